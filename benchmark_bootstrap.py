@@ -0,0 +1,102 @@
+"""
+Benchmark of the batched bootstrap refits.
+
+Simulates a 40x40 paid triangle, fits an over-dispersed Poisson and a gamma
+`glm`, and a ridge and an elastic net `LogLinear` to it, and times
+bootstrapping 10,000 replicates of the reserves of each on one core. The
+batched refits of a few pseudo-triangles are also checked against fitting
+them one at a time (Newton's method to a tight tolerance for the `glm`s,
+and `ElasticNet` for the elastic net).
+
+Run from the root of the repository:
+
+    python benchmark_bootstrap.py
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import ElasticNet
+
+sys.path.append("rocky-app/src")
+
+from rocky.triangle import Triangle
+from rocky.models.GLM import glm
+from rocky.models.LogLinear import LogLinear
+from rocky.model_selection.Bootstrap import Bootstrap, tweedie_newton
+
+MODELS = {
+    "ODP glm": lambda tri: glm(id="glm", model_class="tweedie", tri=tri, alpha=0.1, power=1,
+                               standardize=False),
+    "gamma glm": lambda tri: glm(id="glm", model_class="tweedie", tri=tri, alpha=0.1, power=2,
+                                 standardize=False),
+    "ridge LogLinear": lambda tri: LogLinear(id="loglinear", model_class="loglinear", tri=tri,
+                                             alpha=0.1, l1_ratio=0),
+    "elastic net LogLinear": lambda tri: LogLinear(id="loglinear", model_class="loglinear", tri=tri,
+                                                   alpha=0.01, l1_ratio=0.5),
+}
+
+
+def simulate_triangle(n: int = 40, seed: int = 0) -> Triangle:
+    """
+    Simulates an (n, n) cumulative paid triangle.
+    """
+    rng = np.random.default_rng(seed)
+    dev = np.arange(n)
+    incremental = (rng.lognormal(8, 0.2, (n, 1)) * np.exp(-0.25 * dev) * (dev + 1)
+                   * rng.lognormal(0, 0.15, (n, n)))
+    values = np.cumsum(incremental, axis=1)
+    values[np.add.outer(dev, dev) >= n] = np.nan
+    index = pd.Index(np.arange(2000, 2000 + n), name="accident_period")
+    columns = pd.Index(dev + 1, name="development_period")
+    return Triangle.from_dataframe(df=pd.DataFrame(values, index=index, columns=columns), id="sim")
+
+
+def refit_error(boot: Bootstrap, n: int = 10) -> float:
+    """
+    The largest difference between the batched refit of `n` pseudo-triangles
+    and fitting them one at a time.
+    """
+    a = boot.arrays
+    Y = boot.PseudoData(n, np.random.default_rng(0))
+    coef = boot._Refit(Y)
+    if a["family"] == "tweedie":
+        expected = tweedie_newton(a["X"], Y, a["power"], a["penalty"], a["coef"],
+                                  max_iter=200, tol=1e-12)
+    elif a["refit"] == "enet":
+        expected = np.array([ElasticNet(alpha=a["alpha"], l1_ratio=a["l1_ratio"],
+                                        fit_intercept=False, tol=1e-12,
+                                        max_iter=1000000).fit(a["X"], y).coef_
+                             for y in Y])
+    else:
+        expected = coef
+    return np.abs(coef - expected).max()
+
+
+def benchmark(name: str, tri: Triangle, n_replicates: int = 10000) -> dict:
+    model = MODELS[name](tri)
+    model.Fit()
+    boot = Bootstrap(model, n_replicates=n_replicates, random_state=0)
+
+    start = time.perf_counter()
+    boot.Stream()
+    seconds = time.perf_counter() - start
+
+    return {
+        "model": name,
+        "parameters": boot.arrays["X"].shape[1],
+        "replicates": n_replicates,
+        "seconds": seconds,
+        "replicates per second": n_replicates / seconds,
+        "refit max diff": refit_error(boot),
+        "total reserve (mean)": boot.Summary().loc["Total", "mean"],
+    }
+
+
+if __name__ == "__main__":
+    tri = simulate_triangle(40)
+    results = pd.DataFrame([benchmark(name, tri) for name in MODELS]).set_index("model")
+
+    with pd.option_context("display.float_format", "{:,.4g}".format):
+        print(results.T.to_string())
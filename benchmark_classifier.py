@@ -0,0 +1,160 @@
+"""
+Benchmark of batch inference with the LossTriangleClassifier.
+
+Times preprocessing simulated triangles of assorted sizes into a single
+array, and classifying them a batch at a time, with `classify_triangles`.
+Then compares the accuracy and throughput of classifying labelled simulated
+triangles with the classifier alone, with the heuristic of
+`heuristics.detect_cumulative` alone, and with the heuristic and the
+classifier for the ambiguous ones. The model is loaded from the
+`ROCKY_IS_CUM_MODEL` model file if it is set, and is otherwise an untrained
+model with the same architecture (which is just as fast, though its
+classifications are meaningless).
+
+Without torch, only the heuristic is benchmarked.
+
+Run from the root of the repository:
+
+    python benchmark_classifier.py
+"""
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("model")
+
+from heuristics import detect_cumulative, heuristic_is_cum, triangle_statistics
+from preprocessing import INPUT_SHAPE, prep_for_cnn
+
+HAS_TORCH = importlib.util.find_spec("torch") is not None
+
+
+def simulate_triangles(n_triangles: int = 10000, seed: int = 42) -> tuple:
+    """
+    Simulates triangles of 3 to 25 periods, and whether each is cumulative.
+
+    Three fifths are cumulative: paid (monotone), incurred (paid plus case
+    reserves, which are set too high and come down as claims settle, so the
+    triangle rises and then falls back towards the ultimate), and paid with
+    the occasional salvage recovery. Two fifths are incremental: paid
+    (falling from the first period, with the occasional negative), and
+    long-tailed (rising over the first few periods before falling).
+    """
+    rng = np.random.default_rng(seed)
+    triangles, labels = [], []
+    for size in rng.integers(3, 26, n_triangles):
+        dev = np.arange(size)
+        kind = rng.integers(5)
+        scale = rng.lognormal(7, 1, (size, 1))
+        if kind == 0:
+            values = np.cumsum(scale * np.exp(-0.5 * dev) * rng.lognormal(0, 0.3, (size, size)), axis=1)
+        elif kind == 1:
+            paid = 1 - np.exp(-rng.uniform(0.2, 0.6) * (dev + 1))
+            reported = 1 - np.exp(-rng.uniform(1.0, 2.0) * (dev + 1))
+            adequacy = 1 + rng.uniform(-0.1, 0.6, (size, 1)) * np.exp(-rng.uniform(0.1, 0.5) * dev)
+            values = scale * (paid + (reported - paid) * adequacy) * rng.lognormal(0, 0.01, (size, size))
+        elif kind == 2:
+            incremental = scale * np.exp(-0.4 * dev) * rng.lognormal(0, 0.3, (size, size))
+            incremental[:, 1:][rng.random((size, size - 1)) < 0.1] *= -0.3
+            values = np.cumsum(incremental, axis=1)
+        elif kind == 3:
+            values = scale * np.exp(-0.5 * dev) * rng.lognormal(0, 0.3, (size, size))
+            values[rng.random((size, size)) < 0.03] *= -0.2
+        else:
+            values = scale * dev ** 2 * np.exp(-0.6 * dev) * rng.lognormal(0, 0.3, (size, size)) + scale * 0.1
+        values[np.add.outer(dev, dev) >= size] = np.nan
+        triangles.append(values)
+        labels.append(kind < 3)
+    return triangles, np.array(labels)
+
+
+def load_model():
+    import torch
+
+    from LossTriangleClassifier import LossTriangleClassifier
+    from batch_inference import MODEL_FILE_ENV, MODEL_KWARGS, load_classifier
+
+    if os.environ.get(MODEL_FILE_ENV) is not None:
+        return load_classifier()
+    return LossTriangleClassifier(torch.Size([1, *INPUT_SHAPE]), **MODEL_KWARGS).eval()
+
+
+def benchmark(n_triangles: int, batch_size: int = 1024) -> dict:
+    from batch_inference import classify_triangles
+
+    triangles, _ = simulate_triangles(n_triangles)
+    model = load_model()
+
+    start = time.perf_counter()
+    prep_for_cnn(triangles)
+    prepped = time.perf_counter()
+    classify_triangles(triangles, model=model, batch_size=batch_size)
+    done = time.perf_counter()
+
+    return {
+        "triangles": n_triangles,
+        "batch size": batch_size,
+        "preprocess (s)": prepped - start,
+        "preprocess and classify (s)": done - prepped,
+        "triangles per second": n_triangles / (done - prepped),
+    }
+
+
+def benchmark_heuristic(n_triangles: int = 10000, cnn: bool = HAS_TORCH) -> pd.DataFrame:
+    """
+    The accuracy and throughput of classifying labelled simulated triangles
+    with the heuristic alone (on the triangles it decides), and, if `cnn`,
+    with the LossTriangleClassifier alone and with the heuristic and the
+    classifier for the ambiguous triangles.
+    """
+    triangles, labels = simulate_triangles(n_triangles)
+    results = []
+
+    start = time.perf_counter()
+    is_cum = heuristic_is_cum(triangle_statistics(triangles))
+    seconds = time.perf_counter() - start
+    decided = is_cum.notna().to_numpy()
+    results.append({"method": "heuristic only", "seconds": seconds, "classified": decided.mean(),
+                    "accuracy": np.mean(is_cum[decided].to_numpy(bool) == labels[decided])})
+
+    if cnn:
+        from batch_inference import classify_triangles
+
+        model = load_model()
+
+        start = time.perf_counter()
+        result = classify_triangles(triangles, model=model)
+        seconds = time.perf_counter() - start
+        results.append({"method": "cnn only", "seconds": seconds, "classified": 1.0,
+                        "accuracy": np.mean(result["is_cum"].to_numpy() == labels)})
+
+        start = time.perf_counter()
+        hybrid = detect_cumulative(triangles, model=model)
+        seconds = time.perf_counter() - start
+        results.append({"method": "heuristic and cnn", "seconds": seconds, "classified": 1.0,
+                        "accuracy": np.mean(hybrid["is_cum"].to_numpy() == labels)})
+
+    results = pd.DataFrame(results).set_index("method")
+    results["triangles per second"] = n_triangles * results["classified"] / results["seconds"]
+    return results
+
+
+if __name__ == "__main__":
+    with pd.option_context("display.float_format", "{:,.4g}".format):
+        if HAS_TORCH:
+            from batch_inference import MODEL_FILE_ENV
+
+            results = pd.DataFrame([
+                benchmark(1000),
+                benchmark(10000),
+                benchmark(10000, batch_size=256),
+            ])
+            print(results.to_string(index=False))
+            print()
+            if os.environ.get(MODEL_FILE_ENV) is None:
+                print("(untrained model: the accuracy of the cnn is meaningless)")
+        print(benchmark_heuristic())
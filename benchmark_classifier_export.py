@@ -0,0 +1,115 @@
+"""
+Benchmark of the exported LossTriangleClassifier against the eager model.
+
+Saves the model (from the `ROCKY_IS_CUM_MODEL` model file if it is set, and
+otherwise untrained) and exports it as TorchScript and ONNX, in float32 and
+with int8 dynamic quantization of the linear layers. For each, times the
+cold start (importing, loading and classifying a single triangle, in a new
+Python process) and the latency of classifying batches of preprocessed
+triangles, and compares the probabilities with those of the eager model.
+The ONNX files are skipped if onnxruntime is not installed.
+
+Run from the root of the repository:
+
+    python benchmark_classifier_export.py
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.append("model")
+
+from batch_inference import load_classifier, predict_proba
+from benchmark_classifier import load_model, simulate_triangles
+from export import export_classifier
+from preprocessing import prep_for_cnn
+from runtime import load_exported
+
+COLD_START = """
+import sys, time
+start = time.perf_counter()
+sys.path.append("model")
+import numpy as np
+{load}
+run(np.zeros((1, 1, 10, 10), dtype=np.float32))
+print(time.perf_counter() - start)
+"""
+
+EAGER_LOAD = """
+from batch_inference import load_classifier, predict_proba
+model = load_classifier({path!r})
+run = lambda x: predict_proba(x, model)
+"""
+
+EXPORTED_LOAD = """
+from runtime import load_exported
+run = load_exported({path!r})
+"""
+
+
+def cold_start(load: str, path: str, repeat: int = 3) -> float:
+    """
+    The least time to import, load and run the model in a new process.
+    """
+    code = COLD_START.format(load=load.format(path=path))
+    times = [float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+             for _ in range(repeat)]
+    return min(times)
+
+
+def latency(run, x: np.ndarray, repeat: int = 20) -> float:
+    """
+    The median time to run the model on `x`.
+    """
+    run(x)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(x)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def benchmark(batch_sizes: list = [1, 64, 1024]) -> pd.DataFrame:
+    x = prep_for_cnn(simulate_triangles(max(batch_sizes))[0])
+    model = load_model()
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        eager_path = os.path.join(tmp, "eager.torch")
+        torch.save(model.state_dict(), eager_path)
+        eager = load_classifier(eager_path)
+        expected = predict_proba(x, eager)
+
+        runs = [("eager", eager_path, EAGER_LOAD, lambda x: predict_proba(x, eager))]
+        formats = [".pt", ".onnx"] if importlib.util.find_spec("onnxruntime") else [".pt"]
+        for suffix in formats:
+            for quantize in [False, True]:
+                name = ("torchscript" if suffix == ".pt" else "onnx") + (" int8" if quantize else "")
+                path = export_classifier(eager, os.path.join(tmp, name.replace(" ", "_") + suffix), quantize)
+                runs.append((name, path, EXPORTED_LOAD, load_exported(path)))
+
+        for name, path, load, run in runs:
+            result = {
+                "model": name,
+                "file (MB)": os.path.getsize(path) / 2 ** 20,
+                "cold start (ms)": 1000 * cold_start(load, path),
+                "max prob diff": np.abs(run(x) - expected).max(),
+            }
+            for batch_size in batch_sizes:
+                result[f"batch of {batch_size} (ms)"] = 1000 * latency(run, x[:batch_size])
+            results.append(result)
+
+    return pd.DataFrame(results).set_index("model")
+
+
+if __name__ == "__main__":
+    with pd.option_context("display.float_format", "{:,.4g}".format):
+        print(benchmark().T)
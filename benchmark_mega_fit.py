@@ -0,0 +1,73 @@
+"""
+Benchmark of the inference methods of the Mega models.
+
+Fits `HalfMegaModel` to the bundled reported and paid triangles (rpt.csv and
+paid.csv) and `MegaModel` to simulated triangles (the count triangles are
+not bundled) with every method of `fit`, and NUTS initialized from ADVI, and
+compares their run times and the quantiles of the posterior total reserve.
+A method that fails (eg Laplace, when the Hessian at the mode is not positive
+definite) is reported with its error.
+
+Run from the root of the repository:
+
+    python benchmark_mega_fit.py
+"""
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append("rocky-app/src/rocky")
+sys.path.append("rocky-app/src/rocky/_dev")
+
+from triangle import Triangle
+from megamodel import MegaModel
+from HalfMegaModel import HalfMegaModel, MegaData as HalfMegaData
+from benchmark_megamodel import simulate_mega_data
+
+RUNS = [
+    {"method": "advi"},
+    {"method": "fullrank_advi"},
+    {"method": "laplace"},
+    {"method": "nuts"},
+    {"method": "nuts", "initialize": "advi"},
+]
+
+
+def load_bundled_data() -> HalfMegaData:
+    frames = {}
+    for name in ["rpt", "paid"]:
+        df = pd.read_csv(f"{name}.csv", index_col="Acc. Year", parse_dates=["Acc. Year"])
+        df.columns = df.columns.astype(int)
+        frames[name] = Triangle.from_dataframe(df=df, id=name)
+    return HalfMegaData(frames["rpt"], frames["paid"])
+
+
+def benchmark(name: str, model, samples: int = 1000, burnin: int = 1000,
+              quantiles: list = [0.05, 0.5, 0.95]) -> pd.DataFrame:
+    results = []
+    model.chain_ladder_model()
+    for run in RUNS:
+        label = run["method"] + (f" ({run['initialize']} init)" if "initialize" in run else "")
+        start = time.perf_counter()
+        try:
+            model.fit(samples=samples, burnin=burnin, random_seed=42, **run)
+        except ValueError as err:
+            # eg no Laplace approximation, when the optimum is not a mode
+            results.append({"data": name, "method": label, "error": str(err).split(",")[0]})
+            continue
+        seconds = time.perf_counter() - start
+
+        total = model.reserve_quantiles(quantiles).loc["Total"]
+        results.append({"data": name, "method": label, "seconds": seconds, **total.to_dict()})
+    return pd.DataFrame(results).set_index(["data", "method"])
+
+
+if __name__ == "__main__":
+    results = pd.concat([
+        benchmark("bundled (HalfMegaModel)", HalfMegaModel(load_bundled_data())),
+        benchmark("simulated (MegaModel)", MegaModel(simulate_mega_data(10))),
+    ])
+
+    with pd.option_context("display.float_format", "{:,.4g}".format):
+        print(results.to_string())
@@ -0,0 +1,121 @@
+"""
+Benchmark of building the MegaModel graph.
+
+Times building the chain ladder model and compiling and evaluating its first
+gradient, for the original construction (one likelihood per triangle type,
+with the expected values and standard deviations evaluated eagerly while the
+graph is built) and for the vectorized `MegaModel.chain_ladder_model` (one
+likelihood over the stacked, masked triangles). The eagerly evaluated graph
+has constant expected values and standard deviations, so its gradient with
+respect to the ultimates, development parameters and standard deviations is
+0; the number of parameters with a non-zero gradient is reported too.
+
+The count triangles are not bundled with the repository, so the triangles
+are simulated.
+
+Run from the root of the repository:
+
+    python benchmark_megamodel.py
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pymc
+from pymc import Normal
+
+sys.path.append("rocky-app/src/rocky")
+
+from triangle import Triangle
+from megamodel import MegaData, MegaModel, TRIANGLE_TYPES, ULTIMATE_TYPES
+
+
+def simulate_mega_data(n: int = 10, seed: int = 42) -> MegaData:
+    """
+    Simulates (n, n) reported and paid loss and count triangles.
+    """
+    rng = np.random.default_rng(seed)
+    dev = np.arange(n)
+    pattern = 1 - np.exp(-0.5 * (dev + 1))
+
+    counts = rng.poisson(1000, n)[:, None] * pattern * np.exp(0.02 * rng.standard_normal((n, n)))
+    severity = 5000 * np.exp(0.1 * rng.standard_normal(n))[:, None]
+    rpt_count = np.maximum.accumulate(counts, axis=1)
+    paid_count = rpt_count * pattern * np.exp(0.02 * rng.standard_normal((n, n)))
+    rpt_loss = rpt_count * severity * np.exp(0.02 * rng.standard_normal((n, n)))
+    paid_loss = rpt_loss * pattern * np.exp(0.02 * rng.standard_normal((n, n)))
+
+    observed = dev[None, :] <= (n - 1 - dev)[:, None]
+    index = pd.Index(pd.date_range("2000-01-01", periods=n, freq="YS"), name="accident_period")
+    columns = pd.Index(12 * (dev + 1), name="development_period")
+
+    def tri(values, id):
+        df = pd.DataFrame(np.where(observed, values, np.nan), index=index, columns=columns)
+        return Triangle.from_dataframe(df=df, id=id)
+
+    return MegaData(rpt_loss_tri=tri(rpt_loss, "rpt_loss"),
+                    paid_loss_tri=tri(paid_loss, "paid_loss"),
+                    rpt_count_tri=tri(rpt_count, "rpt_count"),
+                    paid_count_tri=tri(paid_count, "paid_count"))
+
+
+def loop_chain_ladder_model(mm: MegaModel) -> pymc.Model:
+    """
+    The chain ladder model as originally built: a likelihood for each of
+    the eight triangle types, with the expected values and the standard
+    deviations of every cell evaluated eagerly.
+    """
+    mask = mm.tri_mask
+    with pymc.Model(coords={"triangle": TRIANGLE_TYPES, "dev": mm.dev}) as model:
+        ult_loss = pymc.LogNormal("latent_ult_loss", mu=0, sigma=1, shape=mm.acc.shape[0])
+        ult_count = pymc.LogNormal("latent_ult_counts", mu=0, sigma=1, shape=mm.acc.shape[0])
+        ult_ave = pymc.LogNormal("latent_ult_ave_loss", mu=0, sigma=1, shape=mm.acc.shape[0])
+        alphas = {"loss": ult_count * ult_ave,
+                  "count": ult_loss / ult_ave,
+                  "ave_loss": ult_loss / ult_count,
+                  "ratio": None}
+        betas = mm.prior_development_distributions(standalone=False)
+        sigmas = mm.prior_sigma_distributions(standalone=False)
+
+        for k, (name, ultimate) in enumerate(zip(TRIANGLE_TYPES, ULTIMATE_TYPES)):
+            alpha = alphas[ultimate]
+            alpha = np.ones(mm.acc.shape[0]) if alpha is None else alpha.eval()
+            E = np.matmul(alpha.reshape(-1, 1), betas[k].eval().reshape(1, -1))
+            sigma = np.array([sigmas[k].eval() for _ in range(mm.acc.shape[0])])
+            cell = mask & np.isfinite(mm.observed[k])
+            Normal(f"loglik_{name}",
+                   mu=E[cell],
+                   sigma=sigma[cell],
+                   observed=mm.observed[k][cell])
+    return model
+
+
+def benchmark(name: str, build, mm: MegaModel) -> dict:
+    start = time.perf_counter()
+    model = build(mm)
+    built = time.perf_counter()
+    dlogp = model.compile_dlogp()
+    point = model.initial_point()
+    gradient = dlogp(point)
+    done = time.perf_counter()
+
+    return {
+        "model": name,
+        "cells": int(mm.obs_mask.sum()),
+        "build (ms)": 1000 * (built - start),
+        "first gradient (ms)": 1000 * (done - built),
+        "parameters": gradient.size,
+        "non-zero gradients": int(np.sum(np.abs(gradient) > 0)),
+    }
+
+
+if __name__ == "__main__":
+    results = []
+    for n in [10, 20]:
+        mm = MegaModel(simulate_mega_data(n))
+        results.append(benchmark(f"original {n}x{n}", loop_chain_ladder_model, mm))
+        results.append(benchmark(f"vectorized {n}x{n}", lambda m: m.chain_ladder_model(), mm))
+
+    with pd.option_context("display.float_format", "{:,.4g}".format):
+        print(pd.DataFrame(results).set_index("model").T.to_string())
@@ -0,0 +1,171 @@
+"""
+Benchmark of the vectorized PaidIncurredChain calculations.
+
+Times building the model (empirical priors) and fitting it (the joint
+posterior, ultimates and MSEP) on the Dahms paid and incurred triangles and
+on a synthetic 60x60 pair simulated from the lognormal PIC model. The a^I
+and A matrices are also built element by element, as in the original
+implementation, to check the vectorized versions against and to compare
+their run times. Finally, a stack of synthetic pairs is fit with
+BatchedPaidIncurredChain and compared with fitting each pair on its own.
+
+Run from the root of the repository:
+
+    python benchmark_pic.py
+"""
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("rocky-app/src/rocky")
+
+from triangle import Triangle
+from paidincurredchain import PaidIncurredChain, BatchedPaidIncurredChain
+
+
+def simulate_pic_triangles(n: int = 60, seed: int = 42) -> tuple:
+    """
+    Simulates an (n, n) pair of paid and incurred triangles from the
+    lognormal PIC model.
+    """
+    rng = np.random.default_rng(seed)
+    dev = np.arange(n)
+    phi = np.append(np.log(1e6), 0.5 * np.exp(-0.2 * dev[1:]))
+    sigma = np.append(0.1, 0.05 * np.exp(-0.05 * dev[1:]))
+    psi = 0.05 * np.exp(-0.15 * dev[:-1])
+    tau = 0.03 * np.exp(-0.05 * dev[:-1])
+
+    xi = phi + sigma * rng.standard_normal((n, n))
+    zeta = psi + tau * rng.standard_normal((n, n - 1))
+
+    # payments develop forwards, and incurred develops backwards from the
+    # ultimate paid
+    logP = np.cumsum(xi, axis=1)
+    tail = np.cumsum(zeta[:, ::-1], axis=1)[:, ::-1]
+    logI = logP[:, -1:] - np.hstack([tail, np.zeros((n, 1))])
+
+    observed = dev[None, :] <= (n - 1 - dev)[:, None]
+    index = pd.Index(np.arange(2000, 2000 + n), name="accident_period")
+    columns = pd.Index(dev + 1, name="development_period")
+    paid = pd.DataFrame(np.where(observed, np.exp(logP), np.nan), index=index, columns=columns)
+    incurred = pd.DataFrame(np.where(observed, np.exp(logI), np.nan), index=index, columns=columns)
+    return paid, incurred
+
+
+def loop_aI_matrix(pic: PaidIncurredChain) -> np.ndarray:
+    """
+    The a^I matrix, one element at a time.
+    """
+    v2 = pic.v2()
+    n_obs = pic.n_observations("incurred")
+    J = pic.J
+    a = np.zeros((J, J))
+    for n in range(J):
+        for m in range(J):
+            a[n, m] = np.sum(1 / v2[:min(n, m) + 1])
+            if (n == J - 1) != (m == J - 1):
+                a[n, m] = -a[n, m]
+            if n == m:
+                if n < J - 1:
+                    a[n, m] += 1 / pic.prior_t2[n] + n_obs[n] / pic.tau2[n]
+                else:
+                    a[n, m] += 1 / np.sum(pic.prior_s2)
+    return a
+
+
+def loop_posterior_precision(pic: PaidIncurredChain) -> np.ndarray:
+    """
+    The A matrix, one element at a time.
+    """
+    v2, w2 = pic.v2(), pic.w2()
+    n_paid = pic.n_observations("paid")
+    n_incurred = pic.n_observations("incurred")
+    J = pic.J
+    A = np.zeros((2 * J - 1, 2 * J - 1))
+    for n in range(2 * J - 1):
+        for m in range(2 * J - 1):
+            # the diagonal incurred-paid ratios at development periods k
+            # that both parameters load on, with their signs
+            total = 0.0
+            for k in range(J - 1):
+                sn = (1 if n > k else 0) if n < J else (-1 if n - J >= k else 0)
+                sm = (1 if m > k else 0) if m < J else (-1 if m - J >= k else 0)
+                total += sn * sm / (v2[k] - w2[k])
+            if n == m:
+                if n < J:
+                    total += 1 / pic.prior_s2[n] + n_paid[n] / pic.sigma2[n]
+                else:
+                    total += 1 / pic.prior_t2[n - J] + n_incurred[n - J] / pic.tau2[n - J]
+            A[n, m] = total
+    return A
+
+
+def benchmark(name: str, paid, incurred, number: int = 5) -> dict:
+    pic = PaidIncurredChain(paid, incurred)
+    pic.Fit()
+
+    build = timeit.timeit(lambda: PaidIncurredChain(paid, incurred), number=number) / number
+    fit = timeit.timeit(pic.Fit, number=number) / number
+    aI = timeit.timeit(pic.aI_matrix, number=number) / number
+    aI_loop = timeit.timeit(lambda: loop_aI_matrix(pic), number=1)
+    A = timeit.timeit(pic.posterior_precision, number=number) / number
+    A_loop = timeit.timeit(lambda: loop_posterior_precision(pic), number=1)
+
+    return {
+        "triangles": name,
+        "size": pic.J,
+        "build (ms)": 1000 * build,
+        "fit (ms)": 1000 * fit,
+        "a^I (ms)": 1000 * aI,
+        "a^I loop (ms)": 1000 * aI_loop,
+        "a^I max diff": np.abs(pic.aI_matrix() - loop_aI_matrix(pic)).max(),
+        "A (ms)": 1000 * A,
+        "A loop (ms)": 1000 * A_loop,
+        "A max diff": np.abs(pic.posterior_precision() - loop_posterior_precision(pic)).max(),
+        "reserve": pic.ultimates["Reserve"].sum(),
+        "prediction error": pic.prediction_error,
+    }
+
+
+def benchmark_batch(n_pairs: int = 50, n: int = 20, number: int = 5) -> dict:
+    pairs = [simulate_pic_triangles(n, seed=seed) for seed in range(n_pairs)]
+    paid = np.stack([p.to_numpy() for p, _ in pairs])
+    incurred = np.stack([i.to_numpy() for _, i in pairs])
+
+    def fit_each():
+        out = []
+        for p, i in pairs:
+            pic = PaidIncurredChain(p, i)
+            pic.Fit()
+            out.append(pic.prediction_error)
+        return np.array(out)
+
+    def fit_batch():
+        pic = BatchedPaidIncurredChain(paid, incurred)
+        pic.Fit()
+        return pic.prediction_error.to_numpy()
+
+    return {
+        "pairs": n_pairs,
+        "size": n,
+        "one at a time (ms)": 1000 * timeit.timeit(fit_each, number=number) / number,
+        "batched (ms)": 1000 * timeit.timeit(fit_batch, number=number) / number,
+        "prediction error max rel diff": np.max(np.abs(fit_batch() / fit_each() - 1)),
+    }
+
+
+if __name__ == "__main__":
+    rpt, paid = Triangle.from_dahms()
+    synthetic_paid, synthetic_incurred = simulate_pic_triangles(60)
+
+    results = pd.DataFrame([
+        benchmark("dahms", paid, rpt),
+        benchmark("synthetic", synthetic_paid, synthetic_incurred),
+    ]).set_index("triangles")
+
+    with pd.option_context("display.float_format", "{:,.4g}".format):
+        print(results.T)
+        print()
+        print(pd.Series(benchmark_batch()))
@@ -1,12 +1,33 @@
+import os
+import glob
+
 import pymc
+import pytensor.tensor as pt
+import arviz as az
+import xarray as xr
 from pymc import Normal, LogNormal, HalfCauchy
 
 from dataclasses import dataclass
 from triangle import Triangle
+from model_selection.sketch import DistributionSketch
+from laplace import FIT_METHODS, laplace_sampler
 from typing import Tuple
 import numpy as np
+import pandas as pd
 from scipy import stats
 
+# the triangle types in the model, in the order they are stacked
+TRIANGLE_TYPES = ["rpt_loss", "paid_loss",
+                  "rpt_count", "paid_count",
+                  "ave_rpt_loss", "ave_paid_loss",
+                  "paid_rpt_ratio", "paid_rpt_count"]
+
+# the ultimate (alpha) each triangle type develops to
+ULTIMATE_TYPES = ["loss", "loss",
+                  "count", "count",
+                  "ave_loss", "ave_loss",
+                  "ratio", "ratio"]
+
 @dataclass
 class MegaData:
   """
@@ -40,6 +61,48 @@ class MegaData:
     self.dev_months = self.development_periods if self.development_periods is not None else None
     self.dev_period = self.development_periods if self.development_periods is not None else None
 
+@dataclass
+class TraceStore:
+  """
+  Posterior draws written to local disk a chunk at a time, one netCDF file
+  per chunk in the directory `path`, so the draws never have to be in memory
+  all at once. The chunks are read back one at a time, and only the
+  variables that are asked for.
+  """
+  path: str = None
+
+  def __post_init__(self):
+    os.makedirs(self.path, exist_ok=True)
+
+  def files(self) -> list:
+    """
+    The chunk files, in the order they were written.
+    """
+    return sorted(glob.glob(os.path.join(self.path, 'chunk_*.nc')))
+
+  def clear(self):
+    """
+    Delete every chunk in the store.
+    """
+    for f in self.files():
+      os.remove(f)
+
+  def append(self, posterior: xr.Dataset):
+    """
+    Write a chunk of draws (a posterior Dataset with chain and draw
+    dimensions) to the store.
+    """
+    posterior.to_netcdf(os.path.join(self.path, f'chunk_{len(self.files()):05d}.nc'))
+
+  def chunks(self, var_names: list = None):
+    """
+    Generate the chunks, one Dataset at a time, with only `var_names` (all
+    the variables if None) loaded into memory.
+    """
+    for f in self.files():
+      with xr.open_dataset(f) as ds:
+        yield (ds if var_names is None else ds[var_names]).load()
+
 class MegaModel:
   def __init__(self,
                data: MegaData,
@@ -75,10 +138,36 @@ class MegaModel:
     # need a triangle mask -- true if the value is not nan
     self.tri_mask = ~np.isnan(self.rpt_loss)
 
+    # all eight triangles stacked in the order of TRIANGLE_TYPES, with a mask
+    # of the cells that are observed (and finite, since the ratio triangles
+    # divide by the counts)
+    self.observed = np.stack([self.rpt_loss,
+                              self.paid_loss,
+                              self.rpt_count,
+                              self.paid_count,
+                              self.ave_rpt_loss.tri.values,
+                              self.ave_paid_loss.tri.values,
+                              self.paid_rpt_loss_ratio.tri.values,
+                              self.paid_rpt_count_ratio.tri.values]).astype(float)
+    self.obs_mask = self.tri_mask[None, :, :] & np.isfinite(self.observed)
+
+    # (triangle type, accident period, development period) index of every
+    # observed cell, so the likelihood only touches the observed cells
+    self.obs_idx = np.nonzero(self.obs_mask)
+
+    # the model is built once and reused, and its log density and gradient
+    # are compiled on first use
+    self.model = None
+    self._compiled = None
+
     # MCMC parameters
     self.burnin = burnin
     self.samples = samples
     self.chains = chains
+
+    # posterior draws, in memory or on disk (see `fit`)
+    self.trace = None
+    self.trace_store = None
     
     # Prior ultimate estimates
     self.loss_ult_prior = np.multiply(self.rpt_loss_tri.diag().values,
@@ -147,34 +236,34 @@ class MegaModel:
     if standalone:
       alpha_loss = pymc.LogNormal.dist(mu=m_l,
                                        sigma=s_l,
-                                       shape=self.rpt_loss_tri.shape[0])
+                                       shape=self.acc.shape[0])
       alpha_count = pymc.LogNormal.dist(mu=m_c,
                                        sigma=s_c,
-                                       shape=self.rpt_count_tri.shape[0])
+                                       shape=self.acc.shape[0])
       alpha_ave_loss = pymc.LogNormal.dist(mu=m_ave,
                                       sigma=s_ave,
-                                      shape=self.ave_rpt_loss.shape[0])
+                                      shape=self.acc.shape[0])
     else:
-      _ult_loss = pymc.LogNormal.dist('latent_ult_loss',
-                                      mu=m_l,
-                                      sigma=s_l,
-                                      shape=(self.rpt_loss_tri.shape[0],1))
-      _ult_count = pymc.LogNormal.dist('latent_ult_counts',
-                                       mu=m_c,
-                                       sigma=s_c,
-                                       shape=(self.rpt_count_tri.shape[0], 1))
-      _ult_ave = pymc.LogNormal.dist('latent_ult_ave_loss',
-                                     mu=m_ave,
-                                     sigma=s_ave,
-                                     shape=(self.ave_rpt_loss.shape[0], 1))
+      _ult_loss = pymc.LogNormal('latent_ult_loss',
+                                 mu=m_l,
+                                 sigma=s_l,
+                                 dims='acc')
+      _ult_count = pymc.LogNormal('latent_ult_counts',
+                                  mu=m_c,
+                                  sigma=s_c,
+                                  dims='acc')
+      _ult_ave = pymc.LogNormal('latent_ult_ave_loss',
+                                mu=m_ave,
+                                sigma=s_ave,
+                                dims='acc')
 
       # deterministic functions for the prior estimates of ultimates
       # it doesn't make sense to do this like this, but it mirrors the method in
       # the MegaModel class
-      alpha_loss = pymc.Deterministic('alpha_loss', _ult_count * _ult_ave)
-      alpha_count = pymc.Deterministic('alpha_count', _ult_loss / _ult_ave)
+      alpha_loss = pymc.Deterministic('alpha_loss', _ult_count * _ult_ave, dims='acc')
+      alpha_count = pymc.Deterministic('alpha_count', _ult_loss / _ult_ave, dims='acc')
       alpha_ave_loss = pymc.Deterministic(
-          'alpha_ave_loss', _ult_loss / _ult_count)
+          'alpha_ave_loss', _ult_loss / _ult_count, dims='acc')
     
     return alpha_loss, alpha_count, alpha_ave_loss
 
@@ -207,79 +296,23 @@ class MegaModel:
     DEPRECIATED standalone: bool
       If True, then the development parameters are defined as a standalone
       variable (eg does not need to be passed inside a pymc.Model). If False,
-      then the development parameters are defined as variables inside a pymc.Model,
-      and thus cannot be used outside of a block.
+      then the development parameters are defined as variables inside a pymc.Model
+      with 'triangle' and 'dev' coords, and thus cannot be used outside of a block.
 
     Returns
     -------
     beta: pymc.Normal
-      The development parameters.
+      The development parameters: if standalone, a tuple of one distribution
+      per triangle type (in the order of TRIANGLE_TYPES), and otherwise a
+      single (triangle, dev) model variable, one row per triangle type.
     """
 
     # prior distributions for development
-    if standalone:
-      beta_rpt_loss = pymc.Normal.dist(mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-      beta_paid_loss = pymc.Normal.dist(mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-      beta_rpt_count = pymc.Normal.dist(mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-      beta_paid_count = pymc.Normal.dist(mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-      beta_ave_rpt_loss = pymc.Normal.dist(mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-      beta_ave_paid_loss = pymc.Normal.dist(mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-      beta_paid_rpt_ratio = pymc.Normal.dist(mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-      beta_paid_rpt_count = pymc.Normal.dist(mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-    else:
-      beta_rpt_loss = pymc.Normal('beta_rpt_loss',
-                                  mu=mu,
-                                  sigma=sigma,
-                                  size=self.dev.shape[0])
-      beta_paid_loss = pymc.Normal('beta_paid_loss',
-                                   mu=mu,
-                                   sigma=sigma,
-                                   size=self.dev.shape[0])
-      beta_rpt_count = pymc.Normal('beta_rpt_count',
-                                   mu=mu,
-                                   sigma=sigma,
-                                   size=self.dev.shape[0])
-      beta_paid_count = pymc.Normal('beta_paid_count',
-                                    mu=mu,
-                                    sigma=sigma,
-                                    size=self.dev.shape[0])
-      beta_ave_rpt_loss = pymc.Normal('beta_ave_rpt_loss',
-                                      mu=mu,
-                                      sigma=sigma,
-                                      size=self.dev.shape[0])
-      beta_ave_paid_loss = pymc.Normal('beta_ave_paid_loss',
-                                       mu=mu,
-                                       sigma=sigma,
-                                       size=self.dev.shape[0])
-      beta_paid_rpt_ratio = pymc.Normal('beta_paid_rpt_ratio',
-                                        mu=mu,
-                                        sigma=sigma,
-                                        size=self.dev.shape[0])
-      beta_paid_rpt_count = pymc.Normal('beta_paid_rpt_count',
-                                        mu=mu,
-                                        sigma=sigma,
-                                        size=self.dev.shape[0])
-
-    return (beta_rpt_loss, beta_paid_loss,
-            beta_rpt_count, beta_paid_count,
-            beta_ave_rpt_loss, beta_ave_paid_loss,
-            beta_paid_rpt_ratio, beta_paid_rpt_count)
+    if not standalone:
+      return Normal(name, mu=mu, sigma=sigma, dims=('triangle', 'dev'))
+
+    return tuple(pymc.Normal.dist(mu=mu, sigma=sigma, size=self.dev.shape[0])
+                 for _ in TRIANGLE_TYPES)
 
   def prior_sigma_distributions(self
                                 , name: str = 'sigma'
@@ -291,55 +324,17 @@ class MegaModel:
     alpha parameters. The prior distributions half Cauchy distributions with a
     scale parameter of 2.5. The standard deviations vary by the type of triangle
     and the development period.
+
+    As with `prior_development_distributions`, returns a tuple of one
+    distribution per triangle type if standalone, and otherwise a single
+    (triangle, dev) model variable.
     """
     # variance of each of the triangles
-    if standalone:
-      sigma_rpt_loss = HalfCauchy.dist(beta=beta,
-                                       size=self.dev.shape[0])
-      sigma_paid_loss = HalfCauchy.dist(beta=beta,
-                                        size=self.dev.shape[0])
-      sigma_rpt_count = HalfCauchy.dist(beta=beta,
-                                        size=self.dev.shape[0])
-      sigma_paid_count = HalfCauchy.dist(beta=beta,
-                                         size=self.dev.shape[0])
-      sigma_ave_rpt_loss = HalfCauchy.dist(beta=beta,
-                                           size=self.dev.shape[0])
-      sigma_ave_paid_loss = HalfCauchy.dist(beta=beta,
-                                            size=self.dev.shape[0])
-      sigma_paid_rpt_loss = HalfCauchy.dist(beta=beta,
-                                            size=self.dev.shape[0])
-      sigma_paid_rpt_count = HalfCauchy.dist(beta=beta,
-                                             size=self.dev.shape[0])
-    else:
-      sigma_rpt_loss = HalfCauchy('sigma_rpt_loss',
-                                  beta=beta,
-                                  size=self.dev.shape[0])
-      sigma_paid_loss = HalfCauchy('sigma_paid_loss',
-                                   beta=beta,
-                                   size=self.dev.shape[0])
-      sigma_rpt_count = HalfCauchy('sigma_rpt_count',
-                                   beta=beta,
-                                   size=self.dev.shape[0])
-      sigma_paid_count = HalfCauchy('sigma_paid_count',
-                                    beta=beta,
-                                    size=self.dev.shape[0])
-      sigma_ave_rpt_loss = HalfCauchy('sigma_ave_rpt_loss',
-                                      beta=beta,
-                                      size=self.dev.shape[0])
-      sigma_ave_paid_loss = HalfCauchy('sigma_ave_paid_loss',
-                                       beta=beta,
-                                       size=self.dev.shape[0])
-      sigma_paid_rpt_loss = HalfCauchy('sigma_paid_rpt_loss',
-                                       beta=beta,
-                                       size=self.dev.shape[0])
-      sigma_paid_rpt_count = HalfCauchy('sigma_paid_rpt_count',
-                                        beta=beta,
-                                        size=self.dev.shape[0])
-      
-    return (sigma_rpt_loss, sigma_paid_loss,
-            sigma_rpt_count, sigma_paid_count,
-            sigma_ave_rpt_loss, sigma_ave_paid_loss,
-            sigma_paid_rpt_loss, sigma_paid_rpt_count)
+    if not standalone:
+      return HalfCauchy(name, beta=beta, dims=('triangle', 'dev'))
+
+    return tuple(HalfCauchy.dist(beta=beta, size=self.dev.shape[0])
+                 for _ in TRIANGLE_TYPES)
 
   def _E(self
        , alpha = None 
@@ -391,79 +386,134 @@ class MegaModel:
     
 
 
-  def chain_ladder_model(self):
-    with pymc.Model() as model:
+  def chain_ladder_model(self,
+                         beta_mu: float = 0,
+                         beta_sigma: float = 5,
+                         sigma_beta: float = 2.5):
+    """
+    Build the model. The eight triangle types are stacked along a leading
+    `triangle` dimension (in the order of TRIANGLE_TYPES), so the development
+    parameters and standard deviations are each a single (triangle, dev)
+    variable, and there is one likelihood over every observed cell:
+
+      y[k, i, j] ~ Normal(alpha[k, i] * beta[k, j], sigma[k, j])
+
+    where alpha[k] is the ultimate of triangle type k (1 for the two ratio
+    triangles). The expected values and standard deviations are gathered
+    for the observed cells only, so the graph is the same size whatever the
+    shape of the triangles, and nothing is evaluated while it is built.
+
+    The priors on beta and sigma are the (triangle, dev) variables of
+    `prior_development_distributions` and `prior_sigma_distributions`.
+    The model is stored as `self.model` and reused by `fit`.
+    """
+    coords = {'triangle': TRIANGLE_TYPES,
+              'acc': self.acc,
+              'dev': self.dev,
+              'cell': np.arange(self.obs_idx[0].shape[0])}
+    k, i, j = self.obs_idx
+
+    with pymc.Model(coords=coords) as model:
       # prior distributions for the ultimate parameters
       alpha_loss, alpha_count, alpha_ave_loss = self.prior_ultimate_distributions(
           standalone=False)
-      
-      # prior distributions for the development parameters
-      (beta_rpt_loss, beta_paid_loss,
-       beta_rpt_count, beta_paid_count,
-       beta_ave_rpt_loss, beta_ave_paid_loss,
-       beta_paid_rpt_ratio, beta_paid_rpt_count) = self.prior_development_distributions(standalone=False)
-
-      # prior distributions for the standard deviations
-      (sigma_rpt_loss, sigma_paid_loss,
-       sigma_rpt_count, sigma_paid_count,
-       sigma_ave_rpt_loss, sigma_ave_paid_loss,
-       sigma_paid_rpt_loss, sigma_paid_rpt_count) = self.prior_sigma_distributions(standalone=False)
-
-      # expected values for the triangles
-      E_rpt_loss = self._E(alpha_loss, beta_rpt_loss)
-      E_paid_loss = self._E(alpha_loss, beta_paid_loss)
-      E_rpt_count = self._E(alpha_count, beta_rpt_count)
-      E_paid_count = self._E(alpha_count, beta_paid_count)
-      E_ave_rpt_loss = self._E(alpha_ave_loss, beta_ave_rpt_loss)
-      E_ave_paid_loss = self._E(alpha_ave_loss, beta_ave_paid_loss)
-      E_paid_rpt_loss = self._E(1, beta_paid_rpt_ratio)
-      E_paid_rpt_count = self._E(1, beta_paid_rpt_count)
-      
-      # likelihood functions
-      loglik_rpt_loss = pymc.Normal('loglik_rpt_loss',
-                                    mu=E_rpt_loss[self.tri_mask],
-                                    sigma=np.array([sigma_rpt_loss.eval() for _ in range(self.acc.shape)])[self.tri_mask],
-                                    observed=self.rpt_loss[self.tri_mask])
-      loglik_paid_loss = pymc.Normal('loglik_paid_loss',
-                                    mu=E_paid_loss[self.tri_mask],
-                                    sigma=np.array([sigma_paid_loss.eval() for _ in range(self.acc.shape)])[
-                                        self.tri_mask],
-                                    observed=self.paid_loss[self.tri_mask])
-      loglik_rpt_count = pymc.Normal('loglik_rpt_count',
-                                     mu=E_rpt_count[self.tri_mask],
-                                     sigma=np.array([sigma_rpt_count.eval() for _ in range(self.acc.shape)])[
-                                         self.tri_mask],
-                                     observed=self.rpt_count[self.tri_mask])
-      loglik_paid_count = pymc.Normal('loglik_paid_count',
-                                     mu=E_paid_count[self.tri_mask],
-                                     sigma=np.array([sigma_paid_count.eval() for _ in range(self.acc.shape)])[
-                                         self.tri_mask],
-                                     observed=self.paid_count[self.tri_mask])
-      loglik_ave_rpt_loss = pymc.Normal('loglik_ave_rpt_loss',
-                                        mu=E_ave_rpt_loss[self.tri_mask],
-                                        sigma=np.array([sigma_ave_rpt_loss.eval() for _ in range(self.acc.shape)])[
-                                        self.tri_mask],
-                                        observed=self.ave_rpt_loss[self.tri_mask])
-      loglik_ave_paid_loss = pymc.Normal('loglik_ave_paid_loss',
-                                        mu=E_ave_paid_loss[self.tri_mask],
-                                        sigma=np.array([sigma_ave_paid_loss.eval() for _ in range(self.acc.shape)])[
-                                            self.tri_mask],
-                                        observed=self.ave_paid_loss[self.tri_mask])
-      loglik_paid_rpt_loss = pymc.Normal('loglik_paid_rpt_loss',
-                                         mu=E_paid_rpt_loss[self.tri_mask],
-                                         sigma=np.array([sigma_paid_rpt_loss.eval() for _ in range(self.acc.shape)])[
-                                             self.tri_mask],
-                                         observed=self.paid_rpt_loss_ratio[self.tri_mask])
-      loglik_paid_rpt_count = pymc.Normal('loglik_paid_rpt_count',
-                                          mu=E_paid_rpt_count[self.tri_mask],
-                                         sigma=np.array([sigma_paid_rpt_count.eval() for _ in range(self.acc.shape)])[
-                                             self.tri_mask],
-                                         observed=self.paid_rpt_count_ratio[self.tri_mask])
+      ultimates = {'loss': alpha_loss,
+                   'count': alpha_count,
+                   'ave_loss': alpha_ave_loss,
+                   'ratio': pt.ones(self.acc.shape[0])}
+      alpha = pt.stack([ultimates[u] for u in ULTIMATE_TYPES])
+
+      # prior distributions for the development parameters and the
+      # standard deviations, one row per triangle type
+      beta = self.prior_development_distributions(mu=beta_mu, sigma=beta_sigma, standalone=False)
+      sigma = self.prior_sigma_distributions(beta=sigma_beta, standalone=False)
+
+      # likelihood of every observed cell of every triangle
+      observed = pymc.MutableData('observed', self.observed[self.obs_idx], dims='cell')
+      Normal('loglik',
+             mu=alpha[k, i] * beta[k, j],
+             sigma=sigma[k, j],
+             observed=observed,
+             dims='cell')
 
     self.model = model
+    self._compiled = None
     return model
-  
-  def fit(self, samples=None, burnin=None, chains=None):
+
+  def compile(self):
+    """
+    Compile the log density of the model and its gradient, once. Returns a
+    dict with the `logp` and `dlogp` functions of a point (a dict of the
+    values of the free variables, eg `self.model.initial_point()`).
+    """
+    if self.model is None:
+      self.chain_ladder_model()
+    if self._compiled is None:
+      self._compiled = {'logp': self.model.compile_logp(),
+                        'dlogp': self.model.compile_dlogp()}
+    return self._compiled
+
+  def fit(self,
+          method: str = 'nuts',
+          samples: int = None,
+          burnin: int = None,
+          chains: int = None,
+          n_iter: int = 20000,
+          initialize: str = None,
+          random_seed: int = None,
+          trace_path: str = None,
+          chunk_size: int = 1000):
+    """
+    Fit the model, and store the posterior draws in `self.trace`, or on disk
+    in `self.trace_store` (see `trace_path`).
+
+    Parameters
+    ----------
+    method: str
+      One of FIT_METHODS:
+        'nuts' - `pymc.sample`, `chains` chains of `burnin` tuning and
+                 `samples` draws each. Exact, but slow.
+        'advi' - mean-field automatic differentiation variational
+                 inference, `n_iter` iterations.
+        'fullrank_advi' - ADVI with a full covariance matrix, which keeps
+                 the correlations between the parameters.
+        'laplace' - a normal approximation around the maximum a posteriori
+                 estimate, on the unconstrained scale, with the inverse of
+                 the Hessian of the negative log density as its covariance.
+      The approximations return `samples` draws in seconds.
+    initialize: str
+      For 'nuts' only: one of the fast methods ('advi', 'fullrank_advi' or
+      'laplace'), whose posterior mean is used as the starting point of
+      every chain. Default is None, for pymc's own initialization.
+    random_seed: int
+      The random seed.
+    trace_path: str
+      A local directory to write the posterior draws to, a chunk at a time
+      (see `TraceStore`), instead of keeping them in memory as `self.trace`.
+      The approximations write `chunk_size` draws at a time, so only one
+      chunk is ever in memory. NUTS cannot be stopped and resumed between
+      chunks, so it runs each chain to the end with `pymc.sample` (a whole
+      chain of draws in memory) and writes it before starting the next:
+      the chains run one after the other on one core, so with the default
+      4 chains NUTS takes about 4 times as long as without `trace_path` on
+      a machine with a core for each chain.
+      Default is None, to keep the draws in memory.
+    chunk_size: int
+      The number of draws in each chunk written to `trace_path`. The
+      approximations draw a chunk at a time in memory too, so with the same
+      `random_seed` and `chunk_size` they give the same draws with or
+      without `trace_path`.
+
+    Returns
+    -------
+    az.InferenceData or TraceStore
+      The posterior draws.
+    """
+    if method not in FIT_METHODS:
+      raise ValueError(f"method must be one of {FIT_METHODS}.")
+    if initialize is not None and (method != 'nuts' or initialize not in FIT_METHODS[1:]):
+      raise ValueError(f"initialize is only used with method='nuts', and must be one of {FIT_METHODS[1:]}.")
+
     if samples is None:
       samples = self.samples
     if burnin is None:
@@ -475,11 +525,138 @@ class MegaModel:
       mod = self.chain_ladder_model()
     else:
       mod = self.model
+
     with mod:
-    # with self.chain_ladder_model():
-    # inference
-      self.trace = pymc.sample(draws=samples,
-                               tune=burnin,
-                               chains=chains,
-                               cores=None)
+      initvals = None
+      if initialize is not None:
+        self.fit(method=initialize, samples=samples, n_iter=n_iter, random_seed=random_seed)
+        initvals = self._posterior_mean_point()
+
+      self.trace, self.trace_store = None, None
+      if trace_path is not None:
+        store = TraceStore(trace_path)
+        store.clear()
+        for chunk in self._posterior_chunks(method, samples, burnin, chains, n_iter,
+                                            initvals, random_seed, chunk_size):
+          store.append(chunk)
+        self.trace_store = store
+      elif method != 'nuts':
+        # the same chunks as with `trace_path`, so a seed gives the same
+        # draws whether they are kept in memory or on disk
+        chunks = self._posterior_chunks(method, samples, burnin, chains, n_iter,
+                                        initvals, random_seed, chunk_size)
+        self.trace = az.InferenceData(posterior=xr.concat(list(chunks), dim='draw'))
+      else:
+        self.trace = pymc.sample(draws=samples,
+                                 tune=burnin,
+                                 chains=chains,
+                                 cores=None,
+                                 initvals=initvals,
+                                 random_seed=random_seed)
+    self.fit_method = method
+    return self.trace if self.trace_store is None else self.trace_store
+
+  def _posterior_chunks(self, method, samples, burnin, chains, n_iter,
+                        initvals, random_seed, chunk_size):
+    """
+    Generate the posterior draws of `fit` a chunk at a time, as posterior
+    Datasets with unique chain and draw coordinates. For NUTS each chunk is
+    a whole chain, sampled in memory, and the chains are sampled one after
+    the other.
+    """
+    rng = np.random.default_rng(random_seed)
+    if method == 'nuts':
+      for chain in range(chains):
+        trace = pymc.sample(draws=samples,
+                            tune=burnin,
+                            chains=1,
+                            cores=1,
+                            initvals=initvals,
+                            random_seed=int(rng.integers(2**31)),
+                            progressbar=False)
+        yield trace.posterior.assign_coords(chain=[chain])
+      return
+
+    if method == 'laplace':
+      draw = laplace_sampler(random_seed=random_seed)
+    else:
+      self.approx = pymc.fit(n=n_iter, method=method, random_seed=random_seed)
+      draw = lambda n: self.approx.sample(n, random_seed=int(rng.integers(2**31))).posterior
+    for start in range(0, samples, chunk_size):
+      n = min(chunk_size, samples - start)
+      yield draw(n).assign_coords(draw=np.arange(start, start + n))
+
+  def _posterior_mean_point(self) -> dict:
+    """
+    The posterior mean of every free variable in `self.trace`, as starting
+    values for `pymc.sample`.
+    """
+    posterior = self.trace.posterior
+    return {v.name: posterior[v.name].mean(dim=('chain', 'draw')).values
+            for v in self.model.free_RVs}
 
+  def _ultimate_chunks(self):
+    """
+    Generate the posterior draws of the ultimate loss of each accident
+    period (`alpha_loss`), a (draws, accident periods) array at a time: the
+    whole trace if it is in memory, or one chunk of `self.trace_store` at a
+    time, reading only `alpha_loss`.
+    """
+    if self.trace is not None:
+      chunks = [self.trace.posterior[['alpha_loss']]]
+    elif self.trace_store is not None:
+      chunks = self.trace_store.chunks(['alpha_loss'])
+    else:
+      raise ValueError("The model has not been fit yet. Run `fit` first.")
+
+    for chunk in chunks:
+      alpha = chunk['alpha_loss'].values
+      yield alpha.reshape(alpha.shape[0] * alpha.shape[1], -1)
+
+  def ultimate_samples(self) -> np.ndarray:
+    """
+    The posterior draws of the ultimate loss of each accident period
+    (`alpha_loss`), as a (draws, accident periods) array.
+
+    This loads every draw into memory. `ultimate_quantiles` and
+    `reserve_quantiles` read the chunks one at a time instead.
+    """
+    return np.concatenate(list(self._ultimate_chunks()))
+
+  def _sketch(self, offset: np.ndarray = 0.0) -> DistributionSketch:
+    """
+    A `DistributionSketch` of the posterior ultimate loss of each accident
+    period, less `offset`, and of their total, built one chunk of draws at
+    a time, so memory is bounded by the chunk size however many draws
+    there are.
+    """
+    sketch = DistributionSketch(list(self.acc) + ['Total'])
+    for alpha in self._ultimate_chunks():
+      draws = alpha - offset
+      sketch.Update(np.column_stack([draws, draws.sum(axis=1)]))
+    return sketch
+
+  @staticmethod
+  def _quantiles(sketch: DistributionSketch, quantiles: list) -> pd.DataFrame:
+    """
+    Mean and quantiles of each column of the sketch, one row per column.
+    The mean is exact, and the quantiles are estimated by the t-digests.
+    """
+    out = sketch.Quantile(quantiles).T
+    out.insert(0, 'mean', sketch.Mean())
+    return out
+
+  def ultimate_quantiles(self, quantiles: list = [0.05, 0.5, 0.95]) -> pd.DataFrame:
+    """
+    Quantiles and mean of the posterior ultimate loss of each accident
+    period and the total.
+    """
+    return self._quantiles(self._sketch(), quantiles)
+
+  def reserve_quantiles(self, quantiles: list = [0.05, 0.5, 0.95]) -> pd.DataFrame:
+    """
+    Quantiles and mean of the posterior reserve (ultimate loss less the
+    latest paid loss) of each accident period and the total.
+    """
+    paid = self.paid_loss_tri.diag().values
+    return self._quantiles(self._sketch(paid), quantiles)
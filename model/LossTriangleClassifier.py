@@ -8,6 +8,7 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from torch.nn.utils.fusion import fuse_conv_bn_eval
 from typing import Any
 
 class LossTriangleClassifier(nn.Module):
@@ -146,14 +147,17 @@ class LossTriangleClassifier(nn.Module):
             function that takes a tensor as input and returns a tensor as
             output. The default value is None, which will use leaky ReLU
             activation functions with a negative slope of `relu_neg_slope`.
+
+            Pass an `nn.Module` (eg `nn.ELU()`) rather than a plain function
+            if the network is to be exported (see `as_sequential`).
         output_activation: function
             The activation function to use in the output layer. This should be
             a function that takes a tensor as input and returns a tensor as
             output.
             
-            The default value is a lambda function that applies softmax to the
-            output of the network. This is used to convert the output of the
-            network into a probability distribution over the classes.
+            The default value is None, which applies softmax to the output of
+            the network. This is used to convert the output of the network
+            into a probability distribution over the classes.
     """
     def __init__(self,
                  input_shape : tuple
@@ -167,19 +171,24 @@ class LossTriangleClassifier(nn.Module):
                  , linear_dropout : list = [0.4, 0.2]
                  , relu_neg_slope : float = 0.1
                  , activation : Any = None
-                 , output_activation : Any = lambda x: F.softmax(x, dim=1)
+                 , output_activation : Any = None
                  ):
         # Call the parent class's constructor
         super(LossTriangleClassifier, self).__init__()
 
-        # set the activation function depending on the input parameters
+        # set the activation function depending on the input parameters -
+        # the defaults are modules (with no parameters, so saved models load
+        # as before) rather than lambdas, so the network can be scripted
         if activation is None:
-            self.activation = lambda x: F.leaky_relu(x, relu_neg_slope)
+            self.activation = nn.LeakyReLU(relu_neg_slope)
         else:
             self.activation = activation
 
         # set the output activation function
-        self.output_activation = output_activation
+        if output_activation is None:
+            self.output_activation = nn.Softmax(dim=1)
+        else:
+            self.output_activation = output_activation
 
         # initialize the module lists that will hold the layers
         self.convolution_layers = nn.ModuleList()
@@ -274,6 +283,42 @@ class LossTriangleClassifier(nn.Module):
         # apply the output activation function to the output of the network
         return self.output_activation(x)
 
+    def as_sequential(self
+                      , fuse : bool = True
+                      ) -> nn.Sequential:
+        """
+        The network as a single `nn.Sequential` of its layers, which (unlike
+        `forward`, with its loops over the zipped module lists) can be
+        scripted, traced, exported to ONNX and quantized. The layers are
+        shared with the network, not copied.
+
+        If `fuse` is True and the network is in evaluation mode, each batch
+        normalization layer is folded into the convolutional layer before it
+        (a copy of it), which gives the same output with fewer operations.
+        """
+        if not isinstance(self.activation, nn.Module) or not isinstance(self.output_activation, nn.Module):
+            raise ValueError("The activation functions must be nn.Modules to build a sequential network.")
+
+        # convolution, batch normalization, activation and pooling
+        layers = []
+        for c, b, p in zip(self.convolution_layers
+                           , self.batch_normalization_layers
+                           , self.pooling_layers):
+            if fuse and not self.training:
+                layers.append(fuse_conv_bn_eval(c, b))
+            else:
+                layers += [c, b]
+            layers += [self.activation, p]
+
+        # flatten, then linear, activation and dropout
+        layers.append(self.flatten)
+        for l, d in zip(self.linear_layers
+                        , self.linear_dropout_layers):
+            layers += [l, self.activation, d]
+
+        layers.append(self.output_activation)
+        return nn.Sequential(*layers)
+
     def _get_flattened_size(self
                             , input_shape : tuple
                             ) -> int:
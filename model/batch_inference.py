@@ -0,0 +1,116 @@
+"""
+Batch inference with the LossTriangleClassifier: whether each of many loss
+triangles is cumulative or incremental.
+
+The triangles are preprocessed together into a single (n, 1, 10, 10) array
+(see `preprocessing.prep_for_cnn`): the latest 10 accident periods and first
+10 development periods of each triangle, smaller triangles padded, the cells
+outside the upper-left triangle dropped, each development period
+standardized, and the missing cells set to 0. The model is loaded
+once per model file and reused, and runs on the CPU without gradients, a
+batch at a time. Class 1 is cumulative.
+
+The saved model file is passed in, or read from the `ROCKY_IS_CUM_MODEL`
+environment variable.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import torch
+
+try:
+    from .LossTriangleClassifier import LossTriangleClassifier
+    from .preprocessing import INPUT_SHAPE, prep_for_cnn, record_classifications
+except ImportError:
+    from LossTriangleClassifier import LossTriangleClassifier
+    from preprocessing import INPUT_SHAPE, prep_for_cnn, record_classifications
+
+# architecture of the saved model
+MODEL_KWARGS = dict(num_classes=2,
+                    num_conv_layers=5,
+                    base_conv_nodes=256,
+                    kernel_size=(2, 2),
+                    stride=(1, 1),
+                    padding=(1, 1),
+                    linear_nodes=[1024, 512, 256, 128],
+                    linear_dropout=[0.4, 0.3, 0.2, 0.1],
+                    relu_neg_slope=0.1)
+
+# environment variable with the path of the saved model
+MODEL_FILE_ENV = "ROCKY_IS_CUM_MODEL"
+
+# loaded models, by model file
+_MODELS = {}
+
+
+def load_classifier(model_file: str = None) -> LossTriangleClassifier:
+    """
+    The LossTriangleClassifier saved in `model_file`, on the CPU and in
+    evaluation mode. Each model file is only loaded once.
+    """
+    if model_file is None:
+        model_file = os.environ.get(MODEL_FILE_ENV)
+    if model_file is None:
+        raise ValueError(f"No model file given, and {MODEL_FILE_ENV} is not set.")
+
+    model_file = os.path.abspath(model_file)
+    if model_file not in _MODELS:
+        model = LossTriangleClassifier(torch.Size([1, *INPUT_SHAPE]), **MODEL_KWARGS)
+        model.load_state_dict(torch.load(model_file, map_location=torch.device("cpu")))
+        model.to(torch.device("cpu"))
+        model.eval()
+        _MODELS[model_file] = model
+    return _MODELS[model_file]
+
+
+def predict_proba(x: np.ndarray,
+                  model: LossTriangleClassifier,
+                  batch_size: int = 1024) -> np.ndarray:
+    """
+    The probability that each preprocessed triangle is cumulative.
+    """
+    model.eval()
+    out = np.empty(len(x))
+    with torch.inference_mode():
+        for start in range(0, len(x), batch_size):
+            batch = torch.from_numpy(x[start:start + batch_size])
+            out[start:start + len(batch)] = model(batch)[:, 1].numpy()
+    return out
+
+
+def classify_triangles(triangles: list,
+                       model: LossTriangleClassifier = None,
+                       model_file: str = None,
+                       batch_size: int = 1024,
+                       threshold: float = 0.5) -> pd.DataFrame:
+    """
+    Classifies each triangle as cumulative or incremental, and writes the
+    result to the `is_cum_model` attribute of each Triangle (True if it is
+    cumulative), with `has_cum_model_file` set.
+
+    Parameters
+    ----------
+    triangles : list
+        Triangles (or data frames or 2-d arrays, which are classified but not
+        written to).
+    model : LossTriangleClassifier, default=None
+        The model. If None, it is loaded from `model_file`.
+    model_file : str, default=None
+        The saved model (see `load_classifier`).
+    batch_size : int, default=1024
+        The number of triangles run through the model at once.
+    threshold : float, default=0.5
+        The probability above which a triangle is cumulative.
+
+    Returns
+    -------
+    pd.DataFrame
+        The id, the probability of being cumulative and the classification
+        of each triangle.
+    """
+    if model is None:
+        model = load_classifier(model_file)
+
+    proba = predict_proba(prep_for_cnn(triangles), model, batch_size)
+    return record_classifications(triangles, proba, threshold)
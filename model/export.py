@@ -0,0 +1,91 @@
+"""
+Export of a trained LossTriangleClassifier for inference, as a TorchScript
+or an ONNX file, with int8 dynamic quantization of its linear layers (which
+hold most of its weights). The exported file is run with `runtime`, without
+the LossTriangleClassifier class.
+
+The network is exported as `LossTriangleClassifier.as_sequential`, in
+evaluation mode with the batch normalization folded into the convolutions.
+TorchScript files are quantized with torch; ONNX files are exported in
+float32 and quantized with onnxruntime, which is needed for quantized ONNX
+files only.
+"""
+import inspect
+import os
+import tempfile
+
+import torch
+import torch.nn as nn
+
+try:
+    from .LossTriangleClassifier import LossTriangleClassifier
+    from .preprocessing import INPUT_SHAPE
+except ImportError:
+    from LossTriangleClassifier import LossTriangleClassifier
+    from preprocessing import INPUT_SHAPE
+
+
+def export_classifier(model: LossTriangleClassifier,
+                      path: str,
+                      quantize: bool = True) -> str:
+    """
+    Exports the classifier to `path`, as ONNX if it ends in ".onnx" and as
+    TorchScript otherwise.
+
+    Parameters
+    ----------
+    model : LossTriangleClassifier
+        The trained classifier. It is put in evaluation mode.
+    path : str
+        The exported file.
+    quantize : bool, default=True
+        Whether to quantize the weights of the linear layers to int8 (and
+        their activations dynamically, when they are run).
+
+    Returns
+    -------
+    str
+        The path of the exported file.
+    """
+    model.eval()
+    sequential = model.as_sequential(fuse=True).eval()
+
+    if path.endswith(".onnx"):
+        if not quantize:
+            _export_onnx(sequential, path)
+            return path
+
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        with tempfile.TemporaryDirectory() as tmp:
+            float_path = os.path.join(tmp, "float32.onnx")
+            _export_onnx(sequential, float_path)
+            quantize_dynamic(float_path, path,
+                             op_types_to_quantize=["MatMul", "Gemm"],
+                             weight_type=QuantType.QInt8)
+        return path
+
+    if quantize:
+        sequential = torch.ao.quantization.quantize_dynamic(sequential, {nn.Linear}, dtype=torch.qint8)
+    torch.jit.script(sequential).save(path)
+    return path
+
+
+def _export_onnx(sequential: nn.Sequential, path: str) -> None:
+    """
+    Exports the network to ONNX, for batches of any size.
+
+    Uses the TorchScript-based exporter of torch 1.x. Newer versions of
+    torch default to the dynamo exporter, which needs onnxscript.
+    """
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False
+    torch.onnx.export(sequential,
+                      torch.zeros(1, 1, *INPUT_SHAPE),
+                      path,
+                      input_names=["triangles"],
+                      output_names=["probabilities"],
+                      dynamic_axes={"triangles": {0: "batch"}, "probabilities": {0: "batch"}},
+                      opset_version=17,
+                      **kwargs)
@@ -0,0 +1,168 @@
+"""
+Cheap detection of whether loss triangles are cumulative or incremental,
+from summary statistics of each triangle, with the LossTriangleClassifier
+as the fallback for the triangles the statistics cannot decide.
+
+The statistics are computed together for all the triangles, padded into a
+single array, from the pairs of adjacent observed cells in each accident
+period:
+
+    - `monotone`, the share of the pairs that do not decrease,
+    - `negative`, the share of the observed cells that are negative,
+    - `log_ata`, the median log age-to-age factor of the positive pairs.
+
+Cumulative triangles are (nearly) monotone, with age-to-age factors at or
+above 1, and no negative cells. A triangle with
+
+    monotone >= cum_threshold, negative == 0 and log_ata >= 0
+
+is cumulative. Incremental paid triangles fall off steeply after the first
+few development periods, so a triangle with
+
+    log_ata <= inc_log_ata or negative > max_negative
+
+is incremental. Cumulative incurred triangles are often not monotone (case
+reserves come down as claims settle), but their age-to-age factors stay
+close to 1, so being far from monotone is not enough to call a triangle
+incremental. Anything else (including triangles with too few pairs) is
+ambiguous, and is classified with the LossTriangleClassifier (see
+`batch_inference`), which is only imported when it is needed.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from .preprocessing import pad_triangles
+except ImportError:
+    from preprocessing import pad_triangles
+
+
+def triangle_statistics(triangles: list, shape: tuple = (20, 20)) -> pd.DataFrame:
+    """
+    The monotonicity, sign and age-to-age statistics of each triangle.
+
+    Parameters
+    ----------
+    triangles : list
+        Triangles, data frames or 2-d arrays, with the accident periods as
+        rows and the development periods as columns.
+    shape : tuple, default=(20, 20)
+        The most accident and development periods of each triangle used.
+
+    Returns
+    -------
+    pd.DataFrame
+        The number of pairs of adjacent observed cells and the `monotone`,
+        `negative` and `log_ata` statistics of each triangle.
+    """
+    sizes = np.array([np.shape(getattr(tri, "tri", tri)) for tri in triangles])
+    x = pad_triangles(triangles, np.minimum(shape, sizes.max(axis=0)))
+    observed = np.isfinite(x)
+    prev, curr = x[:, :, :-1], x[:, :, 1:]
+    pairs = observed[:, :, :-1] & observed[:, :, 1:]
+    n_pairs = pairs.sum(axis=(1, 2))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        monotone = (pairs & (curr >= prev)).sum(axis=(1, 2)) / n_pairs
+        negative = (observed & (x < 0)).sum(axis=(1, 2)) / observed.sum(axis=(1, 2))
+
+        positive = pairs & (prev > 0) & (curr > 0)
+        log_ata = np.where(positive, np.log(np.where(positive, curr / prev, 1.0)), np.nan)
+    log_ata = log_ata.reshape(len(x), -1)
+    has_ata = positive.any(axis=(1, 2))
+    median = np.full(len(x), np.nan)
+    median[has_ata] = np.nanmedian(log_ata[has_ata], axis=1)
+
+    return pd.DataFrame({
+        "pairs": n_pairs,
+        "monotone": monotone,
+        "negative": negative,
+        "log_ata": median,
+    })
+
+
+def heuristic_is_cum(stats: pd.DataFrame,
+                     cum_threshold: float = 0.95,
+                     inc_log_ata: float = -0.25,
+                     max_negative: float = 0.05,
+                     min_pairs: int = 6) -> pd.Series:
+    """
+    Whether each triangle is cumulative from its `triangle_statistics`:
+    True (cumulative), False (incremental) or NA (ambiguous).
+    """
+    enough = stats["pairs"] >= min_pairs
+    cumulative = (enough
+                  & (stats["monotone"] >= cum_threshold)
+                  & (stats["negative"] == 0)
+                  & (stats["log_ata"] >= 0))
+    incremental = enough & ((stats["log_ata"] <= inc_log_ata) | (stats["negative"] > max_negative))
+
+    out = pd.Series(pd.NA, index=stats.index, dtype="boolean")
+    out[cumulative] = True
+    out[incremental & ~cumulative] = False
+    return out
+
+
+def detect_cumulative(triangles: list,
+                      model=None,
+                      model_file: str = None,
+                      batch_size: int = 1024,
+                      cum_threshold: float = 0.95,
+                      inc_log_ata: float = -0.25,
+                      max_negative: float = 0.05,
+                      min_pairs: int = 6) -> pd.DataFrame:
+    """
+    Classifies each triangle as cumulative or incremental with the
+    heuristic, and the triangles it cannot decide with the
+    LossTriangleClassifier, and writes the result to the `is_cum_model`
+    attribute of each Triangle (True if it is cumulative). As in
+    `classify_triangles`, `has_cum_model_file` is only set on the triangles
+    classified by the model.
+
+    Parameters
+    ----------
+    triangles : list
+        Triangles (or data frames or 2-d arrays, which are classified but not
+        written to).
+    model : LossTriangleClassifier, default=None
+        The model for the ambiguous triangles. If None, it is loaded from
+        `model_file` (see `batch_inference.load_classifier`).
+    model_file : str, default=None
+        The saved model.
+    batch_size : int, default=1024
+        The number of triangles run through the model at once.
+    cum_threshold, inc_log_ata, max_negative, min_pairs
+        The thresholds of the heuristic (see `heuristic_is_cum`).
+
+    Returns
+    -------
+    pd.DataFrame
+        The id, the statistics, the method used ("heuristic" or "cnn") and
+        the classification of each triangle, with the probability of being
+        cumulative of the triangles classified by the model.
+    """
+    stats = triangle_statistics(triangles)
+    is_cum = heuristic_is_cum(stats, cum_threshold, inc_log_ata, max_negative, min_pairs)
+    stats.insert(0, "id", [getattr(tri, "id", k) for k, tri in enumerate(triangles)])
+    stats["method"] = np.where(is_cum.isna(), "cnn", "heuristic")
+    stats["prob_cumulative"] = np.nan
+
+    ambiguous = np.flatnonzero(is_cum.isna().to_numpy())
+    if len(ambiguous) > 0:
+        try:
+            from .batch_inference import classify_triangles
+        except ImportError:
+            from batch_inference import classify_triangles
+
+        cnn = classify_triangles([triangles[k] for k in ambiguous],
+                                 model=model,
+                                 model_file=model_file,
+                                 batch_size=batch_size)
+        stats.loc[ambiguous, "prob_cumulative"] = cnn["prob_cumulative"].to_numpy()
+        is_cum[ambiguous] = cnn["is_cum"].to_numpy()
+
+    stats["is_cum"] = is_cum.astype(bool)
+    for tri, value, method in zip(triangles, stats["is_cum"], stats["method"]):
+        if method == "heuristic" and hasattr(tri, "is_cum_model"):
+            tri.is_cum_model = bool(value)
+    return stats
@@ -0,0 +1,86 @@
+"""
+Preprocessing of loss triangles for the cumulative/incremental classifiers,
+and recording their classifications. Only needs numpy and pandas, so the
+heuristic (`heuristics`) and the exported classifier (`runtime`) run
+without torch.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# size of the triangles the LossTriangleClassifier was trained on
+INPUT_SHAPE = (10, 10)
+
+
+def pad_triangles(triangles: list, shape: tuple) -> np.ndarray:
+    """
+    The latest `shape[0]` accident periods and the first `shape[1]`
+    development periods of the triangles, as a single (n, rows, cols) array
+    padded with NaN.
+
+    Parameters
+    ----------
+    triangles : list
+        Triangles, data frames or 2-d arrays, with the accident periods as
+        rows and the development periods as columns.
+    shape : tuple
+        The number of accident and development periods.
+
+    Returns
+    -------
+    np.ndarray
+        The padded triangles.
+    """
+    rows, cols = shape
+    x = np.full((len(triangles), rows, cols), np.nan)
+    for k, tri in enumerate(triangles):
+        values = np.asarray(getattr(tri, "tri", tri), dtype=float)[-rows:, :cols]
+        x[k, :values.shape[0], :values.shape[1]] = values
+    return x
+
+
+def prep_for_cnn(triangles: list, shape: tuple = INPUT_SHAPE) -> np.ndarray:
+    """
+    Preprocesses the triangles into a single (n, 1, rows, cols) float32
+    array for the LossTriangleClassifier, as in the (commented out)
+    `Triangle.prep_for_cnn`: the triangles are padded (see `pad_triangles`),
+    the cells outside the upper-left triangle dropped, each development
+    period standardized, and the missing cells set to 0.
+    """
+    rows, cols = shape
+    x = pad_triangles(triangles, shape)
+
+    # multiply by the indicators of the cells in the upper-left triangle
+    x = x * (np.add.outer(np.arange(rows), np.arange(cols)) < max(rows, cols))
+
+    # standardize each development period of each triangle (as StandardScaler)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        mean = np.nanmean(x, axis=1, keepdims=True)
+        std = np.nanstd(x, axis=1, keepdims=True)
+    std = np.where(std > 0, std, 1.0)
+    x = np.nan_to_num((x - mean) / std, nan=0.0)
+    return x[:, None, :, :].astype(np.float32)
+
+
+def record_classifications(triangles: list,
+                           proba: np.ndarray,
+                           threshold: float = 0.5) -> pd.DataFrame:
+    """
+    Writes whether each triangle is cumulative (its probability of being
+    cumulative is at least `threshold`) to the `is_cum_model` attribute of
+    each Triangle, with `has_cum_model_file` set, and returns the id, the
+    probability and the classification of each triangle.
+    """
+    is_cum = proba >= threshold
+    for tri, value in zip(triangles, is_cum):
+        if hasattr(tri, "is_cum_model"):
+            tri.is_cum_model = bool(value)
+            tri.has_cum_model_file = True
+
+    return pd.DataFrame({
+        "id": [getattr(tri, "id", k) for k, tri in enumerate(triangles)],
+        "prob_cumulative": proba,
+        "is_cum": is_cum,
+    })
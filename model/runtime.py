@@ -0,0 +1,80 @@
+"""
+Runs a LossTriangleClassifier exported with `export.export_classifier`.
+
+Only the runtime of the exported file is imported: torch for a TorchScript
+file, and onnxruntime (and not torch) for an ONNX file. The model class and
+its training dependencies are not needed. Each file is loaded once and
+reused.
+
+The exported file is passed in, or read from the `ROCKY_IS_CUM_EXPORT`
+environment variable.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .preprocessing import prep_for_cnn, record_classifications
+except ImportError:
+    from preprocessing import prep_for_cnn, record_classifications
+
+# environment variable with the path of the exported model
+EXPORT_FILE_ENV = "ROCKY_IS_CUM_EXPORT"
+
+# loaded models, by exported file
+_RUNNERS = {}
+
+
+def load_exported(path: str = None):
+    """
+    The exported classifier in `path`, as a function from a preprocessed
+    (n, 1, 10, 10) float32 array to the probability that each triangle is
+    cumulative.
+    """
+    if path is None:
+        path = os.environ.get(EXPORT_FILE_ENV)
+    if path is None:
+        raise ValueError(f"No exported model given, and {EXPORT_FILE_ENV} is not set.")
+
+    path = os.path.abspath(path)
+    if path in _RUNNERS:
+        return _RUNNERS[path]
+
+    if path.endswith(".onnx"):
+        import onnxruntime
+
+        session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+
+        def run(x: np.ndarray) -> np.ndarray:
+            return session.run(None, {input_name: x})[0][:, 1]
+    else:
+        import torch
+
+        module = torch.jit.load(path, map_location="cpu").eval()
+
+        def run(x: np.ndarray) -> np.ndarray:
+            with torch.inference_mode():
+                return module(torch.from_numpy(x))[:, 1].numpy()
+
+    _RUNNERS[path] = run
+    return run
+
+
+def classify_triangles(triangles: list,
+                       path: str = None,
+                       batch_size: int = 1024,
+                       threshold: float = 0.5) -> pd.DataFrame:
+    """
+    Classifies each triangle as cumulative or incremental with the exported
+    classifier, as `batch_inference.classify_triangles` does with the
+    LossTriangleClassifier, and writes the result to the `is_cum_model`
+    attribute of each Triangle.
+    """
+    run = load_exported(path)
+    x = prep_for_cnn(triangles)
+    proba = np.empty(len(x))
+    for start in range(0, len(x), batch_size):
+        proba[start:start + batch_size] = run(x[start:start + batch_size])
+    return record_classifications(triangles, proba, threshold)
@@ -1,15 +1,36 @@
 import numpy as np
 import pandas as pd
 
-from sklearn.linear_model import Ridge
+from scipy.optimize import minimize
 
 from typing import Union
 
 from triangle import Triangle
-from BaseEstimator import BaseEstimator
 
 
-class PaidIncurredChain(BaseEstimator):
+def _tail_sum(x: np.ndarray) -> np.ndarray:
+    """
+    Reverse cumulative sum along the last axis: element j is the sum of
+    elements j, j+1, ... of `x`.
+    """
+    return np.flip(np.cumsum(np.flip(x, axis=-1), axis=-1), axis=-1)
+
+
+def _prepend_zero(x: np.ndarray) -> np.ndarray:
+    """
+    Prepends a 0 along the last axis.
+    """
+    return np.concatenate([np.zeros(x.shape[:-1] + (1,)), x], axis=-1)
+
+
+def _append_zero(x: np.ndarray) -> np.ndarray:
+    """
+    Appends a 0 along the last axis.
+    """
+    return np.concatenate([x, np.zeros(x.shape[:-1] + (1,))], axis=-1)
+
+
+class PaidIncurredChain:
     def __init__(self
                  , paid_triangle: Triangle = None
                  , incurred_triangle: Triangle = None
@@ -25,12 +46,16 @@ class PaidIncurredChain(BaseEstimator):
         Initialize the PaidIncurredChain class with the given triangles of
         claims payments and incurred losses.
 
+        All of the quantities in the paper are computed for every development
+        period (or accident period) at once from the triangles as arrays, so
+        nothing is looked up cell by cell.
+
         Args:
-            paid_triangle (Triangle): 
+            paid_triangle (Triangle):
                 The claims payments triangle. Rows represent accident years,
                 and columns represent development years. Each element represents
                 the cumulative claims payments for a specific accident year and
-                development year. 
+                development year.
             incurred_triangle (Triangle):
                 The incurred losses triangle. Rows represent accident years, and
                 columns represent development years. Each element represents the
@@ -39,33 +64,32 @@ class PaidIncurredChain(BaseEstimator):
             bayesian (bool):
                 Whether to use the full Bayesian version of the model. If False,
                 the variance parameters are treated as fixed and identical to
-                the prior parameters. Default is False.
+                the prior parameters. If True, the variances get inverse gamma
+                priors and `Fit` samples the posterior (see `Sample`).
+                Default is False.
             prior_phi (np.ndarray):
-                The prior for the phi (log paid LDF mean) parameters. If an array
-                is passed, the prior for each development period is specified.
-                Default is None, in which case the prior parameters are estimated
-                from the data.
+                The prior for the phi (log paid LDF mean) parameters, one for
+                each development period (phi_0 is the mean of the log of the
+                first payments). Default is None, in which case the prior
+                parameters are estimated from the data.
             prior_psi (np.ndarray):
-                The prior for the psi (log incurred LDF mean) parameters. If an array
-                is passed, the prior for each development period is specified.
-                Default is None, in which case the prior parameters are estimated
-                from the data.
+                The prior for the psi (log incurred LDF mean) parameters, one
+                for each development period but the last. Default is None, in
+                which case the prior parameters are estimated from the data.
             prior_sigma2 (np.ndarray):
-                The prior for the sigma2 (log paid LDF variance) parameters. If an array
-                is passed, the prior for each development period is specified.
-                Default is None, in which case the prior parameters are estimated
-                from the data.
+                The prior for the sigma2 (log paid LDF variance) parameters, one
+                for each development period. Default is None, in which case the
+                prior parameters are estimated from the data.
             prior_tau2 (np.ndarray):
-                The prior for the tau2 (log incurred LDF variance) parameters.
-                If an array is passed, the prior for each development period is
-                specified. Default is None, in which case the prior parameters are
-                estimated from the data.
+                The prior for the tau2 (log incurred LDF variance) parameters,
+                one for each development period but the last. Default is None,
+                in which case the prior parameters are estimated from the data.
             prior_s2 (np.ndarray):
                 The prior for the s2 (variance of mean log paid LDF) parameters.
                 If an array is passed, the prior for each development period is
                 specified. Default is None, in which case the prior parameters
                 are assumed to be 10 at each development period, effectively placing
-                no weight on the prior estimate of the prior mean of the log paid LDF. 
+                no weight on the prior estimate of the prior mean of the log paid LDF.
             prior_t2 (np.ndarray):
                 The prior for the t2 (variance of mean log incurred LDF) parameters.
                 If an array is passed, the prior for each development period is
@@ -74,14 +98,19 @@ class PaidIncurredChain(BaseEstimator):
                 no weight on the prior estimate of the prior mean of the log incurred
                 LDF.
         """
-        super().__init__()
         # store the paid and incurred triangles in their rocky triangle format
         self.paid_triangle = paid_triangle
         self.incurred_triangle = incurred_triangle
+        self.bayesian = bayesian
 
         # use shorter variable names for the paid and incurred triangles as data frames
-        self.P = paid_triangle.tri.copy()
-        self.I = incurred_triangle.tri.copy()
+        self.P = getattr(paid_triangle, "tri", paid_triangle).copy()
+        self.I = getattr(incurred_triangle, "tri", incurred_triangle).copy()
+
+        if self.P.shape != self.I.shape:
+            raise ValueError("The paid and incurred triangles must have the same shape.")
+        if self.P.shape[0] != self.P.shape[1]:
+            raise ValueError("The triangles must have as many accident years as development years.")
 
         # number of development years
         self.J = self.P.shape[1]
@@ -89,36 +118,50 @@ class PaidIncurredChain(BaseEstimator):
         # number of accident years
         self.M = self.P.shape[0]
 
+        # the log increments are used by almost every calculation, so they
+        # are only calculated once
+        self._logP = np.log(self.P.to_numpy(dtype=float))
+        self._logI = np.log(self.I.to_numpy(dtype=float))
+        self._xi = self.log_paid_increments()
+        self._zeta = self.log_incurred_increments()
+
+        self._set_priors(prior_phi, prior_psi, prior_sigma2, prior_tau2, prior_s2, prior_t2)
+
+    def _set_priors(self, prior_phi, prior_psi, prior_sigma2, prior_tau2, prior_s2, prior_t2):
+        """
+        Loads the prior parameters, or estimates them from the data where
+        they are None, and initializes the model parameters to them.
+        """
         # load model prior parameters or estimate them from the data
         if prior_phi is None:
             self.prior_phi = self.empirical_phi_mean()
         else:
-            self.prior_phi = prior_phi
+            self.prior_phi = np.asarray(prior_phi, dtype=float)
 
         if prior_psi is None:
             self.prior_psi = self.empirical_psi_mean()
         else:
-            self.prior_psi = prior_psi
+            self.prior_psi = np.asarray(prior_psi, dtype=float)
 
         if prior_sigma2 is None:
             self.prior_sigma2 = self.empirical_sigma2_estimator()
         else:
-            self.prior_sigma2 = prior_sigma2
+            self.prior_sigma2 = np.asarray(prior_sigma2, dtype=float)
 
         if prior_tau2 is None:
             self.prior_tau2 = self.empirical_tau2_estimator()
         else:
-            self.prior_tau2 = prior_tau2
+            self.prior_tau2 = np.asarray(prior_tau2, dtype=float)
 
         if prior_s2 is None:
-            self.prior_s2 = np.repeat(10, self.J)
+            self.prior_s2 = np.repeat(10.0, self.J)
         else:
-            self.prior_s2 = prior_s2
+            self.prior_s2 = np.asarray(prior_s2, dtype=float)
 
         if prior_t2 is None:
-            self.prior_t2 = np.repeat(10, self.J-1)
+            self.prior_t2 = np.repeat(10.0, self.J-1)
         else:
-            self.prior_t2 = prior_t2
+            self.prior_t2 = np.asarray(prior_t2, dtype=float)
 
         # initialize the model parameters
         self.phi = self.prior_phi
@@ -207,24 +250,13 @@ class PaidIncurredChain(BaseEstimator):
         return out
 
     #########################################################
-    # this section reproduces the calculations in Section 2 #
+    # data                                                  #
     #########################################################
 
-    def _paid_ldf(self, i: int, j: int
-                  ) -> float:
-        """
-        Convenience function to calculate the paid loss development factor
-        at the given row and column indices.
-        """
-        if j == 0:
-            return self.P.iloc[i, j]
-        else:
-            return self.P.iloc[i, j] / self.P.iloc[i, j - 1]
-
     def paid_ldf(self) -> np.ndarray:
         """
         Convenience function to calculate the paid loss development
-        factors.
+        factors. The first column is the first payment itself.
         """
         P = np.array(self.P)
         P_shifted = np.hstack((np.zeros((P.shape[0], 1)), P[:, :-1]))
@@ -233,17 +265,6 @@ class PaidIncurredChain(BaseEstimator):
         LDF[:, 0] = P[:, 0]
         return LDF
 
-    def _incurred_ldf(self, i: int, j: int
-                      ) -> float:
-        """
-        Convenience function to calculate the incurred loss development factor
-        at the given row and column indices.
-        """
-        if j == 0:
-            return self.I.iloc[i, j]
-        else:
-            return self.I.iloc[i, j] / self.I.iloc[i, j - 1]
-
     def incurred_ldf(self) -> np.ndarray:
         """
         Vectorized function to calculate the incurred loss development factor matrix.
@@ -255,83 +276,126 @@ class PaidIncurredChain(BaseEstimator):
         LDF[:, 0] = I[:, 0]
         return LDF
 
-    def _mu(self, j: int
-            ) -> float:
+    def log_paid_increments(self) -> np.ndarray:
         """
-        v^2 parameter for incurred log losses conditional on data in
-        the incurred triangle only.
-
-        Given in Proposition 2.2 in the paper. 
-
-        Calculated as:
-
-        (sum from 0 to J of the phi values)
-        -
-        (sum from j to J-1 of the psi values)
+        The xi_{i,j} matrix: log P_{i,0} in the first column, and
+        log(P_{i,j} / P_{i,j-1}) in the others. Unobserved (or non-positive)
+        cells are nan.
+        """
+        xi = np.diff(self._logP, axis=-1, prepend=0)
+        return np.where(np.isfinite(xi), xi, np.nan)
 
+    def log_incurred_increments(self) -> np.ndarray:
         """
-        if self.psi is None:
-            raise ValueError("The psi values have not been calculated yet.")
-        if self.phi is None:
-            raise ValueError("The phi values have not been calculated yet.")
+        The zeta_{i,j} matrix of log(I_{i,j+1} / I_{i,j}), with one column
+        for each development period but the last. Unobserved (or
+        non-positive) cells are nan.
+        """
+        zeta = np.diff(self._logI, axis=-1)
+        return np.where(np.isfinite(zeta), zeta, np.nan)
 
-        # sum of phi values
-        phi_sum = np.sum(self.phi)
+    def _diagonal(self) -> tuple:
+        """
+        The latest development period j = J - i of each accident year i, and
+        the log paid and log incurred losses on the diagonal.
+        """
+        rows = np.arange(self.M)
+        j = self.J - 1 - rows
+        return j, self._logP[..., rows, j], self._logI[..., rows, j]
 
-        # sum of psi values
-        psi_sum = np.sum(self.psi[j:])
+    def _diagonal_by_development(self) -> tuple:
+        """
+        The log paid and log incurred losses on the diagonal, ordered by
+        development period (so element j is from accident year J - j).
+        """
+        j, logP, logI = self._diagonal()
+        return logP[..., ::-1], logI[..., ::-1]
 
-        # return the mu value
-        if j == self.J:
-            return phi_sum
+    def n_observations(self, triangle: str = "paid") -> np.ndarray:
+        """
+        Number of observed log paid increments (one per development period)
+        or log incurred increments (one per development period but the last).
+        This is the # function from Theorem 3.2 in the paper.
+        """
+        if triangle == "paid":
+            x = self._xi
+        elif triangle == "incurred":
+            x = self._zeta
         else:
-            return phi_sum - psi_sum
+            raise ValueError(
+                f"Invalid triangle: {triangle}. Must be 'paid' or 'incurred'.")
+        return np.sum(~np.isnan(x), axis=-2)
+
+    #########################################################
+    # empirical estimators                                  #
+    #########################################################
 
     def ldf_estimator(self, triangle: str = 'paid') -> np.ndarray:
         """
-        Estimate of the LDFs for the given triangle.
+        Estimate of the log LDFs for the given triangle.
 
         From equation 5.2 in the textbook.
 
         Calculated as:
 
-        ldf_{i, j} = 
+        ldf_{j} =
         (sum from i=0 to I-j of {log [ C_{i,j} / C_{i, j-1} })
         /
         (I - j + 1)
         """
         if triangle == "paid":
-            C = self.P
+            x = self._xi[..., 1:]
         elif triangle == "incurred":
-            C = self.I
+            x = self._zeta
         else:
             raise ValueError(
                 f"Invalid triangle: {triangle}. Must be 'paid' or 'incurred'.")
 
-        num_columns = C.shape[1]
-        ldf = np.zeros(num_columns - 1)
+        return np.nanmean(x, axis=-2)
 
-        for j in range(1, num_columns):
-            sum_log_ratios = 0
-            count = 0
+    @staticmethod
+    def _column_variance(x: np.ndarray) -> np.ndarray:
+        """
+        Unbiased variance of the observed values in each column of `x`, nan
+        for the columns with fewer than two observations.
+        """
+        count = np.sum(~np.isnan(x), axis=-2)
+        mean = np.nansum(x, axis=-2) / np.maximum(count, 1)
+        ss = np.nansum((x - mean[..., None, :]) ** 2, axis=-2)
+        return np.divide(ss, count - 1, out=np.full(count.shape, np.nan), where=count > 1)
 
-            for i in range(C.shape[0] - j):
-                if not np.isnan(C.iloc[i, j]) and not np.isnan(C.iloc[i, j - 1]) and C.iloc[i, j - 1] != 0:
-                    sum_log_ratios += np.log(C.iloc[i, j] / C.iloc[i, j - 1])
-                    count += 1
+    @staticmethod
+    def _extrapolate_variance(variance: np.ndarray) -> np.ndarray:
+        """
+        Fills the missing variances (the last development periods, which have
+        too few observations) using loglinear regression with regularization
+        on the positive variances that could be estimated.
 
-            if count > 0:
-                ldf[j - 1] = sum_log_ratios / count
+        The regression is a ridge regression of the log variances on the
+        development period with a penalty of 1 on the slope, which has a
+        closed form, so every row of a stack of variances is filled at once.
+        """
+        missing = ~(variance > 0)
+        if not missing.any():
+            return variance
+        observed = ~missing
+        x = np.arange(1, variance.shape[-1] + 1, dtype=float)
+        y = np.log(np.where(observed, variance, 1.0))
 
-        return ldf
+        n = observed.sum(axis=-1, keepdims=True)
+        x_mean = np.sum(observed * x, axis=-1, keepdims=True) / n
+        y_mean = np.sum(observed * y, axis=-1, keepdims=True) / n
+        xc = np.where(observed, x - x_mean, 0.0)
+        slope = np.sum(xc * (y - y_mean), axis=-1, keepdims=True) / (np.sum(xc ** 2, axis=-1, keepdims=True) + 1)
+        return np.where(missing, np.exp(y_mean + slope * (x - x_mean)), variance)
 
-    def variance_estimator(self, triangle: str = "paid") -> float:
+    def variance_estimator(self, triangle: str = "paid") -> np.ndarray:
         """
         Estimate of the sigma2 parameter or the tau2 parameter for paid
-        or incurred log losses conditional on data in the paid or incurred
+        or incurred log LDFs conditional on data in the paid or incurred
         triangle only.
 
-        From equation 5.3 in the textbook.  
+        From equation 5.3 in the textbook.
 
         Calculated as:
 
@@ -339,52 +403,40 @@ class PaidIncurredChain(BaseEstimator):
         /
         (I - j)
 
-        where estimated LDF_{i, j} is the estimated LDF for the given row and
-        column indices, and is given by:
-
+        This does not provide an estimator for the last column, so the last
+        column's variance is extrapolated by loglinear regression.
         """
         if triangle == "paid":
-            LDF = self.paid_ldf()[:, 1:]
-            tri = self.paid_triangle
+            x = self._xi[..., 1:]
         elif triangle == "incurred":
-            LDF = self.incurred_ldf()[:, 1:]
-            tri = self.incurred_triangle
+            x = self._zeta
         else:
             raise ValueError(
                 "The triangle argument must be either 'paid' or 'incurred'.")
 
-        logLDF = np.log(LDF)
-        logLDF_est = self.ldf_estimator(triangle)
-
-        # for each column, replace nan values with 0, calculate the sum of the squared differences
-        # between each nonzero item and the estimated LDF for that column
-        # should return a vector of length LDF.shape[1]
-        diff2 = np.sum(np.square(np.where(np.logical_or(
-            np.isnan(logLDF), np.equal(logLDF, 0)), 0, logLDF - logLDF_est)), axis=0)
+        return self._extrapolate_variance(self._column_variance(x))
 
-        variance = diff2 / (tri.n_rows - np.arange(1, LDF.shape[1] + 1))
-
-        # note this does not provide an estimator for the last column, so we will use loglinear
-        # regression with regularization to estimate the variance for the last column
-        y = np.log(variance[:-1])
-        X = np.arange(1, len(y) + 1).reshape(-1, 1)
-        model = Ridge(alpha=1).fit(X, y)
-
-        # calculate the variance for the last column
-        last_col_var = np.exp(model.predict([[len(y) + 1]]))
+    def empirical_phi_mean(self) -> np.ndarray:
+        """
+        Empirical means of phi: the mean log first payment, followed by the
+        mean log paid LDFs.
+        """
+        return np.nanmean(self._xi, axis=-2)
 
-        # return the variance vector with the last column variance appended
-        return np.append(variance[:-1], last_col_var)
+    def empirical_psi_mean(self) -> np.ndarray:
+        """
+        Empirical means of psi: the mean log incurred LDFs.
+        """
+        return self.ldf_estimator('incurred')
 
     def empirical_sigma2_estimator(self) -> np.ndarray:
         """
         Prior estimate of the sigma2 parameter for paid losses conditional on data in the paid
-        triangle only. Uses the textbook standard deviation estimator.
-
-        This is an alias for the variance_estimator function with the triangle argument set to
-        "paid".
+        triangle only. Uses the textbook standard deviation estimator for the log first
+        payments and the log paid LDFs.
         """
-        return self.variance_estimator(triangle="paid")
+        sigma2 = self._column_variance(self._xi[..., :1])
+        return np.concatenate([sigma2, self.variance_estimator(triangle="paid")], axis=-1)
 
     def empirical_tau2_estimator(self) -> np.ndarray:
         """
@@ -392,270 +444,140 @@ class PaidIncurredChain(BaseEstimator):
         incurred triangle only. Uses the textbook standard deviation estimator.
 
         This is an alias for the variance_estimator function with the triangle argument set to
-        "incurred", but does not include the final column, since ultimate incurred is set equal
-        to ultimate paid.
+        "incurred".
         """
-        return self.variance_estimator(triangle="incurred")[:-1]
+        return self.variance_estimator(triangle="incurred")
+
+    #########################################################
+    # this section reproduces the calculations in Section 2 #
+    #########################################################
 
     def mu(self) -> np.ndarray:
         """
-        Vectorized function to calculate the mu values for all columns j.
+        Mean of log I_{i,j} given the parameters, for every development
+        period j. Given in Proposition 2.2 in the paper.
+
+        Calculated as:
 
-        This function calculates the mu values for all columns j by creating an array of the same
-        length as the number of columns in the incurred triangle. It calculates the sum of phi
-        values and subtracts the cumulative sum of psi values for each j. The last element in the
-        array remains the sum of phi values.
+        (sum from 0 to J of the phi values)
+        -
+        (sum from j to J-1 of the psi values)
         """
         if self.psi is None:
             raise ValueError("The psi values have not been calculated yet.")
         if self.phi is None:
             raise ValueError("The phi values have not been calculated yet.")
 
-        J = self.J
-
-        # sum of phi values
-        phi_sum = np.sum(self.phi)
+        # sum of psi values from j to J-1, which is 0 for j = J
+        psi_cumsum = _tail_sum(_append_zero(self.psi))
+        return np.sum(self.phi, axis=-1, keepdims=True) - psi_cumsum
 
-        # sum of psi values for each j
-        psi_cumsum = np.cumsum(self.psi[::-1])[::-1]
-
-        # calculate mu values for all j
-        mu_values = np.full(J + 1, phi_sum)
-        mu_values[:-1] -= psi_cumsum
-
-        return mu_values
-
-    def _v2(self, j: int) -> float:
+    def v2(self) -> np.ndarray:
         """
-        v^2 parameter for incurred log losses conditional on data in
-        the incurred triangle only.
-
-        Given in Proposition 2.2 in the paper. 
+        Variance of log I_{i,j} given the parameters, for every development
+        period j. Given in Proposition 2.2 in the paper.
 
         Calculated as:
 
         (sum from 0 to J of the sigma squared values)
         +
         (sum from j to J-1 of the tau squared values)
-
         """
         if self.sigma2 is None:
             raise ValueError("The sigma2 values have not been calculated yet.")
         if self.tau2 is None:
             raise ValueError("The tau2 values have not been calculated yet.")
 
-        # sum of sigma squared values
-        sigma2_sum = np.sum(self.sigma2)
+        tau2_cumsum = _tail_sum(_append_zero(self.tau2))
+        return np.sum(self.sigma2, axis=-1, keepdims=True) + tau2_cumsum
 
-        # sum of tau squared values
-        tau2_sum = np.sum(self.tau2[j:])
-
-        # return the v2 value
-        if j == self.J:
-            return sigma2_sum
-        else:
-            return sigma2_sum + tau2_sum
-
-    def v2(self, t2: np.ndarray = None) -> np.ndarray:
+    def eta(self) -> np.ndarray:
         """
-        Vectorized function to calculate the v^2 values for all columns j.
-
-        Takes an optional t2 array as an argument. If t2 is provided, the function
-        uses it instead of tau2 to calculate the v^2 values for all columns j.
+        Mean of log P_{i,j} given the parameters: the sum from 0 to j of the
+        phi values. Given in Theorem 2.4 of the paper.
         """
-        J = self.J
+        return np.cumsum(self.phi, axis=-1)
 
-        # sum of sigma squared values
-        sigma2_sum = np.sum(self.sigma2)
-
-        # use t2 if provided, otherwise use tau2
-        t2 = self.tau2 if t2 is None else t2
-
-        # sum of t2 squared values for each j
-        t2_cumsum = np.cumsum(t2[::-1])[::-1]
-
-        # calculate v2 values for all j
-        v2_values = np.full(J + 1, sigma2_sum)
-        v2_values[:-1] += t2_cumsum
-
-        return v2_values
-
-    def _cond_log_incurred_mean(self, i: int, j: int, l: int
-                                ) -> float:
+    def w2(self) -> np.ndarray:
         """
-        Mean of the conditional distribution of the log incurred losses
-        conditional on data in the incurred triangle only.
-
-        Parameters
-        ----------
-        i : int
-            The row index of the incurred losses triangle.
-        j : int
-            The column index of the incurred losses triangle that represents
-            the current/most recent development year.
-        l : int
-            The number of development years in the future. This is a general
-            formulation of the mean, and takes the current triangle, but allows
-            estimation of any future development year.
-
-        Returns
-        -------
-        float
-            The mean of the conditional distribution of the log incurred losses
-            conditional on data in the incurred triangle only.
-
-        References
-        ----------
-        Given in Proposition 2.2 in the paper.
-
-        Calculation
-        -----------
-        $$E[\log I_{i, j+l} | D_j^I, \Phi] = \mu(j+l) + \frac{v^2(j+l)}{v^2(j)} (\log I_{i, j} - \mu(j))$$
+        Variance of log P_{i,j} given the parameters: the sum from 0 to j of
+        the sigma squared values. Given in Theorem 2.4 of the paper.
         """
-        return self._mu(j + l) + (self._v2(j + l) / self._v2(j)) * (np.log(self.I.iloc[i, j]) - self._mu(j))
+        return np.cumsum(self.sigma2, axis=-1)
 
-    def cond_log_incurred_mean(self) -> np.ndarray:
-        """
-        Vectorized function to calculate the mean of the conditional distribution 
-        of the log incurred losses for all combinations of i, j, and l.
+    def alpha(self) -> np.ndarray:
         """
-        # Obtain the shape of the incurred triangle (I is the number of rows, J is the number of columns)
-        I, J = self.I.shape
-
-        # Calculate the mu values for all columns j using the vectorized mu() method
-        mu_values = self.mu()
-
-        # Calculate the v2 values for all columns j using the vectorized v2() method
-        v2_values = self.v2()
-
-        # Reshape mu_values to have shape (J+1, 1) for broadcasting during calculations
-        mu_j_plus_l = mu_values[:, np.newaxis]
-
-        # Calculate the ratio of v2 values for all pairs of (j+l, j) where v2(j) is not zero
-        # The result has shape (J+1, J+1)
-        v2_ratio = np.divide(
-            v2_values[:, np.newaxis], v2_values, where=(v2_values != 0))
-
-        # Calculate the difference between the logarithm of the incurred triangle (element-wise)
-        # and the mu_values (except the last one), broadcasting mu_values along the rows
-        # The result has shape (I, J)
-        log_I_minus_mu_j = np.log(self.I) - mu_values[np.newaxis, :-1]
-
-        # Calculate the product of v2_ratio and log_I_minus_mu_j
-        # The result has shape (J+1, J+1, I, J)
-        product_term = v2_ratio[:, :, np.newaxis] * \
-            log_I_minus_mu_j[np.newaxis, np.newaxis, :, :]
-
-        # Add mu_j_plus_l to the product_term, broadcasting mu_j_plus_l along the last two dimensions
-        # The result has shape (J+1, J+1, I, J)
-        cond_mean = mu_j_plus_l[:, :, np.newaxis, np.newaxis] + product_term
+        Alpha credibility weights for expected ultimate losses conditional on
+        data in the incurred triangle only, for every development period j.
+        Given in Corollary 2.3 of the paper.
 
-        return cond_mean
+        Calculated as:
 
-    def _cond_log_incurred_var(self, i: int, j: int, l: int) -> float:
+        1 - (v2(J) / v2(j))
         """
-        Variance of the conditional distribution of the log incurred losses
-        conditional on data in the incurred triangle only.
+        v2 = self.v2()
+        return 1 - v2[..., -1:] / v2
 
-        Parameters
-        ----------
-        i : int
-            The row index of the incurred losses triangle.
-        j : int
-            The column index of the incurred losses triangle that represents
-            the current/most recent development year.
-        l : int
-            The number of development years in the future. This is a general
-            formulation of the variance, and takes the current triangle, but allows
-            estimation of any future development year.
+    def beta(self) -> np.ndarray:
+        """
+        Beta credibility weights for log paid losses at ultimate conditional
+        on data in both paid and incurred triangles, for every development
+        period j. Given in Theorem 2.4 of the paper.
 
-        Returns
-        -------
-        float
-            The variance of the conditional distribution of the incurred losses
-            conditional on data in the incurred triangle only.
+        Calculated as:
 
-        References
-        ----------
-        Given in Proposition 2.2 in the paper.
+        [v2(J) - w2(j)]
+        /
+        [v2(j) - w2(j)]
 
-        Calculation
-        -----------
-        $$\text{Var}[\log I_{i, j+l} | D_j^I, \Phi] = v_{j+l}^2 \left(1 - \frac{v_{j+l}^2}{v_{j}^2} \right)$$
+        The last development period is fully developed, so its weight is 0.
         """
-        return self._v2(j + l) * (1 - (self._v2(j + l) / self._v2(j)))
+        v2, w2 = self.v2(), self.w2()
+        denom = v2 - w2
+        return np.divide(v2[..., -1:] - w2, denom, out=np.zeros_like(denom), where=denom > 0)
 
-    def cond_log_incurred_var(self) -> np.ndarray:
+    def _future_sum(self, x: np.ndarray, start: int = 1) -> np.ndarray:
         """
-        Vectorized function to calculate the variance of the conditional distribution 
-        of the log incurred losses for all combinations of i, j, and l.
+        For the latest development period j of each accident year, the sum
+        of `x` from development period j + `start` to the end of `x`.
         """
-        # Obtain the shape of the incurred triangle (I is the number of rows, J is the number of columns)
-        I, J = self.I.shape
-
-        # Calculate the v2 values for all columns j using the vectorized v2() method
-        v2_values = self.v2()
-
-        # Calculate the ratio of v2 values for all pairs of (j+l, j) where v2(j) is not zero
-        # The result has shape (J+1, J+1)
-        v2_ratio = np.divide(
-            v2_values[:, np.newaxis], v2_values, where=(v2_values != 0))
-
-        # Calculate 1 - v2_ratio, ensuring that the result is 0 where v2(j) is zero
-        # The result has shape (J+1, J+1)
-        one_minus_v2_ratio = np.where(v2_values != 0, 1 - v2_ratio, 0)
-
-        # Calculate the product of v2_values (j+l) and one_minus_v2_ratio
-        # The result has shape (J+1, J+1)
-        var_values = v2_values[:, np.newaxis] * one_minus_v2_ratio
-
-        # Add two new dimensions to var_values to have shape (J+1, J+1, 1, 1)
-        # This allows broadcasting along the i and j dimensions
-        var_values_expanded = var_values[:, :, np.newaxis, np.newaxis]
-
-        # Broadcast var_values_expanded along the i and j dimensions to create a 3D array
-        # with shape (J+1, J+1, I, J) containing the variances for all combinations of i, j, and l
-        cond_var = np.broadcast_to(var_values_expanded, (J+1, J+1, I, J))
-
-        return cond_var
+        j, _, _ = self._diagonal()
+        tail = np.append(np.cumsum(x[::-1])[::-1], 0)
+        return tail[np.minimum(j + start, len(x))]
 
-    def _alpha(self, j: int) -> float:
+    def cond_log_incurred_mean(self) -> np.ndarray:
         """
-        Alpha credibility weight for expected ultimate losses conditional on
-        data in the incurred triangle only, and parameter vector Theta.
-
-        Given in Corollary 2.3 of the paper.
+        Mean of log I_{i,J}, conditional on the incurred data of each
+        accident year through its latest development period j. Given in
+        Proposition 2.2 in the paper.
 
         Calculated as:
 
-        1 - (_v2(J) / _v2(j))
+        mu(J) + (v2(J) / v2(j)) * (log I_{i,j} - mu(j))
         """
-        return 1 - (self._v2(self.J) / self._v2(j))
+        j, _, logI = self._diagonal()
+        mu, v2 = self.mu(), self.v2()
+        return mu[-1] + (v2[-1] / v2[j]) * (logI - mu[j])
 
-    def alpha(self) -> np.ndarray:
-        """
-        Vectorized function to calculate the alpha credibility weights for all j.
+    def cond_log_incurred_var(self) -> np.ndarray:
         """
-        # Calculate the v2 values for all columns j using the vectorized v2() method
-        v2_values = self.v2()
+        Variance of log I_{i,J}, conditional on the incurred data of each
+        accident year through its latest development period j. Given in
+        Proposition 2.2 in the paper.
 
-        # Calculate the ratio of v2 values for all pairs of (J, j) where v2(j) is not zero
-        # The result has shape (J+1,)
-        v2_ratio = np.divide(v2_values[-1], v2_values, where=(v2_values != 0))
-
-        # Calculate 1 - v2_ratio, ensuring that the result is 0 where v2(j) is zero
-        # The result has shape (J+1,)
-        alpha_values = np.where(v2_values != 0, 1 - v2_ratio, 0)
-
-        return alpha_values
+        Calculated as:
 
-    def _cond_incurred_mean_ultimate(self, i: int, j: int
-                                     ) -> float:
+        v2(J) * (1 - v2(J) / v2(j))
         """
-        Mean of the conditional distribution of the incurred ultimate losses
-        conditional on data in the incurred triangle only.
+        j, _, _ = self._diagonal()
+        v2 = self.v2()
+        return v2[-1] * (1 - v2[-1] / v2[j])
 
-        Given in Corollary 2.3 of the paper.
+    def cond_incurred_mean_ultimate(self) -> np.ndarray:
+        """
+        Mean of the ultimate incurred losses of each accident year
+        conditional on data in the incurred triangle only. Given in
+        Corollary 2.3 of the paper.
 
         Calculated as:
 
@@ -665,79 +587,18 @@ class PaidIncurredChain(BaseEstimator):
         *
         exp[alpha(j) * (mu(j) - log(I_{i,j}) - (sum from j to J-1 of {tau squared values}/2))]
         """
-        # sum of psi values
-        psi_sum = np.sum(self.psi[j:])
+        j, _, logI = self._diagonal()
+        psi_sum = self._future_sum(self.psi, start=0)
+        tau2_sum = self._future_sum(self.tau2, start=0) / 2
+        return np.exp(logI + psi_sum + tau2_sum
+                      + self.alpha()[j] * (self.mu()[j] - logI - tau2_sum))
 
-        # sum of tau squared / 2 values
-        tau2_sum = np.sum(self.tau2[j:]) / 2
-
-        # other values
-        Iij = self.I.iloc[i, j]
-        alpha_j = self._alpha(j)
-        mu_j = self._mu(j)
-
-        # return the mean
-        return Iij * np.exp(psi_sum + tau2_sum) * np.exp(alpha_j * (mu_j - np.log(Iij) - tau2_sum))
-
-    def _eta(self, j: int) -> float:
-        """
-        Eta parameter for log paid losses at ultimate conditional on data in
-        both paid and incurred triangles.
-
-        Given in Theorem 2.4 of the paper. 
-
-        Calculated as:
-
-        (sum from 0 to j of the phi values)
-
-        """
-        # sum of phi values
-        phi_sum = np.sum(self.phi[:j+1])
-
-        # return the eta value
-        return phi_sum
-
-    def _w2(self, j: int) -> float:
-        """
-        w^2 parameter for log paid losses at ultimate conditional on data in
-        both paid and incurred triangles.
-
-        Given in Theorem 2.4 of the paper. 
-
-        Calculated as:
-
-        (sum from 0 to j of the sigma squared values)
-
-        """
-        # sum of sigma squared values
-        sigma2_sum = np.sum(self.sigma2[:j+1])
-
-        # return the w2 value
-        return sigma2_sum
-
-    def _beta(self, j: int) -> float:
-        """
-        Beta credibility parameter for log paid losses at ultimate conditional
-        on data in both paid and incurred triangles.
-
-        Given in Theorem 2.4 of the paper. 
-
-        Calculated as:
-
-        [v2(J) - w2(j)]
-        /
-        [v2(j) - w2(j)]
-        """
-        return (self._v2(self.J) - self._w2(j)) / (self._v2(j) - self._w2(j))
-
-    def _cond_log_paid_mean_ultimate(self, i: int, j: int
-                                     ) -> float:
+    def cond_log_paid_mean_ultimate(self) -> np.ndarray:
         """
         Mean of the conditional distribution of the log paid ultimate losses
-        for origin period i, conditional on data in both paid and incurred
-        triangles through development year j.
-
-        Given in Theorem 2.4 of the paper.
+        for each accident year, conditional on data in both paid and
+        incurred triangles through its latest development year j. Given in
+        Theorem 2.4 of the paper.
 
         Calculated as:
 
@@ -747,1113 +608,1030 @@ class PaidIncurredChain(BaseEstimator):
         +
         beta(j) * (log I_{i,j} - mu(j))
         """
-        # other values
-        mu_J = self._mu(self.J)
-        beta_j = self._beta(j)
-        eta_j = self._eta(j)
-        P_ij = self.P.iloc[i, j]
-        I_ij = self.I.iloc[i, j]
-        mu_j = self._mu(j)
+        j, logP, logI = self._diagonal()
+        mu, beta = self.mu(), self.beta()[j]
+        return mu[-1] + (1 - beta) * (logP - self.eta()[j]) + beta * (logI - mu[j])
 
-        # return the mean
-        cond_mean = mu_J
-        cond_mean += (1 - beta_j) * (np.log(P_ij) - eta_j)
-        cond_mean += beta_j * (np.log(I_ij) - mu_j)
-
-        return cond_mean
-
-    def _cond_log_paid_var_ultimate(self, i: int, j: int
-                                    ) -> float:
+    def cond_log_paid_var_ultimate(self) -> np.ndarray:
         """
         Variance of the conditional distribution of the log paid ultimate
-        losses for origin period i, conditional on data in both paid and
-        incurred triangles through development year j.
-
-        Given in Theorem 2.4 of the paper.
+        losses for each accident year, conditional on data in both paid and
+        incurred triangles through its latest development year j. Given in
+        Theorem 2.4 of the paper.
 
         Calculated as:
 
         (1 - beta(j)) * (v2(J) - w2(j))
         """
-        # other values
-        beta_j = self._beta(j)
-        v2_J = self._v2(self.J)
-        w2_j = self._w2(j)
+        j, _, _ = self._diagonal()
+        return (1 - self.beta()[j]) * (self.v2()[-1] - self.w2()[j])
 
-        # return the variance
-        return (1 - beta_j) * (v2_J - w2_j)
-
-    def _pic_ultimate_loss_chain_ladder_adjustment(self, i: int, j: int
-                                                   ) -> float:
+    def chain_ladder_adjustment(self) -> np.ndarray:
         """
         Adjustment factor applied to the standard chain ladder ultimate
-        loss based on paid data only. This adjustment factor compares the 
-        incurred-paid ratios and corresponds to the observed residuals:
+        loss of each accident year based on paid data only. This adjustment
+        factor compares the incurred-paid ratios and corresponds to the
+        observed residuals:
 
         log[I_{i,j} / P_{i,j}] - (mu(j) - eta(j))
 
         A large incurred-paid ratio will result in a large positive adjustment
-        to the classical chain ladder ultimate loss predictor. 
-
-        Note that this is a similar adjustment to the one used in the
-        Munich chain ladder method that also uses the observed incurred-paid
-        ratios to adjust the chain ladder ultimate loss predictor.
-
-        Given as a remark to Theorem 2.4 of the paper.
-
-        Calculated as (numbered steps correspond to the numbered equations
-        in the calculation below):
-
-        (1) exp[
-        (2)     beta(j)
-                *
-                (
-        (3)         log [I_{i,j} / P_{i,j}]
-                    -
-        (4)         (mu(j) - eta(j))
-                    - 
-        (5)         (sum from j+1 to J of sigma^2/2 values)
-                )
-            ]
-        """
-        # other values
-        beta_j = self._beta(j)
-        I_ij = self.I.iloc[i, j]
-        P_ij = self.P.iloc[i, j]
-        mu_j = self._mu(j)
-        eta_j = self._eta(j)
-        sigma2_sum = np.sum(self.sigma2[j+1:])
+        to the classical chain ladder ultimate loss predictor, similar to the
+        Munich chain ladder method. Given as a remark to Theorem 2.4 of the
+        paper.
 
-        # calculate the adjustment
-        cl_adjustment = np.log(I_ij / P_ij)   # (3)
-        cl_adjustment -= (mu_j - eta_j)       # (4)
-        cl_adjustment -= (sigma2_sum / 2)     # (5)
-        cl_adjustment *= beta_j               # (2)
-        cl_adjustment = np.exp(cl_adjustment)  # (1)
+        Calculated as:
 
-    def _pic_ultimate_loss_prediction(self, i: int, j: int
-                                      ) -> float:
+        exp[
+            beta(j)
+            *
+            (
+                log [I_{i,j} / P_{i,j}]
+                -
+                (mu(j) - eta(j))
+                -
+                (sum from j+1 to J of sigma^2/2 values)
+            )
+        ]
         """
-        Predicted ultimate loss for origin period i, conditional on data in
-        both paid and incurred triangles through development year j, and 
-        parameter vector Theta.
+        j, logP, logI = self._diagonal()
+        residual = logI - logP - (self.mu()[j] - self.eta()[j])
+        return np.exp(self.beta()[j] * (residual - self._future_sum(self.sigma2) / 2))
 
-        Given in Corollary 2.5 of the paper.
+    def ultimate_loss_prediction(self) -> np.ndarray:
+        """
+        Predicted ultimate loss for each accident year, conditional on data
+        in both paid and incurred triangles and the parameters. Given in
+        Corollary 2.5 of the paper.
 
         Calculated as:
 
-        (1) P_{i,j}
-            *
-        (2) exp[
-        (3)     (sum from j+1 to J of phi_j values)
-                +
-        (4)     (sum from j+1 to J of sigma^2/2 values)
-            ]
-            *
-        (5) adjustment factor
+        P_{i,j}
+        *
+        exp[
+            (sum from j+1 to J of phi values)
+            +
+            (sum from j+1 to J of sigma^2/2 values)
+        ]
+        *
+        adjustment factor
         """
-        # other values
-        P_ij = self.P.iloc[i, j]
-        phi_sum = np.sum(self.phi[j+1:])
-        sigma2_sum = np.sum(self.sigma2[j+1:])
-        cl_adjustment = self._pic_ultimate_loss_chain_ladder_adjustment(i, j)
-
-        # calculate the prediction step by step
-        pred = phi_sum + (sigma2_sum / 2)  # (3) + (4)
-        pred = np.exp(pred)               # (2)
-        pred *= P_ij                      # (1)
-        pred *= cl_adjustment             # (5)
-
-        return pred
+        _, logP, _ = self._diagonal()
+        cl = np.exp(logP + self._future_sum(self.phi) + self._future_sum(self.sigma2) / 2)
+        return cl * self.chain_ladder_adjustment()
 
     #########################################################
     # This section reproduces the calculations in section 3 #
     #########################################################
 
-    def _hash(self, j: int
-              ) -> int:
-        """
-        Hash (#) function from the paper. This is the number of
-        future development years. See Theorem 3.2 in the paper.
-        """
-        return self.J - j + 1
-
-    def n_future_development_years(self):
-        """
-        Number of future development years. See Theorem 3.2 in the paper.
-        """
-        return pd.Series(self._hash(j) for j in range(self.J)).to_numpy()
-
-    def _gammaP(self, j: int
-                ) -> float:
+    def gammaP(self) -> np.ndarray:
         """
-        GammaP credibility weight for the posterior distribution of
-        phi. See Theorem 3.2 in the paper.
+        Credibility weights for the posterior distribution of phi given the
+        paid data only. See Theorem 3.2 in the paper.
 
         Calculated as:
-        hash(j)
-        / 
+        #(j)
+        /
         (
-            hash(j)
+            #(j)
             +
             sigma^2_j / s^2_j
         )
         """
-        sigma2_j = self.sigma2[j]
-        s2_j = self.s2[j]
-        return self._hash(j) / (self._hash(j) + (sigma2_j / s2_j))
-
-    def gammaP(self) -> np.ndarray:
-        """
-        Credibility weights for the posterior distribution of phi.
-        See Theorem 3.2 in the paper.
-        """
-        denom = self.n_future_development_years(
-        )[:-1] + (np.divide(self.sigma2, self.s2))
-        num = self.n_future_development_years()[:-1]
-        return np.divide(num, denom)
+        n = self.n_observations("paid")
+        return n / (n + self.sigma2 / self.prior_s2)
 
-    def _empirical_phi_mean(self, j: int
-                            ) -> float:
+    def posterior_phi_mean(self) -> np.ndarray:
         """
-        Empirical mean of the posterior distribution of phi_j.
-
-        Given by Theorem 3.2 in the paper.
-
-        Calculated as:
-        (1) sum of the log paid LDFs from 0 to J - j
-        /
-        (2) hash(j)
-        """
-        paid_ldfs = [self._paid_ldf(i) for i in range(self.J - j + 1)]
-        return np.sum(np.log(paid_ldfs)) / self._hash(j)
-
-    def empirical_phi_mean(self) -> np.ndarray:
-        """
-        Empirical means of the posterior distribution of phi.
-        """
-        return self.ldf_estimator('paid')
-
-    def posterior_phi_mean(self) -> float:
-        """
-        Posterior mean of phi_j, given the observed data.
-
-        Given by Theorem 3.2 in the paper.
+        Posterior mean of phi given the paid data only. Given by Theorem 3.2
+        in the paper.
 
         Calculated as:
 
         (1) gammaP(j) * empirical_phi_mean(j)
         +
-        (2) (1 - gammaP(j)) * phi(j)
+        (2) (1 - gammaP(j)) * prior_phi(j)
         """
-        post = np.multiply(self.gammaP(), self.empirical_phi_mean())
-        post += np.multiply((1 - self.gammaP()), self.prior_phi)
-        return post
+        gamma = self.gammaP()
+        return gamma * self.empirical_phi_mean() + (1 - gamma) * self.prior_phi
 
-    def _posterior_phi_sample_variance(self, j: int
-                                       ) -> float:
+    def posterior_phi_sample_variance(self) -> np.ndarray:
         """
-        Posterior variance of phi_j, given the observed data.
-
-        Given by Theorem 3.2 in the paper.
+        Posterior variance of phi given the paid data only. Given by
+        Theorem 3.2 in the paper.
 
         Calculated as:
 
         1
-        / 
+        /
         [
             ( 1/ s2(j) )
             +
-            ( hash(j) / sigma^2_j )
+            ( #(j) / sigma^2_j )
         ]
         """
-        s2_j = self.s2[j]
-        sigma2_j = self.sigma2[j]
-        return 1 / ((1 / s2_j) + (self._hash(j) / sigma2_j))
-
-    def posterior_phi_sample_variance(self) -> np.ndarray:
-        """
-        Posterior sample variances of phi.
-        """
-        one = np.power(self.s2, -1)
-        two = np.divide(self.n_future_development_years()[:-1], self.sigma2)
-        three = np.add(one, two)
-        return np.power(three, -1)
+        return 1 / (1 / self.prior_s2 + self.n_observations("paid") / self.sigma2)
 
-    def _posterior_ultimate_paid_loss(self, i: int
-                                      ) -> float:
+    def posterior_ultimate_paid_loss(self) -> np.ndarray:
         """
-        Posterior mean of the ultimate loss for origin period i, based
-        on the paid loss data.
-
-        Given as Equation 3.1 in the paper.
+        Posterior mean of the ultimate loss for each accident year, based
+        on the paid loss data only. Given as Equation 3.1 in the paper.
 
         Calculated as:
 
-        (1) P_{i, J-i} 
-            *
-        (2) product from l = J-i+1 to J of [
-        (3)     exp[
-        (4)         posterior_phi_mean(l)
-                    +
-        (5)         sigma^2(l) / 2
-                    +
-        (6)         posterior_phi_sample_variance(l) / 2
-                ]
+        P_{i, J-i}
+        *
+        product from l = J-i+1 to J of [
+            exp[
+                posterior_phi_mean(l)
+                +
+                sigma^2(l) / 2
+                +
+                posterior_phi_sample_variance(l) / 2
             ]
+        ]
         """
-        P_ij = self.P.iloc[i, self.J - i]
-        post_phi_mean = [self._posterior_phi_mean(
-            l) for l in range(self.J - i + 1, self.J + 1)]
-        sigma2 = [self.sigma2[l] for l in range(self.J - i + 1, self.J + 1)]
-        post_phi_var = [self._posterior_phi_sample_variance(
-            l) for l in range(self.J - i + 1, self.J + 1)]
+        _, logP, _ = self._diagonal()
+        log_ldf = (self.posterior_phi_mean()
+                   + self.sigma2 / 2
+                   + self.posterior_phi_sample_variance() / 2)
+        return np.exp(logP + self._future_sum(log_ldf))
 
-        # calculate the prediction step by step
-        ultimate = post_phi_mean + (sigma2 / 2)  # (4) + (5)
-        ultimate += (post_phi_var / 2)           # (6)
-        ultimate = np.exp(ultimate)              # (3)
-        ultimate = np.prod(ultimate)             # (2)
-        ultimate *= P_ij                         # (1)
+    def gammaI(self) -> np.ndarray:
+        """
+        Credibility weights for psi given the incurred data only. See
+        Theorem 3.3 in the paper.
 
-        return ultimate
+        Calculated as:
+        #(j) - 1
+        /
+        (
+            #(j) - 1
+            +
+            tau^2_j / t^2_j
+        )
 
-    def posterior_ultimate_paid_loss(self) -> np.ndarray:
+        where #(j) - 1 is the number of observed log incurred LDFs.
         """
-        Posterior means of the ultimate paid loss for each origin period.
+        n = self.n_observations("incurred")
+        return n / (n + self.tau2 / self.prior_t2)
+
+    def credibility_weighted_psi_mean(self) -> np.ndarray:
         """
-        P = self.P.iloc[:, :-1]
-        posterior_phi_mean = self.posterior_phi_mean()
-        sigma2 = self.sigma2
-        posterior_phi_var = self.posterior_phi_sample_variance()
+        Credibility weighted mean of psi, calculated from the observed data.
+        Given by Theorem 3.3 in the paper.
 
-        # calculate the prediction step by step
-        ultimate = np.add(posterior_phi_mean, (sigma2 / 2))  # (4) + (5)
-        ultimate = np.add(ultimate, (posterior_phi_var / 2))  # (6)
-        ultimate = np.exp(ultimate)                          # (3)
-        ultimate = np.flip(ultimate)              # (2)
-        ultimate = np.cumprod(ultimate)
-        ultimate = np.flip(ultimate)              # (2)
-        ultimate = np.multiply(P, ultimate)           # (1)
+        Calculated as:
 
-        return ultimate
+        (1) gammaI(j) * empirical_psi_mean(j)
+            +
+        (2) (1 - gammaI(j)) * prior_psi(j)
+        """
+        gamma = self.gammaI()
+        return gamma * self.empirical_psi_mean() + (1 - gamma) * self.prior_psi
 
-    def _aI_element(self, n: int, m: int
-                    ) -> float:
+    def _incurred_prior(self) -> tuple:
+        """
+        Prior mean and variance of the parameters of the incurred only
+        posterior: psi_0, ..., psi_{J-1}, followed by the sum of the phi
+        values (the mean of log I_{i,J}).
         """
-        Element from a^I matrix at row n and column m. 
-        a^I is the inverse of the posterior covariance matrix of psi.
+        mean = np.append(self.prior_psi, np.sum(self.prior_phi))
+        var = np.append(self.prior_t2, np.sum(self.prior_s2))
+        return mean, var
 
-        Given by Theorem 3.3 in the paper. 
+    def aI_matrix(self) -> np.ndarray:
+        """
+        a^I matrix: the inverse of the posterior covariance matrix of
+        (psi_0, ..., psi_{J-1}, sum of the phi values) given the incurred
+        data only. Given by Theorem 3.3 in the paper.
 
         Calculated as:
 
-        (1) sum from j = 0 to min(n,m) of [1 / v2(j)]
-            +
-            [
-                (
-        (2)         [1 / t2(n)]
+        a^I_{n,m} = (sum from j = 0 to min(n,m) of [1 / v2(j)])
                     +
-        (3)         [(J - n) / tau2(n)]
-                )
-                *
-        (4)     1_{n=m}
-            ]
+                    [1 / t2(n) + #(n) / tau2(n)] * 1_{n=m}
+
+        where the sum of the phi values enters every mu(j) with the opposite
+        sign to the psi values, so its row and column of the sums are
+        negated. The sums are cumulative sums indexed by min(n, m).
         """
-        v2 = self.v2[:min(n, m) + 1]
-        t2 = self.t2[n]
-        tau2 = self.tau2[n]
-        J = self.J
+        _, var = self._incurred_prior()
+        S = np.cumsum(1 / self.v2())
+        idx = np.arange(self.J)
+        a = S[np.minimum.outer(idx, idx)]
 
-        # calculate the element step by step
-        a = 1 / t2           # (2)
-        a += (J - n) / tau2  # (3)
-        a *= (1 == (n == m))  # (4)
-        a += np.sum(1 / v2)  # (1)
+        # the last parameter is the sum of the phi values, which enters
+        # mu(j) with the opposite sign to the psi values
+        sign = np.append(np.ones(self.J - 1), -1)
+        a *= np.outer(sign, sign)
 
+        data = np.append(self.n_observations("incurred") / self.tau2, 0)
+        a[idx, idx] += 1 / var + data
         return a
 
-    def _aI_matrix(self) -> np.ndarray:
+    def bI(self) -> np.ndarray:
         """
-        Posterior covariance matrix of psi.
-
+        b^I vector, so that the posterior mean of (psi_0, ..., psi_{J-1},
+        sum of the phi values) given the incurred data only is a^I^-1 b^I.
         Given by Theorem 3.3 in the paper.
 
         Calculated as:
 
-        (1) a^I_{n,m} = aI_element(n,m)
-        """
-        aI = np.zeros((self.J + 1, self.J + 1))
-        for n in range(self.J + 1):
-            for m in range(self.J + 1):
-                aI[n, m] = self._aI_element(n, m)
-        return aI
+        (1) psi(j) / t2(j)
+            +
+        (2) (sum from i = 0 to J-j-1 of log[I_{i,j+1} / I_{i,j}]) / tau2(j)
+            -
+        (3) sum from i = 0 to j of [log I_{J-i, i} / v2(i)]
 
-    def _gammaI(self, j: int
-                ) -> float:
+        with the sign of (3) flipped for the sum of the phi values.
         """
-        GammaI credibility weight for the posterior distribution of
-        psi. See Theorem 3.3 in the paper.
+        mean, var = self._incurred_prior()
+        _, logI = self._diagonal_by_development()
+        b = mean / var
+        b[:-1] += np.nansum(self._zeta, axis=0) / self.tau2
+        b[:-1] -= np.cumsum(logI / self.v2())[:-1]
+        b[-1] += np.sum(logI / self.v2())
+        return b
 
-        Calculated as:
-        hash(j) - 1
-        / 
-        (
-            hash(j)
-            - 
-            1
-            +
-            tau^2_j / t^2_j
-        )
+    def posterior_psi_mean(self) -> np.ndarray:
         """
-        hash_j = self._hash(j)
-        tau2_j = self.tau2[j]
-        t2_j = self.t2[j]
-        return (hash_j - 1) / (hash_j - 1 + (tau2_j / t2_j))
-
-    def _empirical_psi_mean(self, j: int
-                            ) -> float:
+        Posterior mean of psi given the incurred data only. Given by
+        Theorem 3.3 in the paper.
         """
-        Empirical mean of psi_j, calculated from the observed data.
-
-        Given by Theorem 3.3 in the paper.
+        return np.linalg.solve(self.aI_matrix(), self.bI())[:-1]
 
-        Calculated as:
+    #########################################################
+    # joint posterior given paid and incurred (Theorem 3.5) #
+    #########################################################
 
-        (1) sum from i=0 to J-j-1 of (
-            log(1 / _incurred_ldf(i, j+1))
-            )
-            /
-        (2) hash(j) - 1
+    def _residual_weights(self, sigma2=None, tau2=None) -> tuple:
         """
-        J = self.J
-        hash_j = self._hash(j)
-        log_ldf_sum = np.sum(np.log(1 / self._incurred_ldf(i, j + 1))
-                             for i in range(J - j))
-        return log_ldf_sum / (hash_j - 1)
+        The inverse variances 1 / (v2(j) - w2(j)) of the incurred-paid log
+        ratios on the diagonal, and the weighted log ratios, for every
+        development period but the last (which is fully developed, so its
+        incurred equals its paid). v2(j) - w2(j) is the sum of sigma2_m for
+        m > j plus the sum of tau2_n for n >= j.
 
-    def empirical_psi_mean(self) -> np.ndarray:
+        The variances can have leading (batch) dimensions.
         """
-        Empirical mean of psi_j, calculated from the observed data.
-        """
-        return self.ldf_estimator('incurred')
+        sigma2 = self.sigma2 if sigma2 is None else sigma2
+        tau2 = self.tau2 if tau2 is None else tau2
+        logP, logI = self._diagonal_by_development()
+        d = 1 / (_tail_sum(sigma2)[..., 1:] + _tail_sum(tau2))
+        return d, d * (logI - logP)[..., :-1]
 
-    def _credibility_weighted_psi_mean(self, j: int
-                                       ) -> float:
+    def posterior_precision(self, sigma2=None, tau2=None) -> np.ndarray:
         """
-        Credibility weighted mean of psi_j, calculated from the observed data.
+        A matrix: the inverse of the posterior covariance matrix of
+        (phi_0, ..., phi_J, psi_0, ..., psi_{J-1}) given the paid and
+        incurred data. Given by Theorem 3.5 in the paper.
 
-        Given by Theorem 3.3 in the paper.
+        The diagonal incurred-paid log ratio of development period j depends
+        on phi_m for m > j and psi_n for n >= j, so every block is a
+        cumulative sum S(k) = sum over j < k of 1 / (v2(j) - w2(j)), indexed
+        by the smaller of the two parameters:
 
-        Calculated as:
+        phi_n, phi_m : S(min(n, m))         + [1/s2(n) + #(n)/sigma2(n)] * 1_{n=m}
+        psi_n, psi_m : S(min(n, m) + 1)     + [1/t2(n) + #(n)/tau2(n)] * 1_{n=m}
+        phi_n, psi_m : -S(min(n, m + 1))
 
-        (1) gammaI(j) * empirical_psi_mean(j)
-            +
-        (2) (1 - gammaI(j)) * psi(j)
+        Variances with leading dimensions (eg one row per chain) give a
+        stack of matrices.
         """
-        gammaI = self._gammaI(j)
-        empirical_psi_mean = self._empirical_psi_mean(j)
-        psi = self.psi[j]
-        return (gammaI * empirical_psi_mean) + ((1 - gammaI) * psi)
+        sigma2 = self.sigma2 if sigma2 is None else sigma2
+        tau2 = self.tau2 if tau2 is None else tau2
+        d, _ = self._residual_weights(sigma2, tau2)
+        S = _prepend_zero(np.cumsum(d, axis=-1))
+        J = self.J
+        phi_idx, psi_idx = np.arange(J), np.arange(J - 1)
+
+        A = np.empty(d.shape[:-1] + (2 * J - 1, 2 * J - 1))
+        A[..., :J, :J] = S[..., np.minimum.outer(phi_idx, phi_idx)]
+        A[..., J:, J:] = S[..., np.minimum.outer(psi_idx, psi_idx) + 1]
+        A[..., :J, J:] = -S[..., np.minimum.outer(phi_idx, psi_idx + 1)]
+        A[..., J:, :J] = np.swapaxes(A[..., :J, J:], -1, -2)
 
-    def _bI_element_from_credibility(self, j: int
-                                     ) -> float:
+        diag = np.concatenate([
+            1 / self.prior_s2 + self.n_observations("paid") / sigma2,
+            1 / self.prior_t2 + self.n_observations("incurred") / tau2,
+        ], axis=-1)
+        idx = np.arange(2 * J - 1)
+        A[..., idx, idx] += diag
+        return A
+
+    def posterior_vector(self, sigma2=None, tau2=None) -> np.ndarray:
         """
-        Element j from b^I vector.
+        The vector (c_0, ..., c_J, b_0, ..., b_{J-1}), so that the posterior
+        mean of the parameters is A^-1 (c, b). Given by Theorem 3.5 in the
+        paper.
 
-        The posterior mean of psi given the data in the incurred losses triangle
-        is given by Theorem 3.3 in the paper, and is calculated as:
+        Calculated as:
 
-        Cred-wtd psi mean
-        *
-        [
-            1 / t2(j)
-            +
-            (
-                hash(j)
-                -
-                1
-            )
-            /
-            tau2(j)
-        ]
+        c_j = phi(j) / s2(j)
+              + (sum of log paid increments in column j) / sigma2(j)
+              + sum over k < j of log(I/P)_k / (v2(k) - w2(k))
+
+        b_j = psi(j) / t2(j)
+              + (sum of log incurred LDFs in column j) / tau2(j)
+              - sum over k <= j of log(I/P)_k / (v2(k) - w2(k))
+
+        where log(I/P)_k is the diagonal incurred-paid log ratio at
+        development period k.
         """
-        psi_j = self._credibility_weighted_psi_mean(j)
-        t2_j = self.t2[j]
-        tau2_j = self.tau2[j]
-        hash_j = self._hash(j)
-        return psi_j * ((1 / t2_j) + ((hash_j - 1) / tau2_j))
+        sigma2 = self.sigma2 if sigma2 is None else sigma2
+        tau2 = self.tau2 if tau2 is None else tau2
+        _, dx = self._residual_weights(sigma2, tau2)
+        Sx = _prepend_zero(np.cumsum(dx, axis=-1))
+        c = (self.prior_phi / self.prior_s2
+             + np.nansum(self._xi, axis=-2) / sigma2
+             + Sx[..., :self.J])
+        b = (self.prior_psi / self.prior_t2
+             + np.nansum(self._zeta, axis=-2) / tau2
+             - Sx[..., 1:])
+        return np.concatenate([c, b], axis=-1)
 
-    def _bI_element(self, j: int
-                    ) -> float:
+    def posterior_theta(self) -> tuple:
         """
-        Element j from b^I vector. 
+        Posterior mean vector and covariance matrix of
+        (phi_0, ..., phi_J, psi_0, ..., psi_{J-1}) given the paid and
+        incurred data.
+        """
+        cov = np.linalg.inv(self.posterior_precision())
+        cov = (cov + np.swapaxes(cov, -1, -2)) / 2
+        return (cov @ self.posterior_vector()[..., None])[..., 0], cov
 
-        The posterior mean of psi given the data in the incurred losses triangle
-        is given by Theorem 3.3 in the paper, and is calculated as:
+    #########################################################
+    # log-likelihood of the data (Equation 3.5)             #
+    #########################################################
 
-        posterior covariance matrix of psi
-        *
-        b^I vector
+    def _parameters(self, phi=None, psi=None, sigma2=None, tau2=None) -> tuple:
+        """
+        The given parameters, or the current ones where they are None.
+        """
+        return (self.phi if phi is None else np.asarray(phi, dtype=float),
+                self.psi if psi is None else np.asarray(psi, dtype=float),
+                self.sigma2 if sigma2 is None else np.asarray(sigma2, dtype=float),
+                self.tau2 if tau2 is None else np.asarray(tau2, dtype=float))
+
+    def _log_likelihood(self, phi, psi, sigma2, tau2,
+                        prior: bool = False,
+                        gradient: bool = False):
+        """
+        Log-likelihood of the paid and incurred data, and optionally its
+        gradients with respect to phi, psi, sigma2 and tau2.
+
+        The likelihood is a product of Gaussian densities, so it is summed
+        as log densities:
+
+        (Part A) the log paid increments, xi_{i,j} ~ N(phi_j, sigma2_j)
+        (Part C) the diagonal incurred-paid log ratios of the accident
+                 years that are not fully developed,
+                 log(I_{i,j} / P_{i,j}) ~ N(mu_j - eta_j, v2_j - w2_j)
+        (Part D) the log incurred LDFs, zeta_{i,j} ~ N(psi_j, tau2_j)
+
+        each less the log of the cell, the Jacobian from the log scale to the
+        paid and incurred losses (Parts A-6, B-9 and D-18).
+
+        mu_j - eta_j is the sum of phi_m for m > j less the sum of psi_n for
+        n >= j, and v2_j - w2_j is the sum of sigma2_m for m > j plus the sum
+        of tau2_n for n >= j, so the gradients of Part C with respect to the
+        parameters are cumulative sums over the development periods.
+
+        With `prior`, adds the log densities of the N(prior_phi, s2) and
+        N(prior_psi, t2) priors on phi and psi.
+        """
+        xi, zeta = self._xi, self._zeta
+        n_paid, n_incurred = self.n_observations("paid"), self.n_observations("incurred")
+
+        # Part A and Part D: sufficient statistics of each column
+        xi_ss = np.nansum((xi - phi[..., None, :]) ** 2, axis=-2)
+        zeta_ss = np.nansum((zeta - psi[..., None, :]) ** 2, axis=-2)
+        log_lik = (-0.5 * np.sum(n_paid * np.log(2 * np.pi * sigma2) + xi_ss / sigma2, axis=-1)
+                   - 0.5 * np.sum(n_incurred * np.log(2 * np.pi * tau2) + zeta_ss / tau2, axis=-1))
+
+        # Part C: one diagonal incurred-paid log ratio per development period,
+        # except the last (whose incurred equals its paid)
+        logP, logI = self._diagonal_by_development()
+        mean = _tail_sum(phi)[..., 1:] - _tail_sum(psi)
+        var = _tail_sum(sigma2)[..., 1:] + _tail_sum(tau2)
+        resid = (logI - logP)[..., :-1] - mean
+        log_lik -= 0.5 * np.sum(np.log(2 * np.pi * var) + resid ** 2 / var, axis=-1)
+
+        # Jacobian of the observed cells (the fully developed incurred is the
+        # paid, so it has no density of its own)
+        observed_I = ~np.isnan(self._logI)
+        observed_I[0, -1] = False
+        log_lik -= np.nansum(self._logP) + np.sum(self._logI[observed_I])
+
+        if prior:
+            log_lik -= 0.5 * np.sum(np.log(2 * np.pi * self.prior_s2)
+                                    + (phi - self.prior_phi) ** 2 / self.prior_s2, axis=-1)
+            log_lik -= 0.5 * np.sum(np.log(2 * np.pi * self.prior_t2)
+                                    + (psi - self.prior_psi) ** 2 / self.prior_t2, axis=-1)
+
+        if not gradient:
+            return log_lik
+
+        # derivatives of Part C with respect to each ratio's mean and
+        # variance, summed over the development periods j < m (phi, sigma2)
+        # or j <= n (psi, tau2)
+        g = _prepend_zero(np.cumsum(resid / var, axis=-1))
+        h = _prepend_zero(np.cumsum(-0.5 / var + 0.5 * resid ** 2 / var ** 2, axis=-1))
+
+        grad = {
+            "phi": np.nansum(xi - phi[..., None, :], axis=-2) / sigma2 + g,
+            "psi": np.nansum(zeta - psi[..., None, :], axis=-2) / tau2 - g[..., 1:],
+            "sigma2": -0.5 * n_paid / sigma2 + 0.5 * xi_ss / sigma2 ** 2 + h,
+            "tau2": -0.5 * n_incurred / tau2 + 0.5 * zeta_ss / tau2 ** 2 + h[..., 1:],
+        }
+        if prior:
+            grad["phi"] -= (phi - self.prior_phi) / self.prior_s2
+            grad["psi"] -= (psi - self.prior_psi) / self.prior_t2
+        return log_lik, grad
+
+    def log_likelihood(self, phi=None, psi=None, sigma2=None, tau2=None,
+                       prior: bool = False) -> float:
+        """
+        Log-likelihood of the paid and incurred data (Equation 3.5 in the
+        paper), at the given parameters or the current ones where they are
+        None. With `prior`, the log posterior density of phi and psi (up to
+        a constant).
+        """
+        return self._log_likelihood(*self._parameters(phi, psi, sigma2, tau2), prior=prior)
+
+    def log_likelihood_gradient(self, phi=None, psi=None, sigma2=None, tau2=None,
+                                prior: bool = False) -> dict:
+        """
+        Analytic gradients of `log_likelihood` with respect to phi, psi,
+        sigma2 and tau2, as a dictionary of arrays.
+        """
+        _, grad = self._log_likelihood(*self._parameters(phi, psi, sigma2, tau2),
+                                       prior=prior, gradient=True)
+        return grad
+
+    def FitParameters(self,
+                      estimator: str = "map",
+                      fit_variances: bool = True,
+                      method: str = "L-BFGS-B",
+                      **kwargs):
+        """
+        Maximum likelihood ("mle") or maximum a posteriori ("map")
+        estimates of phi, psi, sigma2 and tau2, using a quasi-Newton
+        optimizer with the analytic gradients, starting from the current
+        parameters. The variances are optimized on the log scale.
+
+        A development period with a single observation has an unbounded
+        likelihood as its variance goes to 0, so only the variances of the
+        periods with at least two observations are estimated, and the others
+        keep their current (extrapolated) values.
 
-        The b^I vector is given in the theorem as well, and is calculated as:
+        Parameters
+        ----------
+        estimator : str, default="map"
+            "mle", or "map" to add the priors on phi and psi.
+        fit_variances : bool, default=True
+            Whether to estimate sigma2 and tau2 as well as phi and psi.
+        method : str, default="L-BFGS-B"
+            The scipy.optimize.minimize method.
+        **kwargs
+            Passed to scipy.optimize.minimize.
 
-        (1) psi(j) / t2(j)
-            -
-            [
-        (2)     (sum from i = 0 to J-j-1 of log[_incurred_ldf(i, j)])
-                /
-        (3)     tau2(j)
-            ]
-            -
-        (4) sum from i = 0 to j of [
-                (log I_{J-i, i} / v2(i))
-                ]
+        Returns
+        -------
+        scipy.optimize.OptimizeResult
+            The result of the optimization. The fitted parameters replace
+            phi, psi, sigma2 and tau2.
         """
-        psi_j = self.psi[j]
-        t2_j = self.t2[j]
-        tau2_j = self.tau2[j]
+        if estimator not in ["mle", "map"]:
+            raise ValueError("estimator must be either 'mle' or 'map'.")
+        prior = estimator == "map"
+
         J = self.J
-        ldf = [self._incurred_ldf(i, j) for i in range(J - j)]
-        v2 = self.v2[:j + 1]
-        logI = [np.log(self.I.iloc[J - i, i]) for i in range(j + 1)]
+        n_paid, n_incurred = self.n_observations("paid"), self.n_observations("incurred")
+        free_sigma2 = (n_paid > 1) & fit_variances
+        free_tau2 = (n_incurred > 1) & fit_variances
+        sigma2, tau2 = self.sigma2.copy(), self.tau2.copy()
+
+        # the optimizer works on standardized parameters, each divided by its
+        # approximate standard error, since phi_0 is on a much larger scale
+        # than the log LDFs
+        x0 = np.concatenate([self.phi, self.psi,
+                             np.log(self.sigma2[free_sigma2]),
+                             np.log(self.tau2[free_tau2])])
+        scale = np.concatenate([np.sqrt(self.sigma2 / np.maximum(n_paid, 1)),
+                                np.sqrt(self.tau2 / np.maximum(n_incurred, 1)),
+                                np.sqrt(2 / n_paid[free_sigma2]),
+                                np.sqrt(2 / n_incurred[free_tau2])])
+
+        def unpack(z):
+            x = x0 + scale * z
+            phi, psi = x[:J], x[J:2 * J - 1]
+            log_var = x[2 * J - 1:]
+            sigma2[free_sigma2] = np.exp(log_var[:free_sigma2.sum()])
+            tau2[free_tau2] = np.exp(log_var[free_sigma2.sum():])
+            return phi, psi, sigma2, tau2
+
+        def objective(z):
+            log_lik, grad = self._log_likelihood(*unpack(z), prior=prior, gradient=True)
+            # chain rule for the log variances and the standardization
+            grad = np.concatenate([grad["phi"],
+                                   grad["psi"],
+                                   grad["sigma2"][free_sigma2] * sigma2[free_sigma2],
+                                   grad["tau2"][free_tau2] * tau2[free_tau2]])
+            return -log_lik, -grad * scale
+
+        result = minimize(objective, np.zeros(len(x0)), jac=True, method=method, **kwargs)
+
+        phi, psi, sigma2, tau2 = unpack(result.x)
+        self.phi, self.psi = phi.copy(), psi.copy()
+        self.sigma2, self.tau2 = sigma2.copy(), tau2.copy()
+        self.optimize_result = result
+        return result
+
+    def _ultimate_loadings(self) -> np.ndarray:
+        """
+        The E matrix: row i holds the loadings of accident year i's
+        predicted log ultimate on the parameters, (1 - beta(j)) on phi_m
+        for m > j and beta(j) on psi_n for n >= j.
+        """
+        j, _, _ = self._diagonal()
+        beta = self.beta()[..., j, None]
+        phi_idx, psi_idx = np.arange(self.J), np.arange(self.J - 1)
+        return np.concatenate([(1 - beta) * (phi_idx[None, :] > j[:, None]),
+                               beta * (psi_idx[None, :] >= j[:, None])], axis=-1)
+
+    def _posterior_ultimates(self) -> tuple:
+        """
+        The posterior mean and covariance matrix of the parameters, and the
+        ultimate loss and the MSEP matrix of the ultimates of every accident
+        year (see `Fit`). Every quantity can have leading batch dimensions.
+        """
+        theta, cov = self.posterior_theta()
+        j, logP, logI = self._diagonal()
+        beta = self.beta()[..., j]
+
+        E = self._ultimate_loadings()
+        Q = E @ cov @ np.swapaxes(E, -1, -2)
+        process = (1 - beta) * (self.v2()[..., -1:] - self.w2()[..., j])
+
+        ultimate = np.exp((1 - beta) * logP + beta * logI + (E @ theta[..., None])[..., 0]
+                          + process / 2 + np.diagonal(Q, axis1=-2, axis2=-1) / 2)
+        msep = ((np.exp(Q + process[..., None] * np.eye(self.M)) - 1)
+                * ultimate[..., :, None] * ultimate[..., None, :])
+        return theta, cov, ultimate, msep
 
-        # calculate the element step by step
-        b = psi_j / t2_j           # (1)
-        b -= np.sum(ldf) / tau2_j  # (2) / (3)
-        b -= np.sum(logI / v2)     # (4)
+    #########################################################
+    # Gibbs sampler for the Bayesian model                  #
+    #########################################################
 
-        return b
+    def _draw_theta(self, sigma2, tau2, rng: np.random.Generator) -> np.ndarray:
+        """
+        Draws (phi, psi) from their Gaussian conditional posterior
+        N(A^-1 (c, b), A^-1), for every row of the variances at once.
+
+        With A = L L', the draw is L'^-1 (L^-1 (c, b) + z).
+        """
+        L = np.linalg.cholesky(self.posterior_precision(sigma2, tau2))
+        cb = self.posterior_vector(sigma2, tau2)
+        y = np.linalg.solve(L, cb[..., None])
+        z = rng.standard_normal(y.shape)
+        return np.linalg.solve(np.swapaxes(L, -1, -2), y + z)[..., 0]
+
+    def _diagonal_log_likelihood(self, phi, psi, sigma2, tau2) -> np.ndarray:
+        """
+        Part C of the log-likelihood (see `_log_likelihood`), the only part
+        that ties the variances of different development periods together.
+        """
+        logP, logI = self._diagonal_by_development()
+        mean = _tail_sum(phi)[..., 1:] - _tail_sum(psi)
+        var = _tail_sum(sigma2)[..., 1:] + _tail_sum(tau2)
+        resid = (logI - logP)[..., :-1] - mean
+        return -0.5 * np.sum(np.log(2 * np.pi * var) + resid ** 2 / var, axis=-1)
+
+    def _draw_variances(self, phi, psi, shape: float,
+                        rng: np.random.Generator) -> tuple:
+        """
+        Draws sigma2 and tau2 from their inverse gamma conditional posteriors
+        given phi, psi and the log paid and incurred increments only (Parts A
+        and D), for every row of phi and psi at once.
+        """
+        xi_ss = np.nansum((self._xi - phi[..., None, :]) ** 2, axis=-2)
+        zeta_ss = np.nansum((self._zeta - psi[..., None, :]) ** 2, axis=-2)
+        sigma2 = (((shape - 1) * self.prior_sigma2 + xi_ss / 2)
+                  / rng.gamma(shape + self.n_observations("paid") / 2, size=xi_ss.shape))
+        tau2 = (((shape - 1) * self.prior_tau2 + zeta_ss / 2)
+                / rng.gamma(shape + self.n_observations("incurred") / 2, size=zeta_ss.shape))
+        return sigma2, tau2
+
+    def _ultimate_draws(self, phi, psi, sigma2, tau2,
+                        rng: np.random.Generator) -> np.ndarray:
+        """
+        Draws the ultimate loss of every accident year from its conditional
+        distribution given the data and each row of parameters (Theorem 2.4),
+        so the draws include the process variance.
+
+        The sums over the future development periods are taken directly
+        rather than as differences of mu, eta, v2 and w2.
+        """
+        j, logP, logI = self._diagonal()
+        # sums over m > j of phi_m and sigma2_m, and over n >= j of psi_n and tau2_n
+        future_phi = (_tail_sum(phi) - phi)[..., j]
+        future_sigma2 = (_tail_sum(sigma2) - sigma2)[..., j]
+        future_psi = _tail_sum(_append_zero(psi))[..., j]
+        future_tau2 = _tail_sum(_append_zero(tau2))[..., j]
+
+        denom = future_sigma2 + future_tau2
+        beta = np.divide(future_sigma2, denom, out=np.zeros_like(denom), where=denom > 0)
+        mean = ((1 - beta) * (logP + future_phi)
+                + beta * (logI + future_psi))
+        var = (1 - beta) * future_sigma2
+        return np.exp(mean + np.sqrt(var) * rng.standard_normal(mean.shape))
+
+    def Sample(self,
+               n_samples: int = 1000,
+               n_chains: int = 4,
+               burn_in: int = 1000,
+               thin: int = 1,
+               prior_shape: float = 3.0,
+               random_state: int = None) -> pd.DataFrame:
+        """
+        Samples the posterior of the Bayesian PIC model, where the variances
+        sigma2 and tau2 are also unknown, with a Gibbs sampler that runs
+        all chains at once.
+
+        Each iteration:
+
+        1. draws (phi, psi) given the variances from their exact Gaussian
+           conditional posterior N(A^-1 (c, b), A^-1) (Theorem 3.5), and
+        2. proposes sigma2 and tau2 from their inverse gamma conditional
+           posteriors given the log paid and incurred increments (Parts A
+           and D of the likelihood), with inverse gamma priors whose means
+           are prior_sigma2 and prior_tau2, and accepts the proposal on the
+           likelihood ratio of the diagonal incurred-paid ratios (Part C),
+           a Metropolis-within-Gibbs step that needs no tuning.
+
+        Each kept draw of the parameters then gives one draw of every
+        accident year's ultimate loss (including the process variance).
 
-    def _bI(self) -> np.ndarray:
-        """
-        Convenience function to calculate the b^I vector.
+        Parameters
+        ----------
+        n_samples : int, default=1000
+            The number of draws kept from each chain.
+        n_chains : int, default=4
+            The number of chains.
+        burn_in : int, default=1000
+            The number of iterations discarded at the start of each chain.
+        thin : int, default=1
+            Keep every `thin`-th iteration after the burn-in.
+        prior_shape : float, default=3.0
+            The shape of the inverse gamma priors on the variances. Larger
+            values keep the variances closer to their prior means, which
+            matters most for the last development periods.
+        random_state : int, default=None
+            The seed of the random number generator.
+
+        Returns
+        -------
+        pd.DataFrame
+            The reserve draws, one row per draw and one column per accident
+            year, plus the total.
         """
-        return np.array([self._bI_element(j) for j in range(self.J + 1)])
+        if prior_shape <= 1:
+            raise ValueError("prior_shape must be greater than 1.")
+
+        rng = np.random.default_rng(random_state)
+        J = self.J
 
-    def _likelihood(self) -> float:
+        # chains start near the current variances
+        jitter = np.exp(0.1 * rng.standard_normal((n_chains, 2 * J - 1)))
+        sigma2, tau2 = self.sigma2 * jitter[:, :J], self.tau2 * jitter[:, J:]
+
+        theta_trace = np.empty((n_chains, n_samples, 2 * J - 1))
+        var_trace = np.empty((n_chains, n_samples, 2 * J - 1))
+        accepted = np.zeros(n_chains)
+        for t in range(burn_in + n_samples * thin):
+            theta = self._draw_theta(sigma2, tau2, rng)
+            phi, psi = theta[:, :J], theta[:, J:]
+
+            # the proposal is the exact conditional of Parts A and D with the
+            # prior, so only the ratio of Part C is left to accept on
+            new_sigma2, new_tau2 = self._draw_variances(phi, psi, prior_shape, rng)
+            log_ratio = (self._diagonal_log_likelihood(phi, psi, new_sigma2, new_tau2)
+                         - self._diagonal_log_likelihood(phi, psi, sigma2, tau2))
+            accept = np.log(rng.uniform(size=n_chains)) < log_ratio
+            sigma2[accept], tau2[accept] = new_sigma2[accept], new_tau2[accept]
+
+            if t < burn_in:
+                continue
+            accepted += accept
+            if (t - burn_in) % thin == 0:
+                k = (t - burn_in) // thin
+                theta_trace[:, k] = theta
+                var_trace[:, k] = np.concatenate([sigma2, tau2], axis=1)
+
+        self.trace = {
+            "phi": theta_trace[..., :J],
+            "psi": theta_trace[..., J:],
+            "sigma2": var_trace[..., :J],
+            "tau2": var_trace[..., J:],
+        }
+        self.acceptance_rate = accepted / (n_samples * thin)
+
+        draws = {name: x.reshape(-1, x.shape[-1]) for name, x in self.trace.items()}
+        ultimate = self._ultimate_draws(draws["phi"], draws["psi"],
+                                        draws["sigma2"], draws["tau2"], rng)
+        _, logP, _ = self._diagonal()
+        self.ultimate_samples = pd.DataFrame(ultimate, columns=self.P.index)
+        self.reserve_samples = pd.DataFrame(ultimate - np.exp(logP), columns=self.P.index)
+        self.reserve_samples["Total"] = self.reserve_samples.sum(axis=1)
+        return self.reserve_samples
+
+    def PosteriorSummary(self, quantiles: list = [0.05, 0.5, 0.95]) -> pd.DataFrame:
+        """
+        Mean, standard deviation, coefficient of variation and quantiles of
+        the sampled reserves of each accident year and the total.
+        """
+        if getattr(self, "reserve_samples", None) is None:
+            raise ValueError("The posterior has not been sampled yet. Run `Sample` first.")
+        reserves = self.reserve_samples
+        summary = pd.DataFrame({"mean": reserves.mean(), "std": reserves.std()})
+        summary["cv"] = summary["std"] / summary["mean"]
+        return summary.join(reserves.quantile(quantiles).T)
+
+    def RHat(self) -> pd.Series:
+        """
+        Split-chain potential scale reduction factor (Gelman-Rubin R-hat) of
+        every sampled parameter. Values close to 1 indicate the chains have
+        mixed.
+        """
+        if getattr(self, "trace", None) is None:
+            raise ValueError("The posterior has not been sampled yet. Run `Sample` first.")
+        out = {}
+        for name, x in self.trace.items():
+            # split each chain in two halves, as separate chains
+            n = x.shape[1] // 2
+            chains = np.concatenate([x[:, :n], x[:, n:2 * n]], axis=0)
+            within = chains.var(axis=1, ddof=1).mean(axis=0)
+            between = n * chains.mean(axis=1).var(axis=0, ddof=1)
+            rhat = np.sqrt(((n - 1) / n * within + between / n) / within)
+            for age, value in zip(self.P.columns, rhat):
+                out[(name, age)] = value
+        return pd.Series(out, name="rhat")
+
+    def Fit(self, **kwargs) -> pd.DataFrame:
+        """
+        Ultimate losses, reserves and prediction errors of every accident
+        year given the paid and incurred data, with the variance parameters
+        fixed. Given by Theorem 3.5 and Theorem 4.1 in the paper.
+
+        With bayesian=True, the variances are unknown as well, so the
+        posterior is sampled instead (see `Sample`, which gets the keyword
+        arguments), and the ultimates and reserves are posterior means with
+        posterior standard deviations as prediction errors.
+
+        The ultimate of accident year i with latest development period j is
+
+        P_{i,j}^(1 - beta(j)) * I_{i,j}^beta(j)
+        * exp[E_i theta + (1 - beta(j)) * (v2(J) - w2(j)) / 2 + E_i A^-1 E_i' / 2]
+
+        and the mean squared error of prediction of the total reserve is
+
+        sum over i, k of U_i * U_k * (exp[1_{i=k} (1 - beta(j)) (v2(J) - w2(j)) + E_i A^-1 E_k'] - 1)
+
+        After fitting, phi and psi hold their posterior means, and s2 and t2
+        their posterior variances.
+
+        Returns
+        -------
+        pd.DataFrame
+            The latest paid and incurred, ultimate loss, reserve and
+            prediction error (root mean squared error of prediction) of
+            each accident year.
+        """
+        if self.bayesian:
+            return self._FitBayesian(**kwargs)
+
+        theta, cov, ultimate, self.msep_matrix = self._posterior_ultimates()
+        _, logP, logI = self._diagonal()
+
+        self.theta_posterior, self.posterior_cov = theta, cov
+        self.msep = self.msep_matrix.sum()
+        self.prediction_error = np.sqrt(self.msep)
+
+        self.phi, self.psi = theta[:self.J], theta[self.J:]
+        self.s2, self.t2 = np.diag(cov)[:self.J], np.diag(cov)[self.J:]
+
+        self.ultimates = pd.DataFrame({
+            'Cumulative Paid': np.exp(logP),
+            'Cumulative Incurred': np.exp(logI),
+            'Ultimate Loss': ultimate,
+            'Reserve': ultimate - np.exp(logP),
+            'Prediction Error': np.sqrt(np.diag(self.msep_matrix)),
+        }, index=self.P.index)
+        return self.ultimates
+
+    def _FitBayesian(self, **kwargs) -> pd.DataFrame:
+        """
+        Fit with unknown variances, from the posterior draws of `Sample`.
+        """
+        reserves = self.Sample(**kwargs)
+        _, logP, logI = self._diagonal()
+
+        self.phi = self.trace["phi"].mean(axis=(0, 1))
+        self.psi = self.trace["psi"].mean(axis=(0, 1))
+        self.sigma2 = self.trace["sigma2"].mean(axis=(0, 1))
+        self.tau2 = self.trace["tau2"].mean(axis=(0, 1))
+        self.s2 = self.trace["phi"].var(axis=(0, 1))
+        self.t2 = self.trace["psi"].var(axis=(0, 1))
+
+        self.msep = reserves["Total"].var()
+        self.prediction_error = np.sqrt(self.msep)
+        self.ultimates = pd.DataFrame({
+            'Cumulative Paid': np.exp(logP),
+            'Cumulative Incurred': np.exp(logI),
+            'Ultimate Loss': self.ultimate_samples.mean().to_numpy(),
+            'Reserve': reserves.drop(columns="Total").mean().to_numpy(),
+            'Prediction Error': reserves.drop(columns="Total").std().to_numpy(),
+        }, index=self.P.index)
+        return self.ultimates
+
+
+class BatchedPaidIncurredChain(PaidIncurredChain):
+    """
+    The paid-incurred chain model fit to a stack of paid and incurred
+    triangle pairs at once, eg one pair for each segment of a portfolio.
+
+    Every pair must have the same shape. The data are held as
+    (n_pairs, M, J) arrays, so the empirical priors, the joint posterior of
+    the parameters (a stack of A matrices inverted together), the ultimates
+    and the MSEP of every pair come from the same calculations as a single
+    `PaidIncurredChain`, with the pairs as a leading dimension.
+
+    Only the model with fixed variances is available. The methods of
+    `PaidIncurredChain` that estimate the parameters or sample the Bayesian
+    model, `FitParameters` and `Sample`, raise a TypeError: fit each pair
+    that needs them with its own `PaidIncurredChain`.
+    """
+
+    def __init__(self
+                 , paid_triangles=None
+                 , incurred_triangles=None
+                 , labels: list = None
+                 , prior_phi: np.ndarray = None
+                 , prior_psi: np.ndarray = None
+                 , prior_sigma2: np.ndarray = None
+                 , prior_tau2: np.ndarray = None
+                 , prior_s2: np.ndarray = None
+                 , prior_t2: np.ndarray = None
+                 ) -> None:
         """
-        Joint likelihood function of the data D_J and the model parameters psi and v.
+        Args:
+            paid_triangles:
+                The claims payments triangles: an (n_pairs, M, J) array, a list
+                of Triangles or data frames, or a dict of them keyed by label.
+            incurred_triangles:
+                The incurred losses triangles, in the same form and order as
+                the paid triangles.
+            labels (list):
+                The label of each pair. Default is None, in which case the
+                keys of a dict are used, or else 0, 1, ...
+            prior_phi, prior_psi, prior_sigma2, prior_tau2, prior_s2, prior_t2:
+                As for `PaidIncurredChain`, either one value per development
+                period (shared by every pair) or an (n_pairs, J) array.
+                Default is None, in which case the priors of each pair are
+                estimated from its own data.
+        """
+        self.paid_triangles = paid_triangles
+        self.incurred_triangles = incurred_triangles
+        self.bayesian = False
+
+        paid_labels, self.P, index, columns = self._stack(paid_triangles)
+        _, self.I, _, _ = self._stack(incurred_triangles)
+
+        if self.P.shape != self.I.shape:
+            raise ValueError("The paid and incurred triangles must have the same shape.")
+        if self.P.shape[1] != self.P.shape[2]:
+            raise ValueError("The triangles must have as many accident years as development years.")
+
+        labels = paid_labels if labels is None else list(labels)
+        if len(labels) != self.P.shape[0]:
+            raise ValueError(f"Expected {self.P.shape[0]} labels, got {len(labels)}.")
+        self.labels = pd.Index(labels, name="segment")
+        self.index, self.columns = index, columns
+
+        self.M, self.J = self.P.shape[1], self.P.shape[2]
+
+        self._logP = np.log(self.P)
+        self._logI = np.log(self.I)
+        self._xi = self.log_paid_increments()
+        self._zeta = self.log_incurred_increments()
+
+        self._set_priors(prior_phi, prior_psi, prior_sigma2, prior_tau2, prior_s2, prior_t2)
+
+    @staticmethod
+    def _stack(triangles) -> tuple:
+        """
+        The labels, the (n_pairs, M, J) array, and the accident and
+        development periods of a stack of triangles.
+        """
+        if isinstance(triangles, dict):
+            labels, triangles = list(triangles.keys()), list(triangles.values())
+        elif isinstance(triangles, np.ndarray):
+            labels, triangles = list(range(len(triangles))), triangles
+        else:
+            triangles = list(triangles)
+            labels = list(range(len(triangles)))
 
-        Given by Equation 3.5 in the paper.
+        if isinstance(triangles, np.ndarray):
+            frames = None
+            array = np.asarray(triangles, dtype=float)
+        else:
+            frames = [getattr(t, "tri", t) for t in triangles]
+            array = np.stack([np.asarray(f, dtype=float) for f in frames])
 
-        Calculated as:
+        if array.ndim != 3:
+            raise ValueError("The triangles must be stacked in an (n_pairs, M, J) array.")
 
-        (Part A)
-            (1) product from j=0 to J of {
-            (2)     product from i=0 to J-j of {
-            (3)         exp[
-            (4)             -(phi(j) - log(_paid_ldf(i, j)))^2
-                            /
-            (5)             (2 * sigma2(j))
-                        ]
-                        /
-            (6)         P_{i,j} * sqrt(2 * pi * sigma2(j))
-                    }
-                }
-                *
-        (Part B)        
-            (7)     product from i=1 to J of {
-                        [
-            (8)             - 1
-                            /
-            (9)             sqrt(2 * pi * [v2(J-i) - w2(J-i)]) * I_{i, J-i}
-                        ]
-                    }
-                *
-        (Part C)
-            (10)    exp{
-            (11)        -[mu(J-i) - eta(J-i) - log(I_{i, J-i} / P_{i, J-i})]^2
-                        /
-            (12)        (2 * [v2(J-i) - w2(J-i)])
-                    }
-                *
-        (Part D)
-            (13)    product from j=0 to J-1 of {
-            (14)        product from i=0 to J-j-1 of {
-            (15)            exp[
-            (16)                -(psi(j) + log(1 / _incurred_ldf(i, j+1)))^2
-                                /
-            (17)                (2 * tau2(j))
-                            ]
-                            /
-            (18)            I_{i, j+1} * sqrt(2 * pi * tau2(j))
-                    }
-        """
-        # ================
-        # == Part A ======
-        # ================
-
-        # Part A-4: -(phi(j) - log(_paid_ldf(i, j)))^2
-        phi = self.phi
-        paid_ldf = np.array([self._paid_ldf(i, j) for i in range(
-            self.J + 1) for j in range(self.J + 1 - i)])
-        paid_ldf = paid_ldf.reshape(self.J + 1, self.J + 1)
-        paid_ldf = np.log(paid_ldf)
-        A4 = np.square(phi - paid_ldf)
-
-        # Part A-5: (2 * sigma2(j))
-        sigma2 = self.sigma2
-        A5 = 2 * sigma2
-
-        # Part A-3: exp[A4 / A5]
-        A3 = np.exp(A4 / A5)
-
-        # Part A-6: P_{i,j} * sqrt(2 * pi * sigma2(j))
-        P = self.P
-        A6 = P * np.sqrt(2 * np.pi * sigma2)
-
-        # Part A-2: product from i=0 to J-j of {A3 / A6}
-        A2 = np.prod(A3 / A6, axis=1)
-
-        # Part A = Part A-1: product from j=0 to J of {A2}
-        A = np.prod(A2)
-
-        # ================
-        # == Part B ======
-        # ================
-
-        # Part B-8: - 1
-        B8 = -1
-
-        # Part B-9: sqrt(2 * pi * [v2(J-i) - w2(J-i)]) * I_{i, J-i}
-        v2 = self.v2
-        w2 = self.w2
-        I = self.I
-        vct = np.sqrt(2 * np.pi * (v2 - w2))
-        # multiply corresponding elements of vct and columns of I
-        B9 = vct * I
-
-        # Part B-7: product from i=1 to J of {B8 / B9}
-        B7 = np.prod(B8 / B9, axis=0)
-
-        # ================
-        # == Part C ======
-        # ================
-
-        # Part C-11: -[mu(J-i) - eta(J-i) - log(I_{i, J-i} / P_{i, J-i})]^2
-        mu = self.mu
-        eta = self.eta
-        inc_paid_ratio = np.where(
-            # handle division by zero
-            self.P == 0,
-            # if P_{i, J-i} == 0, set I_{i, J-i} / P_{i, J-i} to 0
-            np.zeros(self.I.shape),
-            # otherwise, calculate I_{i, J-i} / P_{i, J-i}
-            self.I / self.P
-        )
-        log_inc_paid_ratio = np.log(inc_paid_ratio)
-
-    # def _calculate_log_ratios(self):
-    #     """
-    #     Calculate the log ratios for both the claims payments and incurred losses triangles. Log ratios are
-    #     calculated as the natural logarithm of the ratio of the current element and its adjacent element in the
-    #     same row (i.e., the ratio of the current development year and the previous development year).
-    #     """
-    #     self.logP = self.P.copy()
-    #     self.logI = self.I.copy()
-
-    #     # for logP, first column is just the natural log of the first column of P
-    #     self.logP.iloc[:, 0] = np.log(self.P.iloc[:, 0])
-
-    #     # for logP, remaining columns are the natural log of the ratio of the current column and the previous column
-    #     for col in range(1, self.P.shape[1]):
-    #         self.logP.iloc[:, col] = np.where(
-    #             np.equal(self.P.iloc[:, col - 1], 0)
-    #             , 0
-    #             , np.log(self.P.iloc[:, col] / self.P.iloc[:, col - 1])
-    #             )
-
-    #     # every column of logI is the natural log of the ratio of the current column (i) and the next column (i + 1)
-    #     for col in range(self.I.shape[1] - 1):
-    #         self.logI.iloc[:, col] = np.where(
-    #             np.equal(self.I.iloc[:, col + 1], 0)
-    #             , 0
-    #             , np.log(self.I.iloc[:, col] / self.I.iloc[:, col + 1])
-    #             )
-
-    # def _estimate_sigma2_hat(self):
-    #     """
-    #     Estimate the sigma2.hat values for the log ratios of the claims payments triangle. The sigma2.hat values
-    #     are the variance of the log ratios for each development year. This method calculates the unbiased estimate
-    #     of the variance for each development year using the log ratios of the claims payments triangle.
-    #     """
-    #     # for all years but the last, sigma2.hat is the variance of the self.logP values for that year
-    #     self.sigma2_hat = pd.Series(np.var(self.logP.iloc[:, :-1], axis=0), index=self.logP.columns[:-1])
-
-    #     # for the last year, sigma2.hat is estimated by log-linear regression on the values of self.sigma2_hat
-    #     # already calculated
-    #     self.sigma2_hat[self.logI.columns[self.logI.shape[1] -1]] = self._estimate_sigma2_hat_last_year()[0]
-
-    #     # reset the index
-    #     self.sigma2_hat = self.sigma2_hat.reset_index(drop=True)
-
-    # def _estimate_sigma2_hat_last_year(self):
-    #     """
-    #     Estimate the sigma2.hat value for the last development year using log-linear regression on the values of
-    #     sigma2.hat already calculated for the previous development years.
-    #     """
-    #     y = pd.Series(np.log(np.var(self.logP.iloc[:, :-1], axis=0)), index=self.logP.columns[:-1])
-    #     X = pd.Series(np.arange(1, len(y) + 1), index=y.index)
-
-    #     # fit a ridge regression model to the data
-    #     ridge = Ridge(alpha=1.0, fit_intercept=True)
-    #     ridge.fit(X.values.reshape(-1, 1), y.values)
-
-    #     # return the predicted value for the last development year
-    #     return np.exp(ridge.predict(np.array([len(y)]).reshape(-1, 1)))
-
-    # def _estimate_tau2_hat(self):
-    #     """
-    #     Estimate the tau2.hat values for the log ratios of the incurred losses triangle. The tau2.hat values are
-    #     the variance of the log ratios for each development year. This method calculates the unbiased estimate of
-    #     the variance for each development year using the log ratios of the incurred losses triangle.
-    #     """
-    #     # for all years but the last two, tau2.hat is the variance of the self.logI values for that year
-    #     self.tau2_hat = pd.Series(np.var(self.logI.iloc[:, :-2], axis=0), index=self.logI.columns[:-2])
-
-    #     # for the last two years, tau2.hat is estimated by log-linear regression on the values of self.tau2_hat
-    #     # already calculated
-    #     self.tau2_hat[self.logI.columns[-1]] = self._estimate_tau2_hat_last_year()
-
-    #     # reset the index
-    #     self.tau2_hat = self.tau2_hat.reset_index(drop=True)
-
-    # def _estimate_tau2_hat_last_year(self):
-    #     """
-    #     Estimate the tau2.hat value for the last two development years using log-linear regression on the values of
-    #     tau2.hat already calculated for the previous development years.
-    #     """
-    #     y = pd.Series(np.log(np.var(self.logI.iloc[:, :-2], axis=0)), index=self.logI.columns[:-2])
-    #     X = pd.Series(np.arange(1, len(y) + 1), index=y.index)
-
-    #     # fit a ridge regression model to the data
-    #     ridge = Ridge(alpha=1.0, fit_intercept=True)
-    #     ridge.fit(X.values.reshape(-1, 1), y.values)
-
-    #     # return the predicted value for the last development year
-    #     return np.exp(ridge.predict(np.array([len(y)]).reshape(-1, 1)))
-
-    # def _estimate_v2_hat(self):
-    #     """
-    #     Current R code:
-    #     # v2_j estimates, j=1,...,J
-    #     v2 <- rep(NA,J)
-    #     for (i in 1:(J-1)) {
-    #         v2[i] <- sum(sigma2.hat) + sum(tau2.hat[i:J-1])
-    #     }
-    #     v2[J] <- sum(sigma2.hat)
-    #     """
-    #     # initialize array of length J full of zeros
-    #     self.v2_hat = pd.Series(np.zeros(len(self.sigma2_hat)), index=self.sigma2_hat.index)
-
-    #     # each element of v2_hat is the sum of total sum of sigma2_hat and the sum of tau2_hat for all
-    #     # development years greater than or equal to the current development year (eg i to J-1)
-    #     for i in range(len(self.v2_hat)):
-    #         self.v2_hat.loc[i] = np.sum(self.sigma2_hat) + np.sum(self.tau2_hat[i:])
-
-    #     # the last element of v2_hat is just the sum of sigma2_hat
-    #     self.v2_hat.loc[len(self.v2_hat) - 1] = np.sum(self.sigma2_hat)
-
-    #     # reset the index
-    #     self.v2_hat = self.v2_hat.reset_index(drop=True)
-
-    # def _estimate_w2_hat(self):
-    #     """
-    #     Current R code:
-    #     w2 <- rep(NA,J)
-    #     for (i in 1:J) {
-    #         w2[i] <- sum(sigma2.hat[1:i])
-    #     }
-    #     """
-    #     # initialize array of length J full of zeros
-    #     self.w2_hat = pd.Series(np.zeros(self.J), index=self.sigma2_hat.index)
-
-    #     # each element of w2_hat is the sum of sigma2_hat for all development years less than or equal to the
-    #     # current development year (eg 1 to i)
-    #     for i in self.sigma2_hat.index.tolist():
-    #         self.w2_hat.loc[i] = np.sum(self.sigma2_hat.loc[:i])
-
-    # def _estimate_c_hat(self):
-    #     """
-    #     Calculate the vector c of log-linear parameters.
-
-    #     The vector c contains the log-linear parameters for each development year.
-    #     The first element of c is the sum of the log ratios of the incurred losses triangle divided by
-    #     the paid losses triangle for the first development year.
-    #     The remaining elements of c are calculated using the formula:
-    #     c[j] = (1/sigma2_hat[j]) * sum(logP[:J+1-j,j]) +
-    #     sum(1/(v2[:j-1]-w2[:j-1]) * log(diag(I[J-j+1:J,:j-1])/diag(P[J-j+1:J,:j-1])))
-
-    #     Returns:
-    #     None
-
-    #     Current R code:
-    #     c <- c()
-    #     for (j in 1:J)	{
-    #         if (j==1) {
-    #         c[j] <- (1/sigma2.hat[j]) * sum(fP[1:J,j])
-    #         }
-    #         else if (j==2) {
-    #         c[j] <- (1/sigma2.hat[j]) * sum(fP[1:(J+1-j),j]) +
-    #         sum( 1/(v2[1:(j-1)]-w2[1:(j-1)]) *
-    #         log(triangleI[J:(J-j+2),1:(j-1)]/triangleP[J:(J-j+2),1:(j-1)]))
-    #         } else {
-    #             diag2 <- diag(triangleI[J:(J-j+2),1:(j-1)])
-    #             diag <- diag(triangleP[J:(J-j+2),1:(j-1)])
-    #             c[j] <- (1/sigma2.hat[j]) * sum(fP[1:(J+1-j),j]) +
-    #             sum( 1/(v2[1:(j-1)]-w2[1:(j-1)]) *
-    #             log(diag2[1:(j-1)]/diag[1:(j-1)]))
-    #         }
-    #     }
-    #     """
-    #     # Initialize an array of length J full of zeros
-    #     c = np.zeros(self.J)
-
-    #     # The first element of c
-    #     c[0] = (1 / self.sigma2_hat[0]) * np.sum(self.logP.iloc[:, 0])
-
-    #     print(f"J: {self.J} \ shape of self.P: {self.P.shape} \ shape of self.I: {self.I.shape}\n")
-
-    #     # print(f"sigma2_hat:\n{self.sigma2_hat}\n")
-    #     # print(f"w2_hat:\n{self.w2_hat}\n")
-    #     # print(f"v2_hat:\n{self.v2_hat}\n\n")
-
-    #     # Loop over each development year from 1 to J-1
-    #     for j in range(1, self.J):
-    #         print(f"j, row index, col index: {j}, {self.J-j}, {j}\n")
-
-    #         # Get the submatrices of I and P needed for the calculations
-    #         tri_I = self.I.iloc[self.J-j:self.J, :j]
-    #         tri_P = self.P.iloc[self.J-j:self.J, :j]
-
-    #         # tri_I = self.I.iloc[self.J-j+1:self.J, :j]
-    #         # tri_P = self.P.iloc[self.J-j+1:self.J, :j]
-
-    #         print(f"tri_I:\n{tri_I}\n")
-    #         print(f"tri_P:\n{tri_P}\n\n")
-
-    #         # this is currently getting the diagonal of the entire triangle
-    #         diag_I = np.diag(np.fliplr(tri_I))
-    #         diag_P = np.diag(np.fliplr(tri_P))
-
-    #         print(f"diag_I: {diag_I}\n")
-    #         print(f"diag_P: {diag_P}\n\n")
-
-    #         print(f"(1 / self.sigma2_hat[j])={1 / self.sigma2_hat[j]}\n")
-    #         print(f"np.sum(self.logP.iloc[self.J-j:self.J, j].values)=\n{np.sum(self.logP.iloc[self.J-j:self.J, j].values)}\n")
-    #         print(f"1 / (self.v2_hat[:j] - self.w2_hat[:j])=\n{1 / (self.v2_hat[:j] - self.w2_hat[:j])}\n")
-    #         print(f"np.log(diag_I / diag_P)=\n{np.log(diag_I / diag_P)}\n\n")
-
-    #         if j == 1:
-    #             c[j] = (1 / self.sigma2_hat[j]) * np.sum(self.logP.iloc[self.J-j:self.J, j].values) \
-    #                     + np.sum(1 / (self.v2_hat[:j] - self.w2_hat[:j]) * np.log(diag_I / diag_P))
-
-    #         else:
-    #             c[j] = (1 / self.sigma2_hat[j]) * np.sum(self.logP.iloc[self.J-j:self.J, j].values) \
-    #                     + np.sum(1 / (self.v2_hat[:j-1] - self.w2_hat[:j-1]) * np.log(diag_I / diag_P))
-
-    #     self.c = c
-
-    #     # # Initialize an array of length J full of zeros
-    #     # c = np.zeros(self.J)
-
-    #     # # The first element of c is the sum of the log ratios of the incurred losses triangle divided by
-    #     # # the paid losses triangle for the first development year
-    #     # # We can calculate this separately since it requires a different slice of self.logP and only depends on sigma2_hat[0]
-    #     # c[0] = np.sum(self.logI.iloc[:, 0] / self.P.iloc[:, 0]) / self.M
-
-    #     # print(f"self.J = {self.J}")
-    #     # print(f"self.M = {self.M}")
-    #     # print(f"self.sigma2_hat = {self.sigma2_hat}")
-
-    #     # # Loop over each development year from 2 to J-1
-    #     # for j in range(2, self.J):
-    #     #     print(f"j = {j}")
-    #     #     print(f"row: {self.J-j+1}:{self.J}")
-    #     #     print(f"col: {0}:{j-1}")
-    #     #     # Get the submatrices of I and P needed for the calculations
-    #     #     tri_I = self.I.iloc[self.J-j:self.J-1, :j-1]
-    #     #     tri_P = self.P.iloc[self.J-j:self.J-1, :j-1]
-
-    #     #     print(f"tri_I = {tri_I}")
-    #     #     print(f"tri_P = {tri_P}")
-
-    #     #     # Extract the diagonal elements of the submatrices using np.diag()
-    #     #     diag_I = np.diag(tri_I)
-    #     #     diag_P = np.diag(tri_P)
-
-    #     #     print(f"diag_I: {diag_I}")
-    #     #     print(f"diag_P: {diag_P}")
-
-    #     #     # Calculate the element of c using vectorized operations
-    #     #     # First, calculate the sum of the loiloc ratios of the incurred losses triangle divided by
-    #     #     # the paid losses triangle for the current development year
-    #     #     # Then, calculate the sum of the log ratios of the incurred losses triangle divided by
-    #     #     # the paid losses triangle for the previous development years using vectorized operations
-    #     #     # Finally, calculate the sum of the log ratios of the diagonal elements of I divided by the diagonal
-    #     #     # elements of P for the previous development years using vectorized operations
-
-    #     #     # tempA = self.logP.iloc[self.J-j:self.J, j-1]
-    #     #     tempA = (self.P.iloc[self.J-j, j-1] + 1e-9) / (self.sigma2_hat[j-1] + 1e-9)
-
-    #     #     print(f"tempA: {tempA}")
-    #     #     tempB = self.sigma2_hat[j-1]
-    #     #     print(f"tempB: {tempB}")
-
-    #     #     temp1 = np.sum(tempA / tempB)
-    #     #     print(f"temp1: {temp1}")
-    #     #     print(f"self.v2_hat[:j-1] = {self.v2_hat[:j-1]}\nsize: {self.v2_hat[:j-1].size}")
-    #     #     print(f"self.w2_hat[:j] = {self.w2_hat[:j]}\nsize: {self.w2_hat[:j].size}")
-    #     #     # print(f"temp_arr1 = self.v2_hat[:j-1] - self.w2_hat[:j] = {self.v2_hat[:j-1]} - {self.w2_hat[:j]}")
-    #     #     temp_arr1 = (self.v2_hat[:j-1] - self.w2_hat[:j])
-    #     #     print(f"temp_arr1: {temp_arr1}")
-    #     #     print(f"temp_arr2 = np.log(diag_I / diag_P) = np.log({diag_I} / {diag_P})")
-    #     #     temp_arr2 = np.log(np.divide(diag_I, diag_P))
-    #     #     print(f"temp_arr2: {temp_arr2}")
-    #     #     print(f"temp_arr3 = temp_arr2 / temp_arr1 = {temp_arr2} / {temp_arr1.values}")
-    #     #     temp_arr3 = np.divide(temp_arr2, temp_arr1)
-    #     #     print(f"temp_arr3: {temp_arr3}")
-    #     #     temp2 = np.sum(temp_arr3)
-    #     #     print(f"temp2: {temp2}")
-    #     #     c[j-1] = (np.sum(self.logP.iloc[self.J-j:self.J, j-1] / self.sigma2_hat[j-1])
-    #     #               + np.sum(1 / (self.v2_hat[:j-1] - self.w2_hat[:j]) * np.log(diag_I / diag_P)))
-
-    #     # # The last element of c is the sum of the log ratios of the incurred losses triangle divided by
-    #     # # the paid losses triangle for the final development year
-    #     # c[-1] = np.sum(self.logP.iloc[:, -1] / self.sigma2_hat[-1])
-
-    #     # # Set self.c to the resulting array of c values
-    #     # self.c = c
-
-    # def _estimate_b_hat(self):
-    #     """
-    #     Calculate the vector b of log-linear parameters.
-
-    #     The vector b contains the log-linear parameters for each incremental payment period.
-    #     The first element of b is calculated using a different formula than the rest of the elements.
-    #     The remaining elements of b are calculated using the formula:
-    #     b[j] = -(1/tau2_hat[j]) * sum(logI[:J-j,j]) -
-    #     sum(1/(v2[:j]-w2[:j]) * log(diag(I[J-j:J-1,:j])/diag(P[J-j:J-1,:j])))
-
-    #     Returns:
-    #     None
-
-    #     Current R code:
-    #     b <- c()
-    #     for (j in 1:(J-1))  {
-    #         if (j==1) {
-    #             b[j] <- -(1/tau2.hat[j]) * sum(fI[1:(J-j),j]) -
-    #             sum( 1/(v2[1:j]-w2[1:j]) *
-    #             log(triangleI[J:(J-j+1),1:j]/triangleP[J:(J-j+1),1:j]))
-    #         } else {
-    #             diag2 <- diag(triangleI[J:(J-j+1),1:j])
-    #             diag <- diag(triangleP[J:(J-j+1),1:j])
-    #             b[j] <- -(1/tau2.hat[j]) * sum(fI[1:(J-j),j]) -
-    #             sum( 1/(v2[1:j]-w2[1:j]) *
-    #             log(diag2[1:j]/diag[1:j]))
-    #         }
-    #     }
-    #     """
-    #     # Initialize an array of length J-1 full of zeros
-    #     b = np.zeros(self.J - 1)
-
-    #     # Loop over each development year from 1 to J-1
-    #     for j in range(1, self.J - 1):
-    #         # Calculate the element of b using vectorized operations
-    #         if j == 1:
-    #             # For the first development year, we use a different slice of logI and tau2_hat
-    #             b[j-1] = -(1/self.tau2_hat[j-1]) * np.sum(self.logI[:self.J-j, j-1]) \
-    #                       - np.sum(1 / (self.v2_hat[:j] - self.w2_hat[:j]) *
-    #                                np.log(self.I[self.J-j:self.J-1, :j] / self.P[self.J-j:self.J-1, :j]))
-    #         else:
-    #             # For the remaining development years, we extract the diagonal elements using np.diag()
-    #             # and use vectorized operations to calculate the element of b
-    #             diag_I = np.diag(self.I[self.J-j:self.J-1, :j])
-    #             diag_P = np.diag(self.P[self.J-j:self.J-1, :j])
-    #             b[j-1] = -(1/self.tau2_hat[j-1]) * np.sum(self.logI[:self.J-j, j-1]) \
-    #                       - np.sum(1 / (self.v2_hat[:j] - self.w2_hat[:j]) * np.log(diag_I[:j] / diag_P[:j]))
-
-    #     # Set self.b to the resulting array of b values
-    #     self.b = b
-
-    # def _estimate_Ainv(self):
-    #     """
-    #     Calculate the inverse of the covariance matrix A.
-    #     """
-    #     J = self.J
-    #     sigma2_hat = self.sigma2_hat
-    #     tau2_hat = self.tau2_hat
-    #     v2_hat = self.v2_hat
-    #     w2_hat = self.w2_hat
-
-    #     # Create indices for the diagonal and off-diagonal elements.
-    #     # diag_indices will be a tuple containing two arrays of equal length,
-    #     # each representing the row and column indices of the diagonal elements.
-    #     diag_indices = np.diag_indices(2 * J - 1)
-
-    #     # off_diag_indices will be a tuple containing two arrays of equal length,
-    #     # each representing the row and column indices of the off-diagonal elements (upper right block).
-    #     off_diag_indices = np.diag_indices_from(diag_indices, offset=J)
-
-    #     # Initialize A as a zero-filled (2 * J - 1) x (2 * J - 1) matrix.
-    #     A = np.zeros((2 * J - 1, 2 * J - 1))
-
-    #     # Set the diagonal elements of A.
-    #     # We concatenate two arrays: one for the elements corresponding to sigma2_hat, and one for tau2_hat.
-    #     # The first array is created by dividing an array of the form [J, J-1, ..., 1] by sigma2_hat.
-    #     # The second array is created by dividing an array of the form [J-1, J-2, ..., 1] by tau2_hat.
-    #     # After concatenation, we add the sum of (1 / (v2_hat - w2_hat)) to each element of the resulting array.
-    #     A[diag_indices] = np.concatenate([
-    #         (J - np.arange(J)) / sigma2_hat,
-    #         ((J - 1) - np.arange(J - 1)) / tau2_hat
-    #     ]) + np.sum(1 / (v2_hat[:, None] - w2_hat), axis=0)
-
-    #     # Set the off-diagonal elements of A (upper right block).
-    #     # We calculate the sum of (1 / (v2_hat - w2_hat)), excluding the last element, and assign it to the off-diagonal elements.
-    #     A[off_diag_indices] = -np.sum(1 / (v2_hat[:, None] - w2_hat), axis=0)[:-1]
-
-    #     # Set the lower left block of A by symmetry.
-    #     # The .T attribute transposes the matrix, so A.T[off_diag_indices] refers to the lower left block.
-    #     A.T[off_diag_indices] = A[off_diag_indices]
-
-    #     # Calculate the inverse of A to get the posterior covariance matrix.
-    #     # np.linalg.inv computes the inverse of a matrix.
-    #     self.Ainv = np.linalg.inv(A)
-
-    # def _calculate_theta_posterior(self):
-    #     # Combine c and b vectors
-    #     cb = np.concatenate([self.c, self.b])
-
-    #     # Calculate posterior parameters
-    #     self.theta_posterior = np.dot(self.Ainv, cb)
-
-    # def _calculate_beta_and_s2_posterior(self):
-    #     J = self.J
-
-    #     # Calculate beta
-    #     self.beta = [(self.v2_hat[J] - self.w2_hat[i]) / (self.v2_hat[i] - self.w2_hat[i]) for i in range(J - 1)]
-
-    #     # Calculate s2.posterior
-    #     self.s2_posterior = np.zeros(J - 1)
-    #     E = np.empty((J - 1, 2 * J - 1))
-
-    #     for i in range(1, J):
-    #         e = np.zeros(2 * J - 1)
-    #         e[J + 1 - i - 1: J - 1] = 1 - self.beta[J - i]
-    #         e[2 * J - i: 2 * J - 1] = self.beta[J - i]
-    #         E[i - 1, :] = e
-    #         self.s2_posterior[i - 1] = e @ self.Ainv @ e.T
-
-    # def _calculate_ultimate_loss_vector(self):
-    #     J = self.J
-    #     PIC_Ult = np.zeros(J - 1)
-
-    #     for i in range(1, J):
-    #         # Extract the corresponding beta value
-    #         beta_i = self.beta[J - i]
-
-    #         # Calculate the intermediate sums of theta_posterior values
-    #         sum_theta1 = np.sum(self.theta_posterior[J - i + 1:J])
-    #         sum_theta2 = np.sum(self.theta_posterior[2 * J - i: 2 * J - 1])
-
-    #         # Calculate the paid-to-incurred ratio (PIR) component
-    #         PIR = self.P.iloc[i, J - i] ** (1 - beta_i) * self.I.iloc[i, J - i] ** beta_i
-
-    #         # Calculate the exponential term involving the theta_posterior values
-    #         exp_theta_term = np.exp((1 - beta_i) * sum_theta1 + beta_i * sum_theta2)
-
-    #         # Calculate the exponential term involving the v2_hat and w2_hat values
-    #         exp_v2_w2_term = np.exp((1 - beta_i) * (self.v2_hat[J] - self.w2_hat[J - i]) / 2 + self.s2_posterior[i - 1] / 2)
-
-    #         # Combine the components to compute the ultimate loss estimate for the current development year
-    #         PIC_Ult[i - 1] = PIR * exp_theta_term * exp_v2_w2_term
-
-    #     self.PIC_Ult = PIC_Ult
-
-    # def _calculate_claims_reserves(self):
-    #     # Calculate the claims reserves by subtracting the diagonal values of the paid losses triangle from the ultimate loss vector
-    #     diag_P = np.diag(self.P)
-    #     PIC_Ris = self.PIC_Ult - diag_P
-
-    #     # Calculate the total claims reserves
-    #     PIC_RisTot = np.sum(PIC_Ris)
-
-    #     # Store the results as class attributes
-    #     self.PIC_Ris = PIC_Ris
-    #     self.PIC_RisTot = PIC_RisTot
-
-    # def _calculate_prediction_uncertainty(self):
-    #     # Initialize the mean squared error of prediction (MSEP)
-    #     msep = 0
-
-    #     # Loop over i and k from the second development year to the last development year
-    #     for i in range(1, self.J):
-    #         for k in range(1, self.J):
-    #             if i == k:
-    #                 # Update MSEP for the case when i equals k
-    #                 msep += ((np.exp((1 - self.beta[self.J - i]) * (self.v2_hat[-1] - self.w2_hat[-1 - i])
-    #                                 + self.E[i - 1].dot(self.Ainv).dot(self.E[k - 1])) - 1)
-    #                         * self.PIC_Ult[i - 1] * self.PIC_Ult[k - 1])
-    #             else:
-    #                 # Update MSEP for the case when i is not equal to k
-    #                 msep += ((np.exp(self.E[i - 1].dot(self.Ainv).dot(self.E[k - 1])) - 1)
-    #                         * self.PIC_Ult[i - 1] * self.PIC_Ult[k - 1])
-
-    #     # Calculate the prediction standard error (PIC.se) as the square root of the MSEP
-    #     PIC_se = np.sqrt(msep)
-
-    #     # Store the result as a class attribute
-    #     self.PIC_se = PIC_se
-
-    # def _fit_frequentist(self
-    #                      , return_df : bool = True
-    #                      ) -> Union[pd.DataFrame, None]:
-    #     # Calculate log ratios
-    #     self._calculate_log_ratios()
+        if frames is not None and isinstance(frames[0], pd.DataFrame):
+            index, columns = frames[0].index, frames[0].columns
+        else:
+            index = pd.RangeIndex(array.shape[1], name="accident_period")
+            columns = pd.RangeIndex(1, array.shape[2] + 1, name="development_period")
+        return labels, array, index, columns
 
-    #     # Estimate sigma2.hat and tau2.hat
-    #     self._estimate_sigma2_hat()
-    #     self._estimate_tau2_hat()
+    def _para_tbl(self, param: str) -> pd.DataFrame:
+        """
+        Helper function for ParameterTable, with a row for each pair and
+        development period.
+        """
+        if param not in ["phi", "psi", "sigma2", "tau2", "s2", "t2"]:
+            raise ValueError("Invalid parameter name.")
 
-    #     # Estimate v2.hat and w2.hat
-    #     self._estimate_v2_hat()
-    #     self._estimate_w2_hat()
+        prior = np.atleast_2d(getattr(self, f"prior_{param}"))
+        posterior = np.atleast_2d(getattr(self, param))
+        shape = (len(self.labels), max(prior.shape[-1], posterior.shape[-1]))
+        prior, posterior = np.broadcast_to(prior, shape), np.broadcast_to(posterior, shape)
+
+        out = pd.DataFrame({
+            "segment": np.repeat(self.labels, shape[1]),
+            "parameter": param,
+            "age": np.tile(self.columns[:shape[1]], shape[0]),
+            "prior": prior.ravel(),
+            "posterior": posterior.ravel(),
+        })
+        return out
 
-    #     # Estimate c.hat and b.hat
-    #     self._estimate_c_hat()
-    #     self._estimate_b_hat()
+    def FitParameters(self, *args, **kwargs):
+        raise TypeError("BatchedPaidIncurredChain only fits the model with fixed variances. "
+                        "To estimate the parameters of a pair, fit it on its own with "
+                        "PaidIncurredChain(paid, incurred).FitParameters().")
 
-    #     # Estimate Ainv
-    #     self._estimate_Ainv()
+    def Sample(self, *args, **kwargs):
+        raise TypeError("BatchedPaidIncurredChain only fits the model with fixed variances. "
+                        "To sample the Bayesian model of a pair, fit it on its own with "
+                        "PaidIncurredChain(paid, incurred, bayesian=True).Fit().")
 
-    #     # Calculate the posterior theta
-    #     self._calculate_theta_posterior()
-
-    #     # Calculate beta and s2.posterior
-    #     self._calculate_beta_and_s2_posterior()
-
-    #     # Calculate the ultimate loss vector
-    #     self._calculate_ultimate_loss_vector()
-
-    #     # Calculate the claims reserves
-    #     self._calculate_claims_reserves()
-
-    #     # Calculate the prediction uncertainty
-    #     self._calculate_prediction_uncertainty()
-
-    #     # Create the results DataFrame
-    #     results_df = pd.DataFrame({
-    #         'Cumulative Paid': np.diag(self.P),
-    #         'Cumulative Incurred': np.diag(self.I),
-    #         'Ultimate Loss': self.PIC_Ult,
-    #         'Reserve': self.PIC_Ris,
-    #         'Prediction Error': self.PIC_se
-    #     }, index=self.P.index)
-    #     self.ultimates = results_df
+    def Fit(self) -> pd.DataFrame:
+        """
+        Ultimate losses, reserves and prediction errors of every accident
+        year of every pair, with the variance parameters fixed (see
+        `PaidIncurredChain.Fit`).
 
-    #     # Return the results DataFrame if return_df is True
-    #     if return_df:
+        After fitting, `totals` holds the total ultimate loss, reserve and
+        prediction error of each pair, and `msep` and `prediction_error`
+        are Series indexed by the pair labels.
 
-    #         # Return the results DataFrame
-    #         return results_df
+        Returns
+        -------
+        pd.DataFrame
+            The latest paid and incurred, ultimate loss, reserve and
+            prediction error of each accident year, indexed by the pair label
+            and the accident period.
+        """
+        theta, cov, ultimate, self.msep_matrix = self._posterior_ultimates()
+        _, logP, logI = self._diagonal()
+
+        self.theta_posterior, self.posterior_cov = theta, cov
+        self.phi, self.psi = theta[:, :self.J], theta[:, self.J:]
+        variance = np.diagonal(cov, axis1=-2, axis2=-1)
+        self.s2, self.t2 = variance[:, :self.J], variance[:, self.J:]
+
+        self.msep = pd.Series(self.msep_matrix.sum(axis=(-2, -1)), index=self.labels, name="msep")
+        self.prediction_error = np.sqrt(self.msep).rename("prediction_error")
+
+        index = pd.MultiIndex.from_product([self.labels, self.index])
+        self.ultimates = pd.DataFrame({
+            'Cumulative Paid': np.exp(logP).ravel(),
+            'Cumulative Incurred': np.exp(logI).ravel(),
+            'Ultimate Loss': ultimate.ravel(),
+            'Reserve': (ultimate - np.exp(logP)).ravel(),
+            'Prediction Error': np.sqrt(np.diagonal(self.msep_matrix, axis1=-2, axis2=-1)).ravel(),
+        }, index=index)
+
+        self.totals = pd.DataFrame({
+            'Ultimate Loss': ultimate.sum(axis=-1),
+            'Reserve': (ultimate - np.exp(logP)).sum(axis=-1),
+            'Prediction Error': self.prediction_error.to_numpy(),
+        }, index=self.labels)
+        return self.ultimates
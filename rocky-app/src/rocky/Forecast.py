@@ -1,3 +1,29 @@
+"""
+Reserves under future calendar-period trend scenarios.
+
+A scenario is a path of log-scale calendar trends, one per future calendar
+period (eg np.log(1.05) for 5% inflation in that period). Calendar trends
+accumulate, so a forecast cell in calendar period c is scaled by the
+exponential of the sum of the trends of every future period up to c. With
+the (n_forecast, n_future) 0/1 matrix C of which future periods each cell has
+passed through, the forecast of every cell under every scenario is
+
+    yhat * exp(T @ C')
+
+for an (n_scenarios, n_future) matrix of trend paths T, and the reserves by
+accident and calendar period are one more matrix product with an indicator
+matrix. Scenarios are processed `chunk_size` at a time to bound memory.
+
+The trends are applied on top of the model's fitted forecast, which already
+includes any fitted calendar parameters for future periods (these are 0
+unless they were set by hand, since future periods are unobserved).
+
+`TrendProcess` fits a random walk with drift or an AR(1) process to the
+fitted calendar trends of the observed periods, and `SimulateReserves`
+draws future trend paths from it (a chunk of paths at a time) and pushes
+them through the same batched forecast, for a reserve distribution that
+reflects future trend uncertainty.
+"""
 try:
     from .triangle import Triangle
 except ImportError:
@@ -8,11 +34,167 @@ from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 
+TREND_PROCESSES = ["random_walk", "ar1"]
+
+
+@dataclass
+class TrendProcess:
+    """
+    Stochastic process for the log-scale calendar trend of each period (the
+    increments of the cumulative calendar trend).
+
+    - "random_walk": the cumulative trend is a random walk with drift, so
+      each period's trend is mu + sigma * e.
+    - "ar1": each period's trend reverts to mu, with
+      trend_t - mu = phi * (trend_{t-1} - mu) + sigma * e.
+
+    Parameters
+    ----------
+    process : str
+        Either "random_walk" or "ar1".
+    mu : float
+        The mean trend (the drift).
+    sigma : float
+        The standard deviation of the innovations.
+    phi : float, default=0
+        The AR(1) coefficient (0 for the random walk).
+    last : float, default=0
+        The trend of the latest observed period, where AR(1) paths start.
+    n_obs : int, default=0
+        The number of observed trends the process was fit to.
+    drift_uncertainty : bool, default=True
+        Whether each path draws its own mu from its sampling distribution,
+        N(mu, sigma^2 / n_obs).
+    """
+    process: str
+    mu: float
+    sigma: float
+    phi: float = 0.0
+    last: float = 0.0
+    n_obs: int = 0
+    drift_uncertainty: bool = True
+
+    @classmethod
+    def Fit(cls, trends, process: str = "random_walk", drift_uncertainty: bool = True):
+        """
+        Fits the process to the observed trends, in calendar order.
+        """
+        if process not in TREND_PROCESSES:
+            raise ValueError(f"process must be one of {TREND_PROCESSES}.")
+        trends = np.asarray(trends, dtype=float)
+        if len(trends) < 3:
+            raise ValueError("At least 3 calendar period trends are needed to fit a trend process.")
+
+        mu = trends.mean()
+        if process == "random_walk":
+            return cls(process, mu, trends.std(ddof=1), last=trends[-1],
+                       n_obs=len(trends), drift_uncertainty=drift_uncertainty)
+
+        # least squares on the lagged, centered trends, kept stationary
+        x, y = trends[:-1] - mu, trends[1:] - mu
+        phi = float(np.clip(x @ y / (x @ x), -0.99, 0.99)) if x @ x > 0 else 0.0
+        sigma = np.sqrt(np.sum((y - phi * x) ** 2) / (len(y) - 1))
+        return cls(process, mu, sigma, phi=phi, last=trends[-1],
+                   n_obs=len(trends), drift_uncertainty=drift_uncertainty)
+
+    def Simulate(self, n: int, n_periods: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Simulates `n` trend paths (n, n_periods).
+        """
+        mu = np.full((n, 1), self.mu)
+        if self.drift_uncertainty and self.n_obs > 0:
+            mu = mu + self.sigma / np.sqrt(self.n_obs) * rng.standard_normal((n, 1))
+        shocks = self.sigma * rng.standard_normal((n, n_periods))
+        if self.process == "random_walk":
+            return mu + shocks
+
+        # each period depends on the one before, so step through the periods
+        paths = np.empty((n, n_periods))
+        previous = np.full(n, self.last)
+        for t in range(n_periods):
+            previous = mu[:, 0] + self.phi * (previous - mu[:, 0]) + shocks[:, t]
+            paths[:, t] = previous
+        return paths
+
 
 @dataclass
 class Forecast:
+    """
+    Reserves of a fitted model under future calendar trend scenarios.
+
+    Parameters
+    ----------
+    model : glm or LogLinear
+        The fitted model.
+    tri : Triangle, default=None
+        The triangle. If None, the model's triangle.
+    cal_periods : pd.Series, default=None
+        The future calendar periods the trends apply to. Set from the
+        model's forecast cells.
+    chunk_size : int, default=10000
+        The number of scenarios processed at once.
+    """
+    model: object = None
     tri: Triangle = None
     cal_periods: pd.Series = None
+    chunk_size: int = 10000
+
+    def __post_init__(self):
+        if self.model is None:
+            raise ValueError("A fitted model must be provided.")
+        if not getattr(self.model, "is_fitted", False):
+            raise ValueError("The model must be fit before it can be forecast.")
+        if self.tri is None:
+            self.tri = self.model.tri
+        self.arrays = self._ModelArrays()
+        self.cal_periods = pd.Series(self.arrays["cal_levels"], name="calendar_period")
+
+    def _ModelArrays(self) -> dict:
+        """
+        The fitted forecast of each cell, the matrix of future calendar
+        periods each cell has passed through, and the indicator matrix that
+        sums the cells by accident and calendar period.
+        """
+        from rocky.models.LogLinear import LogLinear
+
+        model = self.model
+        if isinstance(model, LogLinear):
+            yhat = model.GetYhat("forecast", log=False, actual_scale=True)
+        else:
+            yhat = model.GetYhat("forecast")
+
+        # the forecast is an exponential, so a 0 or infinite cell means it
+        # under- or overflowed (eg aliased calendar parameters)
+        yhat = np.asarray(yhat, dtype=float)
+        if not np.isfinite(yhat).all() or (yhat == 0).any():
+            raise ValueError("The model's forecast is 0 or not finite in some cells, so its "
+                             "parameters are probably aliased (eg a LogLinear model with "
+                             "alpha=0 and use_cal=True). Fit it with alpha > 0.")
+
+        acc = model.GetAcc("forecast").to_numpy()
+        cal = model.GetCal("forecast").to_numpy()
+        acc_levels = np.unique(np.concatenate([model.GetAcc("train").to_numpy(), acc]))
+        cal_levels = np.unique(cal)
+
+        # cumulative trends: cell k gets the trend of every future period <= cal_k
+        passed = (cal[:, None] >= cal_levels[None, :]).astype(float)
+
+        rows = np.arange(len(acc))
+        by_period = np.zeros((len(acc), len(acc_levels) + len(cal_levels)))
+        by_period[rows, np.searchsorted(acc_levels, acc)] = 1
+        by_period[rows, len(acc_levels) + np.searchsorted(cal_levels, cal)] = 1
+        columns = pd.MultiIndex.from_arrays(
+            [["accident_period"] * len(acc_levels) + ["calendar_period"] * len(cal_levels),
+             np.concatenate([acc_levels, cal_levels])],
+            names=["by", "period"])
+
+        return {
+            "yhat": yhat,
+            "passed": passed,
+            "cal_levels": cal_levels,
+            "by_period": by_period,
+            "columns": columns,
+        }
 
     # generator function to generate forecasted parameter values
     def forecast_parameters(self, gen: dict = None):
@@ -22,5 +204,160 @@ class Forecast:
         Parameters
         ----------
         gen : dict, optional
-            Dictionary of parameters to generate forecasts for. The default is None.
+            Dictionary of scenario names to their log-scale calendar trends:
+            a single trend used for every future period, or one trend per
+            future period. The default is None, a single scenario with no
+            future trend.
+
+        Yields
+        ------
+        tuple
+            The scenario name, and its trend path (one value per future
+            calendar period).
         """
+        if gen is None:
+            gen = {"no trend": 0.0}
+        n_future = len(self.cal_periods)
+        for name, trend in gen.items():
+            path = np.broadcast_to(np.asarray(trend, dtype=float), (n_future,))
+            yield name, path.copy()
+
+    def Scenarios(self, trends) -> pd.DataFrame:
+        """
+        The (n_scenarios, n_future) trend paths, from a dict (see
+        `forecast_parameters`), a 2-d array or a DataFrame with one column
+        per future calendar period.
+        """
+        if isinstance(trends, dict):
+            names, paths = zip(*self.forecast_parameters(trends))
+            trends = pd.DataFrame(np.vstack(paths), index=list(names))
+        elif not isinstance(trends, pd.DataFrame):
+            trends = pd.DataFrame(np.atleast_2d(np.asarray(trends, dtype=float)))
+
+        if trends.shape[1] != len(self.cal_periods):
+            raise ValueError(f"Expected one trend per future calendar period "
+                             f"({len(self.cal_periods)}), got {trends.shape[1]}.")
+        trends.columns = pd.Index(self.cal_periods.to_numpy(), name="calendar_period")
+        trends.index.name = "scenario"
+        return trends
+
+    def _Reserves(self, T: np.ndarray) -> np.ndarray:
+        """
+        Reserves by accident and calendar period for each row of the trend
+        paths `T`.
+        """
+        a = self.arrays
+        out = np.empty((len(T), a["by_period"].shape[1]))
+        for start in range(0, len(T), self.chunk_size):
+            chunk = T[start:start + self.chunk_size]
+            with np.errstate(over="ignore"):
+                cells = a["yhat"] * np.exp(chunk @ a["passed"].T)
+            if not np.isfinite(cells).all():
+                raise ValueError("The trend paths overflow the forecast: their cumulative "
+                                 "trends are too large to exponentiate.")
+            out[start:start + len(chunk)] = cells @ a["by_period"]
+        return out
+
+    def Reserves(self, trends) -> pd.DataFrame:
+        """
+        Reserves under every calendar trend scenario.
+
+        Parameters
+        ----------
+        trends : dict, np.ndarray or pd.DataFrame
+            The log-scale trend paths, one row per scenario and one column
+            per future calendar period (see `Scenarios`).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per scenario. The columns are a MultiIndex of
+            ("accident_period", period) and ("calendar_period", period).
+        """
+        trends = self.Scenarios(trends)
+        return pd.DataFrame(self._Reserves(trends.to_numpy()),
+                            index=trends.index,
+                            columns=self.arrays["columns"])
+
+    def CalendarTrends(self) -> pd.Series:
+        """
+        The fitted log-scale calendar trend of each observed calendar
+        period, from the model's calendar parameters.
+        """
+        from rocky.models.LogLinear import LogLinear
+
+        model = self.model
+        if isinstance(model, LogLinear):
+            # coefficients are on the standardized log scale
+            params = model.GetParameters("c")
+            names, values = params["names"], params["param"].to_numpy(dtype=float)
+            if model.standardize:
+                values = values * model.standardize_sigma
+        else:
+            params = model.GetParameters(column="cal")
+            names, values = params["parameter"], params["value"].to_numpy(dtype=float)
+
+        periods = names.str.rsplit("_", n=1).str[1].astype(int).to_numpy()
+        observed = ~np.isin(periods, self.cal_periods.to_numpy())
+        if not observed.any():
+            raise ValueError("The model has no calendar period parameters. "
+                             "Fit it with `use_cal=True`.")
+        trends = pd.Series(values[observed],
+                           index=pd.Index(periods[observed], name="calendar_period"),
+                           name="trend").sort_index()
+
+        # a trend whose factor exp(trend) over- or underflows is not a trend
+        # but an aliased parameter
+        with np.errstate(over="ignore"):
+            factor = np.exp(np.abs(trends.to_numpy()))
+        if not np.isfinite(factor).all():
+            raise ValueError(f"The calendar trends are not finite on the loss scale (up to "
+                             f"{trends.abs().max():.3g}), so the calendar parameters are "
+                             f"probably aliased with the accident and development parameters. "
+                             f"Fit the model with alpha > 0.")
+        return trends
+
+    def FitTrendProcess(self,
+                        process: str = "random_walk",
+                        drift_uncertainty: bool = True) -> TrendProcess:
+        """
+        Fits a `TrendProcess` to the model's calendar trends.
+        """
+        return TrendProcess.Fit(self.CalendarTrends(), process, drift_uncertainty)
+
+    def SimulateReserves(self,
+                         n: int = 10000,
+                         process="random_walk",
+                         random_state: int = None,
+                         drift_uncertainty: bool = True) -> pd.DataFrame:
+        """
+        Reserves under `n` simulated future calendar trend paths.
+
+        Parameters
+        ----------
+        n : int, default=10000
+            The number of trend paths.
+        process : str or TrendProcess, default="random_walk"
+            Either "random_walk" or "ar1" (fit to the model's calendar
+            trends), or an already fitted `TrendProcess`.
+        random_state : int, default=None
+            The seed of the random number generator.
+        drift_uncertainty : bool, default=True
+            Whether each path draws its own mean trend (see `TrendProcess`).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per path. The columns are a MultiIndex of
+            ("accident_period", period) and ("calendar_period", period).
+        """
+        if not isinstance(process, TrendProcess):
+            process = self.FitTrendProcess(process, drift_uncertainty)
+
+        rng = np.random.default_rng(random_state)
+        n_future = len(self.cal_periods)
+        out = np.empty((n, self.arrays["by_period"].shape[1]))
+        for start in range(0, n, self.chunk_size):
+            size = min(self.chunk_size, n - start)
+            out[start:start + size] = self._Reserves(process.Simulate(size, n_future, rng))
+        return pd.DataFrame(out, columns=self.arrays["columns"])
@@ -1,6 +1,7 @@
 import pymc
 from pymc import HalfCauchy, Normal, LogNormal, Exponential, Deterministic
 import pytensor
+import arviz as az
 from pytensor.tensor.nlinalg import matrix_dot
 
 from dataclasses import dataclass
@@ -12,6 +13,7 @@ from scipy import stats
 
 import pickle
 
+from laplace import FIT_METHODS, laplace_sampler
 
 @dataclass
 class MegaData:
@@ -108,6 +110,9 @@ class HalfMegaModel:
         self.samples = samples
         self.chains = chains
 
+        # the model is built by `chain_ladder_model` or `fit`
+        self.model = None
+
         # Prior ultimate estimates
         self.loss_ult_prior = np.multiply(
             self.rpt_loss_tri.diag().values,
@@ -276,16 +281,16 @@ class HalfMegaModel:
                 standalone=False
             )
 
-            sigma_rpt = np.tile(sigma_rpt_loss, (self.n_rows, self.n_cols))[:, :20][
-                self.tri_mask
-            ]
-            sigma_paid = np.tile(sigma_paid_loss, (self.n_rows, self.n_cols))[:, :20][
-                self.tri_mask
-            ]
+            # the observed cells, in the order of `rpt_loss_1d` and
+            # `paid_loss_1d`; each has the standard deviation of its
+            # development period
+            rows, cols = self.tri_mask.values.nonzero()
+            sigma_rpt = sigma_rpt_loss[cols]
+            sigma_paid = sigma_paid_loss[cols]
 
-            # expected values for the triangles
-            E_rpt_loss = self._E(alpha_loss, beta_rpt_loss)
-            E_paid_loss = self._E(alpha_loss, beta_paid_loss)
+            # expected values for the observed cells of the triangles
+            E_rpt_loss = self._E(alpha_loss, beta_rpt_loss)[rows, cols]
+            E_paid_loss = self._E(alpha_loss, beta_paid_loss)[rows, cols]
 
             # likelihood functions
             loglik_rpt_loss = Normal(
@@ -392,7 +397,52 @@ class HalfMegaModel:
         self.model = model
         return model
 
-    def fit(self, samples=None, burnin=None, chains=None):
+    def fit(
+        self,
+        method: str = "nuts",
+        samples: int = None,
+        burnin: int = None,
+        chains: int = None,
+        n_iter: int = 20000,
+        initialize: str = None,
+        random_seed: int = None,
+    ):
+        """
+        Fit the model, and store the posterior draws in `self.trace`.
+
+        Parameters
+        ----------
+        method: str
+            One of FIT_METHODS:
+                'nuts' - `pymc.sample`, `chains` chains of `burnin` tuning and
+                         `samples` draws each. Exact, but slow.
+                'advi' - mean-field automatic differentiation variational
+                         inference, `n_iter` iterations.
+                'fullrank_advi' - ADVI with a full covariance matrix.
+                'laplace' - a normal approximation around the maximum a
+                         posteriori estimate, on the unconstrained scale.
+            The approximations return `samples` draws in seconds.
+        initialize: str
+            For 'nuts' only: one of the fast methods, whose posterior mean is
+            used as the starting point of every chain. Default is None, for
+            pymc's own initialization.
+        random_seed: int
+            The random seed.
+
+        Returns
+        -------
+        az.InferenceData
+            The posterior draws.
+        """
+        if method not in FIT_METHODS:
+            raise ValueError(f"method must be one of {FIT_METHODS}.")
+        if initialize is not None and (
+            method != "nuts" or initialize not in FIT_METHODS[1:]
+        ):
+            raise ValueError(
+                f"initialize is only used with method='nuts', and must be one of {FIT_METHODS[1:]}."
+            )
+
         if samples is None:
             samples = self.samples
         if burnin is None:
@@ -405,8 +455,64 @@ class HalfMegaModel:
         else:
             mod = self.model
         with mod:
-            # with self.chain_ladder_model():
-            # inference
-            self.trace = pymc.sample(
-                draws=samples, tune=burnin, chains=chains, cores=None
-            )
+            if method == "laplace":
+                self.trace = az.InferenceData(
+                    posterior=laplace_sampler(random_seed=random_seed)(samples)
+                )
+            elif method in ["advi", "fullrank_advi"]:
+                self.approx = pymc.fit(n=n_iter, method=method, random_seed=random_seed)
+                self.trace = self.approx.sample(samples, random_seed=random_seed)
+            else:
+                initvals = None
+                if initialize is not None:
+                    self.fit(
+                        method=initialize,
+                        samples=samples,
+                        n_iter=n_iter,
+                        random_seed=random_seed,
+                    )
+                    initvals = self._posterior_mean_point()
+                self.trace = pymc.sample(
+                    draws=samples,
+                    tune=burnin,
+                    chains=chains,
+                    cores=None,
+                    initvals=initvals,
+                    random_seed=random_seed,
+                )
+        self.fit_method = method
+        return self.trace
+
+    def _posterior_mean_point(self) -> dict:
+        """
+        The posterior mean of every free variable in `self.trace`, as starting
+        values for `pymc.sample`.
+        """
+        posterior = self.trace.posterior
+        return {
+            v.name: posterior[v.name].mean(dim=("chain", "draw")).values
+            for v in self.model.free_RVs
+        }
+
+    def ultimate_samples(self) -> np.ndarray:
+        """
+        The posterior draws of the ultimate loss of each accident period
+        (`alpha-loss`), as a (draws, accident periods) array.
+        """
+        if getattr(self, "trace", None) is None:
+            raise ValueError("The model has not been fit yet. Run `fit` first.")
+        alpha = self.trace.posterior["alpha-loss"].values
+        return alpha.reshape(alpha.shape[0] * alpha.shape[1], -1)
+
+    def reserve_quantiles(self, quantiles: list = [0.05, 0.5, 0.95]) -> pd.DataFrame:
+        """
+        Quantiles and mean of the posterior reserve (ultimate loss less the
+        latest paid loss) of each accident period and the total.
+        """
+        ultimate = self.ultimate_samples()
+        paid = self.paid_loss_tri.diag().values
+        reserves = pd.DataFrame(ultimate - paid, columns=self.acc)
+        reserves["Total"] = reserves.sum(axis=1)
+        out = reserves.quantile(quantiles).T
+        out.insert(0, "mean", reserves.mean())
+        return out
@@ -0,0 +1,93 @@
+"""
+Laplace approximation of the posterior of a pymc model, shared by the
+`fit` methods of `MegaModel` and `HalfMegaModel`.
+
+pymc 5.0-5.3 has no Laplace fit, so it is built here: the mode of the log
+density on the unconstrained (transformed) scale, including the Jacobian
+of the transforms, the Hessian of the negative log density there, and
+normal draws around the mode with that Hessian as their precision, mapped
+back to the variables and deterministics of the model.
+
+`pymc.find_MAP` is not used for the mode: it maximizes the log density
+without the Jacobian, so for a transformed variable (eg a standard
+deviation, on the log scale) its MAP is not the mode of the density whose
+Hessian is the precision.
+"""
+import arviz as az
+import numpy as np
+import pymc
+import xarray as xr
+from pymc.blocking import DictToArrayBijection, RaveledVars
+from scipy.linalg import solve_triangular
+from scipy.optimize import minimize
+
+# inference methods of `MegaModel.fit` and `HalfMegaModel.fit`
+FIT_METHODS = ["nuts", "advi", "fullrank_advi", "laplace"]
+
+
+def laplace_sampler(model: pymc.Model = None, random_seed: int = None):
+    """
+    The Laplace approximation of the posterior of `model` (by default the
+    model of the enclosing `with` block): a normal distribution around the
+    mode of the log density of the free variables on their unconstrained
+    scale (with the Jacobian of the transforms), whose precision is the
+    Hessian of the negative log density there.
+
+    Returns a function of the number of draws, that returns a posterior
+    Dataset of that many draws (in one chain), mapped back to the variables
+    and deterministics of the model. Successive calls continue the same
+    random stream, so the draws can be made a chunk at a time.
+
+    Raises a ValueError if the Hessian at the mode is not finite or not
+    positive definite, which usually means the optimization did not reach
+    a mode (eg a standard deviation running off to 0 or infinity).
+    """
+    model = pymc.modelcontext(model)
+    initial_point = model.initial_point()
+    start = DictToArrayBijection.map({v.name: initial_point[v.name] for v in model.value_vars})
+    logp = model.compile_logp(jacobian=True)
+    dlogp = model.compile_dlogp(jacobian=True)
+
+    def point_of(x: np.ndarray) -> dict:
+        return DictToArrayBijection.rmap(RaveledVars(x, start.point_map_info))
+
+    # the mode of the unconstrained log density, with the Jacobian of the
+    # transforms, as the Hessian below is taken of that density
+    result = minimize(lambda x: -logp(point_of(x)), start.data,
+                      jac=lambda x: -dlogp(point_of(x)), method="L-BFGS-B")
+    point = point_of(result.x)
+    raveled = DictToArrayBijection.map(point)
+
+    # d2logp is the Hessian of the negative log density, the precision of
+    # the approximation; with its Cholesky factor, precision = L @ L.T, a
+    # draw is mode + solve(L.T, z)
+    precision = model.compile_d2logp(jacobian=True)(point)
+    if not np.isfinite(precision).all():
+        raise ValueError("The Hessian of the log density at the mode is not finite, so there is no "
+                         "Laplace approximation. The optimization probably did not converge; "
+                         "use method='advi' or 'fullrank_advi' instead.")
+    try:
+        L = np.linalg.cholesky(precision)
+    except np.linalg.LinAlgError as err:
+        raise ValueError("The Hessian of the negative log density at the optimum is not positive "
+                         "definite, so it is not a mode and there is no Laplace "
+                         "approximation. Use method='advi' or 'fullrank_advi' instead.") from err
+    rng = np.random.default_rng(random_seed)
+
+    # the constrained variables and deterministics of each draw
+    outputs = model.unobserved_value_vars
+    fn = model.compile_fn(outputs, inputs=model.value_vars,
+                          on_unused_input="ignore", point_fn=False)
+    dims = {name: list(d) for name, d in model.named_vars_to_dims.items()}
+
+    def draw(n: int) -> xr.Dataset:
+        z = rng.standard_normal((raveled.data.shape[0], n))
+        values = []
+        for x in raveled.data + solve_triangular(L.T, z, lower=False).T:
+            x = DictToArrayBijection.rmap(RaveledVars(x, raveled.point_map_info))
+            values.append(fn(*[x[v.name] for v in model.value_vars]))
+        posterior = {v.name: np.stack([value[k] for value in values])[None]
+                     for k, v in enumerate(outputs)}
+        return az.from_dict(posterior=posterior, coords=model.coords, dims=dims).posterior
+
+    return draw
@@ -1,6 +1,852 @@
+"""
+Bootstrap reserve distributions for fitted `glm` and `LogLinear` models.
+
+The scaled residuals of the fitted model are resampled with replacement to
+make pseudo-triangles, the model is refit to every pseudo-triangle at once
+with a batched solver, and process variance is added to the forecast cells:
+
+- `glm` (Tweedie, log link, power p): Pearson residuals (y - mu) / mu^(p/2),
+  pseudo data mu + r* mu^(p/2), a batched truncated Newton refit
+  preconditioned with the Hessian of the original fit, and process error
+  from a gamma distribution with the Tweedie mean and variance (phi mu^p).
+  p = 1 is the over-dispersed Poisson (ODP) bootstrap, and p = 2 the gamma
+  bootstrap.
+- `LogLinear`: residuals of the (standardized) log losses, an exact refit
+  (least squares and ridge as one matrix product, lasso and elastic net by
+  a batched homotopy from the original fit), and lognormal process error.
+
+Residuals are scaled by sqrt(n / (n - p)) (England & Verrall). Replicates are
+simulated `chunk_size` at a time, as (replicates, cells) arrays, so memory
+does not grow with `n_replicates`.
+
+Each chunk draws from its own random stream, spawned from one
+`SeedSequence`, so chunks can be spread across a pool of worker processes
+and the results do not depend on the number of workers. `Stream` summarizes
+each chunk with running moments and t-digests (see `sketch`) instead of
+keeping every replicate, and merges them in chunk order.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import copy
 from dataclasses import dataclass
+import os
+
+import numpy as np
+import pandas as pd
+
+from rocky.model_selection.sketch import DistributionSketch
+
+# bootstrap copied to a worker process (set by `_init_worker`)
+_WORKER_BOOTSTRAP = None
+
+
+def _init_worker(boot):
+    global _WORKER_BOOTSTRAP
+    _WORKER_BOOTSTRAP = boot
+
+
+def _run_chunk(task: tuple):
+    """
+    Simulates one (size, seed, sketch) chunk in a worker process.
+    """
+    return _WORKER_BOOTSTRAP._RunChunk(*task)
+
+
+def batched_solve(A: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Solves A[i] x[i] = b[i] for a stack of systems, falling back to the
+    pseudo-inverse when any system is singular.
+    """
+    try:
+        return np.linalg.solve(A, b[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return (np.linalg.pinv(A) @ b[..., None])[..., 0]
+
+
+def tweedie_loss(Y: np.ndarray, eta: np.ndarray, power: float) -> np.ndarray:
+    """
+    Negative Tweedie quasi-log-likelihood (up to terms that only depend on
+    y) of each row of `Y`, for the log-link linear predictor `eta`. Defined
+    for negative pseudo data too.
+    """
+    mu = np.exp(eta)
+    if power == 1:
+        loss = mu - Y * eta
+    elif power == 2:
+        loss = Y / mu + eta
+    else:
+        loss = mu ** (2 - power) / (2 - power) - Y * mu ** (1 - power) / (1 - power)
+    return loss.sum(axis=-1)
+
+
+def _tweedie_descent(X: np.ndarray,
+                     Y: np.ndarray,
+                     power: float,
+                     penalty: np.ndarray,
+                     coef: np.ndarray,
+                     direction: callable,
+                     max_iter: int,
+                     tol: float,
+                     max_halvings: int = 30) -> tuple:
+    """
+    Minimizes the penalized Tweedie loss of every row of `Y` by steps
+    `direction(active, coef, mu, grad)`, halving the steps of the replicates
+    whose loss would go up. Rows stop once no coefficient changes by more
+    than `tol`.
+
+    Returns
+    -------
+    tuple
+        The coefficients (n_replicates, n_params), and the indices of the
+        replicates that did not converge in `max_iter` iterations.
+    """
+    def objective(b, y):
+        eta = b @ X.T
+        return tweedie_loss(y, eta, power) + 0.5 * (b ** 2) @ penalty, eta
+
+    coef = np.array(np.broadcast_to(coef, (len(Y), X.shape[1])))
+    active = np.arange(len(Y))
+
+    # the linear predictor of the active rows is kept from the line search,
+    # so each iteration only needs one more (replicates, cells) product for
+    # the gradient
+    f, eta = objective(coef, Y)
+    for _ in range(max_iter):
+        b, y = coef[active], Y[active]
+        mu = np.exp(eta)
+        grad = (mu ** (1 - power) * (mu - y)) @ X + b * penalty
+        step = direction(active, b, mu, grad)
+
+        # (with a little slack for rounding, so rows at their minimum do
+        # not halve their steps `max_halvings` times)
+        t = np.ones(len(active))
+        new_f, new_eta = objective(b - step, y)
+        bound = f[active] + 1e-12 * np.abs(f[active])
+        for _ in range(max_halvings):
+            worse = ~(new_f <= bound)
+            if not worse.any():
+                break
+            t[worse] /= 2
+            new_f[worse], new_eta[worse] = objective(b[worse] - t[worse, None] * step[worse], y[worse])
+
+        step *= t[:, None]
+        coef[active] = b - step
+        f[active] = new_f
+        moving = np.max(np.abs(step), axis=1) >= tol
+        active, eta = active[moving], new_eta[moving]
+        if len(active) == 0:
+            break
+    return coef, active
+
+
+def batched_pcg(matvec: callable,
+                B: np.ndarray,
+                M: np.ndarray,
+                max_iter: int = 50,
+                rtol: float = 1e-6) -> np.ndarray:
+    """
+    Solves H[i] x[i] = B[i] for a stack of symmetric positive definite
+    systems by preconditioned conjugate gradients, starting from B[i] M.
+    Rows stop once their residual is below `rtol` times the norm of B[i].
+
+    Parameters
+    ----------
+    matvec : callable
+        `matvec(V, rows)` is H[rows[k]] V[k] for each k.
+    B : np.ndarray
+        The right-hand sides (n_systems, n).
+    M : np.ndarray
+        The preconditioner, an approximate inverse of every H[i] (n, n).
+    max_iter : int, default=50
+        The most iterations.
+    rtol : float, default=1e-6
+        The relative tolerance of the residuals.
+
+    Returns
+    -------
+    np.ndarray
+        The solutions (n_systems, n).
+    """
+    rows = np.arange(len(B))
+    X = B @ M
+    R = B - matvec(X, rows)
+    Z = R @ M
+    D = Z.copy()
+    rz = np.sum(R * Z, axis=1)
+    bound = rtol * np.linalg.norm(B, axis=1)
+    for _ in range(max_iter):
+        rows = rows[np.linalg.norm(R[rows], axis=1) > bound[rows]]
+        if len(rows) == 0:
+            break
+        d = D[rows]
+        Hd = matvec(d, rows)
+        step = rz[rows] / np.sum(d * Hd, axis=1)
+        X[rows] += step[:, None] * d
+        R[rows] -= step[:, None] * Hd
+        z = R[rows] @ M
+        new_rz = np.sum(R[rows] * z, axis=1)
+        D[rows] = z + (new_rz / rz[rows])[:, None] * d
+        rz[rows] = new_rz
+    return X
+
+
+def tweedie_newton(X: np.ndarray,
+                   Y: np.ndarray,
+                   power: float,
+                   penalty: np.ndarray,
+                   coef: np.ndarray,
+                   max_iter: int = 50,
+                   tol: float = 1e-8) -> np.ndarray:
+    """
+    Fits a log-link Tweedie GLM to every row of `Y` by (batched) penalized
+    Newton iterations, building and solving each replicate's X'WX every
+    iteration.
+
+    Parameters
+    ----------
+    X : np.ndarray
+        The design matrix (n_cells, n_params).
+    Y : np.ndarray
+        The responses, one replicate per row (n_replicates, n_cells).
+    power : float
+        The Tweedie power.
+    penalty : np.ndarray
+        The ridge penalty on each coefficient (n_params,), on the scale of
+        the summed loss (ie n * alpha for `TweedieRegressor`).
+    coef : np.ndarray
+        The starting coefficients, (n_params,) or (n_replicates, n_params).
+    max_iter : int, default=50
+        The most iterations.
+    tol : float, default=1e-8
+        Stop once no coefficient changes by more than `tol`.
+
+    Returns
+    -------
+    np.ndarray
+        The coefficients (n_replicates, n_params).
+    """
+    P = np.diag(penalty)
+
+    def direction(active, b, mu, grad):
+        # X'WX of 64 replicates at a time, so memory stays at 64 copies of X
+        w = mu ** (2 - power)
+        H = np.empty((len(b), X.shape[1], X.shape[1]))
+        for start in range(0, len(b), 64):
+            H[start:start + 64] = (X.T * w[start:start + 64, None, :]) @ X
+        return batched_solve(H + P, grad)
+
+    return _tweedie_descent(X, Y, power, penalty, coef, direction, max_iter, tol)[0]
+
+
+def tweedie_refit(X: np.ndarray,
+                  Y: np.ndarray,
+                  power: float,
+                  penalty: np.ndarray,
+                  coef: np.ndarray,
+                  max_iter: int = 30,
+                  tol: float = 1e-8,
+                  cg_iter: int = 50,
+                  cg_rtol: float = 1e-2) -> np.ndarray:
+    """
+    Refits a log-link Tweedie GLM, fitted with coefficients `coef`, to
+    every row of `Y` (eg bootstrap pseudo data).
+
+    Each replicate takes truncated Newton steps: its Newton system X'WX d =
+    grad is solved by conjugate gradients, preconditioned with the inverse
+    Hessian of the original fit (computed once and shared by every
+    replicate), so no replicate's X'WX is ever formed. Each conjugate
+    gradient iteration is two (n_replicates, n_cells) x (n_cells, n_params)
+    products, and pseudo data close to the original fit needs only a few of
+    them. The rare replicates that have not converged after `max_iter`
+    iterations are finished with full Newton iterations.
+
+    Parameters
+    ----------
+    X, Y, power, penalty :
+        As in `tweedie_newton`.
+    coef : np.ndarray
+        The coefficients of the original fit (n_params,).
+    max_iter : int, default=30
+        The most truncated Newton iterations.
+    tol : float, default=1e-8
+        Stop once no coefficient changes by more than `tol`.
+    cg_iter : int, default=50
+        The most conjugate gradient iterations per Newton step.
+    cg_rtol : float, default=1e-2
+        The relative tolerance of the conjugate gradients (how inexact each
+        Newton step may be).
+
+    Returns
+    -------
+    np.ndarray
+        The coefficients (n_replicates, n_params).
+    """
+    # inverse Hessian at the original fit, the preconditioner
+    mu = np.exp(X @ coef)
+    H_inv = np.linalg.pinv((X.T * mu ** (2 - power)) @ X + np.diag(penalty))
+
+    # the products in the conjugate gradients only need to be as accurate
+    # as their tolerance, so are in single precision
+    X32 = X.astype(np.float32)
+
+    def direction(active, b, mu, grad):
+        if power == 2:
+            # the weights mu^(2 - p) are all 1, so X'WX is the same for
+            # every replicate and the preconditioned step is exact
+            return grad @ H_inv
+
+        w = (mu ** (2 - power)).astype(np.float32)
+
+        def matvec(V, rows):
+            return ((V.astype(np.float32) @ X32.T) * w[rows]) @ X32 + V * penalty
+
+        return batched_pcg(matvec, grad, H_inv, cg_iter, cg_rtol)
+
+    coef, active = _tweedie_descent(X, Y, power, penalty, coef, direction, max_iter, tol)
+
+    # the stragglers get the exact Hessian
+    if len(active):
+        coef[active] = tweedie_newton(X, Y[active], power, penalty, coef[active], tol=tol)
+    return coef
+
+
+def enet_coordinate_descent(G: np.ndarray,
+                            C: np.ndarray,
+                            alpha: float,
+                            l1_ratio: float,
+                            coef: np.ndarray,
+                            max_iter: int = 1000,
+                            tol: float = 1e-8) -> np.ndarray:
+    """
+    Fits an elastic net (in the `ElasticNet` parametrization, with no
+    intercept) to many responses at once by cyclic coordinate descent on
+    the Gram matrix.
+
+    Parameters
+    ----------
+    G : np.ndarray
+        X'X / n (n_params, n_params).
+    C : np.ndarray
+        X'y / n for each response (n_replicates, n_params).
+    alpha, l1_ratio : float
+        The `ElasticNet` penalty.
+    coef : np.ndarray
+        The starting coefficients, (n_params,) or (n_replicates, n_params).
+    max_iter : int, default=1000
+        The most passes over the coefficients.
+    tol : float, default=1e-8
+        Stop once no coefficient changes by more than `tol` in a pass.
+
+    Returns
+    -------
+    np.ndarray
+        The coefficients (n_replicates, n_params).
+    """
+    l1, l2 = alpha * l1_ratio, alpha * (1 - l1_ratio)
+    diag = np.diag(G)
+    coef = np.array(np.broadcast_to(coef, C.shape))
+
+    # gradient of the squared error, kept up to date after every update
+    R = C - coef @ G
+    for _ in range(max_iter):
+        max_change = 0.0
+        for j in np.flatnonzero(diag):
+            rho = R[:, j] + diag[j] * coef[:, j]
+            new = np.sign(rho) * np.maximum(np.abs(rho) - l1, 0) / (diag[j] + l2)
+            change = new - coef[:, j]
+            if np.any(change):
+                R -= change[:, None] * G[j]
+                coef[:, j] = new
+                max_change = max(max_change, np.max(np.abs(change)))
+        if max_change < tol:
+            break
+    return coef
+
+
+def enet_homotopy(G: np.ndarray,
+                  C: np.ndarray,
+                  alpha: float,
+                  l1_ratio: float,
+                  coef: np.ndarray,
+                  c0: np.ndarray,
+                  max_iter: int = None,
+                  eps: float = 1e-12) -> tuple:
+    """
+    Fits an elastic net (as in `enet_coordinate_descent`) to many
+    responses at once, by following the exact solution path from the
+    original fit.
+
+    `coef` is the solution for X'y / n = `c0`. Moving the data linearly
+    from `c0` to each row of `C`, the solution is piecewise linear, and
+    only changes direction when a coefficient hits 0 or a zero coefficient
+    becomes nonzero. Every replicate steps from one such event to the next
+    with a batched solve on its nonzero set, until it reaches its own data.
+    Pseudo data close to the original needs only a few steps. The nonzero
+    sets are usually much smaller than n_params, so each replicate's system
+    is gathered down to the size of the largest nonzero set in the batch.
+
+    Parameters
+    ----------
+    G, C, alpha, l1_ratio :
+        As in `enet_coordinate_descent`.
+    coef : np.ndarray
+        The solution of the original fit (n_params,).
+    c0 : np.ndarray
+        X'y / n of the original fit (n_params,).
+    max_iter : int, default=None
+        The most steps. If None, 4 * n_params.
+    eps : float, default=1e-12
+        Steps shorter than `eps` are treated as 0.
+
+    Returns
+    -------
+    tuple
+        The coefficients (n_replicates, n_params), and the indices of the
+        replicates that did not reach their data in `max_iter` steps.
+    """
+    l1, l2 = alpha * l1_ratio, alpha * (1 - l1_ratio)
+    p = G.shape[0]
+    A = G + l2 * np.eye(p)
+    if max_iter is None:
+        max_iter = 4 * p
+
+    # the data for which `coef` is exactly optimal (the original fit only
+    # solves the problem to a tolerance)
+    grad = c0 - coef @ A
+    c0 = np.where(coef != 0,
+                  coef @ A + l1 * np.sign(coef),
+                  coef @ A + np.clip(grad, -l1, l1))
+
+    coef = np.tile(coef, (len(C), 1))
+    nonzero = coef != 0
+    dC = C - c0
+    t = np.zeros(len(C))
+    active = np.arange(len(C))
+    for _ in range(max_iter):
+        b, S, dc = coef[active], nonzero[active], dC[active]
+
+        # direction of the coefficients along the path: each replicate's
+        # nonzero coefficients first, padded with identity rows up to the
+        # largest nonzero set
+        size = S.sum(axis=1)
+        k = max(size.max(), 1)
+        idx = np.argsort(~S, axis=1, kind="stable")[:, :k]
+        valid = np.arange(k) < size[:, None]
+        M = np.where(valid[:, :, None] & valid[:, None, :],
+                     A[idx[:, :, None], idx[:, None, :]],
+                     np.eye(k))
+        db = np.zeros_like(b)
+        np.put_along_axis(db, idx,
+                          batched_solve(M, np.take_along_axis(dc, idx, axis=1) * valid),
+                          axis=1)
+
+        # and of the gradient
+        r = c0 + t[active, None] * dc - b @ A
+        dr = dc - db @ A
+
+        # distance to the next event: a nonzero coefficient hitting 0, or a
+        # zero coefficient's gradient reaching the l1 penalty
+        with np.errstate(divide="ignore", invalid="ignore"):
+            h = np.where(S, -b / db, np.inf)
+            h = np.where(~S & (dr > 0), (l1 - r) / dr, h)
+            h = np.where(~S & (dr < 0), (-l1 - r) / dr, h)
+        h = np.where(h > eps, h, np.inf)
+        j = np.argmin(h, axis=1)
+        h = h[np.arange(len(active)), j]
+
+        # go to the event, or to the end of the path
+        remaining = 1 - t[active]
+        done = remaining <= h
+        step = np.minimum(h, remaining)
+        coef[active] = b + step[:, None] * db
+        t[active] += step
+
+        # the event adds or drops one coefficient
+        rows, cols = active[~done], j[~done]
+        nonzero[rows, cols] = ~nonzero[rows, cols]
+        dropped = ~nonzero[rows, cols]
+        coef[rows[dropped], cols[dropped]] = 0
+
+        active = active[~done]
+        if len(active) == 0:
+            break
+    return coef, active
 
 
 @dataclass
 class Bootstrap:
-    pass
+    """
+    Residual bootstrap of the reserves of a fitted `glm` or `LogLinear`
+    model.
+
+    Parameters
+    ----------
+    model : glm or LogLinear
+        The fitted model.
+    n_replicates : int, default=1000
+        The number of pseudo-triangles.
+    process_variance : bool, default=True
+        Whether to add process error to the forecast cells. If False, the
+        distribution only reflects parameter uncertainty.
+    chunk_size : int, default=1000
+        The number of replicates simulated at once.
+    random_state : int, default=None
+        The seed of the random number generator. Each chunk gets its own
+        stream spawned from it, so the replicates only depend on
+        `random_state` and `chunk_size`.
+    max_iter : int, default=30
+        The most iterations of each batched refit (truncated Newton
+        iterations for `glm`, and 30x as many coordinate descent passes
+        for elastic nets whose homotopy does not finish).
+    tol : float, default=1e-8
+        The convergence tolerance of the batched refits.
+    n_jobs : int, default=1
+        The number of worker processes the chunks are spread across. -1
+        uses every core.
+    compression : float, default=500
+        The compression of the t-digests used by `Stream`.
+    reserves : pd.DataFrame, default=None
+        The simulated reserves, one row per replicate and one column per
+        accident period. Set by `Run`.
+    sketch : DistributionSketch, default=None
+        Running moments and t-digests of the reserves by accident period
+        and in total. Set by `Stream`.
+    """
+    model: object
+    n_replicates: int = 1000
+    process_variance: bool = True
+    chunk_size: int = 1000
+    random_state: int = None
+    max_iter: int = 30
+    tol: float = 1e-8
+    n_jobs: int = 1
+    compression: float = 500
+    reserves: pd.DataFrame = None
+    sketch: DistributionSketch = None
+
+    def __post_init__(self):
+        if not getattr(self.model, "is_fitted", False):
+            raise ValueError("The model must be fit before it can be bootstrapped.")
+        self.arrays = self._ModelArrays()
+
+    def __repr__(self):
+        return (f"Bootstrap(model={self.model!r}, n_replicates={self.n_replicates}, "
+                f"family='{self.arrays['family']}')")
+
+    def _ModelArrays(self) -> dict:
+        """
+        The arrays that define the fitted model: design matrices, fitted
+        values, scaled residuals, the refit penalty and the process
+        variance.
+        """
+        from rocky.models.GLM import glm
+        from rocky.models.LogLinear import LogLinear
+
+        model = self.model
+        X = model.GetX("train").drop(columns="is_observed", errors="ignore")
+        X_forecast = model.GetX("forecast").drop(columns="is_observed", errors="ignore")
+
+        # accident period of each forecast cell, as an indicator matrix so
+        # reserves by origin are one matrix product
+        acc = pd.concat([model.GetAcc("train"), model.GetAcc("forecast")])
+        acc_levels = np.unique(acc.to_numpy())
+        acc_forecast = np.searchsorted(acc_levels, model.GetAcc("forecast").to_numpy())
+        by_acc = np.zeros((len(acc_forecast), len(acc_levels)))
+        by_acc[np.arange(len(acc_forecast)), acc_forecast] = 1
+
+        arrays = {"acc_levels": acc_levels, "by_acc": by_acc}
+        if isinstance(model, glm):
+            # `TweedieRegressor` fits an unpenalized intercept on top of X
+            X = np.column_stack([np.ones(len(X)), X.to_numpy(dtype=float)])
+            X_forecast = np.column_stack([np.ones(len(X_forecast)),
+                                          X_forecast.to_numpy(dtype=float)])
+            coef = np.concatenate([[model.model.intercept_], model.model.coef_])
+            penalty = np.full(X.shape[1], len(X) * model.model.alpha)
+            penalty[0] = 0
+
+            y = model.GetY("train", actual_scale=True).to_numpy(dtype=float)
+            mu = np.exp(X @ coef)
+            power = model.model.power
+            dof = len(y) - np.linalg.matrix_rank(X)
+
+            # Pearson residuals, and the dispersion from their sum of squares
+            pearson = (y - mu) / mu ** (power / 2)
+            arrays.update(family="tweedie",
+                          power=power,
+                          phi=np.sum(pearson ** 2) / dof,
+                          residuals=pearson * np.sqrt(len(y) / dof))
+        elif isinstance(model, LogLinear):
+            X = X.to_numpy(dtype=float)
+            X_forecast = X_forecast.to_numpy(dtype=float)
+            coef = np.asarray(model.model.coef_, dtype=float)
+
+            # the model is fit to (standardized) log losses
+            y = model.GetY("train", log=True).to_numpy(dtype=float)
+            mu = X @ coef
+            dof = len(y) - np.linalg.matrix_rank(X)
+            if model.standardize:
+                center, scale = model.standardize_mu, model.standardize_sigma
+            else:
+                center, scale = 0.0, 1.0
+
+            residuals = y - mu
+            arrays.update(family="lognormal",
+                          center=center,
+                          scale=scale,
+                          sigma=np.sqrt(np.sum(residuals ** 2) / dof),
+                          residuals=residuals * np.sqrt(len(y) / dof),
+                          **self._LinearRefit(X, model))
+        else:
+            raise ValueError("Only `glm` and `LogLinear` models can be bootstrapped.")
+
+        arrays.update(X=X, X_forecast=X_forecast, coef=coef, mu=mu)
+        if arrays["family"] == "tweedie":
+            arrays["penalty"] = penalty
+        return arrays
+
+    @staticmethod
+    def _LinearRefit(X: np.ndarray, model) -> dict:
+        """
+        How to refit a `LogLinear` model. Least squares and ridge are linear
+        in the response, so their refit is a fixed (n_params, n_cells)
+        matrix. Lasso and elastic net are solved on X'X / n.
+        """
+        alpha, l1_ratio = model.alpha, model.l1_ratio
+        if alpha == 0:
+            return {"refit": "linear", "smoother": np.linalg.pinv(X)}
+        if l1_ratio == 0:
+            # `Ridge` penalizes the unscaled sum of squares
+            p = X.shape[1]
+            return {"refit": "linear",
+                    "smoother": np.linalg.solve(X.T @ X + alpha * np.eye(p), X.T)}
+        return {"refit": "enet",
+                "gram": X.T @ X / len(X),
+                "c0": X.T @ model.GetY("train", log=True).to_numpy(dtype=float) / len(X),
+                "alpha": alpha,
+                "l1_ratio": l1_ratio}
+
+    def _Refit(self, Y: np.ndarray) -> np.ndarray:
+        """
+        Refits the model to each pseudo-triangle (rows of `Y`), returning
+        the coefficients (n_replicates, n_params).
+        """
+        a = self.arrays
+        if a["family"] == "tweedie":
+            return tweedie_refit(a["X"], Y, a["power"], a["penalty"], a["coef"],
+                                 max_iter=self.max_iter, tol=self.tol)
+        if a["refit"] == "linear":
+            return Y @ a["smoother"].T
+        C = Y @ a["X"] / len(a["X"])
+        coef, active = enet_homotopy(a["gram"], C, a["alpha"], a["l1_ratio"],
+                                     a["coef"], a["c0"])
+
+        # the rare replicates with very long paths get coordinate descent
+        if len(active):
+            coef[active] = enet_coordinate_descent(a["gram"], C[active],
+                                                   a["alpha"], a["l1_ratio"],
+                                                   coef[active],
+                                                   max_iter=30 * self.max_iter,
+                                                   tol=self.tol)
+        return coef
+
+    def PseudoData(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Resamples the scaled residuals into `n` pseudo-triangles, on the
+        scale the model is fit on.
+
+        Returns
+        -------
+        np.ndarray
+            The pseudo data of the observed cells (n, n_cells).
+        """
+        a = self.arrays
+        resid = a["residuals"][rng.integers(0, len(a["residuals"]), size=(n, len(a["mu"])))]
+        if a["family"] != "tweedie":
+            return a["mu"] + resid
+
+        Y = a["mu"] + resid * a["mu"] ** (a["power"] / 2)
+        if a["power"] > 1:
+            # the Tweedie loss has no minimum for negative data when p > 1
+            Y = np.maximum(Y, 0)
+        return Y
+
+    def SimulateChunk(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Simulates the reserves of `n` replicates.
+
+        Returns
+        -------
+        np.ndarray
+            The reserves by accident period (n, n_acc).
+        """
+        a = self.arrays
+
+        # refit to n pseudo-triangles, and forecast with the new coefficients
+        eta = self._Refit(self.PseudoData(n, rng)) @ a["X_forecast"].T
+        if a["family"] == "tweedie":
+            sim = np.exp(eta)
+            if self.process_variance:
+                # gamma with the Tweedie mean and variance phi * mu^p
+                power, phi = a["power"], a["phi"]
+                sim = rng.gamma(sim ** (2 - power) / phi, phi * sim ** (power - 1))
+        else:
+            if self.process_variance:
+                eta = eta + a["sigma"] * rng.standard_normal(eta.shape)
+            sim = np.exp(a["center"] + a["scale"] * eta)
+
+        return sim @ a["by_acc"]
+
+    def _Chunks(self) -> list:
+        """
+        The (size, seed) of each chunk, with one spawned seed per chunk.
+        """
+        sizes = [min(self.chunk_size, self.n_replicates - start)
+                 for start in range(0, self.n_replicates, self.chunk_size)]
+        seeds = np.random.SeedSequence(self.random_state).spawn(len(sizes))
+        return list(zip(sizes, seeds))
+
+    def _Columns(self) -> list:
+        return list(self.arrays["acc_levels"]) + ["Total"]
+
+    def _RunChunk(self, size: int, seed: np.random.SeedSequence, sketch: bool):
+        """
+        Simulates one chunk, returning its reserves by accident period, or a
+        sketch of the reserves by accident period and in total.
+        """
+        reserves = self.SimulateChunk(size, np.random.default_rng(seed))
+        if not sketch:
+            return reserves
+        return DistributionSketch(self._Columns(), self.compression).Update(
+            np.column_stack([reserves, reserves.sum(axis=1)]))
+
+    def _MapChunks(self, sketch: bool = False):
+        """
+        Yields the result of every chunk, in chunk order, either from the
+        main process or from a pool of `n_jobs` workers.
+        """
+        tasks = [(size, seed, sketch) for size, seed in self._Chunks()]
+
+        n_jobs = self.n_jobs
+        if n_jobs is None or n_jobs == 0:
+            n_jobs = 1
+        elif n_jobs < 0:
+            n_jobs = max(os.cpu_count() + 1 + n_jobs, 1)
+
+        if n_jobs == 1 or len(tasks) == 1:
+            for task in tasks:
+                yield self._RunChunk(*task)
+            return
+
+        # workers only need the model arrays, not the model itself
+        worker = copy.copy(self)
+        worker.model, worker.reserves, worker.sketch = None, None, None
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_worker,
+                                 initargs=(worker,)) as pool:
+            yield from pool.map(_run_chunk, tasks)
+
+    def Run(self) -> pd.DataFrame:
+        """
+        Simulates `n_replicates` reserves, `chunk_size` replicates at a
+        time.
+
+        Returns
+        -------
+        pd.DataFrame
+            The reserves, one row per replicate and one column per accident
+            period. Also stored as `reserves`.
+        """
+        out = np.empty((self.n_replicates, len(self.arrays["acc_levels"])))
+        start = 0
+        for chunk in self._MapChunks():
+            out[start:start + len(chunk)] = chunk
+            start += len(chunk)
+
+        self.reserves = pd.DataFrame(out,
+                                     columns=pd.Index(self.arrays["acc_levels"],
+                                                      name="accident_period"))
+        return self.reserves
+
+    def Stream(self) -> DistributionSketch:
+        """
+        Simulates `n_replicates` reserves without keeping them: each chunk
+        is summarized by running moments and t-digests, and the summaries
+        are merged in chunk order, so memory does not grow with
+        `n_replicates`.
+
+        Returns
+        -------
+        DistributionSketch
+            The sketch of the reserves by accident period and in total. Also
+            stored as `sketch`.
+        """
+        self.sketch = DistributionSketch(self._Columns(), self.compression)
+        for chunk in self._MapChunks(sketch=True):
+            self.sketch.Merge(chunk)
+        return self.sketch
+
+    def Total(self) -> pd.Series:
+        """
+        The simulated total reserve of each replicate.
+        """
+        if self.reserves is None:
+            self.Run()
+        return self.reserves.sum(axis=1).rename("Total")
+
+    def Summary(self, quantiles: list = None) -> pd.DataFrame:
+        """
+        Mean, standard deviation, coefficient of variation and quantiles of
+        the reserve distribution, by accident period and in total. Uses the
+        simulated `reserves` if they are kept, and otherwise the `sketch`
+        from `Stream`.
+
+        Parameters
+        ----------
+        quantiles : list, default=None
+            The quantiles to report. If None, the 50th, 75th, 90th, 95th and
+            99th percentiles.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per accident period, plus a "Total" row.
+        """
+        if quantiles is None:
+            quantiles = [0.5, 0.75, 0.9, 0.95, 0.99]
+        if self.reserves is None and self.sketch is not None:
+            return self.sketch.Summary(quantiles)
+        if self.reserves is None:
+            self.Run()
+
+        df = self._WithTotal()
+        summary = pd.DataFrame({"mean": df.mean(), "std": df.std()})
+        summary["cv"] = summary["std"] / summary["mean"]
+        return summary.join(df.quantile(quantiles).T)
+
+    def _WithTotal(self) -> pd.DataFrame:
+        df = self.reserves.copy()
+        df.columns = df.columns.astype(object)
+        df["Total"] = self.Total()
+        return df
+
+    def VaR(self, p: float = 0.995) -> pd.Series:
+        """
+        Value at risk: the `p` quantile of the reserves, by accident period
+        and in total.
+        """
+        if self.reserves is None and self.sketch is not None:
+            return self.sketch.VaR(p)
+        if self.reserves is None:
+            self.Run()
+        return self._WithTotal().quantile(p).rename(f"VaR_{p}")
+
+    def TVaR(self, p: float = 0.995) -> pd.Series:
+        """
+        Tail value at risk: the mean of the reserves above their `p`
+        quantile, by accident period and in total.
+        """
+        if self.reserves is None and self.sketch is not None:
+            return self.sketch.TVaR(p)
+        if self.reserves is None:
+            self.Run()
+        df = self._WithTotal()
+        return df[df >= df.quantile(p)].mean().rename(f"TVaR_{p}")
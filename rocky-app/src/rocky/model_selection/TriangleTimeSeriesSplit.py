@@ -18,18 +18,27 @@ from sklearn.metrics import (
     mean_squared_log_error as msle,
     mean_absolute_percentage_error as mape)
 
-# clustering algorithms
-from sklearn.cluster import AgglomerativeClustering
-
-# clustering metrics
-from sklearn.metrics import (
-    silhouette_score,
-    calinski_harabasz_score)
-
 from sklearn.model_selection import ParameterGrid
 # import sys
 # sys.path.append('./')
 from .cv_inputs import cv_inputs, cv_blank_model
+from ._parallel import (
+    SharedFoldStore,
+    fit_score,
+    fit_score_path,
+    fold_statistics,
+    _init_worker,
+    _run_task,
+    _run_path_task)
+from .search import get_search
+from .pareto import pareto_ranks
+from .cache import fingerprint, get_cache
+from .press import press_errors
+from .clustering import WardTree
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import time
 
 from tqdm import tqdm
 
@@ -41,6 +50,28 @@ class TriangleTimeSeriesSplit:
 
     Does hyperparameter tuning for both regression and clustering methods.
 
+    The (fold, parameter) fits can be spread across a pool of workers by
+    setting `n_jobs` (-1 uses every core). `executor` is one of 'process'
+    (the default when `n_jobs` > 1), 'thread', or 'serial'.
+
+    `search` sets which (fold, parameter) pairs are fit: 'grid' (the
+    default) fits every point of the grid on every fold, 'halving' runs
+    successive halving with the earliest folds as the cheap rungs, 'bayes'
+    runs a sequential model-based search over the continuous
+    hyperparameters, and 'path' scores the whole grid with one
+    regularization-path solve per fold and l1_ratio (or power). A strategy
+    object from `rocky.model_selection.search` can also be passed.
+
+    With `precompute` (the default), each fold's Gram matrix and X'y are
+    computed once, and log-linear models are fit from them rather than from
+    the training data.
+
+    `cache` (True, a directory, or a `TuningCache`) stores the tuning
+    results, Pareto front and optimal parameters on disk, keyed by a
+    fingerprint of the triangle, folds, grid and settings (plus anything in
+    `cache_extra`), so `OptimalParameters` on an unchanged triangle does not
+    re-run the cross-validation.
+
 
     Methods
     -------
@@ -68,6 +99,12 @@ class TriangleTimeSeriesSplit:
         clustering_hyperparameters: bool = False,
         clustering_grid: dict = None,
         n_failed_to_converge: int = 0,
+        n_jobs: int = 1,
+        executor: str = None,
+        search=None,
+        precompute: bool = True,
+        cache=None,
+        cache_extra: dict = None,
         **kwargs,
     ):
         self.tri = triangle
@@ -79,6 +116,12 @@ class TriangleTimeSeriesSplit:
         self.model = model
         self.log_transform = log_transform
         self.n_failed_to_converge = n_failed_to_converge
+        self.n_jobs = n_jobs
+        self.executor = executor
+        self.search = search
+        self.precompute = precompute
+        self.cache = cache
+        self.cache_extra = cache_extra
         self.X = X
         self.y = y
 
@@ -285,127 +328,337 @@ Either regression_hyperparameters or clustering_hyperparameters must be True.
         if "n_clusters" in kwargs:
             self.grid["n_clusters"] = kwargs["n_clusters"]
 
-    def RunCrossValidation(self):
-        # Initialize storage for results
-        self.tuning_results = []
-        self.tuning_years = []
-        self.tuning_param = []
-        self.tuning_mse = []
-        self.tuning_mae = []
-
-        # extra metrics for clustering
-        if self.clustering_hyperparameters:
-            self.tuning_silhouette = []
-            self.tuning_calinski_harabasz = []
-            
-        # Perform cross-validation
-        for train_indices, val_indices in self.GetSplit():
-            # Extract training and validation data
-            X_train = self.tri.get_X_base().iloc[train_indices]
-            if self.log_transform:
-                y_train = np.log(self.tri.get_y_base()[train_indices])
-            else:
-                y_train = self.tri.get_y_base()[train_indices]
-
-            X_val = self.tri.get_X_base().iloc[val_indices]
-            if self.log_transform:
-                y_val = np.log(self.tri.get_y_base()[val_indices])
-            else:
-                y_val = self.tri.get_y_base()[val_indices]
+    def _GetArrays(self) -> tuple:
+        """
+        The full design matrix, response (log-transformed if
+        `log_transform`) and calendar periods as contiguous arrays.
+        """
+        X = np.ascontiguousarray(self.tri.get_X_base().to_numpy(dtype=float))
+        y = self.tri.get_y_base().to_numpy(dtype=float)
+        if self.log_transform:
+            y = np.log(y)
+        cal = self.tri.get_X_id().calendar_period.to_numpy()
+        return X, y, cal
 
-            excluded_cal = (
-                self.tri.get_X_id().iloc[train_indices].calendar_period.max() + 1
-            )
+    def _GetFoldArrays(self) -> list:
+        """
+        Builds the training and validation arrays for each fold once, so they
+        can be reused for every point in the parameter grid (and shipped to
+        worker processes once, rather than once per task).
 
-            # Iterate over the grid of parameters
-            for params in tqdm(
-                ParameterGrid(self.grid),
-                desc=f"Tuning on {excluded_cal} and earlier",
-            ):
-                mse_values = []
-
-
-                if self.regression_hyperparameters:
-                    # Create and fit the model
-                    if self.model_type == "tweedie":
-                        model = TweedieRegressor(**params)
-                    elif self.model_type == "loglinear":
-                        # if alpha is 0, then it is linear regression
-                        if params["alpha"] == 0:
-                            # only return the first element of the list
-                            # the rest will be identical in this case
-                            model = LinearRegression()
-                            params["l1_ratio"] = 0
-                        elif 'l1_ratio' not in params:
-                            # if l1_ratio is not specified, then it is ridge
-                            model = Ridge(alpha=params["alpha"])
-                            params["l1_ratio"] = 0
-                        else:
-                            # if l1_ratio is 1, then it is lasso
-                            if params["l1_ratio"] == 1:
-                                model = Lasso(alpha=params["alpha"])
-                            # if l1_ratio is 0, then it is ridge
-                            elif params["l1_ratio"] == 0:
-                                model = Ridge(alpha=params["alpha"])
-                            # if l1_ratio is between 0 and 1, then it is elastic net
-                            else:
-                                model = ElasticNet(
-                                    alpha=params["alpha"], l1_ratio=params["l1_ratio"]
-                                )
-                elif self.clustering_hyperparameters:
-                    model = AgglomerativeClustering(n_clusters=params["n_clusters"],
-                                                    linkage="ward",
-                                                    affinity="euclidean",
-                                                    memory="./cache")
-
-
-                # no matter which one, fit the model
-                model.fit(X_train, y_train)
-
-                # Compute the predictions and MSE for the validation set
-                y_val_pred = model.predict(X_val)
-                mse_values = mse(y_val, y_val_pred)
-                mae_values = mae(y_val, y_val_pred)
+        Returns
+        -------
+        list
+            One dictionary per fold, with `X_train`, `y_train`, `X_val`,
+            `y_val` and the `excluded_cal` calendar period, along with the
+            fold's sufficient statistics if `precompute` is True.
+        """
+        X, y, cal = self._GetArrays()
 
-                # Store the results
-                self.tuning_years.append(excluded_cal)
-                self.tuning_param.append(params)
-                self.tuning_mse.append(mse_values)
-                self.tuning_mae.append(mae_values)
+        folds = []
+        for train_indices, val_indices in self.GetSplit():
+            folds.append({
+                "X_train": X[train_indices],
+                "y_train": y[train_indices],
+                "X_val": X[val_indices],
+                "y_val": y[val_indices],
+                "excluded_cal": cal[train_indices].max() + 1,
+            })
+            if self.precompute:
+                folds[-1].update(fold_statistics(folds[-1]["X_train"],
+                                                 folds[-1]["y_train"]))
+        return folds
+
+    def _RunTasks(self, folds: list, tasks: list, path: bool = False) -> list:
+        """
+        Runs the (fold index, params) tasks, either in the main process or
+        across a pool of workers, depending on `n_jobs` and `executor`.
+        Results are returned in the same order as `tasks`.
 
+        If `path` is True, each task's `alpha` is an array, and each result
+        is a list with one result per alpha (see `fit_score_path`).
+        """
+        func, worker_func = (fit_score_path, _run_path_task) if path else (fit_score, _run_task)
+
+        n_jobs = self.n_jobs
+        if n_jobs is None or n_jobs == 0:
+            n_jobs = 1
+        elif n_jobs < 0:
+            n_jobs = max(os.cpu_count() + 1 + n_jobs, 1)
+
+        executor = self.executor
+        if executor is None:
+            executor = "process" if n_jobs > 1 else "serial"
+        if executor not in ["serial", "process", "thread"]:
+            raise ValueError("executor must be one of 'serial', 'process', or 'thread'.")
+
+        task_args = [(i, params, self.model_type,
+                      self.regression_hyperparameters,
+                      self.clustering_hyperparameters) for i, params in tasks]
+        desc = f"Tuning on {len(folds)} folds"
+
+        if executor == "serial" or n_jobs == 1:
+            return [func(folds[i], *args)
+                    for i, *args in tqdm(task_args, desc=desc)]
+
+        if executor == "thread":
+            # threads share memory with the main process already
+            with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+                return list(tqdm(pool.map(lambda t: func(folds[t[0]], *t[1:]),
+                                          task_args),
+                                 total=len(task_args),
+                                 desc=desc))
+
+        # processes attach to the fold arrays in shared memory once each
+        chunksize = max(len(task_args) // (n_jobs * 4), 1)
+        with SharedFoldStore(folds) as store:
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     initializer=_init_worker,
+                                     initargs=(store.spec,)) as pool:
+                return list(tqdm(pool.map(worker_func, task_args, chunksize=chunksize),
+                                 total=len(task_args),
+                                 desc=desc))
+
+    @staticmethod
+    def _SummarizeTuning(params: list,
+                         years: list,
+                         mse: list,
+                         mae: list,
+                         fit_time: list,
+                         failed_to_converge: list) -> pd.DataFrame:
+        """
+        Summarizes the (fold, params) scores into one row per point of the
+        grid, in the `tuning_results` format.
+        """
         # split out parameters
         tuning_parameters = {}
-        for p in self.tuning_param:
+        for p in params:
             for k, v in p.items():
                 if k not in tuning_parameters:
                     tuning_parameters[k] = []
                 tuning_parameters[k].append(v)
 
         # Create a dataframe with the results
-        self.tuning_results = pd.DataFrame(tuning_parameters).round(2)
-        param_cols = self.tuning_results.columns.tolist()
-        self.tuning_results["tuning_years"] = self.tuning_years
-        self.tuning_results["tuning_mse"] = self.tuning_mse
-        self.tuning_results["tuning_mae"] = self.tuning_mae
-
-        # group by the param_cols, and get the mean and sd of mse, mae, d2
-        self.tuning_results = (
-            self.tuning_results.groupby(param_cols).agg(
+        tuning_results = pd.DataFrame(tuning_parameters).round(2)
+        param_cols = tuning_results.columns.tolist()
+        tuning_results["tuning_years"] = years
+        tuning_results["tuning_mse"] = mse
+        tuning_results["tuning_mae"] = mae
+        tuning_results["tuning_fit_time"] = fit_time
+        tuning_results["tuning_failed_to_converge"] = failed_to_converge
+
+        # group by the param_cols, and get the mean and sd of mse, mae, d2,
+        # along with the time spent fitting and the number of fits that
+        # failed to converge
+        return (
+            tuning_results.groupby(param_cols).agg(
                 {
                     "tuning_mse": ["mean", "std"],
+                    "tuning_years": ["nunique"],
                     "tuning_mae": ["mean", "std"],
+                    "tuning_fit_time": ["mean", "sum"],
+                    "tuning_failed_to_converge": ["sum"],
                 }
             )
             # reset the index
             .reset_index()
             # flatten the column names
             .pipe(lambda x: x.set_axis(["_".join(col) for col in x.columns], axis=1))
+            # number of folds each point was scored on (can vary by search)
+            .rename(columns={"tuning_years_nunique": "tuning_n_folds"})
             # sort by mean mse then std mse
             .sort_values(by=["tuning_mse_mean", "tuning_mse_std"], ascending=True)
         )
 
+    def RunCrossValidation(self):
+        # Initialize storage for results
+        self.tuning_results = []
+        self.tuning_years = []
+        self.tuning_param = []
+        self.tuning_mse = []
+        self.tuning_mae = []
+        self.tuning_fit_time = []
+        self.tuning_failed_to_converge = []
+
+        # Extract training and validation data once per fold
+        folds = self._GetFoldArrays()
+
+        # clustering is scored from one linkage tree per fold
+        if self.clustering_hyperparameters:
+            self.tuning_silhouette = []
+            self.tuning_calinski_harabasz = []
+            self._RunClusteringCrossValidation(folds)
+            self.has_tuning_results = True
+            return
+
+        # every (fold, params) pair is an independent task -- the search
+        # strategy decides which ones to run, and `evaluate` records them
+        def evaluate(tasks, path=False):
+            results = self._RunTasks(folds, tasks, path=path)
+            if path:
+                # one result per alpha on each path
+                tasks = [task for task, res in zip(tasks, results) for _ in res]
+                results = [r for res in results for r in res]
+            for (i, _), result in zip(tasks, results):
+                # Store the results
+                self.tuning_years.append(folds[i]["excluded_cal"])
+                self.tuning_param.append(result["params"])
+                self.tuning_mse.append(result["mse"])
+                self.tuning_mae.append(result["mae"])
+                self.tuning_fit_time.append(result["fit_time"])
+                self.tuning_failed_to_converge.append(result["failed_to_converge"])
+            return results
+
+        # Perform cross-validation
+        get_search(self.search).run(evaluate, len(folds), self.grid)
+
+        self.n_failed_to_converge = int(np.sum(self.tuning_failed_to_converge))
+
+        self.tuning_results = self._SummarizeTuning(self.tuning_param,
+                                                    self.tuning_years,
+                                                    self.tuning_mse,
+                                                    self.tuning_mae,
+                                                    self.tuning_fit_time,
+                                                    self.tuning_failed_to_converge)
+
         self.has_tuning_results = True
 
+    def _RunClusteringCrossValidation(self, folds: list) -> None:
+        """
+        Scores every `n_clusters` in the clustering grid on each fold. The
+        Ward linkage of the fold's training cells (design matrix and
+        response) is computed once and cut at each number of clusters.
+        """
+        n_clusters = list(self.clustering_grid["n_clusters"])
+        for fold in tqdm(folds, desc=f"Clustering on {len(folds)} folds"):
+            start = time.perf_counter()
+            tree = WardTree(np.column_stack([fold["X_train"], fold["y_train"]]))
+            scores = tree.Score(n_clusters)
+            fit_time = (time.perf_counter() - start) / len(n_clusters)
+
+            for k, silhouette, ch in zip(n_clusters,
+                                         scores["silhouette"],
+                                         scores["calinski_harabasz"]):
+                self.tuning_years.append(fold["excluded_cal"])
+                self.tuning_param.append({"n_clusters": k})
+                self.tuning_silhouette.append(silhouette)
+                self.tuning_calinski_harabasz.append(ch)
+                self.tuning_fit_time.append(fit_time)
+
+        tuning_results = pd.DataFrame({
+            "n_clusters": [p["n_clusters"] for p in self.tuning_param],
+            "tuning_years": self.tuning_years,
+            "tuning_silhouette": self.tuning_silhouette,
+            "tuning_calinski_harabasz": self.tuning_calinski_harabasz,
+            "tuning_fit_time": self.tuning_fit_time,
+        })
+        self.n_failed_to_converge = 0
+        self.tuning_results = (
+            tuning_results.groupby("n_clusters").agg(
+                {
+                    "tuning_silhouette": ["mean", "std"],
+                    "tuning_years": ["nunique"],
+                    "tuning_calinski_harabasz": ["mean", "std"],
+                    "tuning_fit_time": ["mean", "sum"],
+                }
+            )
+            .reset_index()
+            .pipe(lambda x: x.set_axis(["_".join(col) for col in x.columns], axis=1))
+            .rename(columns={"tuning_years_nunique": "tuning_n_folds"})
+            # best separated clusterings first
+            .sort_values(by="tuning_silhouette_mean", ascending=False)
+        )
+
+    def RunPRESS(self, alphas=None, kind: str = "last") -> pd.DataFrame:
+        """
+        Closed-form cross-validation of least squares and ridge log-linear
+        models (`l1_ratio` = 0), using the generalized PRESS identity on one
+        factorization of the design matrix (see `model_selection.press`).
+        Takes a fraction of the time of `RunCrossValidation`, so it can be
+        used to screen the grid first (see `ScreenGrid`).
+
+        Parameters
+        ----------
+        alphas : array-like, default=None
+            The ridge penalties to score (0 is least squares). If None, the
+            alphas in the grid are used.
+        kind : str, default='last'
+            'last' leaves out the last k diagonals for each fold of
+            `GetSplit`, giving the same errors as `RunCrossValidation` for
+            these models. 'diagonal' leaves out each calendar diagonal on
+            its own.
+
+        Returns
+        -------
+        pd.DataFrame
+            The results in the same format as `tuning_results`, also stored
+            as `press_results`. The number of blocks that had to be refit
+            (because I - H_SS was singular) is stored as `n_press_refits`.
+        """
+        if self.model_type != "loglinear" or not self.regression_hyperparameters:
+            raise ValueError("RunPRESS is only available for loglinear models.")
+        if alphas is None:
+            alphas = self.grid["alpha"]
+        alphas = np.unique(np.asarray(alphas, dtype=float))
+
+        # only the observed cells (future cells are in the design matrix too)
+        X, y, cal = self._GetArrays()
+        current_cal = self.tri.getCurCalendarYear()
+        observed = cal <= current_cal
+        X, y, cal = X[observed], y[observed], cal[observed]
+
+        # blocks of cells to leave out
+        if kind == "last":
+            # the validation cells of each `GetSplit` fold
+            blocks = [np.flatnonzero(cal >= current_cal - i)
+                      for i in range(1, self.n_splits_ + 1)]
+        elif kind == "diagonal":
+            blocks = [np.flatnonzero(cal == c) for c in np.unique(cal)]
+        else:
+            raise ValueError("kind must be one of 'last' or 'diagonal'.")
+
+        start = time.perf_counter()
+        errors, refit = press_errors(X, y, blocks, alphas)
+        fit_time = (time.perf_counter() - start) / refit.size
+        self.n_press_refits = int(refit.sum())
+
+        # other hyperparameters are reported at their first grid value
+        fixed = {k: np.atleast_1d(v)[0] for k, v in self.grid.items()
+                 if k not in ["alpha", "l1_ratio"]}
+
+        params, years, mse_, mae_ = [], [], [], []
+        for block, block_errors in zip(blocks, errors):
+            for alpha, e in zip(alphas, block_errors):
+                p = dict(fixed, alpha=alpha, l1_ratio=0)
+                params.append({k: p[k] for k in sorted(p)})
+                years.append(cal[block].min())
+                mse_.append(np.mean(e ** 2))
+                mae_.append(np.mean(np.abs(e)))
+
+        self.press_results = self._SummarizeTuning(params,
+                                                   years,
+                                                   mse_,
+                                                   mae_,
+                                                   [fit_time] * len(params),
+                                                   [0] * len(params))
+        return self.press_results
+
+    def ScreenGrid(self, n_keep: int = 5, kind: str = "last") -> dict:
+        """
+        First-stage screen of the grid: keeps the `n_keep` alphas with the
+        lowest closed-form validation MSE (see `RunPRESS`), so the refit-based
+        `RunCrossValidation` only searches around them.
+
+        Returns
+        -------
+        dict
+            The screened grid, which also replaces `grid`.
+        """
+        results = self.RunPRESS(kind=kind)
+        keep = results.nsmallest(n_keep, "tuning_mse_mean")["alpha_"].to_numpy()
+        self.grid["alpha"] = np.sort(keep)
+        return self.grid
+
     def CalculateParameterParetoFront(self, measures=None):
         """
         Get the Pareto front from the results of RunCrossValidation.
@@ -429,7 +682,8 @@ Either regression_hyperparameters or clustering_hyperparameters must be True.
 
         Returns:
         -------
-        A pandas DataFrame containing the Pareto front.
+        A pandas DataFrame containing the Pareto front. The Pareto rank of
+        every model is also added to `tuning_results` as `pareto_rank`.
         """
 
         # Ensure RunCrossValidation has been called
@@ -437,45 +691,63 @@ Either regression_hyperparameters or clustering_hyperparameters must be True.
             self.RunCrossValidation()
 
         # If no measures are passed, use the default
-        if measures is None:
+        if measures is None and self.clustering_hyperparameters:
+            measures = {"tuning_silhouette_mean": "max",
+                        "tuning_calinski_harabasz_mean": "max"}
+        elif measures is None:
             measures = {"tuning_mse_mean": "min", "tuning_mse_std": "min"}
 
-        # Create a copy of the results dataframe
+        # Create a copy of the results dataframe, only comparing the
+        # parameters that were scored on every fold (successive halving
+        # drops most candidates after the early folds)
         results = self.tuning_results.copy()
+        if "tuning_n_folds" in results.columns:
+            results = results.loc[results.tuning_n_folds.eq(results.tuning_n_folds.max())]
+
+        # rank every model by non-dominated sorting: a model is Pareto
+        # optimal (rank 1) if no other model is at least as good on every
+        # measure and strictly better on one
+        results["pareto_rank"] = pareto_ranks(
+            results[list(measures.keys())].to_numpy(dtype=float),
+            list(measures.values()))
 
-        # Initialize a boolean Series to keep track of whether each model
-        # is Pareto optimal
-        is_pareto_optimal = pd.Series([True] * len(results), index=results.index)
-
-        for i, model in results.iterrows():
-            # Compare the current model to all other models
-            for measure, direction in measures.items():
-                # for each direction:
-                if direction == "min":
-
-                    # if there is no other model with a lower value of the measure
-                    # and a different set of parameters, then the current model is
-                    # Pareto optimal
-                    is_pareto_optimal[i] = not any(
-                        (results[measure] <= model[measure])
-                        & (
-                            results[list(measures.keys())]
-                            != model[list(measures.keys())]
-                        ).any(axis=1)
-                    )
-                elif direction == "max":
-                    is_pareto_optimal[i] = not any(
-                        (results[measure] >= model[measure])
-                        & (
-                            results[list(measures.keys())]
-                            != model[list(measures.keys())]
-                        ).any(axis=1)
-                    )
+        # keep the ranks with the tuning results (models that were not
+        # compared are left missing)
+        self.tuning_results["pareto_rank"] = results["pareto_rank"]
 
         # Return only the Pareto optimal models
-        self.pareto_optimal_parameters = results[is_pareto_optimal]
+        self.pareto_optimal_parameters = results[results.pareto_rank.eq(1)]
         return self.pareto_optimal_parameters
 
+    def CacheKey(self, measures=None, tie_criterion=None) -> str:
+        """
+        Fingerprint of everything that determines the tuning results and
+        the optimal parameters: the triangle cells and design matrix, the
+        folds, the model type and grid, the search, the Pareto measures and
+        tie criterion, and `cache_extra`.
+        """
+        if isinstance(self.search, str) or self.search is None:
+            search = self.search
+        else:
+            search = (type(self.search).__name__, vars(self.search))
+
+        return fingerprint(
+            "TriangleTimeSeriesSplit",
+            self.tri.get_X_base(),
+            self.tri.get_y_base(),
+            self.tri.get_X_id(),
+            [list(split) for split in self.GetSplit()],
+            self.model_type,
+            self.log_transform,
+            self.regression_hyperparameters,
+            self.clustering_hyperparameters,
+            self.clustering_grid if self.clustering_hyperparameters else self.grid,
+            search,
+            measures,
+            self.tie_criterion if tie_criterion is None else tie_criterion,
+            self.cache_extra,
+        )
+
     def OptimalParameters(self, measures=None, tie_criterion=None):
         """
         Returns the optimal model, which is defined to be the Pareto-optimal
@@ -488,6 +760,18 @@ Either regression_hyperparameters or clustering_hyperparameters must be True.
         This method is intended to be the only method that the user needs to call
         to get the optimal Tweedie model.
         """
+        # look the results up in the cache before running anything
+        cache = get_cache(self.cache)
+        key, entry = None, None
+        if cache is not None and not hasattr(self, "pareto_optimal_parameters"):
+            key = self.CacheKey(measures, tie_criterion)
+            entry = cache.get(key)
+            if entry is not None:
+                self.tuning_results = entry["tuning_results"]
+                self.pareto_optimal_parameters = entry["pareto_optimal_parameters"]
+                self.n_failed_to_converge = entry["n_failed_to_converge"]
+                self.has_tuning_results = True
+
         # Ensure CalculateParameterParetoFront has been called
         if not hasattr(self, "pareto_optimal_parameters"):
             self.CalculateParameterParetoFront(measures=measures)
@@ -495,24 +779,53 @@ Either regression_hyperparameters or clustering_hyperparameters must be True.
         if tie_criterion is None:
             tie_criterion = self.tie_criterion
 
+        # `ave_mse_test` is the old name of the mean validation MSE
+        if tie_criterion == "ave_mse_test":
+            tie_criterion = "tuning_mse_mean"
+
+        # clustering ties go to the best separated clusters
+        ascending = True
+        if self.clustering_hyperparameters:
+            tie_criterion, ascending = "tuning_silhouette_mean", False
+
         # if there is more than one optimal model, return the one with the lowest MSE
         if self.pareto_optimal_parameters.shape[0] > 1:
             print(f"More than one optimal model found. Using {tie_criterion}")
             print(self.pareto_optimal_parameters)
             optimal_model = (self.pareto_optimal_parameters
-                             .sort_values(tie_criterion)
+                             .sort_values(tie_criterion, ascending=ascending)
                              .iloc[0])
         else:
             optimal_model = self.pareto_optimal_parameters.iloc[0]
 
         # get the optimal set of hyperparameters
-        if self.model_type == "tweedie":
+        if self.clustering_hyperparameters:
+            n_clusters = int(optimal_model["n_clusters_"])
+        elif self.model_type == "tweedie":
             alpha = optimal_model["alpha_"]
             power = optimal_model["power_"]
         elif self.model_type == "loglinear":
             alpha = optimal_model["alpha_"]
             l1_ratio = optimal_model["l1_ratio_"]
 
+        # store the results for next time
+        grid = self.clustering_grid if self.clustering_hyperparameters else self.grid
+        if key is not None and entry is None:
+            cache.put(key, {
+                "model_type": self.model_type,
+                "params": {k[:-1]: v for k, v in optimal_model.items()
+                           if k[:-1] in grid},
+                "tuning_results": self.tuning_results,
+                "pareto_optimal_parameters": self.pareto_optimal_parameters,
+                "optimal_model": optimal_model,
+                "n_failed_to_converge": self.n_failed_to_converge,
+            })
+
+        # clustering has no model to re-fit, only the number of clusters
+        if self.clustering_hyperparameters:
+            self.best_model = optimal_model
+            return n_clusters
+
         # Re-fit a model with the optimal hyperparameters, and return it
         if self.model_type == "tweedie":
             best_model = TweedieRegressor(alpha=alpha, power=power, link="log")
@@ -663,16 +976,11 @@ Either regression_hyperparameters or clustering_hyperparameters must be True.
         return fitted_stats
 
     def _fit_ward_clusters(self, X, n_clusters):
-        # fit the ward clustering algorithm
-        clusterer = AgglomerativeClustering(
-            n_clusters=n_clusters, linkage="ward", affinity="euclidean"
-        )
-        
-        # get the cluster labels
-        cluster_labels = clusterer.fit_predict(X)
-
-        # get the silhouette score
-        silhouette_avg = silhouette_score(X, cluster_labels)
-
-        # get the calinski harabasz score
-        calinski_harabasz_avg = calinski_harabasz_score(X, cluster_labels)
\ No newline at end of file
+        # one linkage tree, cut at every requested number of clusters
+        scores = WardTree(X).Score(np.atleast_1d(n_clusters))
+
+        # get the cluster labels, silhouette and calinski harabasz scores
+        cluster_labels = scores["labels"]
+        silhouette_avg = scores["silhouette"]
+        calinski_harabasz_avg = scores["calinski_harabasz"]
+        return cluster_labels, silhouette_avg, calinski_harabasz_avg
@@ -0,0 +1,456 @@
+"""
+Helpers for running the (fold, parameters) tasks of
+`TriangleTimeSeriesSplit.RunCrossValidation` either in the main process or
+across a pool of workers.
+
+The fold matrices are written once to shared memory by the parent process,
+and each worker attaches to them when it starts, so only the small
+`(fold index, parameter dict)` tuples are pickled for each task.
+
+Each fold can also carry its sufficient statistics (the column means and the
+centered Gram matrix and X'y). Log-linear models are then fit from those
+directly: ordinary least squares and ridge in closed form, and lasso and
+elastic net by coordinate descent on the Gram matrix. This gives the same
+coefficients as the scikit-learn estimators, without centering (or copying)
+the training data again for every point of the grid.
+"""
+from multiprocessing import shared_memory
+import time
+import warnings
+
+import numpy as np
+
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import (
+    TweedieRegressor,
+    ElasticNet,
+    Lasso,
+    Ridge,
+    LinearRegression,
+    enet_path)
+from sklearn.metrics import (
+    mean_squared_error as mse,
+    mean_absolute_error as mae)
+
+# names of the arrays stored for each fold
+FOLD_ARRAYS = ["X_train", "y_train", "X_val", "y_val"]
+
+# names of the sufficient statistics stored for each fold
+FOLD_STATISTICS = ["X_mean", "y_mean", "y_centered", "gram", "xy"]
+
+# iteration limit of the lasso and elastic net coordinate descent, the
+# default of the `Lasso` and `ElasticNet` estimators of `_build_model`
+ENET_MAX_ITER = 1000
+
+# fold arrays attached by a worker process (set by `_init_worker`)
+_WORKER_FOLDS = None
+_WORKER_SHM = []
+
+
+def fold_statistics(X_train: np.ndarray, y_train: np.ndarray) -> dict:
+    """
+    Sufficient statistics of a fold's training data for linear models with
+    an (unpenalized) intercept.
+
+    Returns
+    -------
+    dict
+        The column means `X_mean`, the mean `y_mean`, the centered response
+        `y_centered`, the centered Gram matrix `gram` and the centered `xy`.
+    """
+    X_mean = X_train.mean(axis=0)
+    y_mean = y_train.mean()
+    Xc = X_train - X_mean
+    y_centered = y_train - y_mean
+    return {
+        "X_mean": X_mean,
+        "y_mean": np.asarray(y_mean),
+        "y_centered": y_centered,
+        "gram": np.ascontiguousarray(Xc.T @ Xc),
+        "xy": Xc.T @ y_centered,
+    }
+
+
+def _loglinear_solver(params: dict) -> str:
+    """
+    Which log-linear model a point of the grid reduces to. Updates `params`
+    in place (`l1_ratio` is set to 0 when the model reduces to a linear or
+    ridge regression).
+    """
+    # if alpha is 0, then it is linear regression
+    if params["alpha"] == 0:
+        params["l1_ratio"] = 0
+        return "linear"
+    # if l1_ratio is not specified, then it is ridge
+    elif "l1_ratio" not in params:
+        params["l1_ratio"] = 0
+        return "ridge"
+    # if l1_ratio is 1, then it is lasso
+    elif params["l1_ratio"] == 1:
+        return "lasso"
+    # if l1_ratio is 0, then it is ridge
+    elif params["l1_ratio"] == 0:
+        return "ridge"
+    # if l1_ratio is between 0 and 1, then it is elastic net
+    else:
+        return "elasticnet"
+
+
+def _solve_loglinear(fold: dict, params: dict) -> tuple:
+    """
+    Fits a log-linear model from the fold's sufficient statistics.
+
+    Returns
+    -------
+    tuple
+        The coefficients and the intercept.
+    """
+    solver = _loglinear_solver(params)
+    gram, xy = fold["gram"], fold["xy"]
+    if solver == "linear":
+        # minimum norm least squares solution, as `LinearRegression` gives
+        coef = np.linalg.lstsq(gram, xy, rcond=None)[0]
+    elif solver == "ridge":
+        coef = np.linalg.solve(gram + params["alpha"] * np.eye(len(gram)), xy)
+    else:
+        # coordinate descent on the Gram matrix, with the same objective,
+        # tolerance and iteration limit as `Lasso` and `ElasticNet`
+        l1_ratio = 1.0 if solver == "lasso" else params["l1_ratio"]
+        coef = enet_path(fold["X_train"],
+                         fold["y_centered"],
+                         l1_ratio=l1_ratio,
+                         alphas=[params["alpha"]],
+                         precompute=gram,
+                         Xy=xy,
+                         max_iter=ENET_MAX_ITER,
+                         check_input=False)[1][:, 0]
+    intercept = fold["y_mean"] - fold["X_mean"] @ coef
+    return coef, intercept
+
+
+def _build_model(model_type: str,
+                 params: dict,
+                 regression_hyperparameters: bool = True,
+                 clustering_hyperparameters: bool = False):
+    """
+    Returns an unfitted model for one point of the parameter grid. Mirrors
+    the model selection logic that `RunCrossValidation` has always used, and
+    may update `params` in place (eg `l1_ratio` is set to 0 when the model
+    reduces to a linear or ridge regression).
+    """
+    if regression_hyperparameters:
+        if model_type == "tweedie":
+            model = TweedieRegressor(**params)
+        elif model_type == "loglinear":
+            solver = _loglinear_solver(params)
+            if solver == "linear":
+                model = LinearRegression()
+            elif solver == "ridge":
+                model = Ridge(alpha=params["alpha"])
+            elif solver == "lasso":
+                model = Lasso(alpha=params["alpha"])
+            else:
+                model = ElasticNet(alpha=params["alpha"],
+                                   l1_ratio=params["l1_ratio"])
+        else:
+            raise ValueError(f"model_type {model_type} cannot be tuned in parallel.")
+    elif clustering_hyperparameters:
+        # the clustering grid is scored from one linkage tree per fold
+        # (see `WardTree`), not by fitting each point of the grid
+        raise ValueError("Clustering is tuned with `WardTree`, not per grid point.")
+    else:
+        raise ValueError("""
+Either regression_hyperparameters or clustering_hyperparameters must be True.
+""")
+    return model
+
+
+def fit_score(fold: dict,
+              params: dict,
+              model_type: str,
+              regression_hyperparameters: bool = True,
+              clustering_hyperparameters: bool = False) -> dict:
+    """
+    Fits one model on the training part of `fold` and scores it on the
+    validation part. Log-linear models are fit from the fold's sufficient
+    statistics when it has them.
+
+    Parameters
+    ----------
+    fold : dict
+        Dictionary of the fold arrays (see `FOLD_ARRAYS`), and optionally
+        the fold's sufficient statistics (see `FOLD_STATISTICS`).
+    params : dict
+        One point from the parameter grid.
+    model_type : str
+        The model type being tuned.
+
+    Returns
+    -------
+    dict
+        The (possibly updated) parameters, the validation MSE and MAE, the
+        time spent fitting, and whether the solver failed to converge.
+    """
+    params = dict(params)
+    use_statistics = (regression_hyperparameters
+                      and model_type == "loglinear"
+                      and "gram" in fold)
+    if not use_statistics:
+        model = _build_model(model_type,
+                             params,
+                             regression_hyperparameters,
+                             clustering_hyperparameters)
+
+    # time the fit, and record any convergence warnings raised by the solver
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ConvergenceWarning)
+        start = time.perf_counter()
+        if use_statistics:
+            coef, intercept = _solve_loglinear(fold, params)
+        else:
+            model.fit(fold["X_train"], fold["y_train"])
+        fit_time = time.perf_counter() - start
+    failed = any(issubclass(w.category, ConvergenceWarning) for w in caught)
+
+    # Compute the predictions and MSE for the validation set
+    if use_statistics:
+        y_val_pred = fold["X_val"] @ coef + intercept
+    else:
+        y_val_pred = model.predict(fold["X_val"])
+
+    return {
+        "params": params,
+        "mse": mse(fold["y_val"], y_val_pred),
+        "mae": mae(fold["y_val"], y_val_pred),
+        "fit_time": fit_time,
+        "failed_to_converge": int(failed),
+    }
+
+
+def _path_results(fold: dict,
+                  params: dict,
+                  alphas: np.ndarray,
+                  predictions: np.ndarray,
+                  fit_time: float,
+                  failed: np.ndarray,
+                  l1_ratios: np.ndarray = None) -> list:
+    """
+    Splits the validation predictions for a whole path into one result
+    dictionary per alpha, in the same form as `fit_score`.
+    """
+    err = predictions - fold["y_val"]
+    mse_path = np.mean(err ** 2, axis=1)
+    mae_path = np.mean(np.abs(err), axis=1)
+
+    results = []
+    for j, alpha in enumerate(alphas):
+        p = dict(params, alpha=alpha)
+        if l1_ratios is not None:
+            p["l1_ratio"] = l1_ratios[j]
+        results.append({
+            # ordered by name, like the points of a `ParameterGrid`
+            "params": {k: p[k] for k in sorted(p)},
+            "mse": mse_path[j],
+            "mae": mae_path[j],
+            # the path is solved at once, so share the time across alphas
+            "fit_time": fit_time / len(alphas),
+            "failed_to_converge": int(failed[j]),
+        })
+    return results
+
+
+def _loglinear_path(fold: dict, params: dict, alphas: np.ndarray) -> tuple:
+    """
+    Validation predictions of a log-linear model for every alpha at once.
+
+    Alpha = 0 is ordinary least squares. Ridge uses one SVD of the
+    centered training data, so every alpha is a rescaling of the singular
+    values. Lasso and elastic net use coordinate descent on the Gram
+    matrix along the descending alphas, each warm-started from the last.
+
+    Returns
+    -------
+    tuple
+        The predictions (n_alphas, n_val), whether each fit failed to
+        converge, and the l1_ratio each alpha reduces to.
+    """
+    if "gram" not in fold:
+        fold = dict(fold, **fold_statistics(fold["X_train"], fold["y_train"]))
+
+    l1_ratio = params.get("l1_ratio", 0)
+    X_val = fold["X_val"] - fold["X_mean"]
+    predictions = np.empty((len(alphas), len(fold["y_val"])))
+    failed = np.zeros(len(alphas), dtype=bool)
+    l1_ratios = np.where(alphas == 0, 0, l1_ratio).astype(float)
+
+    # alpha = 0 is linear regression, whatever the l1_ratio
+    is_ols = alphas == 0
+    if is_ols.any():
+        coef = np.linalg.lstsq(fold["gram"], fold["xy"], rcond=None)[0]
+        predictions[is_ols] = X_val @ coef
+
+    penalized = np.flatnonzero(~is_ols)
+    if len(penalized) > 0:
+        if l1_ratio == 0:
+            # ridge: coef(alpha) = V diag(s / (s^2 + alpha)) U'y
+            Xc = fold["X_train"] - fold["X_mean"]
+            U, sv, Vt = np.linalg.svd(Xc, full_matrices=False)
+            Uy = U.T @ fold["y_centered"]
+            Z = X_val @ Vt.T
+            shrink = sv / (sv ** 2 + alphas[penalized, None])
+            predictions[penalized] = (shrink * Uy) @ Z.T
+        else:
+            # lasso / elastic net: warm-started coordinate descent from the
+            # largest alpha down
+            order = penalized[np.argsort(-alphas[penalized], kind="stable")]
+            path_alphas, coefs, _, n_iters = enet_path(fold["X_train"],
+                                                       fold["y_centered"],
+                                                       l1_ratio=l1_ratio,
+                                                       alphas=alphas[order],
+                                                       precompute=fold["gram"],
+                                                       Xy=fold["xy"],
+                                                       max_iter=ENET_MAX_ITER,
+                                                       check_input=False,
+                                                       return_n_iter=True)
+            predictions[order] = (X_val @ coefs).T
+            failed[order] = np.asarray(n_iters) >= ENET_MAX_ITER
+
+    predictions += fold["y_mean"]
+    return predictions, failed, l1_ratios
+
+
+def _tweedie_path(fold: dict, params: dict, alphas: np.ndarray) -> tuple:
+    """
+    Validation predictions of a Tweedie GLM for every alpha, refitting along
+    the descending alphas with each fit warm-started from the last.
+    """
+    predictions = np.empty((len(alphas), len(fold["y_val"])))
+    failed = np.zeros(len(alphas), dtype=bool)
+    model = TweedieRegressor(**{k: v for k, v in params.items() if k != "alpha"},
+                             warm_start=True)
+    for j in np.argsort(-alphas, kind="stable"):
+        model.set_params(alpha=alphas[j])
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ConvergenceWarning)
+            model.fit(fold["X_train"], fold["y_train"])
+        failed[j] = any(issubclass(w.category, ConvergenceWarning) for w in caught)
+        predictions[j] = model.predict(fold["X_val"])
+    return predictions, failed, None
+
+
+def fit_score_path(fold: dict,
+                   params: dict,
+                   model_type: str,
+                   regression_hyperparameters: bool = True,
+                   clustering_hyperparameters: bool = False) -> list:
+    """
+    Fits and scores a model for every alpha in `params["alpha"]` in one
+    solver call, instead of one cold-started fit per alpha.
+
+    Parameters
+    ----------
+    fold : dict
+        Dictionary of the fold arrays (see `FOLD_ARRAYS`), and optionally
+        the fold's sufficient statistics (see `FOLD_STATISTICS`).
+    params : dict
+        One point of the grid, except `alpha` is an array of values.
+    model_type : str
+        The model type being tuned ('loglinear' or 'tweedie').
+
+    Returns
+    -------
+    list
+        One result dictionary per alpha, as returned by `fit_score`.
+    """
+    if not regression_hyperparameters:
+        raise ValueError("Path cross-validation is only available for regression models.")
+
+    params = dict(params)
+    alphas = np.asarray(params.pop("alpha"), dtype=float)
+
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        # convergence is checked from the iteration counts instead
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        if model_type == "loglinear":
+            predictions, failed, l1_ratios = _loglinear_path(fold, params, alphas)
+        elif model_type == "tweedie":
+            predictions, failed, l1_ratios = _tweedie_path(fold, params, alphas)
+        else:
+            raise ValueError(f"model_type {model_type} has no path solver.")
+    fit_time = time.perf_counter() - start
+
+    return _path_results(fold, params, alphas, predictions, fit_time, failed, l1_ratios)
+
+
+class SharedFoldStore:
+    """
+    Copies the fold arrays into named shared memory blocks. `spec` is a
+    small, picklable description of the blocks that is passed to
+    `_init_worker` so each worker can attach to the same memory.
+
+    Use as a context manager so the blocks are always released.
+    """
+
+    def __init__(self, folds: list):
+        self.spec = []
+        self._shm = []
+        for fold in folds:
+            fold_spec = {}
+            for name in FOLD_ARRAYS + FOLD_STATISTICS:
+                if name not in fold:
+                    continue
+                arr = np.ascontiguousarray(fold[name], dtype=np.float64)
+                shm = shared_memory.SharedMemory(create=True,
+                                                 size=max(arr.nbytes, 1))
+                view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+                view[...] = arr
+                self._shm.append(shm)
+                fold_spec[name] = (shm.name, arr.shape, arr.dtype.str)
+            self.spec.append(fold_spec)
+
+    def close(self) -> None:
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+        self._shm = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _init_worker(spec: list) -> None:
+    """
+    Worker initializer. Attaches to the shared fold arrays once per worker.
+    """
+    global _WORKER_FOLDS
+    _WORKER_FOLDS = []
+    for fold_spec in spec:
+        fold = {}
+        for name, (shm_name, shape, dtype) in fold_spec.items():
+            shm = shared_memory.SharedMemory(name=shm_name)
+            _WORKER_SHM.append(shm)
+            fold[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        _WORKER_FOLDS.append(fold)
+
+
+def _run_task(task: tuple) -> dict:
+    """
+    Runs a single `(fold index, params, model_type, regression, clustering)`
+    task inside a worker process.
+    """
+    i, params, model_type, regression, clustering = task
+    out = fit_score(_WORKER_FOLDS[i], params, model_type, regression, clustering)
+    out["fold"] = i
+    return out
+
+
+def _run_path_task(task: tuple) -> list:
+    """
+    Runs a single path task (see `fit_score_path`) inside a worker process.
+    """
+    i, params, model_type, regression, clustering = task
+    return fit_score_path(_WORKER_FOLDS[i], params, model_type, regression, clustering)
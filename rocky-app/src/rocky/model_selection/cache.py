@@ -0,0 +1,244 @@
+"""
+On-disk cache of cross-validation tuning results.
+
+Entries are keyed by a fingerprint of everything that determines the tuning
+outcome: the triangle cells and design matrix, the fold definition, the
+model type and grid, the search and Pareto settings, and any model settings
+passed in by the caller (eg `use_cal` or the parameter groupings). Re-tuning
+an unchanged model is then a single file read.
+
+The cache directory defaults to `~/.cache/rocky/tuning`, and can be set with
+the `ROCKY_CACHE_DIR` environment variable. When the entries grow beyond
+`max_size` bytes, the least recently used ones are removed.
+"""
+import hashlib
+import os
+import pickle
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# default size limit of the cache directory (bytes)
+DEFAULT_MAX_SIZE = 256 * 1024 ** 2
+
+# file extension of cache entries
+SUFFIX = ".pkl"
+
+
+def _update_hash(h, value) -> None:
+    """
+    Adds `value` to the hash `h` in a way that is stable across sessions
+    (unlike the built-in `hash`).
+    """
+    if value is None:
+        h.update(b"None")
+    elif isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        h.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            h.update(repr(value.columns.tolist()).encode())
+        elif isinstance(value, pd.Series):
+            h.update(repr(value.name).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        arr = np.ascontiguousarray(value)
+        h.update(f"{arr.dtype.str}{arr.shape}".encode())
+        h.update(arr.tobytes() if arr.dtype != object else repr(arr.tolist()).encode())
+    elif isinstance(value, dict):
+        h.update(b"dict")
+        for k in sorted(value, key=str):
+            _update_hash(h, str(k))
+            _update_hash(h, value[k])
+    elif isinstance(value, (list, tuple)):
+        h.update(type(value).__name__.encode())
+        for v in value:
+            _update_hash(h, v)
+    else:
+        h.update(f"{type(value).__name__}:{value!r}".encode())
+
+
+def fingerprint(*values) -> str:
+    """
+    Returns a hex digest that identifies `values`. Arrays and pandas objects
+    are hashed by content.
+    """
+    h = hashlib.sha256()
+    for value in values:
+        _update_hash(h, value)
+    return h.hexdigest()
+
+
+class TuningCache:
+    """
+    Content-addressed store of tuning results in a local directory, with
+    size-based least recently used eviction.
+
+    Parameters
+    ----------
+    directory : str, default=None
+        The cache directory. If None, `ROCKY_CACHE_DIR` is used if set,
+        otherwise `~/.cache/rocky/tuning`.
+    max_size : int, default=256MB
+        The total size (in bytes) above which the least recently used
+        entries are removed.
+    """
+
+    def __init__(self, directory: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        if directory is None:
+            directory = os.environ.get("ROCKY_CACHE_DIR",
+                                       Path.home() / ".cache" / "rocky" / "tuning")
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def __repr__(self):
+        return f"TuningCache(directory='{self.directory}', n_entries={len(self)})"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    def _entries(self) -> list:
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob(f"*{SUFFIX}"))
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, key: str):
+        return self._path(key).exists()
+
+    def get(self, key: str) -> dict:
+        """
+        Returns the entry stored under `key`, or None if there is none (or
+        it cannot be read). Reading an entry marks it as recently used.
+        """
+        path = self._path(key)
+        entry = self._load(path)
+        if entry is not None:
+            os.utime(path)
+        return entry
+
+    def _load(self, path: Path) -> dict:
+        # reads an entry without marking it as used, or None if it cannot be read
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key: str, entry: dict) -> None:
+        """
+        Stores `entry` under `key`, then evicts the least recently used
+        entries if the cache is larger than `max_size`.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = dict(entry, created=time.time())
+
+        # write to a temporary file first so readers never see partial entries
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self, max_size: int = None) -> list:
+        """
+        Removes the least recently used entries until the cache is no larger
+        than `max_size` (by default, the cache's own limit).
+
+        Returns
+        -------
+        list
+            The keys that were removed.
+        """
+        if max_size is None:
+            max_size = self.max_size
+
+        stats = []
+        for path in self._entries():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            stats.append((st.st_mtime, st.st_size, path))
+
+        total = sum(s[1] for s in stats)
+        removed = []
+        for _, size, path in sorted(stats, key=lambda s: s[0]):
+            if total <= max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed.append(path.stem)
+        return removed
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the entry stored under `key`, if there is one.
+        """
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache.
+        """
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+
+    def size(self) -> int:
+        """
+        Total size of the cache entries, in bytes.
+        """
+        return sum(path.stat().st_size for path in self._entries())
+
+    def info(self) -> pd.DataFrame:
+        """
+        Summary of the cache entries, most recently used first. Listing
+        the entries does not mark them as used.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per entry with its key, model type, chosen parameters,
+            size (bytes), and creation and last used times.
+        """
+        rows = []
+        for path in self._entries():
+            # stat before loading, and load without marking the entry as
+            # used, so listing the cache does not change the eviction order
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entry = self._load(path)
+            if entry is None:
+                continue
+            rows.append({
+                "key": path.stem,
+                "model_type": entry.get("model_type"),
+                "params": entry.get("params"),
+                "size": st.st_size,
+                "created": pd.to_datetime(entry.get("created"), unit="s"),
+                "last_used": pd.to_datetime(st.st_mtime, unit="s"),
+            })
+        columns = ["key", "model_type", "params", "size", "created", "last_used"]
+        return (pd.DataFrame(rows, columns=columns)
+                .sort_values("last_used", ascending=False)
+                .reset_index(drop=True))
+
+
+def get_cache(cache) -> TuningCache:
+    """
+    Returns a `TuningCache` from `cache`, which can be a `TuningCache`, True
+    (the default cache directory), a directory path, or None / False (no
+    cache).
+    """
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return TuningCache()
+    if isinstance(cache, (str, Path)):
+        return TuningCache(cache)
+    return cache
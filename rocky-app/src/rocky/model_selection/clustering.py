@@ -0,0 +1,85 @@
+"""
+Ward clustering with one linkage tree per data set.
+
+The Ward linkage is computed once, and the tree is then cut at every
+requested number of clusters, instead of re-running the clustering for each
+`n_clusters`. The pairwise distances are also computed once and shared by
+the silhouette scores of every cut. Nothing is written to disk.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.cluster.hierarchy import linkage, cut_tree
+from scipy.spatial.distance import pdist, squareform
+from sklearn.metrics import silhouette_score
+
+
+@dataclass
+class WardTree:
+    """
+    Ward linkage tree of a data set, with its pairwise distances.
+
+    Parameters
+    ----------
+    X : np.ndarray
+        The data that was clustered (n_samples, n_features).
+    """
+    X: np.ndarray
+    linkage_matrix: np.ndarray = None
+    distances: np.ndarray = None
+
+    def __post_init__(self):
+        self.X = np.asarray(self.X, dtype=float)
+        condensed = pdist(self.X)
+        self.linkage_matrix = linkage(condensed, method="ward")
+        self.distances = squareform(condensed)
+
+    def Labels(self, n_clusters) -> np.ndarray:
+        """
+        Cluster labels from cutting the tree at `n_clusters` (an int, or a
+        list of ints for an (n_cuts, n_samples) array).
+        """
+        labels = cut_tree(self.linkage_matrix,
+                          n_clusters=np.atleast_1d(n_clusters)).T
+        return labels[0] if np.ndim(n_clusters) == 0 else labels
+
+    def Silhouette(self, labels: np.ndarray) -> float:
+        """
+        Mean silhouette coefficient, from the stored distances.
+        """
+        return silhouette_score(self.distances, labels, metric="precomputed")
+
+    def CalinskiHarabasz(self, labels: np.ndarray) -> float:
+        """
+        Calinski-Harabasz score (ratio of between- to within-cluster
+        dispersion, scaled by the degrees of freedom).
+        """
+        n, k = len(labels), labels.max() + 1
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros((k, self.X.shape[1]))
+        np.add.at(sums, labels, self.X)
+        means = sums / counts[:, None]
+
+        overall = self.X.mean(axis=0)
+        between = np.sum(counts * ((means - overall) ** 2).sum(axis=1))
+        within = np.sum((self.X - means[labels]) ** 2)
+        if within == 0:
+            return 1.0
+        return between * (n - k) / (within * (k - 1))
+
+    def Score(self, n_clusters: list) -> dict:
+        """
+        Labels, silhouette and Calinski-Harabasz scores for every cut.
+
+        Returns
+        -------
+        dict
+            `labels` (n_cuts, n_samples), and the `silhouette` and
+            `calinski_harabasz` scores (n_cuts,).
+        """
+        labels = self.Labels(list(n_clusters))
+        return {
+            "labels": labels,
+            "silhouette": np.array([self.Silhouette(lab) for lab in labels]),
+            "calinski_harabasz": np.array([self.CalinskiHarabasz(lab) for lab in labels]),
+        }
@@ -0,0 +1,145 @@
+"""
+Non-dominated sorting of tuning results.
+
+A point dominates another if it is at least as good on every objective and
+strictly better on at least one. The Pareto rank of a point is 1 if no other
+point dominates it, 2 if it is only dominated by points of rank 1, and so on.
+
+Two objectives (the default mean / std of the validation MSE) use an
+O(n log n) sort-and-sweep. More objectives use the efficient non-dominated
+sort with binary search (ENS-BS, Zhang et al. 2015), which only compares a
+point with the members of the fronts found by a binary search over the
+fronts built so far.
+"""
+from bisect import bisect_right
+
+import numpy as np
+
+
+def _as_minimization(F: np.ndarray, directions: list = None) -> np.ndarray:
+    """
+    Returns a float copy of `F` where every objective is to be minimized.
+    Columns to maximize are negated, and missing values are treated as the
+    worst possible value.
+    """
+    F = np.array(F, dtype=float, copy=True)
+    if F.ndim == 1:
+        F = F[:, None]
+    if directions is None:
+        directions = ["min"] * F.shape[1]
+    if len(directions) != F.shape[1]:
+        raise ValueError("There must be one direction for each objective.")
+
+    for j, direction in enumerate(directions):
+        if direction == "max":
+            F[:, j] = -F[:, j]
+        elif direction != "min":
+            raise ValueError(f"direction must be 'min' or 'max', not {direction}")
+    F[np.isnan(F)] = np.inf
+    return F
+
+
+def _ranks_1d(F: np.ndarray) -> np.ndarray:
+    # with one objective, the rank is the dense rank of the value
+    return np.unique(F[:, 0], return_inverse=True)[1] + 1
+
+
+def _ranks_2d(F: np.ndarray) -> np.ndarray:
+    """
+    Sort-and-sweep for two objectives.
+
+    After sorting by (f1, f2), every point that could dominate a point has
+    already been seen, and the last f2 added to each front increases with
+    the front number, so the front of each point is found by a binary search.
+    """
+    order = np.lexsort((F[:, 1], F[:, 0]))
+    ranks = np.empty(len(F), dtype=int)
+    front_last_f2 = []
+
+    prev = None
+    for i in order:
+        if prev is not None and F[i, 0] == F[prev, 0] and F[i, 1] == F[prev, 1]:
+            # identical points do not dominate each other
+            ranks[i] = ranks[prev]
+        else:
+            # first front where no member has f2 <= this point's f2
+            k = bisect_right(front_last_f2, F[i, 1])
+            if k == len(front_last_f2):
+                front_last_f2.append(F[i, 1])
+            else:
+                front_last_f2[k] = F[i, 1]
+            ranks[i] = k + 1
+        prev = i
+    return ranks
+
+
+def _dominated_by_any(front: np.ndarray, p: np.ndarray) -> bool:
+    """
+    Whether any row of `front` dominates `p`.
+    """
+    le = (front <= p).all(axis=1)
+    lt = (front < p).any(axis=1)
+    return bool((le & lt).any())
+
+
+def _ranks_nd(F: np.ndarray) -> np.ndarray:
+    """
+    Efficient non-dominated sort with binary search (ENS-BS).
+
+    Points are processed in lexicographic order, so a point can only be
+    dominated by points already assigned to a front. If a point is not
+    dominated by front k, it is not dominated by any later front either, so
+    the first front that does not dominate it is found by a binary search.
+    """
+    order = np.lexsort(F.T[::-1])
+    ranks = np.empty(len(F), dtype=int)
+    fronts = []
+
+    for i in order:
+        lo, hi = 0, len(fronts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _dominated_by_any(F[fronts[mid]], F[i]):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(fronts):
+            fronts.append([])
+        fronts[lo].append(i)
+        ranks[i] = lo + 1
+    return ranks
+
+
+def pareto_ranks(F: np.ndarray, directions: list = None) -> np.ndarray:
+    """
+    Computes the Pareto rank of every point.
+
+    Parameters
+    ----------
+    F : array-like of shape (n_points, n_objectives)
+        The objective values.
+    directions : list, default=None
+        One of 'min' or 'max' for each objective. If None, every objective
+        is minimized.
+
+    Returns
+    -------
+    np.ndarray
+        Integer array of shape (n_points,) with the Pareto rank of each
+        point, where 1 is the Pareto front.
+    """
+    F = _as_minimization(F, directions)
+    if len(F) == 0:
+        return np.empty(0, dtype=int)
+    if F.shape[1] == 1:
+        return _ranks_1d(F)
+    if F.shape[1] == 2:
+        return _ranks_2d(F)
+    return _ranks_nd(F)
+
+
+def pareto_front(F: np.ndarray, directions: list = None) -> np.ndarray:
+    """
+    Returns a boolean mask of the points on the Pareto front (rank 1).
+    """
+    return pareto_ranks(F, directions) == 1
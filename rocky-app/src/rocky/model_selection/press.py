@@ -0,0 +1,114 @@
+"""
+Closed-form held-out errors for linear smoothers (generalized PRESS).
+
+For a linear smoother with hat matrix H, the errors on a block of cells S
+when the model is refit without S are
+
+    e_S(-S) = (I - H_SS)^{-1} e_S
+
+where e_S are the residuals of the fit on all the data. Ordinary least
+squares and ridge regression (with an unpenalized intercept) are both linear
+smoothers, and with the SVD of the centered design matrix X_c = U s V',
+
+    H(alpha) = 11'/n + U diag(s^2 / (s^2 + alpha)) U'
+
+so one factorization gives the held-out errors of every block and every
+alpha. Leaving out the last k calendar diagonals gives exactly the errors of
+the refit-based `TriangleTimeSeriesSplit` folds.
+
+When I - H_SS is singular (eg leaving out the last diagonal removes the
+only cell of the latest accident period, so an unpenalized model can not
+predict it), the block is refit instead, using the same minimum-norm least
+squares solution as `LinearRegression`.
+"""
+import numpy as np
+
+
+def _refit_errors(X: np.ndarray,
+                  y: np.ndarray,
+                  block: np.ndarray,
+                  alpha: float) -> np.ndarray:
+    """
+    Held-out errors on `block`, from a ridge (or least squares, if alpha is
+    0) model refit on the other rows.
+    """
+    train = np.ones(len(y), dtype=bool)
+    train[block] = False
+    X_mean, y_mean = X[train].mean(axis=0), y[train].mean()
+    Xc = X[train] - X_mean
+    if alpha == 0:
+        coef = np.linalg.lstsq(Xc, y[train] - y_mean, rcond=None)[0]
+    else:
+        coef = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(X.shape[1]),
+                               Xc.T @ (y[train] - y_mean))
+    return y[block] - (y_mean + (X[block] - X_mean) @ coef)
+
+
+def press_errors(X: np.ndarray,
+                 y: np.ndarray,
+                 blocks: list,
+                 alphas: np.ndarray,
+                 rcond: float = 1e-10) -> tuple:
+    """
+    Held-out errors of least squares / ridge models for each block of rows
+    left out, for every alpha, from one SVD of the design matrix.
+
+    Parameters
+    ----------
+    X : np.ndarray
+        The design matrix (n_samples, n_features). An intercept is always
+        fit (unpenalized), as in `Ridge` and `LinearRegression`.
+    y : np.ndarray
+        The response (n_samples,).
+    blocks : list
+        Arrays of the row indices left out together.
+    alphas : np.ndarray
+        The ridge penalties. An alpha of 0 is least squares.
+    rcond : float, default=1e-10
+        Relative tolerance below which singular values (of X, and of
+        I - H_SS) are treated as 0.
+
+    Returns
+    -------
+    tuple
+        A list with one (n_alphas, block size) array of held-out errors
+        per block, and a boolean (n_blocks, n_alphas) array that is True
+        where the block had to be refit.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    n = len(y)
+
+    # one SVD of the centered data for every alpha and block
+    X_mean, y_mean = X.mean(axis=0), y.mean()
+    U, sv, _ = np.linalg.svd(X - X_mean, full_matrices=False)
+    keep = sv > rcond * sv.max()
+    U, sv = U[:, keep], sv[keep]
+    Uy = U.T @ (y - y_mean)
+
+    # shrinkage factors s^2 / (s^2 + alpha), one row per alpha
+    shrink = sv ** 2 / (sv ** 2 + alphas[:, None])
+
+    # residuals of the full fit, for every alpha
+    residuals = (y - y_mean) - (shrink * Uy) @ U.T
+
+    errors = []
+    refit = np.zeros((len(blocks), len(alphas)), dtype=bool)
+    for b, block in enumerate(blocks):
+        block = np.asarray(block)
+        U_S = U[block]
+        I_S = np.eye(len(block))
+        block_errors = np.empty((len(alphas), len(block)))
+        for j, alpha in enumerate(alphas):
+            H_SS = 1 / n + (U_S * shrink[j]) @ U_S.T
+            # I - H_SS is symmetric, so one eigendecomposition both checks
+            # that it is invertible and solves the system
+            w, V = np.linalg.eigh(I_S - H_SS)
+            if w.min() <= rcond:
+                refit[b, j] = True
+                block_errors[j] = _refit_errors(X, y, block, alpha)
+            else:
+                block_errors[j] = V @ ((V.T @ residuals[j, block]) / w)
+        errors.append(block_errors)
+    return errors, refit
@@ -0,0 +1,346 @@
+"""
+Search strategies for `TriangleTimeSeriesSplit`.
+
+A search strategy decides which (fold, parameters) pairs are fit during
+cross-validation. Each strategy implements `run(evaluate, n_folds, grid)`,
+where `evaluate` takes a list of `(fold index, params)` tasks, fits and
+scores them (in parallel if the splitter is set up that way), records them
+in the splitter's tuning results, and returns one result dictionary per
+task, in order. Path strategies call `evaluate(tasks, path=True)` with an
+array of alphas in each task's params, and get back one result per alpha.
+
+Folds are indexed in the order they are yielded by `GetSplit`, so fold 0
+holds out only the most recent diagonal and the last fold has the earliest
+calendar cutoff (and the smallest training set).
+"""
+import numpy as np
+from scipy.stats import norm
+from sklearn.model_selection import ParameterGrid
+
+# hyperparameters that can be searched over a continuous interval
+CONTINUOUS_PARAMS = ["alpha", "l1_ratio", "power"]
+
+
+def _sorted(params: dict) -> dict:
+    """
+    Orders the parameters by name, as `ParameterGrid` iteration does, so
+    every strategy gives the same tuning results columns.
+    """
+    return {k: params[k] for k in sorted(params)}
+
+
+class GridSearch:
+    """
+    Exhaustive search: every point of the grid is fit on every fold.
+    """
+
+    def run(self, evaluate, n_folds: int, grid: dict) -> None:
+        evaluate([(i, params)
+                  for i in range(n_folds)
+                  for params in ParameterGrid(grid)])
+
+
+class PathSearch:
+    """
+    Exhaustive search along the regularization path: for each fold and each
+    combination of the other hyperparameters (eg `l1_ratio`), every alpha is
+    scored in one solver call (see `_parallel.fit_score_path`).
+    """
+
+    def run(self, evaluate, n_folds: int, grid: dict) -> None:
+        if "alpha" not in grid:
+            raise ValueError("The grid must include alpha for a path search.")
+        alphas = np.sort(np.atleast_1d(grid["alpha"]))[::-1]
+        others = {k: v for k, v in grid.items() if k != "alpha"}
+        evaluate([(i, dict(params, alpha=alphas))
+                  for i in range(n_folds)
+                  for params in ParameterGrid(others)],
+                 path=True)
+
+
+class SuccessiveHalvingSearch:
+    """
+    Successive halving over the points of the grid, using the folds as the
+    resource.
+
+    A random sample of grid points is first scored on the fold(s) with the
+    earliest calendar cutoff, which have the smallest training sets and are
+    the cheapest to fit. Only the best `1 / factor` of the candidates move on
+    to the next rung, where they are also scored on the next folds, until
+    the survivors have been scored on every fold.
+
+    Parameters
+    ----------
+    factor : int, default=3
+        The proportion of candidates kept at each rung is `1 / factor`, and
+        the number of folds used grows by `factor` at each rung.
+    budget : float, default=0.1
+        Fraction of the fits an exhaustive grid search would use. Sets the
+        number of starting candidates when `n_candidates` is None.
+    min_folds : int, default=1
+        Number of folds used in the first rung.
+    n_candidates : int, default=None
+        Number of grid points to start with. If None, it is derived from
+        `budget`.
+    random_state : int, default=None
+        Seed used to sample the starting candidates.
+    """
+
+    def __init__(self,
+                 factor: int = 3,
+                 budget: float = 0.1,
+                 min_folds: int = 1,
+                 n_candidates: int = None,
+                 random_state: int = None):
+        if factor < 2:
+            raise ValueError("factor must be at least 2.")
+        self.factor = factor
+        self.budget = budget
+        self.min_folds = min_folds
+        self.n_candidates = n_candidates
+        self.random_state = random_state
+
+    def _rungs(self, n_folds: int) -> list:
+        """
+        Cumulative number of folds used at each rung.
+        """
+        rungs = [min(self.min_folds, n_folds)]
+        while rungs[-1] < n_folds:
+            rungs.append(min(rungs[-1] * self.factor, n_folds))
+        return rungs
+
+    def run(self, evaluate, n_folds: int, grid: dict) -> None:
+        param_grid = ParameterGrid(grid)
+        rungs = self._rungs(n_folds)
+
+        # number of starting candidates, based on the fit budget:
+        # each starting candidate costs sum_k (new folds at rung k) / factor^k
+        if self.n_candidates is None:
+            new_folds = np.diff([0] + rungs)
+            cost = np.sum(new_folds / self.factor ** np.arange(len(rungs)))
+            n_candidates = int(np.ceil(self.budget * len(param_grid) * n_folds / cost))
+            n_candidates = max(n_candidates, self.factor ** (len(rungs) - 1))
+        else:
+            n_candidates = self.n_candidates
+        n_candidates = min(n_candidates, len(param_grid))
+
+        rng = np.random.default_rng(self.random_state)
+        idx = rng.choice(len(param_grid), size=n_candidates, replace=False)
+        candidates = [_sorted(param_grid[i]) for i in np.sort(idx)]
+
+        # earliest calendar cutoffs first
+        fold_order = list(range(n_folds))[::-1]
+
+        alive = np.arange(len(candidates))
+        mse_sum = np.zeros(len(candidates))
+        n_scored = np.zeros(len(candidates))
+        prev = 0
+        for k, n_used in enumerate(rungs):
+            folds = fold_order[prev:n_used]
+            tasks = [(f, candidates[c]) for c in alive for f in folds]
+            results = evaluate(tasks)
+
+            # running mean validation MSE of each surviving candidate
+            owners = np.repeat(alive, len(folds))
+            np.add.at(mse_sum, owners, [r["mse"] for r in results])
+            np.add.at(n_scored, owners, 1)
+
+            # several grid points can reduce to the same model (eg every
+            # l1_ratio when alpha is 0), so only keep the first of each
+            if k == 0:
+                for c, r in zip(owners, results):
+                    candidates[c] = _sorted(r["params"])
+                first = {}
+                for c in alive:
+                    first.setdefault(tuple(candidates[c].items()), c)
+                alive = np.array(sorted(first.values()))
+
+            # keep the best 1 / factor of the candidates for the next rung
+            if k < len(rungs) - 1:
+                n_keep = max(int(np.ceil(len(alive) / self.factor)), 1)
+                score = mse_sum[alive] / n_scored[alive]
+                alive = alive[np.argsort(score, kind="stable")[:n_keep]]
+            prev = n_used
+
+
+class SequentialModelBasedSearch:
+    """
+    Lightweight sequential model-based (Bayesian) optimization over the
+    continuous hyperparameters `alpha`, `l1_ratio` and `power`.
+
+    A Gaussian process with a Matern 5/2 kernel is fit to the mean
+    validation MSE (log scale) of the points evaluated so far, and the next
+    points are the ones with the highest expected improvement among a random
+    sample of candidates. Every proposed point is scored on every fold.
+
+    Parameters
+    ----------
+    space : dict, default=None
+        Dictionary mapping each continuous hyperparameter to a `(low, high)`
+        tuple. If None, the space is the range of the corresponding values
+        in the splitter's grid. Any other grid entries (eg `max_iter`) are
+        held at their first value.
+    n_initial : int, default=8
+        Number of space-filling points evaluated before the GP is used.
+    n_iter : int, default=24
+        Number of points proposed by the GP.
+    batch_size : int, default=1
+        Number of points proposed at a time. Larger batches keep a worker
+        pool busy at the cost of slightly less informed proposals.
+    n_samples : int, default=2048
+        Number of random candidates on which the expected improvement is
+        evaluated at each step.
+    xi : float, default=0.01
+        Exploration parameter of the expected improvement.
+    decimals : int, default=2
+        Proposed points are rounded to this many decimals, matching the
+        precision of the tuning results.
+    random_state : int, default=None
+        Seed for the initial design and the candidate samples.
+    """
+
+    def __init__(self,
+                 space: dict = None,
+                 n_initial: int = 8,
+                 n_iter: int = 24,
+                 batch_size: int = 1,
+                 n_samples: int = 2048,
+                 xi: float = 0.01,
+                 decimals: int = 2,
+                 random_state: int = None):
+        self.space = space
+        self.n_initial = n_initial
+        self.n_iter = n_iter
+        self.batch_size = batch_size
+        self.n_samples = n_samples
+        self.xi = xi
+        self.decimals = decimals
+        self.random_state = random_state
+
+    @staticmethod
+    def _space_from_grid(grid: dict) -> tuple:
+        """
+        Splits the grid into the continuous search space and the fixed
+        parameters.
+        """
+        space, fixed = {}, {}
+        for k, v in grid.items():
+            values = np.atleast_1d(v)
+            if k in CONTINUOUS_PARAMS and np.ptp(values.astype(float)) > 0:
+                space[k] = (float(values.min()), float(values.max()))
+            else:
+                fixed[k] = values[0]
+        return space, fixed
+
+    @staticmethod
+    def _kernel(A: np.ndarray, B: np.ndarray, length_scale: float) -> np.ndarray:
+        d = np.sqrt(((A[:, None, :] - B[None, :, :]) ** 2).sum(-1)) / length_scale
+        return (1 + np.sqrt(5) * d + 5 / 3 * d ** 2) * np.exp(-np.sqrt(5) * d)
+
+    def _fit_gp(self, U: np.ndarray, z: np.ndarray) -> tuple:
+        """
+        Fits the GP, choosing the length scale that maximizes the marginal
+        likelihood over a small grid of values.
+        """
+        best = None
+        for length_scale in [0.05, 0.1, 0.2, 0.4, 0.8]:
+            K = self._kernel(U, U, length_scale) + 1e-6 * np.eye(len(U))
+            try:
+                L = np.linalg.cholesky(K)
+            except np.linalg.LinAlgError:
+                continue
+            a = np.linalg.solve(L.T, np.linalg.solve(L, z))
+            loglik = -0.5 * z @ a - np.log(np.diag(L)).sum()
+            if best is None or loglik > best[0]:
+                best = (loglik, length_scale, L, a)
+        return best[1:]
+
+    def _expected_improvement(self, U, z, candidates) -> np.ndarray:
+        length_scale, L, a = self._fit_gp(U, z)
+        k = self._kernel(candidates, U, length_scale)
+        mu = k @ a
+        v = np.linalg.solve(L, k.T)
+        sd = np.sqrt(np.clip(1 - (v ** 2).sum(0), 1e-12, None))
+        imp = z.min() - mu - self.xi
+        u = imp / sd
+        return imp * norm.cdf(u) + sd * norm.pdf(u)
+
+    def run(self, evaluate, n_folds: int, grid: dict) -> None:
+        if self.space is None:
+            space, fixed = self._space_from_grid(grid)
+        else:
+            space = dict(self.space)
+            fixed = {k: np.atleast_1d(v)[0]
+                     for k, v in grid.items() if k not in space}
+        if len(space) == 0:
+            raise ValueError(f"""
+No continuous hyperparameters ({', '.join(CONTINUOUS_PARAMS)}) to search over.""")
+
+        names = list(space.keys())
+        low = np.array([space[k][0] for k in names])
+        high = np.array([space[k][1] for k in names])
+        rng = np.random.default_rng(self.random_state)
+
+        def to_params(u):
+            x = np.round(low + u * (high - low), self.decimals)
+            params = _sorted({**fixed, **dict(zip(names, x.tolist()))})
+            return params, (x - low) / np.where(high > low, high - low, 1)
+
+        U, z, seen = [], [], set()
+
+        def score(points):
+            new = []
+            for u in points:
+                params, u = to_params(u)
+                key = tuple(params[k] for k in names)
+                if key not in seen:
+                    seen.add(key)
+                    new.append((params, u))
+            if len(new) == 0:
+                return
+            results = evaluate([(f, params) for params, _ in new for f in range(n_folds)])
+            mse = np.array([r["mse"] for r in results]).reshape(len(new), n_folds)
+            for (_, u), m in zip(new, mse.mean(axis=1)):
+                U.append(u)
+                z.append(np.log(m))
+
+        # space-filling initial design (Latin hypercube)
+        n, d = self.n_initial, len(names)
+        lhs = (rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T
+               + rng.uniform(size=(n, d))) / n
+        score(lhs)
+
+        # sequential proposals from the GP
+        n_proposed = 0
+        while n_proposed < self.n_iter:
+            Ua = np.array(U)
+            za = (np.array(z) - np.mean(z)) / (np.std(z) + 1e-12)
+            candidates = rng.uniform(size=(self.n_samples, d))
+            ei = self._expected_improvement(Ua, za, candidates)
+            batch = candidates[np.argsort(-ei)[:self.batch_size]]
+            score(batch)
+            n_proposed += len(batch)
+
+
+def get_search(search) -> object:
+    """
+    Returns a search strategy from either a strategy object or one of the
+    names 'grid', 'path', 'halving' or 'bayes'.
+    """
+    if search is None:
+        return GridSearch()
+    if isinstance(search, str):
+        lookup = {
+            "grid": GridSearch,
+            "path": PathSearch,
+            "halving": SuccessiveHalvingSearch,
+            "successive_halving": SuccessiveHalvingSearch,
+            "bayes": SequentialModelBasedSearch,
+            "smbo": SequentialModelBasedSearch,
+        }
+        if search.lower() not in lookup:
+            raise ValueError(f"search must be one of {list(lookup.keys())}")
+        return lookup[search.lower()]()
+    if not hasattr(search, "run"):
+        raise TypeError("search must be a string or have a `run` method.")
+    return search
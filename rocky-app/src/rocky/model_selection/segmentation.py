@@ -0,0 +1,173 @@
+"""
+Optimal contiguous segmentation of development periods by residual variance.
+
+Hetero groups are runs of adjacent development periods that share one
+residual variance. For each number of groups k, the exact best partition
+(the one maximizing the Gaussian likelihood of the residuals, with one
+variance per group) is found by dynamic programming over the D development
+periods, in O(k D^2) time. Every k up to `max_segments` comes out of the
+same pass, and the number of groups is then picked with an information
+criterion.
+
+Residuals are centered within each development period first (as in the
+original rocky hetero adjustment), so a period with n cells adds n - 1
+degrees of freedom to its group. A single-cell period (eg the oldest
+development period) adds none, and simply joins a neighbouring group.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+CRITERIA = ["aic", "bic"]
+
+
+@dataclass
+class Segmentation:
+    """
+    Contiguous groupings of the development periods for every number of
+    groups, with their information criteria.
+
+    Parameters
+    ----------
+    dev : np.ndarray
+        The sorted, unique development periods.
+    groups : pd.DataFrame
+        The group (1, 2, ...) of each development period (rows), for each
+        feasible number of groups (columns).
+    scores : pd.DataFrame
+        -2 log-likelihood, AIC and BIC for each feasible number of groups.
+    criterion : str, default="bic"
+        The information criterion used to pick `best_k`.
+    """
+    dev: np.ndarray
+    groups: pd.DataFrame
+    scores: pd.DataFrame
+    criterion: str = "bic"
+
+    @property
+    def best_k(self) -> int:
+        return int(self.scores[self.criterion].idxmin())
+
+    def Groups(self, k: int = None) -> pd.Series:
+        """
+        The group of each development period, using `k` groups (by default,
+        the number picked by the information criterion).
+        """
+        if k is None:
+            k = self.best_k
+        if k not in self.groups.columns:
+            raise ValueError(f"No contiguous grouping with {k} groups. "
+                             f"Choose from {self.groups.columns.tolist()}.")
+        return self.groups[k]
+
+    def Map(self, dev, k: int = None) -> pd.Series:
+        """
+        The group of every cell, given each cell's development period.
+        Periods that were not segmented get the group of the closest
+        earlier period (or the first group).
+        """
+        groups = self.Groups(k).to_numpy()
+        dev = pd.Series(dev)
+        pos = np.searchsorted(self.dev, dev.to_numpy(), side="right") - 1
+        return pd.Series(groups[np.clip(pos, 0, len(groups) - 1)],
+                         index=dev.index,
+                         name="hetero_gp")
+
+
+def segment_variance(dev,
+                     residuals,
+                     max_segments: int = None,
+                     min_df: int = 2,
+                     criterion: str = "bic") -> Segmentation:
+    """
+    Optimal partitions of the development periods into contiguous groups
+    with a common residual variance, for every number of groups.
+
+    Parameters
+    ----------
+    dev : array-like
+        The development period of each residual.
+    residuals : array-like
+        The residuals (eg of the log-linear model).
+    max_segments : int, default=None
+        The largest number of groups. If None, every development period can
+        be its own group.
+    min_df : int, default=2
+        The fewest degrees of freedom a group can be estimated from.
+    criterion : str, default="bic"
+        Either "aic" or "bic", used to pick the number of groups.
+
+    Returns
+    -------
+    Segmentation
+        The groupings and information criteria for each number of groups.
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"criterion must be one of {CRITERIA}.")
+
+    dev = np.asarray(dev)
+    residuals = np.asarray(residuals, dtype=float)
+    if dev.shape != residuals.shape:
+        raise ValueError("dev and residuals must have the same length.")
+
+    # per development period degrees of freedom and centered sum of squares
+    levels, inv = np.unique(dev, return_inverse=True)
+    D = len(levels)
+    n = np.bincount(inv, minlength=D).astype(float)
+    means = np.bincount(inv, weights=residuals, minlength=D) / n
+    ss = np.bincount(inv, weights=(residuals - means[inv]) ** 2, minlength=D)
+    df = n - 1
+
+    # cost[i, j] is -2 log-likelihood (less a constant) of periods i..j-1 as
+    # one group, from prefix sums. groups that are too small are infeasible
+    cum_df = np.concatenate([[0], np.cumsum(df)])
+    cum_ss = np.concatenate([[0], np.cumsum(ss)])
+    seg_df = cum_df[None, :] - cum_df[:, None]
+    seg_ss = cum_ss[None, :] - cum_ss[:, None]
+    feasible = (np.triu(np.ones((D + 1, D + 1), dtype=bool), k=1)
+                & (seg_df >= min_df)
+                & (seg_ss > 0))
+    cost = np.full((D + 1, D + 1), np.inf)
+    cost[feasible] = seg_df[feasible] * np.log(seg_ss[feasible] / seg_df[feasible])
+
+    # best[k, j] is the lowest cost of periods 0..j-1 in k groups, and
+    # start[k, j] is where the last of those groups starts
+    max_segments = D if max_segments is None else min(max_segments, D)
+    best = np.full((max_segments + 1, D + 1), np.inf)
+    best[0, 0] = 0
+    start = np.zeros((max_segments + 1, D + 1), dtype=int)
+    cols = np.arange(D + 1)
+    for k in range(1, max_segments + 1):
+        total = best[k - 1][:, None] + cost
+        start[k] = np.argmin(total, axis=0)
+        best[k] = total[start[k], cols]
+
+    # walk back through the group starts for every feasible k
+    total_df = cum_df[-1]
+    groups, scores = {}, {}
+    for k in range(1, max_segments + 1):
+        if not np.isfinite(best[k, D]):
+            continue
+        labels = np.empty(D, dtype=int)
+        j = D
+        for g in range(k, 0, -1):
+            i = start[g, j]
+            labels[i:j] = g
+            j = i
+        groups[k] = labels
+
+        neg2_loglik = best[k, D] + total_df * (np.log(2 * np.pi) + 1)
+        scores[k] = {"neg2_loglik": neg2_loglik,
+                     "aic": neg2_loglik + 2 * k,
+                     "bic": neg2_loglik + k * np.log(total_df)}
+
+    if not groups:
+        raise ValueError("There are too few residuals to estimate any group variance.")
+
+    return Segmentation(
+        dev=levels,
+        groups=pd.DataFrame(groups, index=pd.Index(levels, name="development_period")),
+        scores=pd.DataFrame.from_dict(scores, orient="index").rename_axis("k"),
+        criterion=criterion,
+    )
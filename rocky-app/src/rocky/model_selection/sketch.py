@@ -0,0 +1,264 @@
+"""
+Mergeable summaries of simulated distributions, in bounded memory.
+
+`RunningMoments` keeps the count, mean and sum of squared deviations of each
+column, and combines two summaries exactly (Chan et al). `TDigest` keeps a
+sorted list of weighted centroids, small near the tails and larger in the
+middle of the distribution, so the extreme quantiles used for VaR and TVaR
+stay accurate while the number of centroids is bounded by the compression.
+
+Both can be built on separate chunks of replicates (eg in separate worker
+processes) and merged. Merging in a fixed order gives the same result
+however the chunks were spread across workers.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class RunningMoments:
+    """
+    Count, mean and sum of squared deviations of each column of a stream of
+    (n, n_columns) arrays.
+    """
+    count: int = 0
+    mean: np.ndarray = 0.0
+    m2: np.ndarray = 0.0
+
+    def _Combine(self, count: int, mean: np.ndarray, m2: np.ndarray):
+        total = self.count + count
+        if total == 0:
+            return self
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        return self
+
+    def Update(self, x: np.ndarray):
+        """
+        Adds the rows of `x`.
+        """
+        x = np.asarray(x, dtype=float)
+        if len(x) == 0:
+            return self
+        mean = x.mean(axis=0)
+        return self._Combine(len(x), mean, ((x - mean) ** 2).sum(axis=0))
+
+    def Merge(self, other: "RunningMoments"):
+        """
+        Adds the rows summarized by `other`.
+        """
+        return self._Combine(other.count, other.mean, other.m2)
+
+    def Variance(self, ddof: int = 1) -> np.ndarray:
+        return self.m2 / (self.count - ddof)
+
+
+@dataclass
+class TDigest:
+    """
+    Merging t-digest (Dunning & Ertl) of a stream of numbers.
+
+    Parameters
+    ----------
+    compression : float, default=500
+        Bounds the number of centroids (at most about compression / 2).
+        Larger values are more accurate and use more memory.
+    """
+    compression: float = 500
+    means: np.ndarray = None
+    weights: np.ndarray = None
+    min: float = np.inf
+    max: float = -np.inf
+
+    def __post_init__(self):
+        if self.means is None:
+            self.means = np.empty(0)
+            self.weights = np.empty(0)
+
+    @property
+    def count(self) -> float:
+        return self.weights.sum()
+
+    def _Compress(self, means: np.ndarray, weights: np.ndarray):
+        """
+        Sorts the centroids and merges neighbours that fall in the same unit
+        of the arcsine scale function, which is steep near the tails so the
+        extreme centroids stay small.
+        """
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        q = (np.cumsum(weights) - weights / 2) / weights.sum()
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+
+        # k is non-decreasing, so each bucket is one run of centroids
+        start = np.flatnonzero(np.r_[True, np.diff(k) > 0])
+        self.weights = np.add.reduceat(weights, start)
+        self.means = np.add.reduceat(weights * means, start) / self.weights
+        return self
+
+    def Update(self, x: np.ndarray):
+        """
+        Adds the values of `x`.
+        """
+        x = np.ravel(np.asarray(x, dtype=float))
+        if len(x) == 0:
+            return self
+        self.min = min(self.min, x.min())
+        self.max = max(self.max, x.max())
+        return self._Compress(np.r_[self.means, x],
+                              np.r_[self.weights, np.ones(len(x))])
+
+    def Merge(self, other: "TDigest"):
+        """
+        Adds the values summarized by `other`.
+        """
+        if len(other.means) == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self._Compress(np.r_[self.means, other.means],
+                              np.r_[self.weights, other.weights])
+
+    def _Knots(self) -> tuple:
+        """
+        The quantile function is piecewise linear through each centroid's
+        mean (at its middle cumulative weight), and the min and max.
+        """
+        q = (np.cumsum(self.weights) - self.weights / 2) / self.count
+        return np.r_[0, q, 1], np.r_[self.min, self.means, self.max]
+
+    def Quantile(self, q) -> np.ndarray:
+        """
+        The estimated quantiles `q` (a float or array of floats in [0, 1]).
+        """
+        if len(self.means) == 0:
+            return np.full(np.shape(q), np.nan)
+        knots, values = self._Knots()
+        return np.interp(q, knots, values)
+
+    def TailMean(self, q) -> np.ndarray:
+        """
+        The estimated mean of the values above the quantile `q` (TVaR).
+        Centroids entirely in the tail add their exact sums, and the one
+        that straddles `q` adds the part of it above `q`, from the
+        interpolated quantile function.
+        """
+        if len(self.means) == 0:
+            return np.full(np.shape(q), np.nan)
+        knots, values = self._Knots()
+        total = self.count
+        upper = np.cumsum(self.weights) / total
+        lower = upper - self.weights / total
+        out = []
+        for p in np.atleast_1d(q):
+            if p >= 1:
+                out.append(self.max)
+                continue
+            tail = self.weights[lower >= p] @ self.means[lower >= p] / total
+
+            # the centroid that straddles p
+            i = np.searchsorted(upper, p, side="right")
+            if i < len(upper) and lower[i] < p:
+                x = np.r_[p, knots[(knots > p) & (knots < upper[i])], upper[i]]
+                y = np.interp(x, knots, values)
+                tail += np.sum((y[1:] + y[:-1]) / 2 * np.diff(x))
+            out.append(tail / (1 - p))
+        return np.array(out) if np.ndim(q) else out[0]
+
+
+@dataclass
+class DistributionSketch:
+    """
+    Running moments and one t-digest per column of a stream of simulated
+    (n, n_columns) arrays, eg the reserves by accident period.
+
+    Parameters
+    ----------
+    columns : list
+        The column labels.
+    compression : float, default=500
+        The compression of each column's t-digest.
+    """
+    columns: list
+    compression: float = 500
+    moments: RunningMoments = None
+    digests: list = None
+
+    def __post_init__(self):
+        self.columns = list(self.columns)
+        if self.moments is None:
+            self.moments = RunningMoments()
+        if self.digests is None:
+            self.digests = [TDigest(self.compression) for _ in self.columns]
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    def Update(self, x: np.ndarray):
+        """
+        Adds the rows of `x` (n, n_columns).
+        """
+        x = np.asarray(x, dtype=float)
+        if x.shape[1] != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} columns, got {x.shape[1]}.")
+        self.moments.Update(x)
+        for j, digest in enumerate(self.digests):
+            digest.Update(x[:, j])
+        return self
+
+    def Merge(self, other: "DistributionSketch"):
+        """
+        Adds the rows summarized by `other`, which must have the same
+        columns.
+        """
+        if other.columns != self.columns:
+            raise ValueError("Only sketches with the same columns can be merged.")
+        self.moments.Merge(other.moments)
+        for digest, other_digest in zip(self.digests, other.digests):
+            digest.Merge(other_digest)
+        return self
+
+    def Mean(self) -> pd.Series:
+        return pd.Series(self.moments.mean, index=self.columns, name="mean")
+
+    def Std(self) -> pd.Series:
+        return pd.Series(np.sqrt(self.moments.Variance()), index=self.columns, name="std")
+
+    def Quantile(self, q) -> pd.DataFrame:
+        """
+        The estimated quantiles `q` of each column, one row per quantile.
+        """
+        q = np.atleast_1d(q)
+        return pd.DataFrame(np.column_stack([d.Quantile(q) for d in self.digests]),
+                            index=q,
+                            columns=self.columns)
+
+    def VaR(self, p: float = 0.995) -> pd.Series:
+        """
+        Value at risk: the `p` quantile of each column.
+        """
+        return pd.Series([d.Quantile(p) for d in self.digests],
+                         index=self.columns,
+                         name=f"VaR_{p}")
+
+    def TVaR(self, p: float = 0.995) -> pd.Series:
+        """
+        Tail value at risk: the mean of each column above its `p` quantile.
+        """
+        return pd.Series([d.TailMean(p) for d in self.digests],
+                         index=self.columns,
+                         name=f"TVaR_{p}")
+
+    def Summary(self, quantiles: list) -> pd.DataFrame:
+        """
+        Mean, standard deviation, coefficient of variation and quantiles of
+        each column, one row per column.
+        """
+        summary = pd.DataFrame({"mean": self.Mean(), "std": self.Std()})
+        summary["cv"] = summary["std"] / summary["mean"]
+        return summary.join(self.Quantile(quantiles).T)
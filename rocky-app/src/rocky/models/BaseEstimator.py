@@ -115,6 +115,23 @@ class BaseEstimator:
                                               y=self.GetY(),
             )
 
+    def _TuningCacheExtra(self) -> dict:
+        """
+        Model settings (beyond the triangle itself) that the tuning cache is
+        keyed on, so changing any of them re-runs the tuning.
+        """
+        return {
+            "model": type(self).__name__,
+            "model_class": self.model_class,
+            "use_cal": self.use_cal,
+            "standardize": self.standardize,
+            "weights": None if self.weights is None else np.asarray(self.weights),
+            "acc_gp": self.acc_gp,
+            "dev_gp": self.dev_gp,
+            "cal_gp": self.cal_gp,
+            "hetero_gp": self.hetero_gp,
+        }
+
     def lookup_col_full(self, col):
         if col is None:
             return None
@@ -132,8 +132,18 @@ class glm(BaseEstimator):
         param_grid=None,
         measures=None,
         tie_criterion="ave_mse_test",
+        cache=True,
         **kwargs,
     ):
+        """
+        Tunes `alpha` and `power` by cross-validation over the calendar
+        periods.
+
+        Results are cached on disk (see `rocky.model_selection.cache`), so
+        re-tuning an unchanged model only reads the stored results. Pass
+        `cache=False` to always re-run the cross-validation, or a
+        `TuningCache` / directory to use a different cache.
+        """
         # set the parameter grid to default if none is provided
         if param_grid is None:
             param_grid = {
@@ -152,18 +162,24 @@ class glm(BaseEstimator):
 
         # set the cross-validation object
         cv = TriangleTimeSeriesSplit(
-            self.tri, n_splits=n_splits, tweedie_grid=param_grid
+            self.tri,
+            n_splits=n_splits,
+            model_type="tweedie",
+            tweedie_grid=param_grid,
+            cache=cache,
+            cache_extra=self._TuningCacheExtra(),
         )
 
         # set the parameter search grid
-        cv.GridTweedie(
+        cv.SetParameterGrid(
+            model_type="tweedie",
             alpha=param_grid["alpha"],
             power=param_grid["power"],
             max_iter=param_grid["max_iter"],
         )
 
         # grid search & return the optimal model
-        opt_tweedie = cv.OptimalTweedie(measures=measures, tie_criterion=tie_criterion)
+        opt_tweedie = cv.OptimalParameters(measures=measures, tie_criterion=tie_criterion)
 
         # set the optimal hyperparameters
         self.alpha = opt_tweedie.alpha
@@ -1,6 +1,8 @@
 # rocky code
 from rocky.triangle import Triangle
 from rocky.model_selection.TriangleTimeSeriesSplit import TriangleTimeSeriesSplit
+from rocky.model_selection.clustering import WardTree
+from rocky.model_selection.segmentation import segment_variance
 from rocky.plot.ModelPlot import Plot
 from rocky.models.BaseEstimator import BaseEstimator
 
@@ -11,9 +13,12 @@ from dataclasses import dataclass
 from sklearn.linear_model import LinearRegression, Ridge, Lasso, ElasticNet
 
 # hetero adjustment
-from sklearn.cluster import KMeans, AgglomerativeClustering
+from sklearn.cluster import KMeans
 from sklearn.metrics import mean_squared_error
 
+# prediction intervals
+from scipy.stats import norm
+
 # for plotting
 import plotly.express as px
 import plotly.subplots as sp
@@ -204,8 +209,18 @@ selecting carried reserves."
         measures=None,
         tie_criterion="ave_mse_test",
         model_type="loglinear",
+        cache=True,
         **kwargs,
     ):
+        """
+        Tunes `alpha` and `l1_ratio` by cross-validation over the calendar
+        periods, then refits the model.
+
+        Results are cached on disk (see `rocky.model_selection.cache`), so
+        re-tuning an unchanged model only reads the stored results. Pass
+        `cache=False` to always re-run the cross-validation, or a
+        `TuningCache` / directory to use a different cache.
+        """
         # set the parameter grid to default if none is provided
         if param_grid is None:
             param_grid = {
@@ -231,6 +246,8 @@ selecting carried reserves."
             model=self,
             X=self.GetX('train'),
             y=self.GetY('train'),
+            cache=cache,
+            cache_extra=self._TuningCacheExtra(),
         )
 
         # set the parameter search grid
@@ -463,6 +480,24 @@ selecting carried reserves."
         self.Fit()
 
     def fit_ward_clustering(self, n_clusters=None):
+        """
+        Clusters the training cells on their residuals and development
+        period, using Ward linkage. The linkage tree is kept on the model,
+        so calling this again with another `n_clusters` (and the same
+        residuals) only cuts the existing tree.
+
+        Parameters
+        ----------
+        n_clusters : int, default=None
+            The number of clusters. If None, half the number of development
+            periods, plus one.
+
+        Returns
+        -------
+        pd.Series
+            The cluster of each training cell, which is also stored as
+            `hetero_clusters`.
+        """
         if n_clusters is None:
             n_clusters = int(self.tri.n_dev / 2) + 1
 
@@ -475,18 +510,65 @@ selecting carried reserves."
                             .str.zfill(3),
                             prefix='dev').astype(int)
         X['residuals'] = residuals
-        
-        # Ward clustering model
-        ward = AgglomerativeClustering(n_clusters=n_clusters,
-                                       linkage='ward')
-        
-        # Fit model to residuals grouped by dev period level
-        ward.fit(residuals.to_frame().merge(X,
-                                            left_index=True,
-                                            right_index=True))
-        
 
-        return ward
+        # residuals grouped by dev period level
+        features = np.column_stack([residuals.to_numpy(dtype=float),
+                                    X.to_numpy(dtype=float)])
+
+        # only rebuild the Ward tree when the residuals have changed
+        tree = getattr(self, "_ward_tree", None)
+        if tree is None or not np.array_equal(tree.X, features):
+            tree = WardTree(features)
+            self._ward_tree = tree
+
+        self.hetero_clusters = pd.Series(tree.Labels(n_clusters),
+                                         index=residuals.index,
+                                         name='cluster')
+        return self.hetero_clusters
+
+    def fit_hetero_segments(self,
+                            n_segments: int = None,
+                            max_segments: int = None,
+                            criterion: str = "bic"):
+        """
+        Groups the development periods into contiguous hetero groups with a
+        common residual variance, and sets them as the model's `hetero_gp`.
+
+        The best grouping for every number of groups is found exactly (see
+        `segment_variance`), and unless `n_segments` is given, the number of
+        groups is picked with an information criterion.
+
+        Parameters
+        ----------
+        n_segments : int, default=None
+            The number of hetero groups. If None, the number that minimizes
+            `criterion`.
+        max_segments : int, default=None
+            The largest number of groups to consider. If None, every
+            development period can be its own group.
+        criterion : str, default="bic"
+            Either "aic" or "bic".
+
+        Returns
+        -------
+        Segmentation
+            The groupings and information criteria for every number of
+            groups.
+        """
+        # log residuals of the current fit
+        residuals = self.GetY('train', log=True) - self.GetYhat('train', log=True)
+        segmentation = segment_variance(self.GetDev('train'),
+                                        residuals,
+                                        max_segments=max_segments,
+                                        criterion=criterion)
+
+        # hetero group of every cell, in the same layout as the default
+        # (one hetero group per development period)
+        dev = self.tri.get_X_id()['development_period']
+        gp = segmentation.Map(dev, n_segments)
+        hetero_gp = pd.get_dummies(gp.astype(str).str.zfill(3), prefix='hetero')
+        self.SetHeteroGp(pd.concat([dev, hetero_gp], axis=1))
+        return segmentation
 
     def Fit(
         self,
@@ -704,6 +786,213 @@ selecting carried reserves."
         out -= self.GetYhat("train", log=log, actual_scale=actual_scale)
         return out.dropna()
 
+    def _ParameterCovariance(self, process_var_est: str = "ube") -> pd.DataFrame:
+        """
+        Estimated covariance matrix of the coefficients, V (X'WX)^-1, on the
+        (standardized) log scale the model is fit on. This is the least
+        squares covariance, so it ignores the shrinkage of penalized fits.
+        A pseudo-inverse is used when X'WX is singular.
+        """
+        if process_var_est == "ube":
+            V = self._ProcessVarUBE()
+        elif process_var_est == "mle":
+            V = self._ProcessVarMLE()
+        else:
+            raise ValueError("process_var_est must be 'ube' or 'mle'")
+
+        X = self.GetX("train").drop(columns="is_observed", errors="ignore")
+        w = self.GetWeights("train").to_numpy(dtype=float)
+        Xv = X.to_numpy(dtype=float)
+        cov = np.linalg.pinv(Xv.T @ (Xv * w[:, None])) * V
+        return pd.DataFrame(cov, index=X.columns, columns=X.columns)
+
+    def _ForecastArrays(self, process_var_est: str = "ube") -> dict:
+        """
+        The arrays behind the reserve distribution of the forecast cells:
+        the forecast design matrix, the fitted coefficients and their
+        covariance, the process variance of each cell (all on the fitted
+        log scale), the scale back to log losses, and an indicator matrix
+        that sums the cells by accident period and by calendar period.
+        """
+        X_forecast = self.GetX("forecast").drop(columns="is_observed", errors="ignore")
+        if self.standardize:
+            center, scale = self.standardize_mu, self.standardize_sigma
+        else:
+            center, scale = 0.0, 1.0
+
+        # every accident period gets a column (the oldest has no reserve),
+        # and every forecast calendar period
+        acc = self.GetAcc("forecast").to_numpy()
+        cal = self.GetCal("forecast").to_numpy()
+        acc_levels = np.unique(np.concatenate([self.GetAcc("train").to_numpy(), acc]))
+        cal_levels = np.unique(cal)
+        rows = np.arange(len(acc))
+        by_period = np.zeros((len(acc), len(acc_levels) + len(cal_levels)))
+        by_period[rows, np.searchsorted(acc_levels, acc)] = 1
+        by_period[rows, len(acc_levels) + np.searchsorted(cal_levels, cal)] = 1
+        columns = pd.MultiIndex.from_arrays(
+            [["accident_period"] * len(acc_levels) + ["calendar_period"] * len(cal_levels),
+             np.concatenate([acc_levels, cal_levels])],
+            names=["by", "period"])
+
+        process_var = self._ProcessVarUBE() if process_var_est == "ube" else self._ProcessVarMLE()
+        return {
+            "X_forecast": X_forecast.to_numpy(dtype=float),
+            "coef": np.asarray(self.model.coef_, dtype=float),
+            "cov": self._ParameterCovariance(process_var_est).to_numpy(),
+            "process_var": process_var / self.GetWeights("forecast").to_numpy(dtype=float),
+            "center": center,
+            "scale": scale,
+            "by_period": by_period,
+            "columns": columns,
+        }
+
+    def SimulateReserves(self,
+                         n: int = 10000,
+                         process_variance: bool = True,
+                         random_state: int = None,
+                         process_var_est: str = "ube",
+                         chunk_size: int = 10000) -> pd.DataFrame:
+        """
+        Parametric simulation of the reserves, without refitting. Each
+        replicate draws a coefficient vector from the estimated multivariate
+        normal distribution of the coefficients (from the Cholesky factor of
+        their covariance) and, if `process_variance` is True, adds normal
+        process error to every forecast cell on the log scale.
+
+        Parameters
+        ----------
+        n : int, default=10000
+            The number of replicates.
+        process_variance : bool, default=True
+            Whether to add (lognormal) process error. If False, the
+            distribution only reflects parameter uncertainty.
+        random_state : int, default=None
+            The seed of the random number generator.
+        process_var_est : str, default="ube"
+            The process variance estimator, 'ube' or 'mle'.
+        chunk_size : int, default=10000
+            The number of replicates simulated at once, to bound memory.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per replicate. The columns are a MultiIndex of
+            ("accident_period", period) and ("calendar_period", period),
+            each giving the simulated reserve of that period.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model has not been fit")
+        a = self._ForecastArrays(process_var_est)
+
+        # a singular covariance (eg aliased parameters) has no Cholesky
+        # factor, so use its symmetric square root instead
+        try:
+            L = np.linalg.cholesky(a["cov"])
+        except np.linalg.LinAlgError:
+            w, v = np.linalg.eigh(a["cov"])
+            L = v * np.sqrt(np.clip(w, 0, None))
+
+        rng = np.random.default_rng(random_state)
+        out = np.empty((n, a["by_period"].shape[1]))
+        for start in range(0, n, chunk_size):
+            size = min(chunk_size, n - start)
+            coef = a["coef"] + rng.standard_normal((size, len(a["coef"]))) @ L.T
+            eta = coef @ a["X_forecast"].T
+            if process_variance:
+                eta += rng.standard_normal(eta.shape) * np.sqrt(a["process_var"])
+            out[start:start + size] = np.exp(a["center"] + a["scale"] * eta) @ a["by_period"]
+        return pd.DataFrame(out, columns=a["columns"])
+
+    def PredictionInterval(self,
+                           level: float = 0.95,
+                           by: str = "accident_period",
+                           ultimate: bool = False,
+                           process_variance: bool = True,
+                           process_var_est: str = "ube") -> pd.DataFrame:
+        """
+        Closed-form mean, standard deviation and prediction interval of the
+        reserves, without simulation.
+
+        Each forecast cell is lognormal, with log-scale variance x' cov x
+        from the coefficients (shared between cells) plus its process
+        variance, so the covariance of any two cells is known exactly. The
+        mean and variance of a sum of cells follow from those, and the sum
+        is approximated by a lognormal with the same mean and variance
+        (Fenton-Wilkinson) to get the interval.
+
+        Parameters
+        ----------
+        level : float, default=0.95
+            The coverage of the two-sided interval.
+        by : str, default="accident_period"
+            One of "cell" (every forecast cell), "accident_period" or
+            "calendar_period". Sums by period also get a "Total" row.
+        ultimate : bool, default=False
+            If True (only by accident period), add the observed losses to
+            get the ultimate losses instead of the reserves.
+        process_variance : bool, default=True
+            Whether to include process variance. If False, the interval
+            only reflects parameter uncertainty.
+        process_var_est : str, default="ube"
+            The process variance estimator, 'ube' or 'mle'.
+
+        Returns
+        -------
+        pd.DataFrame
+            The `mean`, `std`, `cv`, `lower` and `upper` bounds of each row.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model has not been fit")
+        if by not in ["cell", "accident_period", "calendar_period"]:
+            raise ValueError("by must be one of 'cell', 'accident_period' or 'calendar_period'.")
+        if ultimate and by != "accident_period":
+            raise ValueError("Ultimates are only available by accident period.")
+        a = self._ForecastArrays(process_var_est)
+        X, scale = a["X_forecast"], a["scale"]
+
+        # log-scale covariance of the cells, and their lognormal means
+        log_cov = scale ** 2 * (X @ a["cov"] @ X.T)
+        if process_variance:
+            log_cov[np.diag_indices_from(log_cov)] += scale ** 2 * a["process_var"]
+        mean = np.exp(a["center"] + scale * (X @ a["coef"]) + np.diag(log_cov) / 2)
+        cov = np.outer(mean, mean) * np.expm1(log_cov)
+
+        if by == "cell":
+            A = np.eye(len(mean))
+            index = self.GetIdx("forecast")
+        else:
+            A = a["by_period"][:, a["columns"].get_level_values("by") == by]
+            A = np.column_stack([A, np.ones(len(mean))])
+            index = pd.Index(list(a["columns"][a["columns"].get_level_values("by") == by]
+                                  .get_level_values("period")) + ["Total"],
+                             name=by)
+
+        # moments of the sums, then the lognormal with the same moments
+        total_mean = mean @ A
+        total_var = np.einsum("ij,ik,kj->j", A, cov, A)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sigma2 = np.log1p(total_var / total_mean ** 2)
+            mu = np.log(total_mean) - sigma2 / 2
+        z = norm.ppf((1 + level) / 2)
+        lower = np.where(total_mean > 0, np.exp(mu - z * np.sqrt(sigma2)), 0)
+        upper = np.where(total_mean > 0, np.exp(mu + z * np.sqrt(sigma2)), 0)
+
+        out = pd.DataFrame({"mean": total_mean,
+                            "std": np.sqrt(total_var),
+                            "lower": lower,
+                            "upper": upper},
+                           index=index)
+        out.insert(2, "cv", out["std"] / out["mean"])
+        if ultimate:
+            observed = self.GetYBase("train").groupby(self.GetAcc("train").to_numpy()).sum()
+            observed = observed.reindex(index[:-1], fill_value=0)
+            observed["Total"] = observed.sum()
+            for c in ["mean", "lower", "upper"]:
+                out[c] += observed.to_numpy()
+            out["cv"] = out["std"] / out["mean"]
+        return out
+
     ###################################################################################
     ### In the next section, I reproduce the code from Josh Brady's ###################
     ### original rocky code. I am keeping the original methods and  ###################
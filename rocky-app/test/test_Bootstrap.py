@@ -0,0 +1,115 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import ElasticNet
+
+sys.path.append("../src")
+
+from rocky.triangle import Triangle
+from rocky.models.GLM import glm
+from rocky.models.LogLinear import LogLinear
+from rocky.model_selection.Bootstrap import (
+    Bootstrap,
+    tweedie_refit,
+    tweedie_newton,
+    enet_homotopy)
+
+
+@pytest.fixture
+def taylor_ashe():
+    return Triangle.from_taylor_ashe()
+
+def fit_glm(tri, power=1):
+    model = glm(id='glm', model_class='tweedie', tri=tri, alpha=0.1, power=power,
+                standardize=False)
+    model.Fit()
+    return model
+
+def fit_loglinear(tri, alpha, l1_ratio):
+    model = LogLinear(id='loglinear', model_class='loglinear', tri=tri,
+                      alpha=alpha, l1_ratio=l1_ratio)
+    model.Fit()
+    return model
+
+def pseudo_data(boot, n=20, seed=0):
+    return boot.PseudoData(n, np.random.default_rng(seed))
+
+@pytest.mark.parametrize('power', [1, 1.5, 2])
+def test_refit1(taylor_ashe, power):
+    boot = Bootstrap(fit_glm(taylor_ashe, power))
+    a = boot.arrays
+    Y = pseudo_data(boot)
+    chord = tweedie_refit(a['X'], Y, power, a['penalty'], a['coef'])
+    newton = tweedie_newton(a['X'], Y, power, a['penalty'], a['coef'],
+                            max_iter=200, tol=1e-12)
+    assert np.allclose(chord, newton, atol=1e-6), \
+        "BOOT-001: fixed-Hessian refit differs from Newton's method"
+
+@pytest.mark.parametrize('alpha, l1_ratio', [(0.01, 0.5), (0.01, 1)])
+def test_refit2(taylor_ashe, alpha, l1_ratio):
+    boot = Bootstrap(fit_loglinear(taylor_ashe, alpha, l1_ratio))
+    a = boot.arrays
+    Y = pseudo_data(boot, n=5)
+    coef, unfinished = enet_homotopy(a['gram'], Y @ a['X'] / len(a['X']),
+                                     alpha, l1_ratio, a['coef'], a['c0'])
+    expected = np.array([
+        ElasticNet(alpha=alpha, l1_ratio=l1_ratio, fit_intercept=False,
+                   tol=1e-12, max_iter=1000000).fit(a['X'], y).coef_
+        for y in Y])
+    assert len(unfinished) == 0, "BOOT-002: homotopy did not reach the pseudo data"
+    assert np.allclose(coef, expected, atol=1e-6), \
+        "BOOT-003: homotopy refit differs from ElasticNet"
+
+def test_bootstrap1(taylor_ashe):
+    model = fit_glm(taylor_ashe)
+    reserves = Bootstrap(model, n_replicates=500, random_state=1).Run()
+    again = Bootstrap(model, n_replicates=500, chunk_size=128, random_state=1).Run()
+    assert reserves.shape == (500, 10), "BOOT-004: one column per accident period"
+    assert np.allclose(reserves.sum(axis=1).mean(), model.GetYhat('forecast').sum(),
+                       rtol=0.05), \
+        "BOOT-005: ODP bootstrap mean should be close to the fitted reserve"
+    assert np.allclose(reserves.iloc[:, 0], 0), \
+        "BOOT-006: the oldest accident period has no reserve"
+    assert not reserves.equals(again), \
+        "BOOT-007: each chunk should draw from its own random stream"
+
+def test_bootstrap2(taylor_ashe):
+    model = fit_loglinear(taylor_ashe, 0.1, 0)
+    with_process = Bootstrap(model, n_replicates=500, random_state=1)
+    without = Bootstrap(model, n_replicates=500, random_state=1, process_variance=False)
+    summary = with_process.Summary()
+    assert 'Total' in summary.index, "BOOT-008: summary should include the total"
+    assert summary.loc['Total', 'std'] > without.Summary().loc['Total', 'std'], \
+        "BOOT-009: process variance should widen the distribution"
+    assert summary.loc['Total', 0.95] > summary.loc['Total', 0.5], \
+        "BOOT-010: quantiles should be increasing"
+
+def test_bootstrap3(taylor_ashe):
+    model = fit_glm(taylor_ashe)
+    serial = Bootstrap(model, n_replicates=400, chunk_size=100, random_state=2)
+    pooled = Bootstrap(model, n_replicates=400, chunk_size=100, random_state=2, n_jobs=2)
+    assert serial.Run().equals(pooled.Run()), \
+        "BOOT-011: replicates should not depend on the number of workers"
+    sketch, pooled_sketch = serial.Stream(), pooled.Stream()
+    assert np.array_equal(sketch.moments.mean, pooled_sketch.moments.mean) \
+        and all(np.array_equal(a.means, b.means)
+                for a, b in zip(sketch.digests, pooled_sketch.digests)), \
+        "BOOT-012: sketches should not depend on the number of workers"
+
+def test_bootstrap4(taylor_ashe):
+    model = fit_glm(taylor_ashe, power=2)
+    boot = Bootstrap(model, n_replicates=2000, chunk_size=500, random_state=3)
+    exact = boot.Summary()
+    tvar = boot.TVaR(0.95)
+    boot.Stream()
+    boot.reserves = None
+    streamed = boot.Summary()
+    assert np.allclose(streamed['mean'], exact['mean']) \
+        and np.allclose(streamed['std'], exact['std']), \
+        "BOOT-013: streamed moments should match the stored replicates"
+    assert np.allclose(streamed[0.95], exact[0.95], rtol=0.01), \
+        "BOOT-014: streamed quantiles should be close to the exact quantiles"
+    assert np.allclose(boot.TVaR(0.95), tvar, rtol=0.01), \
+        "BOOT-015: streamed TVaR should be close to the exact TVaR"
@@ -0,0 +1,107 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append("../src")
+
+from rocky.triangle import Triangle
+from rocky.models.GLM import glm
+from rocky.models.LogLinear import LogLinear
+from rocky.Forecast import Forecast, TrendProcess
+
+
+@pytest.fixture
+def model():
+    model = glm(id='glm', model_class='tweedie', tri=Triangle.from_taylor_ashe(),
+                alpha=0.1, power=1, standardize=False)
+    model.Fit()
+    return model
+
+def test_forecast1(model):
+    forecast = Forecast(model)
+    reserves = forecast.Reserves({"flat": 0.0, "inflation": np.log(1.05)})
+    yhat = model.GetYhat('forecast').to_numpy()
+    assert np.isclose(reserves.loc["flat", "accident_period"].sum(), yhat.sum()), \
+        "FCST-001: no trend should give the fitted reserve"
+
+    # a constant trend compounds once per future calendar period
+    cal = model.GetCal('forecast').to_numpy()
+    factor = 1.05 ** (cal - cal.min() + 1)
+    assert np.isclose(reserves.loc["inflation", "accident_period"].sum(),
+                      (yhat * factor).sum()), \
+        "FCST-002: a constant trend should compound by calendar period"
+    assert np.allclose(reserves["accident_period"].sum(axis=1),
+                       reserves["calendar_period"].sum(axis=1)), \
+        "FCST-003: accident and calendar period reserves should have the same total"
+
+def test_forecast2(model):
+    forecast = Forecast(model, chunk_size=7)
+    paths = np.random.default_rng(0).normal(0.03, 0.02, (50, len(forecast.cal_periods)))
+    reserves = forecast.Reserves(paths)
+    one_by_one = pd.concat([forecast.Reserves(p[None, :]) for p in paths],
+                           ignore_index=True)
+    assert reserves.shape[0] == 50, "FCST-004: one row per scenario"
+    assert np.allclose(reserves.to_numpy(), one_by_one.to_numpy()), \
+        "FCST-005: batched scenarios should match one at a time"
+    with pytest.raises(ValueError):
+        forecast.Reserves(paths[:, :-1])
+
+def test_forecast3():
+    model = LogLinear(id='loglinear', model_class='loglinear',
+                      tri=Triangle.from_taylor_ashe(), alpha=0, l1_ratio=0)
+    model.Fit()
+    reserves = Forecast(model).Reserves({"flat": 0.0})
+    assert np.isclose(reserves.loc["flat", "accident_period"].sum(),
+                      model.GetYhat('forecast', log=False, actual_scale=True).sum()), \
+        "FCST-006: no trend should give the fitted LogLinear reserve"
+
+def test_trend1():
+    rng = np.random.default_rng(0)
+    shocks = rng.normal(0, 0.01, 5000)
+    trends = np.empty(5000)
+    trends[0] = 0.03
+    for t in range(1, 5000):
+        trends[t] = 0.03 + 0.6 * (trends[t - 1] - 0.03) + shocks[t]
+    process = TrendProcess.Fit(trends, "ar1")
+    assert np.isclose(process.phi, 0.6, atol=0.03) and np.isclose(process.mu, 0.03, atol=0.002), \
+        "TREND-001: AR(1) fit should recover phi and mu"
+    paths = process.Simulate(20000, 40, np.random.default_rng(1))
+    assert np.isclose(paths[:, -1].std(), 0.01 / np.sqrt(1 - 0.36), rtol=0.05), \
+        "TREND-002: AR(1) paths should reach the stationary variance"
+    with pytest.raises(ValueError):
+        TrendProcess.Fit(trends, "garch")
+
+def test_trend2(model):
+    with pytest.raises(ValueError):
+        Forecast(model).SimulateReserves(10)
+
+    model = glm(id='glm', model_class='tweedie', tri=Triangle.from_taylor_ashe(),
+                alpha=0.1, power=1, standardize=False, use_cal=True)
+    model.Fit()
+    forecast = Forecast(model, chunk_size=1000)
+    trends = forecast.CalendarTrends()
+    assert trends.index.max() == model.GetCal('train').max(), \
+        "TREND-003: only observed calendar periods have fitted trends"
+
+    sims = forecast.SimulateReserves(5000, random_state=0)
+    flat = TrendProcess("random_walk", trends.mean(), 0.0)
+    at_mean = forecast.SimulateReserves(10, process=flat)
+    expected = forecast.Reserves({"mean": trends.mean()})
+    assert np.allclose(at_mean.to_numpy(), expected.to_numpy()), \
+        "TREND-004: a process with no variance should give the constant-trend reserves"
+    total = sims['accident_period'].sum(axis=1)
+    assert total.std() > 0 and total.mean() > expected['accident_period'].sum(axis=1).iloc[0], \
+        "TREND-005: trend uncertainty should spread (and raise the mean of) the reserves"
+
+def test_aliased1(model):
+    aliased = LogLinear(id='loglinear', model_class='loglinear', tri=Triangle.from_taylor_ashe(),
+                        alpha=0, l1_ratio=0, use_cal=True)
+    aliased.Fit()
+    with pytest.raises(ValueError):
+        Forecast(aliased)
+
+    forecast = Forecast(model)
+    with pytest.raises(ValueError):
+        forecast.Reserves({"overflow": 1000.0})
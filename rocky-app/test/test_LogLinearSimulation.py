@@ -0,0 +1,92 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append("../src")
+
+from rocky.triangle import Triangle
+from rocky.models.LogLinear import LogLinear
+
+
+@pytest.fixture
+def model():
+    model = LogLinear(id='loglinear', model_class='loglinear',
+                      tri=Triangle.from_taylor_ashe(), alpha=0, l1_ratio=0)
+    model.Fit()
+    return model
+
+def test_simulate1(model):
+    sims = model.SimulateReserves(20000, random_state=0)
+    acc, cal = sims['accident_period'], sims['calendar_period']
+    assert acc.shape == (20000, 10), "LLSIM-001: one column per accident period"
+    assert np.allclose(acc.sum(axis=1), cal.sum(axis=1)), \
+        "LLSIM-002: accident and calendar period reserves should have the same total"
+    assert np.allclose(acc.iloc[:, 0], 0), \
+        "LLSIM-003: the oldest accident period has no reserve"
+    assert sims.equals(model.SimulateReserves(20000, random_state=0)), \
+        "LLSIM-004: the same seed should give the same simulation"
+
+def test_simulate2(model):
+    # without process error, each cell is lognormal with log-scale variance
+    # x' cov x, so the mean total reserve is known exactly
+    a = model._ForecastArrays()
+    X = a['X_forecast']
+    var = np.einsum('ij,jk,ik->i', X, a['cov'], X)
+    expected = np.exp(a['center'] + a['scale'] * (X @ a['coef'])
+                      + a['scale'] ** 2 * var / 2).sum()
+    sims = model.SimulateReserves(50000, process_variance=False, random_state=1)
+    assert np.isclose(sims['accident_period'].sum(axis=1).mean(), expected, rtol=0.01), \
+        "LLSIM-005: parameter-only simulation mean should match the lognormal mean"
+    with_process = model.SimulateReserves(50000, random_state=1)
+    assert with_process['accident_period'].sum(axis=1).std() \
+        > sims['accident_period'].sum(axis=1).std(), \
+        "LLSIM-006: process variance should widen the distribution"
+
+def test_interval1(model):
+    intervals = model.PredictionInterval(level=0.95)
+    sims = model.SimulateReserves(100000, random_state=2)['accident_period']
+    sims['Total'] = sims.sum(axis=1)
+    assert intervals.index.tolist()[-1] == 'Total', "LLSIM-007: intervals should include the total"
+    assert np.allclose(intervals['mean'], sims.mean(), rtol=0.02), \
+        "LLSIM-008: analytic means should match the simulation"
+    assert np.allclose(intervals['std'], sims.std(), rtol=0.03), \
+        "LLSIM-009: analytic standard deviations should match the simulation"
+    assert np.allclose(intervals.loc['Total', ['lower', 'upper']],
+                       sims['Total'].quantile([0.025, 0.975]), rtol=0.03), \
+        "LLSIM-010: the total reserve interval should match the simulation"
+
+def test_interval2(model):
+    cells = model.PredictionInterval(by='cell')
+    by_cal = model.PredictionInterval(by='calendar_period')
+    by_acc = model.PredictionInterval()
+    assert np.isclose(cells['mean'].sum(), by_cal.loc['Total', 'mean']), \
+        "LLSIM-011: cell means should add up to the total"
+    assert np.isclose(by_cal.loc['Total', 'std'], by_acc.loc['Total', 'std']), \
+        "LLSIM-012: the total should not depend on the grouping"
+    assert by_acc.loc['Total', 'std'] > np.sqrt((by_acc['std'].iloc[:-1] ** 2).sum()), \
+        "LLSIM-013: parameter covariance should correlate the accident periods"
+    ultimates = model.PredictionInterval(ultimate=True)
+    assert np.allclose(ultimates['std'], by_acc['std']) \
+        and (ultimates['mean'] > by_acc['mean']).iloc[:-1].all(), \
+        "LLSIM-014: ultimates should shift the reserves by the observed losses"
+    with pytest.raises(ValueError):
+        model.PredictionInterval(by='calendar_period', ultimate=True)
+
+def test_hetero1(model):
+    seg = model.fit_hetero_segments()
+    assert seg.best_k == seg.scores['bic'].idxmin() == 2, \
+        "LLSIM-015: BIC should pick two hetero groups on the Taylor-Ashe triangle"
+    hetero = model.hetero_gp
+    assert hetero.columns.tolist() == ['development_period', 'hetero_001', 'hetero_002'], \
+        "LLSIM-016: one hetero column per group should be added to the development periods"
+    assert (hetero.filter(like='hetero_').sum(axis=1) == 1).all(), \
+        "LLSIM-017: every cell should be in exactly one hetero group"
+    groups = hetero.filter(like='hetero_').to_numpy().argmax(axis=1) + 1
+    assert (groups == seg.Map(hetero['development_period']).to_numpy()).all(), \
+        "LLSIM-018: the hetero groups should match the segmentation"
+
+    model.fit_hetero_segments(n_segments=3)
+    assert model.hetero_gp.filter(like='hetero_').shape[1] == 3, \
+        "LLSIM-019: n_segments should set the number of hetero groups"
@@ -0,0 +1,151 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append("../src")
+
+from rocky.triangle import Triangle
+from rocky.model_selection.TriangleTimeSeriesSplit import TriangleTimeSeriesSplit
+from rocky.model_selection.search import SuccessiveHalvingSearch, SequentialModelBasedSearch
+
+
+@pytest.fixture
+def taylor_ashe():
+    return Triangle.from_taylor_ashe()
+
+@pytest.fixture
+def small_grid():
+    return {
+        'alpha': np.array([0, 0.1, 0.5]),
+        'l1_ratio': np.array([0, 0.5, 1]),
+        'max_iter': [100000],
+    }
+
+def run_cv(tri, grid, **kwargs):
+    cv = TriangleTimeSeriesSplit(tri,
+                                 model_type='loglinear',
+                                 log_transform=True,
+                                 loglinear_grid=dict(grid),
+                                 **kwargs)
+    cv.RunCrossValidation()
+    return cv
+
+def test_parallel1(taylor_ashe, small_grid):
+    serial = run_cv(taylor_ashe, small_grid)
+    threads = run_cv(taylor_ashe, small_grid, n_jobs=2, executor='thread')
+    assert np.allclose(serial.tuning_results.tuning_mse_mean.values,
+                       threads.tuning_results.tuning_mse_mean.values), \
+        "TTSS-001: thread pool results differ from serial results"
+
+def test_parallel2(taylor_ashe, small_grid):
+    serial = run_cv(taylor_ashe, small_grid)
+    procs = run_cv(taylor_ashe, small_grid, n_jobs=2, executor='process')
+    assert np.allclose(serial.tuning_results.tuning_mse_mean.values,
+                       procs.tuning_results.tuning_mse_mean.values), \
+        "TTSS-002: process pool results differ from serial results"
+
+def test_parallel3(taylor_ashe, small_grid):
+    cv = run_cv(taylor_ashe, small_grid)
+    for col in ['tuning_fit_time_mean', 'tuning_failed_to_converge_sum']:
+        assert col in cv.tuning_results.columns, \
+            f"TTSS-003: {col} missing from tuning_results"
+
+def test_search1(taylor_ashe, small_grid):
+    # halving only compares candidates that survived to the last rung
+    cv = run_cv(taylor_ashe, small_grid,
+                search=SuccessiveHalvingSearch(n_candidates=9, random_state=0))
+    assert len(cv.tuning_mse) < 9 * cv.n_splits_, \
+        "TTSS-004: successive halving did not drop any candidates"
+    front = cv.CalculateParameterParetoFront()
+    assert front.tuning_n_folds.eq(cv.n_splits_).all(), \
+        "TTSS-005: pareto front includes candidates not scored on every fold"
+
+def test_search2(taylor_ashe, small_grid):
+    grid = run_cv(taylor_ashe, small_grid)
+    halving = run_cv(taylor_ashe, small_grid,
+                     search=SuccessiveHalvingSearch(n_candidates=9, random_state=0))
+    assert np.isclose(grid.tuning_results.tuning_mse_mean.min(),
+                      halving.CalculateParameterParetoFront().tuning_mse_mean.min()), \
+        "TTSS-006: successive halving did not find the best grid point"
+
+def test_search3(taylor_ashe, small_grid):
+    search = SequentialModelBasedSearch(n_initial=4, n_iter=4, random_state=0)
+    cv = run_cv(taylor_ashe, small_grid, search=search)
+    res = cv.tuning_results
+    assert res.tuning_n_folds.eq(cv.n_splits_).all(), \
+        "TTSS-007: bayes search points not scored on every fold"
+    assert res.alpha_.between(0, 0.5).all() and res.l1_ratio_.between(0, 1).all(), \
+        "TTSS-008: bayes search left the search space"
+
+def test_precompute1(taylor_ashe, small_grid):
+    sklearn = run_cv(taylor_ashe, small_grid, precompute=False)
+    gram = run_cv(taylor_ashe, small_grid, precompute=True)
+    assert np.allclose(sklearn.tuning_results.tuning_mse_mean.values,
+                       gram.tuning_results.tuning_mse_mean.values), \
+        "TTSS-009: sufficient statistics solvers differ from scikit-learn"
+
+def test_path1(taylor_ashe, small_grid):
+    grid = run_cv(taylor_ashe, small_grid)
+    path = run_cv(taylor_ashe, small_grid, search='path')
+    a = grid.tuning_results.sort_values(['alpha_', 'l1_ratio_'])
+    b = path.tuning_results.sort_values(['alpha_', 'l1_ratio_'])
+    assert a.columns.tolist() == b.columns.tolist(), \
+        "TTSS-010: path search changes the tuning_results schema"
+    assert np.allclose(a.tuning_mse_mean.values, b.tuning_mse_mean.values, rtol=1e-4), \
+        "TTSS-011: path search MSE differs from grid search"
+
+def test_press1(taylor_ashe):
+    # closed-form errors equal refit errors for least squares and ridge
+    grid = {'alpha': np.array([0, 0.1, 1, 3]), 'l1_ratio': [0], 'max_iter': [100000]}
+    cv = run_cv(taylor_ashe, grid)
+    press = cv.RunPRESS()
+    a = cv.tuning_results.sort_values('alpha_')
+    b = press.sort_values('alpha_')
+    assert np.allclose(a.tuning_mse_mean.values, b.tuning_mse_mean.values), \
+        "TTSS-012: PRESS errors differ from refit cross-validation"
+    assert np.allclose(a.tuning_mae_std.values, b.tuning_mae_std.values), \
+        "TTSS-013: PRESS MAE differs from refit cross-validation"
+
+def test_press2(taylor_ashe, small_grid):
+    cv = TriangleTimeSeriesSplit(taylor_ashe, model_type='loglinear',
+                                 log_transform=True, loglinear_grid=dict(small_grid))
+    diag = cv.RunPRESS(kind='diagonal')
+    assert diag.tuning_n_folds.eq(taylor_ashe.n_dev).all(), \
+        "TTSS-014: leave-one-diagonal-out should score every diagonal"
+    grid = cv.ScreenGrid(n_keep=2)
+    assert len(grid['alpha']) == 2, "TTSS-015: ScreenGrid did not reduce the grid"
+
+def test_clustering1(taylor_ashe, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cv = TriangleTimeSeriesSplit(taylor_ashe,
+                                 log_transform=True,
+                                 regression_hyperparameters=False,
+                                 clustering_hyperparameters=True,
+                                 clustering_grid={'n_clusters': [2, 3, 4, 5]})
+    n_clusters = cv.OptimalParameters()
+    assert cv.tuning_results.shape[0] == 4, \
+        "TTSS-016: clustering CV should score every n_clusters"
+    assert n_clusters in [2, 3, 4, 5], \
+        "TTSS-017: clustering CV should return one of the grid's n_clusters"
+    assert not list(tmp_path.iterdir()), \
+        "TTSS-018: clustering CV should not write files"
+
+def test_clustering2():
+    from sklearn.cluster import AgglomerativeClustering
+    from sklearn.metrics import adjusted_rand_score, silhouette_score, calinski_harabasz_score
+    from rocky.model_selection.clustering import WardTree
+
+    X = np.random.default_rng(0).normal(size=(40, 3))
+    tree = WardTree(X)
+    scores = tree.Score([2, 3, 4])
+    for k, labels, sil, ch in zip([2, 3, 4], scores['labels'],
+                                  scores['silhouette'], scores['calinski_harabasz']):
+        expected = AgglomerativeClustering(n_clusters=k, linkage='ward').fit_predict(X)
+        assert adjusted_rand_score(labels, expected) == 1, \
+            "TTSS-019: cutting the Ward tree differs from AgglomerativeClustering"
+        assert np.isclose(sil, silhouette_score(X, labels)), \
+            "TTSS-020: silhouette score differs from scikit-learn"
+        assert np.isclose(ch, calinski_harabasz_score(X, labels)), \
+            "TTSS-021: Calinski-Harabasz score differs from scikit-learn"
@@ -0,0 +1,86 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append("../src")
+
+from rocky.triangle import Triangle
+from rocky.model_selection.TriangleTimeSeriesSplit import TriangleTimeSeriesSplit
+from rocky.model_selection.cache import TuningCache, fingerprint
+
+
+@pytest.fixture
+def taylor_ashe():
+    return Triangle.from_taylor_ashe()
+
+def make_cv(tri, cache, **kwargs):
+    return TriangleTimeSeriesSplit(tri,
+                                   model_type='loglinear',
+                                   log_transform=True,
+                                   loglinear_grid={'alpha': np.array([0, 0.5]),
+                                                   'l1_ratio': np.array([0, 1]),
+                                                   'max_iter': [100000]},
+                                   cache=cache,
+                                   **kwargs)
+
+def test_cache1(taylor_ashe, tmp_path):
+    cache = TuningCache(tmp_path)
+    first = make_cv(taylor_ashe, cache).OptimalParameters()
+    assert len(cache) == 1, "CACHE-001: tuning results were not stored"
+
+    # an unchanged triangle should not re-run the cross-validation
+    cv = make_cv(taylor_ashe, cache)
+    cv.RunCrossValidation = lambda: pytest.fail("CACHE-002: cache was not used")
+    second = cv.OptimalParameters()
+    assert np.allclose(first.coef_, second.coef_), \
+        "CACHE-003: cached optimal model differs"
+
+def test_cache2(taylor_ashe, tmp_path):
+    cache = TuningCache(tmp_path)
+    key1 = make_cv(taylor_ashe, cache).CacheKey()
+    key2 = make_cv(taylor_ashe, cache, cache_extra={'use_cal': True}).CacheKey()
+    key3 = make_cv(taylor_ashe, cache, n_splits=4).CacheKey()
+    assert key1 == make_cv(taylor_ashe, cache).CacheKey(), \
+        "CACHE-004: cache key is not stable"
+    assert len({key1, key2, key3}) == 3, \
+        "CACHE-005: cache key ignores model settings or folds"
+
+def test_cache3(tmp_path):
+    # least recently used entries are evicted first
+    cache = TuningCache(tmp_path, max_size=10 ** 9)
+    for i in range(3):
+        cache.put(fingerprint(i), {'params': {'alpha': i},
+                                   'tuning_results': pd.DataFrame({'x': np.arange(1000)})})
+    # spread out the last used times so the order does not depend on the
+    # file system's timestamp resolution
+    for i in range(3):
+        os.utime(tmp_path / f"{fingerprint(i)}.pkl", (1000 + i, 1000 + i))
+    cache.get(fingerprint(0))
+    size = cache.size()
+    cache.evict(max_size=size - 1)
+    assert fingerprint(1) not in cache and fingerprint(0) in cache, \
+        "CACHE-006: eviction did not remove the least recently used entry"
+    assert len(cache.info()) == 2, "CACHE-007: info does not list the entries"
+
+    cache.clear()
+    assert len(cache) == 0, "CACHE-008: clear left entries behind"
+
+def test_cache4(tmp_path):
+    # listing the cache does not mark its entries as used
+    cache = TuningCache(tmp_path, max_size=10 ** 9)
+    for i in range(3):
+        cache.put(fingerprint(i), {'params': {'alpha': i},
+                                   'tuning_results': pd.DataFrame({'x': np.arange(1000)})})
+    for i in range(3):
+        os.utime(tmp_path / f"{fingerprint(i)}.pkl", (1000 + i, 1000 + i))
+    info = cache.info()
+    assert list(info["key"]) == [fingerprint(2), fingerprint(1), fingerprint(0)], \
+        "CACHE-009: info does not list the most recently used entries first"
+    assert [os.stat(tmp_path / f"{fingerprint(i)}.pkl").st_mtime for i in range(3)] == [1000, 1001, 1002], \
+        "CACHE-010: info marked the entries as used"
+    removed = cache.evict(max_size=cache.size() - 1)
+    assert removed == [fingerprint(0)], \
+        "CACHE-011: info changed which entry is least recently used"
@@ -0,0 +1,69 @@
+import sys
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+sys.path.append("../../model")
+
+from LossTriangleClassifier import LossTriangleClassifier
+from export import export_classifier
+from preprocessing import INPUT_SHAPE
+from runtime import load_exported
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    model = LossTriangleClassifier(torch.Size([1, *INPUT_SHAPE]),
+                                   num_conv_layers=3,
+                                   base_conv_nodes=8,
+                                   linear_nodes=[64, 32, 16],
+                                   linear_dropout=[0.4, 0.3, 0.2])
+
+    # batch normalization statistics as after training, so folding them
+    # into the convolutions is not the identity
+    for b in model.batch_normalization_layers:
+        b.running_mean.uniform_(-1, 1)
+        b.running_var.uniform_(0.5, 2)
+        b.weight.data.uniform_(0.5, 1.5)
+        b.bias.data.uniform_(-0.5, 0.5)
+    return model.eval()
+
+@pytest.fixture
+def x():
+    return np.random.default_rng(0).standard_normal((64, 1, *INPUT_SHAPE)).astype(np.float32)
+
+def eager(model, x):
+    with torch.no_grad():
+        return model(torch.from_numpy(x))[:, 1].numpy()
+
+def test_sequential1(model, x):
+    with torch.no_grad():
+        expected = model(torch.from_numpy(x))
+        fused = model.as_sequential(fuse=True)(torch.from_numpy(x))
+    assert torch.allclose(fused, expected, atol=1e-5), \
+        "EXPORT-001: the fused sequential network should match forward in evaluation mode"
+
+def test_torchscript1(model, x, tmp_path):
+    run = load_exported(export_classifier(model, str(tmp_path / "model.pt"), quantize=False))
+    assert np.allclose(run(x), eager(model, x), atol=1e-5), \
+        "EXPORT-002: the TorchScript model should match the eager model"
+
+def test_torchscript2(model, x, tmp_path):
+    run = load_exported(export_classifier(model, str(tmp_path / "model_int8.pt"), quantize=True))
+    assert np.abs(run(x) - eager(model, x)).max() < 0.02, \
+        "EXPORT-003: the int8 TorchScript model should be close to the eager model"
+
+def test_onnx1(model, x, tmp_path):
+    pytest.importorskip("onnxruntime")
+    run = load_exported(export_classifier(model, str(tmp_path / "model.onnx"), quantize=False))
+    assert np.allclose(run(x), eager(model, x), atol=1e-5), \
+        "EXPORT-004: the ONNX model should match the eager model"
+
+def test_onnx2(model, x, tmp_path):
+    pytest.importorskip("onnxruntime")
+    run = load_exported(export_classifier(model, str(tmp_path / "model_int8.onnx"), quantize=True))
+    assert np.abs(run(x) - eager(model, x)).max() < 0.02, \
+        "EXPORT-005: the int8 ONNX model should be close to the eager model"
@@ -0,0 +1,45 @@
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append("../src")
+sys.path.append("../../model")
+
+from rocky.triangle import Triangle
+from heuristics import detect_cumulative, heuristic_is_cum, triangle_statistics
+
+
+@pytest.fixture
+def dahms():
+    return Triangle.from_dahms()
+
+def test_dahms1(dahms):
+    rpt, paid = dahms
+    is_cum = heuristic_is_cum(triangle_statistics([rpt, paid]))
+    assert is_cum[1], "HEUR-001: the Dahms paid triangle is clearly cumulative"
+    assert is_cum.isna()[0], \
+        "HEUR-002: the Dahms incurred triangle (case reserves coming down) is ambiguous, not incremental"
+
+def test_dahms2(dahms):
+    rpt, paid = dahms
+    incremental = paid.tri.diff(axis=1).fillna(paid.tri)
+    is_cum = heuristic_is_cum(triangle_statistics([incremental.to_numpy()]))
+    assert is_cum.isna()[0] or not is_cum[0], \
+        "HEUR-003: the incremental Dahms paid triangle should not be called cumulative"
+
+def test_incremental1():
+    dev = np.arange(10)
+    values = 1000 * np.exp(-0.6 * dev) * np.ones((10, 1))
+    values[np.add.outer(dev, dev) >= 10] = np.nan
+    is_cum = heuristic_is_cum(triangle_statistics([values, np.cumsum(values, axis=1)]))
+    assert is_cum.tolist() == [False, True], \
+        "HEUR-004: steeply falling increments are incremental, and their sums cumulative"
+
+def test_detect1(dahms):
+    rpt, paid = dahms
+    paid.is_cum_model = None
+    result = detect_cumulative([paid])
+    assert (result["method"] == "heuristic").all(), "HEUR-005: decided triangles should not need the model"
+    assert paid.is_cum_model is True, "HEUR-006: the classification should be written to the triangle"
+    assert not paid.has_cum_model_file, "HEUR-007: the model file was not used"
@@ -0,0 +1,53 @@
+import sys
+
+import numpy as np
+import pytest
+from scipy.optimize import minimize_scalar
+
+pymc = pytest.importorskip("pymc")
+
+sys.path.append("../src/rocky")
+
+from laplace import laplace_sampler
+
+
+def test_laplace1():
+    # a normal mean with a normal prior: the posterior is normal, so the
+    # Laplace approximation is exact
+    y = np.random.default_rng(0).normal(3, 2, 50)
+    with pymc.Model() as model:
+        mu = pymc.Normal("mu", 0, 10)
+        pymc.Normal("y", mu, 2, observed=y)
+    draws = laplace_sampler(model, random_seed=0)(20000)["mu"].values.ravel()
+
+    precision = 1 / 10 ** 2 + len(y) / 2 ** 2
+    assert np.isclose(draws.mean(), y.sum() / 2 ** 2 / precision, atol=0.01), \
+        "LAPLACE-001: the draws should be centered on the posterior mode"
+    assert np.isclose(draws.std(), precision ** -0.5, rtol=0.02), \
+        "LAPLACE-002: the draws should have the posterior standard deviation"
+
+def test_laplace2():
+    # a flat direction: only the sum of a and b is identified
+    y = np.random.default_rng(0).normal(3, 1, 20)
+    with pymc.Model() as model:
+        a = pymc.Flat("a")
+        b = pymc.Flat("b")
+        pymc.Normal("y", a + b, 1, observed=y)
+    with pytest.raises(ValueError):
+        laplace_sampler(model, random_seed=0)
+
+def test_laplace3():
+    # a standard deviation, sampled on the log scale: the draws should be
+    # centered on the mode of the log density of log(s), with the Jacobian
+    y = np.random.default_rng(0).normal(0, 2, 5)
+    with pymc.Model() as model:
+        s = pymc.HalfNormal("s", 5)
+        pymc.Normal("y", 0, s, observed=y)
+    draws = laplace_sampler(model, random_seed=0)(20000)["s"].values.ravel()
+
+    def neg_logp(u):
+        # HalfNormal(5) prior, Jacobian of s = exp(u) and normal likelihood
+        return np.exp(2 * u) / (2 * 5 ** 2) - u + len(y) * u + np.sum(y ** 2) / (2 * np.exp(2 * u))
+    mode = minimize_scalar(neg_logp).x
+    assert np.isclose(np.log(draws).mean(), mode, atol=0.01), \
+        "LAPLACE-003: the draws should be centered on the mode of the unconstrained log density"
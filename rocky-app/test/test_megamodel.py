@@ -0,0 +1,68 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pymc = pytest.importorskip("pymc")
+
+sys.path.append("../src/rocky")
+sys.path.append("../..")
+
+from triangle import Triangle
+from megamodel import MegaData, MegaModel, TRIANGLE_TYPES
+
+
+@pytest.fixture
+def mega_data():
+    n = 5
+    rng = np.random.default_rng(42)
+    dev = np.arange(n)
+    pattern = 1 - np.exp(-0.5 * (dev + 1))
+    rpt_count = rng.poisson(1000, n)[:, None] * pattern
+    rpt_loss = rpt_count * 5000 * np.exp(0.02 * rng.standard_normal((n, n)))
+
+    observed = dev[None, :] <= (n - 1 - dev)[:, None]
+    index = pd.Index(pd.date_range("2000-01-01", periods=n, freq="YS"), name="accident_period")
+    columns = pd.Index(12 * (dev + 1), name="development_period")
+
+    def tri(values, id):
+        df = pd.DataFrame(np.where(observed, values, np.nan), index=index, columns=columns)
+        return Triangle.from_dataframe(df=df, id=id)
+
+    return MegaData(rpt_loss_tri=tri(rpt_loss, "rpt_loss"),
+                    paid_loss_tri=tri(rpt_loss * pattern, "paid_loss"),
+                    rpt_count_tri=tri(rpt_count, "rpt_count"),
+                    paid_count_tri=tri(rpt_count * pattern, "paid_count"))
+
+def test_build1(mega_data):
+    mm = MegaModel(mega_data)
+    model = mm.chain_ladder_model()
+    assert model["beta"].eval().shape == (len(TRIANGLE_TYPES), 5), \
+        "MEGA-001: beta should have one row per triangle type and one column per development period"
+    assert model["sigma"].eval().shape == (len(TRIANGLE_TYPES), 5), \
+        "MEGA-002: sigma should have one row per triangle type and one column per development period"
+
+def test_gradient1(mega_data):
+    mm = MegaModel(mega_data)
+    dlogp = mm.compile()["dlogp"](mm.model.initial_point())
+    assert np.isfinite(dlogp).all(), "MEGA-003: the gradient at the initial point should be finite"
+    assert (dlogp != 0).all(), "MEGA-004: every parameter should be in the gradient"
+
+def test_trace_store1(mega_data, tmp_path):
+    fit = dict(method="advi", samples=2000, n_iter=2000, random_seed=0, chunk_size=500)
+    mm = MegaModel(mega_data)
+    mm.fit(**fit)
+    expected = mm.reserve_quantiles()
+    draws = mm.ultimate_samples() - mm.paid_loss_tri.diag().values
+    std = np.append(draws.std(axis=0), draws.sum(axis=1).std())
+
+    store = mm.fit(trace_path=str(tmp_path / "trace"), **fit)
+    assert mm.trace is None and len(store.files()) == 4, \
+        "MEGA-005: the draws should be written to the store a chunk at a time"
+    streamed = mm.reserve_quantiles()
+    assert np.allclose(streamed["mean"], expected["mean"], rtol=1e-8), \
+        "MEGA-006: the streamed fit should have the same draws as the in-memory fit"
+    assert (np.abs(streamed.drop(columns="mean") - expected.drop(columns="mean")).to_numpy()
+            <= 0.05 * std[:, None]).all(), \
+        "MEGA-007: the streamed reserve quantiles should match the in-memory fit"
@@ -0,0 +1,133 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append("../src/rocky")
+sys.path.append("../..")
+
+from triangle import Triangle
+from paidincurredchain import PaidIncurredChain, BatchedPaidIncurredChain
+
+
+@pytest.fixture
+def dahms():
+    rpt, paid = Triangle.from_dahms()
+    return paid, rpt
+
+@pytest.fixture
+def pic(dahms):
+    paid, incurred = dahms
+    return PaidIncurredChain(paid, incurred)
+
+def loop_aI_matrix(pic):
+    """
+    The a^I matrix of Theorem 3.3, one element at a time.
+    """
+    v2 = pic.v2()
+    n_obs = pic.n_observations("incurred")
+    J = pic.J
+    a = np.zeros((J, J))
+    for n in range(J):
+        for m in range(J):
+            a[n, m] = np.sum(1 / v2[:min(n, m) + 1])
+            if (n == J - 1) != (m == J - 1):
+                a[n, m] = -a[n, m]
+            if n == m:
+                if n < J - 1:
+                    a[n, m] += 1 / pic.prior_t2[n] + n_obs[n] / pic.tau2[n]
+                else:
+                    a[n, m] += 1 / np.sum(pic.prior_s2)
+    return a
+
+def loop_posterior_precision(pic):
+    """
+    The A matrix of Theorem 3.5, one element at a time: the diagonal
+    incurred-paid ratio of development period k loads on phi_n for n > k
+    and on psi_n for n >= k (with the opposite sign).
+    """
+    v2, w2 = pic.v2(), pic.w2()
+    n_paid = pic.n_observations("paid")
+    n_incurred = pic.n_observations("incurred")
+    J = pic.J
+    A = np.zeros((2 * J - 1, 2 * J - 1))
+    for n in range(2 * J - 1):
+        for m in range(2 * J - 1):
+            total = 0.0
+            for k in range(J - 1):
+                sn = (1 if n > k else 0) if n < J else (-1 if n - J >= k else 0)
+                sm = (1 if m > k else 0) if m < J else (-1 if m - J >= k else 0)
+                total += sn * sm / (v2[k] - w2[k])
+            if n == m:
+                if n < J:
+                    total += 1 / pic.prior_s2[n] + n_paid[n] / pic.sigma2[n]
+                else:
+                    total += 1 / pic.prior_t2[n - J] + n_incurred[n - J] / pic.tau2[n - J]
+            A[n, m] = total
+    return A
+
+def test_aI1(pic):
+    assert np.allclose(pic.aI_matrix(), loop_aI_matrix(pic), rtol=1e-12), \
+        "PIC-001: the vectorized a^I matrix should match the element-wise build"
+
+def test_A1(pic):
+    assert np.allclose(pic.posterior_precision(), loop_posterior_precision(pic), rtol=1e-12), \
+        "PIC-002: the vectorized A matrix should match the element-wise build"
+
+@pytest.mark.parametrize("prior", [False, True])
+def test_gradient1(pic, prior):
+    params = {"phi": pic.phi, "psi": pic.psi, "sigma2": pic.sigma2, "tau2": pic.tau2}
+    grad = pic.log_likelihood_gradient(prior=prior, **params)
+    for name, value in params.items():
+        numeric = np.empty_like(value)
+        for j in range(len(value)):
+            h = 1e-6 * max(abs(value[j]), 1e-3)
+            up, down = value.copy(), value.copy()
+            up[j] += h
+            down[j] -= h
+            numeric[j] = (pic.log_likelihood(prior=prior, **{**params, name: up})
+                          - pic.log_likelihood(prior=prior, **{**params, name: down})) / (2 * h)
+        assert np.allclose(grad[name], numeric, rtol=1e-5, atol=1e-4), \
+            f"PIC-003: the gradient with respect to {name} should match finite differences"
+
+def test_batched1(dahms):
+    paid, incurred = dahms
+    rng = np.random.default_rng(0)
+    pairs = []
+    for _ in range(3):
+        noise = np.exp(0.02 * rng.standard_normal(paid.tri.shape))
+        pairs.append((paid.tri * noise, incurred.tri * noise))
+
+    batched = BatchedPaidIncurredChain([p for p, _ in pairs], [i for _, i in pairs])
+    ultimates = batched.Fit()
+    for k, (p, i) in enumerate(pairs):
+        single = PaidIncurredChain(p, i)
+        expected = single.Fit()
+        assert np.allclose(ultimates.loc[k].to_numpy(), expected.to_numpy(), rtol=1e-8), \
+            "PIC-004: each pair of the batched fit should match fitting it on its own"
+        assert np.isclose(batched.prediction_error[k], single.prediction_error, rtol=1e-8), \
+            "PIC-005: the total prediction error of each pair should match fitting it on its own"
+
+def test_bayesian1(dahms):
+    paid, incurred = dahms
+
+    def fit():
+        pic = PaidIncurredChain(paid, incurred, bayesian=True)
+        return pic, pic.Fit(n_samples=200, n_chains=2, burn_in=200, random_state=42)
+
+    pic, ultimates = fit()
+    _, again = fit()
+    pd.testing.assert_frame_equal(ultimates, again, obj="PIC-006: the same seed should give the same fit")
+    assert np.isfinite(pic.reserve_samples.to_numpy()).all(), "PIC-007: every reserve draw should be finite"
+    assert ultimates["Reserve"].sum() > 0, "PIC-008: the total reserve should be positive"
+    assert ((pic.acceptance_rate > 0) & (pic.acceptance_rate <= 1)).all(), \
+        "PIC-009: every chain should accept some of its variance proposals"
+
+def test_batched2(dahms):
+    paid, incurred = dahms
+    batched = BatchedPaidIncurredChain([paid], [incurred])
+    with pytest.raises(TypeError):
+        batched.FitParameters()
+    with pytest.raises(TypeError):
+        batched.Sample()
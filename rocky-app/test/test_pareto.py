@@ -0,0 +1,52 @@
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append("../src")
+
+from rocky.model_selection.pareto import pareto_ranks, pareto_front
+
+
+def brute_force_ranks(F):
+    # peel off the non-dominated points one front at a time
+    F = np.asarray(F, dtype=float)
+    ranks = np.zeros(len(F), dtype=int)
+    remaining = np.arange(len(F))
+    rank = 1
+    while len(remaining) > 0:
+        G = F[remaining]
+        dominated = np.array([
+            ((G <= g).all(axis=1) & (G < g).any(axis=1)).any() for g in G
+        ])
+        ranks[remaining[~dominated]] = rank
+        remaining = remaining[dominated]
+        rank += 1
+    return ranks
+
+@pytest.mark.parametrize("n_objectives", [1, 2, 3, 4])
+def test_pareto1(n_objectives):
+    rng = np.random.default_rng(n_objectives)
+    # rounded values so there are ties and duplicates
+    F = rng.normal(size=(300, n_objectives)).round(1)
+    assert np.array_equal(pareto_ranks(F), brute_force_ranks(F)), \
+        f"PARETO-001: ranks differ from brute force with {n_objectives} objectives"
+
+def test_pareto2():
+    rng = np.random.default_rng(0)
+    F = rng.normal(size=(200, 3))
+    directions = ["min", "max", "min"]
+    flipped = F * np.array([1, -1, 1])
+    assert np.array_equal(pareto_ranks(F, directions), brute_force_ranks(flipped)), \
+        "PARETO-002: mixed min/max directions not handled"
+
+def test_pareto3():
+    F = np.array([[1, 2], [2, 1], [2, 2], [1, 2], [3, 3]])
+    assert pareto_front(F).tolist() == [True, True, False, True, False], \
+        "PARETO-003: wrong pareto front for small example"
+    assert pareto_ranks(F).tolist() == [1, 1, 2, 1, 3], \
+        "PARETO-004: wrong pareto ranks for small example"
+
+def test_pareto4():
+    with pytest.raises(ValueError):
+        pareto_ranks(np.ones((3, 2)), ["min", "up"])
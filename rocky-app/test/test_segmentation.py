@@ -0,0 +1,53 @@
+import sys
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+sys.path.append("../src")
+
+from rocky.model_selection.segmentation import segment_variance
+
+
+@pytest.fixture
+def residuals():
+    # three contiguous variance regimes over 9 development periods
+    rng = np.random.default_rng(0)
+    dev = np.repeat(np.arange(1, 10), 12)
+    sd = np.select([dev <= 3, dev <= 6], [1.0, 0.2], 3.0)
+    return dev, rng.normal(scale=sd)
+
+def brute_force(dev, resid, k, min_df=2):
+    # cost of every contiguous partition into k groups
+    levels = np.unique(dev)
+    best = np.inf
+    for cuts in combinations(range(1, len(levels)), k - 1):
+        bounds = [0, *cuts, len(levels)]
+        cost = 0
+        for i, j in zip(bounds[:-1], bounds[1:]):
+            r = [resid[dev == d] - resid[dev == d].mean() for d in levels[i:j]]
+            df = sum(len(x) - 1 for x in r)
+            ss = sum((x ** 2).sum() for x in r)
+            cost += df * np.log(ss / df) if df >= min_df and ss > 0 else np.inf
+        best = min(best, cost)
+    return best
+
+def test_segmentation1(residuals):
+    dev, resid = residuals
+    seg = segment_variance(dev, resid)
+    const = (len(resid) - 9) * (np.log(2 * np.pi) + 1)
+    for k in [1, 2, 3, 4]:
+        assert np.isclose(seg.scores.loc[k, 'neg2_loglik'] - const,
+                          brute_force(dev, resid, k)), \
+            "SEG-001: dynamic programming differs from the brute-force optimum"
+
+def test_segmentation2(residuals):
+    dev, resid = residuals
+    seg = segment_variance(dev, resid)
+    assert seg.best_k == 3, "SEG-002: BIC should recover the three regimes"
+    assert seg.Groups().tolist() == [1, 1, 1, 2, 2, 2, 3, 3, 3], \
+        "SEG-003: groups should match the variance regimes"
+    assert seg.Map([0, 5, 12]).tolist() == [1, 2, 3], \
+        "SEG-004: unseen development periods should map to the nearest earlier group"
+    assert np.all(np.diff(seg.groups.to_numpy(), axis=0) >= 0), \
+        "SEG-005: groups should be contiguous"
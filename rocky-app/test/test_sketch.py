@@ -0,0 +1,50 @@
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append("../src")
+
+from rocky.model_selection.sketch import RunningMoments, TDigest, DistributionSketch
+
+
+@pytest.fixture
+def lognormal():
+    return np.random.default_rng(0).lognormal(0, 1, 50000)
+
+def test_moments1(lognormal):
+    x = lognormal.reshape(-1, 2)
+    moments = RunningMoments()
+    for chunk in np.array_split(x, 7):
+        moments.Merge(RunningMoments().Update(chunk))
+    assert moments.count == len(x), "SKETCH-001: count should add up"
+    assert np.allclose(moments.mean, x.mean(axis=0)), \
+        "SKETCH-002: merged mean should be exact"
+    assert np.allclose(moments.Variance(), x.var(axis=0, ddof=1)), \
+        "SKETCH-003: merged variance should be exact"
+
+def test_tdigest1(lognormal):
+    digest = TDigest()
+    for chunk in np.array_split(lognormal, 50):
+        digest.Merge(TDigest().Update(chunk))
+    assert len(digest.means) <= digest.compression / 2 + 1, \
+        "SKETCH-004: the number of centroids should be bounded"
+    q = np.array([0.5, 0.9, 0.99, 0.995])
+    assert np.allclose(digest.Quantile(q), np.quantile(lognormal, q), rtol=0.01), \
+        "SKETCH-005: quantiles should be accurate"
+    for p in q:
+        tail = lognormal[lognormal >= np.quantile(lognormal, p)].mean()
+        assert np.isclose(digest.TailMean(p), tail, rtol=0.01), \
+            "SKETCH-006: tail means should be accurate"
+    assert np.isclose(digest.TailMean(0), lognormal.mean()), \
+        "SKETCH-007: the tail mean above 0 is the mean"
+
+def test_sketch1(lognormal):
+    x = lognormal.reshape(-1, 2)
+    sketch = DistributionSketch(["a", "b"]).Update(x)
+    summary = sketch.Summary([0.5, 0.95])
+    assert summary.index.tolist() == ["a", "b"], "SKETCH-008: one row per column"
+    assert np.allclose(summary[0.95], np.quantile(x, 0.95, axis=0), rtol=0.01), \
+        "SKETCH-009: column quantiles should be accurate"
+    with pytest.raises(ValueError):
+        sketch.Merge(DistributionSketch(["a"]))